@@ -0,0 +1,220 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import gc
+import sys
+import tracemalloc
+
+from pinject import bindings
+from pinject import decorators
+from pinject import object_graph
+from pinject import scoping
+
+
+_DEFAULT_NUM_PROVIDES = 200
+
+
+class Leaf(object):
+    def __init__(self):
+        pass
+
+
+class OtherLeaf(object):
+    def __init__(self):
+        pass
+
+
+class ChainRoot(object):
+    def __init__(self, chain_one):
+        pass
+
+
+class ChainOne(object):
+    def __init__(self, chain_two):
+        pass
+
+
+class ChainTwo(object):
+    def __init__(self, chain_three):
+        pass
+
+
+class ChainThree(object):
+    def __init__(self, leaf):
+        pass
+
+
+class FanOutRoot(object):
+    def __init__(self, leaf, other_leaf, chain_three, left, right):
+        pass
+
+
+class DiamondRoot(object):
+    def __init__(self, left, right):
+        pass
+
+
+class Left(object):
+    def __init__(self, leaf):
+        pass
+
+
+class Right(object):
+    def __init__(self, leaf):
+        pass
+
+
+class ProviderRoot(object):
+    def __init__(self, provide_leaf, provide_chain_three):
+        provide_leaf()
+        provide_chain_three()
+
+
+class AnnotatedRoot(object):
+    @decorators.annotate_arg('leaf', 'first')
+    @decorators.annotate_arg('other_leaf', 'second')
+    def __init__(self, leaf, other_leaf):
+        pass
+
+
+_NON_ROOT_CLASSES = [Leaf, OtherLeaf, ChainOne, ChainTwo, ChainThree, Left,
+                     Right]
+
+
+class _ShapesBindingSpec(bindings.BindingSpec):
+    """Binds every non-root class, plus the annotated args, in one scope.
+
+    In prototype scope, each provide() goes through every binding of its
+    graph, rather than returning singletons cached by the previous provide().
+    """
+
+    def __init__(self, in_scope):
+        self._in_scope = in_scope
+
+    def configure(self, bind):
+        for cls, arg_name in [
+                (Leaf, 'leaf'), (OtherLeaf, 'other_leaf'),
+                (ChainOne, 'chain_one'), (ChainTwo, 'chain_two'),
+                (ChainThree, 'chain_three'), (Left, 'left'),
+                (Right, 'right')]:
+            bind(arg_name, to_class=cls, in_scope=self._in_scope)
+        bind('leaf', annotated_with='first', to_class=Leaf,
+             in_scope=self._in_scope)
+        bind('other_leaf', annotated_with='second', to_class=OtherLeaf,
+             in_scope=self._in_scope)
+
+
+# Maps the name of each canonical graph shape to the class to provide.
+GRAPH_SHAPE_TO_ROOT_CLASS = {
+    'chain': ChainRoot,
+    'fan_out': FanOutRoot,
+    'diamond': DiamondRoot,
+    'provider_indirection': ProviderRoot,
+    'annotated_args': AnnotatedRoot,
+}
+
+
+def new_shapes_object_graph(in_prototype_scope):
+    """Creates an object graph for all the canonical graph shapes.
+
+    Args:
+      in_prototype_scope: whether to bind every non-root class in prototype
+          scope, rather than in the default singleton scope
+    Returns:
+      an ObjectGraph
+    """
+    if in_prototype_scope:
+        in_scope = scoping.PROTOTYPE
+    else:
+        in_scope = scoping.SINGLETON
+    return object_graph.new_object_graph(
+        modules=None, classes=_NON_ROOT_CLASSES,
+        binding_specs=[_ShapesBindingSpec(in_scope)])
+
+
+def measure_allocations(obj_graph, root_class,
+                        num_provides=_DEFAULT_NUM_PROVIDES):
+    """Measures the memory allocated by providing a class.
+
+    Args:
+      obj_graph: an ObjectGraph
+      root_class: the class to provide
+      num_provides: the number of provisions to measure
+    Returns:
+      a map from measurement name to value: peak_bytes_per_provide is the
+          most memory allocated at once during a provide(), beyond what was
+          allocated before, and leaked_blocks_per_provide is the number of
+          memory blocks still allocated after a provide() whose result is
+          dropped
+    """
+    # Caches filled by the first provide() aren't per-provide costs.
+    obj_graph.provide(root_class)
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        peak_bytes = []
+        for _ in range(num_provides):
+            tracemalloc.reset_peak()
+            start_bytes, _ = tracemalloc.get_traced_memory()
+            obj_graph.provide(root_class)
+            _, end_peak_bytes = tracemalloc.get_traced_memory()
+            peak_bytes.append(end_peak_bytes - start_bytes)
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    gc.collect()
+    start_blocks = sys.getallocatedblocks()
+    for _ in range(num_provides):
+        obj_graph.provide(root_class)
+    gc.collect()
+    leaked_blocks = sys.getallocatedblocks() - start_blocks
+    # The minimum is the least disturbed by, e.g., dict resizes elsewhere.
+    return {'peak_bytes_per_provide': min(peak_bytes),
+            'leaked_blocks_per_provide': (
+                max(leaked_blocks, 0) / float(num_provides))}
+
+
+def measure_all_shapes(num_provides=_DEFAULT_NUM_PROVIDES):
+    """Measures allocations for each canonical graph shape and scope.
+
+    Args:
+      num_provides: the number of provisions to measure per shape
+    Returns:
+      a map from '<shape>.<scope>' (where scope is prototype or singleton)
+          to the measurements returned by measure_allocations()
+    """
+    measurements = {}
+    for scope_name, in_prototype_scope in [('prototype', True),
+                                           ('singleton', False)]:
+        obj_graph = new_shapes_object_graph(in_prototype_scope)
+        for shape, root_class in GRAPH_SHAPE_TO_ROOT_CLASS.items():
+            measurements['{0}.{1}'.format(shape, scope_name)] = (
+                measure_allocations(obj_graph, root_class, num_provides))
+    return measurements
+
+
+def main(argv):
+    num_provides = int(argv[1]) if len(argv) > 1 else _DEFAULT_NUM_PROVIDES
+    for name, measurement in sorted(measure_all_shapes(num_provides).items()):
+        print('{0:>32}: {1:7d} peak bytes, {2:5.2f} leaked blocks'
+              ' per provide'.format(
+                  name, measurement['peak_bytes_per_provide'],
+                  measurement['leaked_blocks_per_provide']))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,73 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import gc
+import sys
+import tracemalloc
+
+from pinject import bindings
+
+
+_DEFAULT_NUM_CLASSES = [1000, 10000, 50000]
+
+
+def _new_classes(num_classes):
+    return [type('SyntheticClass{0}'.format(index), (object,), {})
+            for index in range(num_classes)]
+
+
+def measure_implicit_bindings(num_classes):
+    """Measures the memory retained by implicit bindings for some classes.
+
+    Args:
+      num_classes: the number of classes to create implicit bindings for
+    Returns:
+      a map from measurement name to value
+    """
+    classes = _new_classes(num_classes)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        implicit_bindings = bindings.get_implicit_class_bindings(classes)
+        binding_key_to_binding, collided_binding_key_to_bindings = (
+            bindings.get_overall_binding_key_to_binding_maps(
+                [implicit_bindings, []]))
+        gc.collect()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    retained_bytes = after - before
+    return {
+        'num_classes': num_classes,
+        'num_bindings': len(binding_key_to_binding),
+        'retained_bytes': retained_bytes,
+        'peak_bytes': peak - before,
+        'bytes_per_binding': retained_bytes // max(len(implicit_bindings), 1),
+    }
+
+
+def main(argv):
+    num_classes_list = [int(arg) for arg in argv[1:]] or _DEFAULT_NUM_CLASSES
+    for num_classes in num_classes_list:
+        result = measure_implicit_bindings(num_classes)
+        print('{num_classes:>7} classes: {retained_bytes:>11,} bytes retained,'
+              ' {peak_bytes:>11,} bytes peak, {bytes_per_binding:>5,} bytes'
+              ' per binding'.format(**result))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
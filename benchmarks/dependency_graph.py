@@ -0,0 +1,110 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+
+import gc
+import sys
+import time
+
+from pinject import bindings
+from pinject import dependency_graphs
+
+
+_DEFAULT_NUM_CLASSES = [1000, 10000, 100000]
+# The most that the first, cold build of a graph of this many bindings may
+# take.  It's cold because nothing has analyzed the classes' initializers
+# yet, as in a fresh process in CI, so it's the one that counts.
+_BUDGETED_NUM_CLASSES = 100000
+_COLD_BUILD_BUDGET_SECS = 1.0
+
+
+def _new_classes(num_classes):
+    """Creates classes each injected with up to two earlier ones."""
+    namespace = {}
+    classes = []
+    for index in range(num_classes):
+        if index >= 3:
+            source = ('class Synthetic{0}(object):\n'
+                      '    def __init__(self, synthetic_{1}, synthetic_{2}):\n'
+                      '        pass\n'.format(index, index - 1, index // 2))
+        else:
+            source = 'class Synthetic{0}(object):\n    pass\n'.format(index)
+        exec(source, namespace)
+        classes.append(namespace['Synthetic{0}'.format(index)])
+    return classes
+
+
+def measure_dependency_graph(num_classes, with_gc=False):
+    """Measures computing the dependency graph of implicit class bindings.
+
+    The first (cold) build includes analyzing each initializer's args, which
+    is memoized; the second (warm) one shows the cost of the graph itself.
+    As with timeit, garbage collection is disabled while timing by default,
+    so that full collections of the heap of synthetic classes (which are
+    triggered by whatever happens to allocate when the collector's
+    thresholds are crossed) don't land in the builds' times.
+
+    Args:
+      num_classes: the number of classes to bind implicitly
+      with_gc: whether to time with garbage collection enabled
+    Returns:
+      a map from measurement name to value
+    """
+    binding_key_to_binding, collided_binding_key_to_bindings = (
+        bindings.get_overall_binding_key_to_binding_maps(
+            [bindings.get_implicit_class_bindings(_new_classes(num_classes)),
+             []]))
+    binding_mapping = bindings.BindingMapping(
+        binding_key_to_binding, collided_binding_key_to_bindings)
+    result = {'num_bindings': len(binding_key_to_binding)}
+    was_gc_enabled = gc.isenabled()
+    if not with_gc:
+        gc.disable()
+    try:
+        for name in ['cold_build_secs', 'warm_build_secs']:
+            start_secs = time.perf_counter()
+            graph = dependency_graphs.new_dependency_graph(binding_mapping)
+            result[name] = time.perf_counter() - start_secs
+        start_secs = time.perf_counter()
+        graph.get_max_depth()
+        result['depth_secs'] = time.perf_counter() - start_secs
+    finally:
+        if was_gc_enabled:
+            gc.enable()
+    result['num_edges'] = graph.get_num_edges()
+    return result
+
+
+def main(argv):
+    with_gc = '--with-gc' in argv[1:]
+    num_classes_list = [int(arg) for arg in argv[1:]
+                        if arg != '--with-gc'] or _DEFAULT_NUM_CLASSES
+    status = 0
+    for num_classes in num_classes_list:
+        result = measure_dependency_graph(num_classes, with_gc)
+        print('{num_bindings:>7} bindings, {num_edges:>7} edges:'
+              ' {cold_build_secs:6.3f}s cold build, {warm_build_secs:6.3f}s'
+              ' warm build, {depth_secs:6.3f}s depths'.format(**result))
+        if (not with_gc and num_classes == _BUDGETED_NUM_CLASSES and
+                result['cold_build_secs'] > _COLD_BUILD_BUDGET_SECS):
+            print('the cold build of {0} bindings took over {1}s'.format(
+                num_classes, _COLD_BUILD_BUDGET_SECS))
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
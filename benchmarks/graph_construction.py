@@ -0,0 +1,113 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import sys
+import time
+import types
+
+from pinject import decorators
+from pinject import object_graph
+
+
+_DEFAULT_NUM_CLASSES = [1000, 10000, 100000]
+_CLASSES_PER_MODULE = 100
+
+
+def new_module_tree(num_classes, only_use_explicit_bindings=False,
+                    classes_per_module=_CLASSES_PER_MODULE):
+    """Creates modules of classes, each injected with up to two earlier ones.
+
+    Class N is injected with classes N/2 and N/2 - 1, so that dependencies
+    are shared and nest logarithmically deep, as in typical applications.
+    The modules aren't imported (i.e., added to sys.modules), so that they
+    don't slow down other object graphs scanning all imported modules.
+
+    Args:
+      num_classes: the total number of classes
+      only_use_explicit_bindings: whether to mark each initializer with
+          @inject(), as needed with only_use_explicit_bindings=True
+      classes_per_module: the number of classes in each module
+    Returns:
+      a list of modules
+    """
+    if only_use_explicit_bindings:
+        decorator_source = '    @inject()\n'
+    else:
+        decorator_source = ''
+    modules = []
+    for index in range(num_classes):
+        if index % classes_per_module == 0:
+            module = types.ModuleType(
+                'synthetic_module_{0}'.format(len(modules)))
+            module.inject = decorators.inject
+            modules.append(module)
+        if index >= 3:
+            args_source = ', synthetic_{0}, synthetic_{1}'.format(
+                index // 2, index // 2 - 1)
+        else:
+            args_source = ''
+        exec('class Synthetic{0}(object):\n{1}'
+             '    def __init__(self{2}):\n'
+             '        pass\n'.format(index, decorator_source, args_source),
+             module.__dict__)
+        getattr(module, 'Synthetic{0}'.format(index)).__module__ = (
+            module.__name__)
+    return modules
+
+
+def measure_new_object_graph(num_classes, only_use_explicit_bindings=False):
+    """Measures creating an object graph from a tree of modules.
+
+    Creating the classes isn't measured.
+
+    Args:
+      num_classes: the total number of classes in the modules
+      only_use_explicit_bindings: the arg to new_object_graph()
+    Returns:
+      a map from measurement name to value
+    """
+    modules = new_module_tree(num_classes, only_use_explicit_bindings)
+    last_class = getattr(modules[-1], 'Synthetic{0}'.format(num_classes - 1))
+    start_secs = time.perf_counter()
+    obj_graph = object_graph.new_object_graph(
+        modules=modules,
+        only_use_explicit_bindings=only_use_explicit_bindings)
+    new_object_graph_secs = time.perf_counter() - start_secs
+    # The last class depends, transitively, on a few classes per level of
+    # nesting.
+    start_secs = time.perf_counter()
+    obj_graph.provide(last_class)
+    first_provide_secs = time.perf_counter() - start_secs
+    return {'num_classes': num_classes, 'num_modules': len(modules),
+            'new_object_graph_secs': new_object_graph_secs,
+            'first_provide_secs': first_provide_secs}
+
+
+def main(argv):
+    num_classes_list = [int(arg) for arg in argv[1:]] or _DEFAULT_NUM_CLASSES
+    for num_classes in num_classes_list:
+        for only_use_explicit_bindings in [False, True]:
+            print('{0:>7} classes, {1:>8}: {new_object_graph_secs:6.3f}s'
+                  ' new_object_graph(), {first_provide_secs:6.3f}s first'
+                  ' provide()'.format(
+                      num_classes,
+                      'explicit' if only_use_explicit_bindings else 'implicit',
+                      **measure_new_object_graph(
+                          num_classes, only_use_explicit_bindings)))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
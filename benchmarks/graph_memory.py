@@ -0,0 +1,208 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import gc
+import json
+import os
+import subprocess
+import sys
+import tracemalloc
+
+from benchmarks import graph_construction
+from pinject import finding
+from pinject import object_graph
+
+
+_DEFAULT_NUM_CLASSES = [1000, 10000, 100000]
+# How to tell new_object_graph() which classes to bind.
+DISCOVERY_MODES = ['all_imported_modules', 'explicit_modules',
+                   'only_use_explicit_bindings']
+_PINJECT_DIR = os.path.dirname(os.path.abspath(object_graph.__file__))
+_REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _get_rss_bytes():
+    """Returns the resident set size of this process, or None if unknown."""
+    try:
+        with open('/proc/self/statm') as statm_file:
+            resident_pages = int(statm_file.read().split()[1])
+    except (IOError, OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE')
+
+
+def _get_rss_delta(before_rss_bytes):
+    if before_rss_bytes is None:
+        return None
+    return _get_rss_bytes() - before_rss_bytes
+
+
+def _new_graph(modules, mode):
+    if mode == 'all_imported_modules':
+        return object_graph.new_object_graph(
+            modules=finding.ALL_IMPORTED_MODULES, collect_startup_report=True)
+    return object_graph.new_object_graph(
+        modules=modules,
+        only_use_explicit_bindings=(mode == 'only_use_explicit_bindings'),
+        collect_startup_report=True)
+
+
+def _provide_all(obj_graph, modules):
+    # Providing every class constructs every class injected into another
+    # one, as a singleton.
+    for module in modules:
+        for name, cls in vars(module).items():
+            if name.startswith('Synthetic'):
+                obj_graph.provide(cls)
+
+
+def _get_pinject_file_to_size_diff(after_snapshot, before_snapshot):
+    file_to_size_diff = {}
+    for stat in after_snapshot.compare_to(before_snapshot, 'filename'):
+        filename = stat.traceback[0].filename
+        if filename.startswith(_PINJECT_DIR) and stat.size_diff:
+            file_to_size_diff[os.path.basename(filename)] = stat.size_diff
+    return file_to_size_diff
+
+
+def _take_snapshot():
+    gc.collect()
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__)])
+
+
+def measure_graph_memory(num_classes, mode):
+    """Measures the memory that an object graph and its singletons retain.
+
+    RSS deltas are only meaningful in a process that hasn't already freed
+    lots of memory (which the interpreter reuses without growing RSS), so
+    measure_graph_memory_in_subprocess() is preferable.
+
+    Args:
+      num_classes: the number of synthetic classes to bind
+      mode: one of DISCOVERY_MODES
+    Returns:
+      a map from measurement name to value: graph_* is for creating the
+          object graph (bindings, collided bindings, binding keys, provider
+          closures, and so on), singletons_* is for then providing every
+          class, which fills the singleton scope, *_retained_bytes is what
+          tracemalloc sees as still allocated, *_retained_bytes_by_file
+          breaks that down by the pinject file that allocated it,
+          *_rss_delta_bytes is the growth of the resident set size (measured
+          in a separate run without tracemalloc, whose bookkeeping would
+          inflate it), and *_per_binding and *_per_class divide by the
+          number of bindings or classes
+    """
+    if mode not in DISCOVERY_MODES:
+        raise ValueError('unknown mode {0!r}'.format(mode))
+    modules = graph_construction.new_module_tree(
+        num_classes,
+        only_use_explicit_bindings=(mode == 'only_use_explicit_bindings'))
+    if mode == 'all_imported_modules':
+        for module in modules:
+            sys.modules[module.__name__] = module
+    try:
+        gc.collect()
+        before_rss_bytes = _get_rss_bytes()
+        obj_graph = _new_graph(modules, mode)
+        graph_rss_delta_bytes = _get_rss_delta(before_rss_bytes)
+        before_rss_bytes = _get_rss_bytes()
+        _provide_all(obj_graph, modules)
+        singletons_rss_delta_bytes = _get_rss_delta(before_rss_bytes)
+        startup_report = obj_graph.get_startup_report()
+        del obj_graph
+
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        try:
+            before_snapshot = _take_snapshot()
+            obj_graph = _new_graph(modules, mode)
+            graph_snapshot = _take_snapshot()
+            _provide_all(obj_graph, modules)
+            singletons_snapshot = _take_snapshot()
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+    finally:
+        if mode == 'all_imported_modules':
+            for module in modules:
+                del sys.modules[module.__name__]
+    graph_retained_bytes = sum(
+        stat.size_diff
+        for stat in graph_snapshot.compare_to(before_snapshot, 'filename'))
+    singletons_retained_bytes = sum(
+        stat.size_diff
+        for stat in singletons_snapshot.compare_to(graph_snapshot, 'filename'))
+    num_bindings = max(startup_report.num_bindings, 1)
+    return {
+        'num_classes': num_classes,
+        'num_found_classes': startup_report.num_classes,
+        'num_bindings': startup_report.num_bindings,
+        'num_collided_binding_keys': startup_report.num_collided_binding_keys,
+        'graph_retained_bytes': graph_retained_bytes,
+        'graph_retained_bytes_per_binding': (
+            graph_retained_bytes / float(num_bindings)),
+        'graph_retained_bytes_by_file': _get_pinject_file_to_size_diff(
+            graph_snapshot, before_snapshot),
+        'graph_rss_delta_bytes': graph_rss_delta_bytes,
+        'singletons_retained_bytes': singletons_retained_bytes,
+        'singletons_retained_bytes_per_class': (
+            singletons_retained_bytes / float(num_classes)),
+        'singletons_retained_bytes_by_file': _get_pinject_file_to_size_diff(
+            singletons_snapshot, graph_snapshot),
+        'singletons_rss_delta_bytes': singletons_rss_delta_bytes,
+    }
+
+
+def measure_graph_memory_in_subprocess(num_classes, mode):
+    """Runs measure_graph_memory() in a fresh interpreter."""
+    output = subprocess.check_output(
+        [sys.executable, '-m', 'benchmarks.graph_memory', '--json',
+         str(num_classes), mode],
+        cwd=_REPO_DIR)
+    return json.loads(output.decode('utf-8'))
+
+
+def measure_all(num_classes_list=tuple(_DEFAULT_NUM_CLASSES)):
+    """Measures each discovery mode at each number of classes.
+
+    Returns:
+      a map from '<mode>.<num classes>' to the measurements returned by
+          measure_graph_memory()
+    """
+    return {'{0}.{1}'.format(mode, num_classes):
+            measure_graph_memory_in_subprocess(num_classes, mode)
+            for num_classes in num_classes_list
+            for mode in DISCOVERY_MODES}
+
+
+def main(argv):
+    if len(argv) == 4 and argv[1] == '--json':
+        json.dump(measure_graph_memory(int(argv[2]), argv[3]), sys.stdout)
+        return
+    num_classes_list = [int(arg) for arg in argv[1:]] or _DEFAULT_NUM_CLASSES
+    for name, result in sorted(measure_all(num_classes_list).items()):
+        print('{0:>34}: graph {1:>12,} bytes ({2:6.0f} per binding),'
+              ' singletons {3:>12,} bytes ({4:5.0f} per class)'.format(
+                  name, result['graph_retained_bytes'],
+                  result['graph_retained_bytes_per_binding'],
+                  result['singletons_retained_bytes'],
+                  result['singletons_retained_bytes_per_class']))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
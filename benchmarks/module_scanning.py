@@ -0,0 +1,122 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import inspect
+import sys
+import time
+import types
+
+from pinject import finding
+
+
+_DEFAULT_NUM_MODULES = [1000, 10000]
+_MEMBERS_PER_MODULE = 50
+# How many of each module's members are classes.
+_CLASSES_PER_MODULE = 10
+# How many names each lazy module's __dir__() lists but its __dict__ lacks.
+_LAZY_NAMES_PER_MODULE = 10
+
+
+def _find_classes_via_getmembers(module):
+    """Finds classes in a module the way that pinject used to."""
+    return {member for member_name, member in inspect.getmembers(module)
+            if inspect.isclass(member) and member_name != '__class__'}
+
+
+def _new_modules(num_modules):
+    """Creates modules like those of a large application's dependencies.
+
+    Every tenth module is lazy, i.e., it has a module-level __getattr__, as
+    in packages that import their submodules on first access, and it counts
+    the calls to it.
+
+    Returns:
+      a (list of modules, list of lazy modules' __getattr__ call counts)
+          pair
+    """
+    modules = []
+    lazy_getattr_counts = []
+    for module_index in range(num_modules):
+        module = types.ModuleType('synthetic_dependency_{0}'.format(
+            module_index))
+        for index in range(_CLASSES_PER_MODULE):
+            name = 'Synthetic{0}'.format(index)
+            setattr(module, name, type(name, (object,), {}))
+        for index in range(_MEMBERS_PER_MODULE - _CLASSES_PER_MODULE):
+            setattr(module, 'synthetic_{0}'.format(index), index)
+        if module_index % 10 == 0:
+            lazy_names = ['lazy_{0}'.format(index)
+                          for index in range(_LAZY_NAMES_PER_MODULE)]
+            getattr_count = [0]
+            def GetAttr(name, getattr_count=getattr_count):
+                getattr_count[0] += 1
+                return None
+            module.__getattr__ = GetAttr
+            module.__dir__ = (
+                lambda module=module, lazy_names=lazy_names:
+                list(vars(module)) + lazy_names)
+            lazy_getattr_counts.append(getattr_count)
+        modules.append(module)
+    return modules, lazy_getattr_counts
+
+
+def _time_scan(find_classes_fn, modules):
+    start_secs = time.perf_counter()
+    num_classes = sum(len(find_classes_fn(module)) for module in modules)
+    return time.perf_counter() - start_secs, num_classes
+
+
+def measure_module_scanning(num_modules):
+    """Measures finding classes in modules, the old way and the new way.
+
+    Args:
+      num_modules: the number of synthetic modules to scan, on top of the
+          imported modules
+    Returns:
+      a map from measurement name to value: getmembers_* is for scanning
+          with inspect.getmembers(), as pinject used to, vars_* is for
+          scanning the modules' __dict__s, and *_lazy_getattr_calls counts
+          the calls to modules' __getattr__ (which getmembers() makes for
+          names that modules' __dir__ lists)
+    """
+    modules, lazy_getattr_counts = _new_modules(num_modules)
+    modules.extend(module for module in list(sys.modules.values())
+                   if isinstance(module, types.ModuleType))
+    result = {'num_modules': len(modules)}
+    for name, find_classes_fn in [
+            ('getmembers', _find_classes_via_getmembers),
+            ('vars', finding._find_classes_in_module)]:
+        for getattr_count in lazy_getattr_counts:
+            getattr_count[0] = 0
+        (result['{0}_secs'.format(name)],
+         result['{0}_num_classes'.format(name)]) = _time_scan(
+             find_classes_fn, modules)
+        result['{0}_lazy_getattr_calls'.format(name)] = sum(
+            getattr_count[0] for getattr_count in lazy_getattr_counts)
+    return result
+
+
+def main(argv):
+    num_modules_list = [int(arg) for arg in argv[1:]] or _DEFAULT_NUM_MODULES
+    for num_modules in num_modules_list:
+        print('{num_modules:>6} modules: {getmembers_secs:6.3f}s getmembers'
+              ' ({getmembers_lazy_getattr_calls} lazy __getattr__ calls),'
+              ' {vars_secs:6.3f}s vars ({vars_lazy_getattr_calls})'.format(
+                  **measure_module_scanning(num_modules)))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
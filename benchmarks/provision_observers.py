@@ -0,0 +1,97 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+
+import sys
+import timeit
+
+import pinject
+
+
+_DEFAULT_NUM_CALLS = 20000
+
+
+class Leaf(object):
+    pass
+
+
+class Middle(object):
+    def __init__(self, leaf):
+        pass
+
+
+class Root(object):
+    def __init__(self, middle, leaf):
+        pass
+
+
+class _PrototypeBindingSpec(pinject.BindingSpec):
+
+    def configure(self, bind):
+        bind('leaf', to_class=Leaf, in_scope=pinject.PROTOTYPE)
+        bind('middle', to_class=Middle, in_scope=pinject.PROTOTYPE)
+
+
+class _NoOpObserver(pinject.ProvisionObserver):
+    pass
+
+
+def _new_obj_graph():
+    return pinject.new_object_graph(
+        modules=None, classes=[Root], binding_specs=[_PrototypeBindingSpec()])
+
+
+def _best_us_per_call(fn, num_calls):
+    return min(timeit.repeat(fn, number=num_calls, repeat=5)) * 1e6 / num_calls
+
+
+def measure_observer_overhead(num_calls):
+    """Measures providing a small prototype graph with and without observers.
+
+    A graph whose only observer has been removed should cost the same as one
+    that was never observed, since removing the last observer reinstates the
+    uninstrumented code.
+
+    Args:
+      num_calls: the number of provisions per timing run
+    Returns:
+      a map from measurement name to microseconds per provision
+    """
+    never_observed = _new_obj_graph()
+    no_longer_observed = _new_obj_graph()
+    observer = _NoOpObserver()
+    no_longer_observed.add_provision_observer(observer)
+    no_longer_observed.remove_provision_observer(observer)
+    observed = _new_obj_graph()
+    observed.add_provision_observer(_NoOpObserver())
+    return {
+        'never_observed_us': _best_us_per_call(
+            lambda: never_observed.provide(Root), num_calls),
+        'no_longer_observed_us': _best_us_per_call(
+            lambda: no_longer_observed.provide(Root), num_calls),
+        'one_no_op_observer_us': _best_us_per_call(
+            lambda: observed.provide(Root), num_calls),
+    }
+
+
+def main(argv):
+    num_calls = int(argv[1]) if len(argv) > 1 else _DEFAULT_NUM_CALLS
+    for name, us in sorted(measure_observer_overhead(num_calls).items()):
+        print('{0:>24}: {1:7.2f} us per provision'.format(name, us))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,255 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import sys
+import threading
+import time
+import timeit
+
+from pinject import bindings
+from pinject import object_graph
+from pinject import scoping
+
+
+_DEFAULT_SHAPE_SIZE = 1000
+_DEFAULT_NUM_CONTENTION_CALLS = 10000
+
+
+def _new_classes(class_name_prefix, index_to_arg_indices):
+    """Creates classes injected with each other by index.
+
+    Args:
+      class_name_prefix: the prefix of each class name, which is followed by
+          the class's index
+      index_to_arg_indices: a list mapping each class's index to the indices
+          of the classes injected into it
+    Returns:
+      a list of the classes
+    """
+    arg_name_prefix = ''.join(
+        '_' + char.lower() if char.isupper() else char
+        for char in class_name_prefix).lstrip('_')
+    namespace = {}
+    classes = []
+    for index, arg_indices in enumerate(index_to_arg_indices):
+        exec('class {0}{1}(object):\n'
+             '    def __init__(self{2}):\n'
+             '        pass\n'.format(
+                 class_name_prefix, index,
+                 ''.join(', {0}_{1}'.format(arg_name_prefix, arg_index)
+                         for arg_index in arg_indices)),
+             namespace)
+        classes.append(namespace['{0}{1}'.format(class_name_prefix, index)])
+    return classes
+
+
+def new_deep_chain(depth):
+    """Returns classes each injected with the previous one, root last."""
+    return _new_classes('Chain', [[]] + [[index - 1]
+                                         for index in range(1, depth)])
+
+
+def new_wide_fan_out(width):
+    """Returns leaf classes and a root class injected with all of them."""
+    return _new_classes('Fan', [[] for _ in range(width)] +
+                        [list(range(width))])
+
+
+def new_diamonds(num_layers):
+    """Returns classes in layers of two, each injected with both below it.
+
+    In singleton scope, each class is constructed once.  In prototype
+    scope, each class is constructed once per path to it from the root,
+    which is exponential in the number of layers above it.
+    """
+    index_to_arg_indices = [[]]
+    for layer in range(num_layers):
+        below = [0] if layer == 0 else [2 * layer - 1, 2 * layer]
+        index_to_arg_indices.extend([below, below])
+    index_to_arg_indices.append([2 * num_layers - 1, 2 * num_layers])
+    return _new_classes('Diamond', index_to_arg_indices)
+
+
+class _AllInScopeBindingSpec(bindings.BindingSpec):
+
+    def __init__(self, classes, in_scope):
+        self._classes = classes
+        self._in_scope = in_scope
+
+    def configure(self, bind):
+        for cls in self._classes:
+            [arg_name] = bindings.default_get_arg_names_from_class_name(
+                cls.__name__)
+            bind(arg_name, to_class=cls, in_scope=self._in_scope)
+
+
+def _new_obj_graph(classes, in_scope=scoping.SINGLETON):
+    if in_scope is scoping.SINGLETON:
+        return object_graph.new_object_graph(modules=None, classes=classes)
+    return object_graph.new_object_graph(
+        modules=None, classes=classes,
+        binding_specs=[_AllInScopeBindingSpec(classes, in_scope)])
+
+
+def _best_us_per_call(fn, repeat=3):
+    """Times fn, calling it enough times per run to take at least 0.2s."""
+    timer = timeit.Timer(fn)
+    num_calls, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=num_calls)) * 1e6 / (
+        num_calls)
+
+
+def measure_graph_shape(classes):
+    """Measures providing the last of some classes.
+
+    Args:
+      classes: classes injected with each other, the last being the root
+    Returns:
+      a map from measurement name to value
+    """
+    root = classes[-1]
+    def ProvideCold():
+        _new_obj_graph(classes).provide(root)
+    singleton_graph = _new_obj_graph(classes)
+    singleton_graph.provide(root)
+    prototype_graph = _new_obj_graph(classes, scoping.PROTOTYPE)
+    prototype_graph.provide(root)
+    return {
+        'num_classes': len(classes),
+        'cold_singleton_us': _best_us_per_call(ProvideCold),
+        'warm_singleton_us': _best_us_per_call(
+            lambda: singleton_graph.provide(root)),
+        'prototype_us': _best_us_per_call(
+            lambda: prototype_graph.provide(root)),
+    }
+
+
+def measure_singleton_hits_and_prototype_churn():
+    """Measures providing a small graph whose dependencies are cached or not.
+
+    Returns:
+      a map from measurement name to microseconds per provision
+    """
+    classes = _new_classes('Small', [[], [0], [0, 1], [1, 2]])
+    root = classes[-1]
+    singleton_graph = _new_obj_graph(classes[:-1])
+    prototype_graph = _new_obj_graph(classes[:-1], scoping.PROTOTYPE)
+    return {
+        'singleton_hits_us': _best_us_per_call(
+            lambda: singleton_graph.provide(root)),
+        'prototype_churn_us': _best_us_per_call(
+            lambda: prototype_graph.provide(root)),
+    }
+
+
+def measure_provider_fn_loops():
+    """Measures calling an injected provide_ function repeatedly.
+
+    Returns:
+      a map from measurement name to microseconds per call
+    """
+    leaf, middle = _new_classes('Provided', [[], [0]])
+    class Factory(object):
+        def __init__(self, provide_provided_1):
+            self.provide_provided_1 = provide_provided_1
+    result = {}
+    for scope_name, in_scope in [('singleton', scoping.SINGLETON),
+                                 ('prototype', scoping.PROTOTYPE)]:
+        factory = _new_obj_graph([leaf, middle], in_scope).provide(Factory)
+        result['{0}_provide_fn_call_us'.format(scope_name)] = (
+            _best_us_per_call(factory.provide_provided_1))
+    return result
+
+
+def measure_singleton_contention(num_threads, num_calls):
+    """Measures threads providing from the same graph at once.
+
+    Args:
+      num_threads: the number of threads
+      num_calls: the number of provisions per thread
+    Returns:
+      a map from measurement name to value: warm_provides_per_sec is the
+          combined rate of providing a class whose dependencies are already
+          constructed singletons, and cold_secs is how long it takes for
+          all threads to provide the root of a fresh deep chain, whose
+          singletons they all contend to construct
+    """
+    small_classes = _new_classes('Contended', [[], [0], [0, 1], [1, 2]])
+    warm_graph = _new_obj_graph(small_classes[:-1])
+    warm_graph.provide(small_classes[-1])
+    chain = new_deep_chain(200)
+    cold_graph = _new_obj_graph(chain)
+    def Run(obj_graph, cls, num_calls_per_thread):
+        barrier = threading.Barrier(num_threads + 1)
+        def ProvideRepeatedly():
+            barrier.wait()
+            for _ in range(num_calls_per_thread):
+                obj_graph.provide(cls)
+        threads = [threading.Thread(target=ProvideRepeatedly)
+                   for _ in range(num_threads)]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        start_secs = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start_secs
+    warm_secs = Run(warm_graph, small_classes[-1], num_calls)
+    return {
+        'num_threads': num_threads,
+        'warm_provides_per_sec': num_threads * num_calls / warm_secs,
+        'cold_secs': Run(cold_graph, chain[-1], 1),
+    }
+
+
+def measure_all(shape_size=_DEFAULT_SHAPE_SIZE, num_diamond_layers=10,
+                thread_counts=(1, 2, 4, 8),
+                num_contention_calls=_DEFAULT_NUM_CONTENTION_CALLS):
+    """Runs all the provisioning measurements.
+
+    Args:
+      shape_size: the number of classes in the deep chain and in the wide
+          fan-out
+      num_diamond_layers: the number of layers of diamonds
+      thread_counts: the numbers of threads for which to measure contention
+      num_contention_calls: the number of provisions per thread when
+          measuring contention
+    Returns:
+      a map from benchmark name to a map from measurement name to value
+    """
+    results = {
+        'deep_chain': measure_graph_shape(new_deep_chain(shape_size)),
+        'wide_fan_out': measure_graph_shape(new_wide_fan_out(shape_size)),
+        'diamonds': measure_graph_shape(new_diamonds(num_diamond_layers)),
+        'small_graph': measure_singleton_hits_and_prototype_churn(),
+        'provider_fn_loops': measure_provider_fn_loops(),
+    }
+    for num_threads in thread_counts:
+        results['singleton_contention.{0}_threads'.format(num_threads)] = (
+            measure_singleton_contention(num_threads, num_contention_calls))
+    return results
+
+
+def main(argv):
+    shape_size = int(argv[1]) if len(argv) > 1 else _DEFAULT_SHAPE_SIZE
+    for name, measurements in sorted(measure_all(shape_size).items()):
+        print('{0}:'.format(name))
+        for measurement_name, value in sorted(measurements.items()):
+            print('  {0:>32}: {1:12.3f}'.format(measurement_name, value))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
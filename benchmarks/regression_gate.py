@@ -0,0 +1,364 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+from benchmarks import allocations
+from benchmarks import graph_construction
+from pinject import decorators
+from pinject import object_graph
+from pinject import version
+
+
+DEFAULT_BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'baselines',
+    'regression_gate.json')
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_SIGNIFICANCE = 0.01
+_DEFAULT_NUM_SAMPLES = 20
+# Each sample calls the benchmarked function enough times to take at least
+# this long, so that timer resolution doesn't matter.
+_MIN_SAMPLE_SECS = 0.02
+_NUM_BOOTSTRAP_RESAMPLES = 1000
+_NUM_GRAPH_CLASSES = 300
+
+
+def _calibration_workload():
+    # Plain Python work, with no pinject code, whose speed stands in for the
+    # speed of the machine and interpreter.
+    mapping = {}
+    for index in range(200):
+        mapping[str(index)] = [index] * 3
+    return sorted(mapping.items(), key=lambda item: item[1][0], reverse=True)
+
+
+def _get_benchmark_name_to_fn():
+    """Returns the benchmarked functions, each taking no args."""
+    name_to_fn = {}
+    for mode, only_use_explicit_bindings in [('implicit', False),
+                                             ('explicit_only', True)]:
+        modules = graph_construction.new_module_tree(
+            _NUM_GRAPH_CLASSES, only_use_explicit_bindings)
+        name_to_fn['new_object_graph.{0}'.format(mode)] = (
+            lambda modules=modules, explicit=only_use_explicit_bindings:
+            object_graph.new_object_graph(
+                modules=modules, only_use_explicit_bindings=explicit))
+    for scope_name, in_prototype_scope in [('prototype', True),
+                                           ('singleton', False)]:
+        obj_graph = allocations.new_shapes_object_graph(in_prototype_scope)
+        for shape, root_class in sorted(
+                allocations.GRAPH_SHAPE_TO_ROOT_CLASS.items()):
+            name_to_fn['provide.{0}.{1}'.format(shape, scope_name)] = (
+                lambda obj_graph=obj_graph, root_class=root_class:
+                obj_graph.provide(root_class))
+    def Initializer(self, foo, bar):
+        pass
+    def provide_foo(bar):
+        pass
+    name_to_fn.update({
+        'decorate.inject': lambda: decorators.inject()(Initializer),
+        'decorate.inject_with_annotate_arg': lambda: decorators.inject()(
+            decorators.annotate_arg('foo', 'annotation')(Initializer)),
+        'decorate.provides': lambda: decorators.provides(
+            in_scope='a-scope')(provide_foo),
+    })
+    return name_to_fn
+
+
+def _get_num_calls_per_sample(fn):
+    num_calls = 1
+    while True:
+        start_secs = time.perf_counter()
+        for _ in range(num_calls):
+            fn()
+        if time.perf_counter() - start_secs >= _MIN_SAMPLE_SECS:
+            return num_calls
+        num_calls *= 2
+
+
+def _take_sample_us(fn, num_calls):
+    start_secs = time.perf_counter()
+    for _ in range(num_calls):
+        fn()
+    return (time.perf_counter() - start_secs) * 1e6 / num_calls
+
+
+def _take_samples(fn, num_samples):
+    """Samples fn, alternating with samples of the calibration workload.
+
+    Alternating means that both see the same machine speed (e.g., the same
+    CPU frequency and load from other processes).  As with timeit, garbage
+    collection is disabled while sampling, so that collections triggered by
+    earlier benchmarks' garbage don't land in later benchmarks' samples.
+
+    Returns:
+      a pair of lists of microseconds per call, for fn and for the
+          calibration workload
+    """
+    num_calls = _get_num_calls_per_sample(fn)
+    num_calibration_calls = _get_num_calls_per_sample(_calibration_workload)
+    samples_us = []
+    calibration_samples_us = []
+    was_gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(num_samples):
+            samples_us.append(_take_sample_us(fn, num_calls))
+            calibration_samples_us.append(
+                _take_sample_us(_calibration_workload, num_calibration_calls))
+    finally:
+        if was_gc_enabled:
+            gc.enable()
+    return samples_us, calibration_samples_us
+
+
+def run_benchmarks(num_samples=_DEFAULT_NUM_SAMPLES, name_prefixes=None,
+                   log_fn=None):
+    """Samples each gated benchmark.
+
+    Args:
+      num_samples: the number of timed samples per benchmark
+      name_prefixes: the prefixes of the names of the benchmarks to run, or
+          None to run them all
+      log_fn: a function called with a progress message before each
+          benchmark, or None
+    Returns:
+      a JSON-serializable dict of the metadata of the run, the samples, which
+          map each benchmark's name to microseconds per call, and the
+          calibration samples taken alternately with each benchmark's
+    """
+    name_to_samples_us = {}
+    name_to_calibration_samples_us = {}
+    for name, fn in sorted(_get_benchmark_name_to_fn().items()):
+        if name_prefixes is not None and not any(
+                name.startswith(prefix) for prefix in name_prefixes):
+            continue
+        if log_fn is not None:
+            log_fn('sampling {0}'.format(name))
+        name_to_samples_us[name], name_to_calibration_samples_us[name] = (
+            _take_samples(fn, num_samples))
+    return {
+        'metadata': {
+            'pinject_version': version.VERSION,
+            'python_version': platform.python_version(),
+            'python_implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'num_samples': num_samples,
+        },
+        'samples_us': name_to_samples_us,
+        'calibration_samples_us': name_to_calibration_samples_us,
+    }
+
+
+class Comparison(object):
+    """How a benchmark's current run compares with its baseline.
+
+    Times are normalized by the median time of the calibration workload
+    (plain Python code) sampled alongside the benchmark, so that a baseline
+    recorded on one machine is comparable with a run on another.
+
+    Attributes:
+      name: the benchmark's name
+      baseline_median: the baseline's median normalized time
+      current_median: the current run's median normalized time
+      ratio: current_median / baseline_median
+      ratio_low, ratio_high: the bounds of the 95% confidence interval of
+          the ratio, estimated by bootstrapping
+      p_value: the probability of the current run being at least this much
+          slower than the baseline scaled up by the threshold, if it weren't
+          actually slower (by a one-sided Mann-Whitney U test)
+      is_regression: whether the current run is significantly slower than the
+          baseline by more than the threshold
+    """
+
+    def __init__(self, name, baseline_median, current_median, ratio_low,
+                 ratio_high, p_value, is_regression):
+        self.name = name
+        self.baseline_median = baseline_median
+        self.current_median = current_median
+        self.ratio = current_median / baseline_median
+        self.ratio_low = ratio_low
+        self.ratio_high = ratio_high
+        self.p_value = p_value
+        self.is_regression = is_regression
+
+    def format(self):
+        return '{0:<45} {1:6.2f}x  [{2:5.2f}x, {3:5.2f}x]  p={4:.4f}{5}'.format(
+            self.name, self.ratio, self.ratio_low, self.ratio_high,
+            self.p_value, '  REGRESSION' if self.is_regression else '')
+
+
+def _get_mann_whitney_p_value(lower, upper):
+    """Returns the one-sided p-value that upper's values tend to be larger.
+
+    This uses the normal approximation, which is good enough for the 10+
+    samples per benchmark that the gate takes.
+    """
+    values = sorted([(value, False) for value in lower] +
+                    [(value, True) for value in upper])
+    upper_rank_sum = 0.0
+    index = 0
+    while index < len(values):
+        end_index = index
+        while (end_index + 1 < len(values) and
+               values[end_index + 1][0] == values[index][0]):
+            end_index += 1
+        # Tied values share their average rank.
+        average_rank = (index + end_index) / 2.0 + 1
+        upper_rank_sum += average_rank * sum(
+            1 for _, is_upper in values[index:end_index + 1] if is_upper)
+        index = end_index + 1
+    num_lower, num_upper = len(lower), len(upper)
+    u = upper_rank_sum - num_upper * (num_upper + 1) / 2.0
+    mean_u = num_lower * num_upper / 2.0
+    stdev_u = math.sqrt(num_lower * num_upper *
+                        (num_lower + num_upper + 1) / 12.0)
+    return 1.0 - statistics.NormalDist().cdf((u - mean_u) / stdev_u)
+
+
+def _get_ratio_confidence_interval(baseline, current, rng):
+    ratios = sorted(
+        statistics.median(rng.choices(current, k=len(current))) /
+        statistics.median(rng.choices(baseline, k=len(baseline)))
+        for _ in range(_NUM_BOOTSTRAP_RESAMPLES))
+    return (ratios[int(0.025 * len(ratios))],
+            ratios[int(0.975 * len(ratios)) - 1])
+
+
+def _get_normalized_samples(run):
+    name_to_normalized_samples = {}
+    for name, samples_us in run['samples_us'].items():
+        calibration_us = statistics.median(
+            run['calibration_samples_us'][name])
+        name_to_normalized_samples[name] = [
+            sample_us / calibration_us for sample_us in samples_us]
+    return name_to_normalized_samples
+
+
+def compare(baseline_run, current_run, threshold=DEFAULT_THRESHOLD,
+            significance=DEFAULT_SIGNIFICANCE):
+    """Compares a run of the gated benchmarks with a baseline run.
+
+    Args:
+      baseline_run: a run returned by run_benchmarks()
+      current_run: a run returned by run_benchmarks()
+      threshold: the fraction by which a benchmark may get slower, e.g., 0.1
+          allows 10% slower
+      significance: the largest p-value at which a slowdown beyond the
+          threshold counts as a regression
+    Returns:
+      a list of Comparison, sorted by benchmark name, for the benchmarks in
+          both runs
+    """
+    name_to_baseline = _get_normalized_samples(baseline_run)
+    name_to_current = _get_normalized_samples(current_run)
+    # A fixed seed makes the confidence intervals reproducible.
+    rng = random.Random(0)
+    comparisons = []
+    for name in sorted(set(name_to_baseline) & set(name_to_current)):
+        baseline = name_to_baseline[name]
+        current = name_to_current[name]
+        ratio_low, ratio_high = _get_ratio_confidence_interval(
+            baseline, current, rng)
+        p_value = _get_mann_whitney_p_value(
+            [value * (1 + threshold) for value in baseline], current)
+        baseline_median = statistics.median(baseline)
+        current_median = statistics.median(current)
+        is_regression = (
+            current_median > baseline_median * (1 + threshold) and
+            p_value < significance)
+        comparisons.append(Comparison(
+            name, baseline_median, current_median, ratio_low, ratio_high,
+            p_value, is_regression))
+    return comparisons
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.regression_gate',
+        description='Fails if pinject got significantly slower than the'
+                    ' stored baseline.')
+    parser.add_argument(
+        '--baseline', default=DEFAULT_BASELINE_PATH,
+        help='the baseline file (default: %(default)s)')
+    parser.add_argument(
+        '--update-baseline', action='store_true',
+        help='write this run to the baseline file instead of comparing')
+    parser.add_argument(
+        '--current',
+        help='a file of a previous run to compare, instead of running')
+    parser.add_argument(
+        '--output', help='the file to write this run to')
+    parser.add_argument(
+        '--threshold', type=float, default=DEFAULT_THRESHOLD,
+        help='the allowed fractional slowdown (default: %(default)s)')
+    parser.add_argument(
+        '--significance', type=float, default=DEFAULT_SIGNIFICANCE,
+        help='the p-value below which a slowdown counts (default:'
+             ' %(default)s)')
+    parser.add_argument(
+        '--num-samples', type=int, default=_DEFAULT_NUM_SAMPLES,
+        help='the number of samples per benchmark (default: %(default)s)')
+    parser.add_argument(
+        '--benchmark', action='append', dest='name_prefixes',
+        help='a prefix of the names of benchmarks to run (repeatable;'
+             ' default: all)')
+    args = parser.parse_args(argv[1:])
+    if args.current is None:
+        current_run = run_benchmarks(
+            args.num_samples, args.name_prefixes,
+            log_fn=lambda message: print(message, file=sys.stderr))
+    else:
+        with open(args.current) as current_file:
+            current_run = json.load(current_file)
+    output_paths = [args.output] if args.output is not None else []
+    if args.update_baseline:
+        output_paths.append(args.baseline)
+    for output_path in output_paths:
+        with open(output_path, 'w') as output_file:
+            json.dump(current_run, output_file, indent=2, sort_keys=True)
+            output_file.write('\n')
+    if args.update_baseline:
+        print('wrote baseline to {0}'.format(args.baseline))
+        return 0
+    with open(args.baseline) as baseline_file:
+        baseline_run = json.load(baseline_file)
+    comparisons = compare(baseline_run, current_run, args.threshold,
+                          args.significance)
+    for comparison in comparisons:
+        print(comparison.format())
+    regressions = [comparison for comparison in comparisons
+                   if comparison.is_regression]
+    if regressions:
+        print('{0} of {1} benchmarks regressed by more than {2:.0%}'.format(
+            len(regressions), len(comparisons), args.threshold))
+        return 1
+    print('no regressions beyond {0:.0%} in {1} benchmarks'.format(
+        args.threshold, len(comparisons)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
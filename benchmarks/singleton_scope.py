@@ -0,0 +1,87 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import sys
+import timeit
+
+from pinject import binding_keys
+from pinject import scoping
+
+
+_DEFAULT_NUM_CALLS = 1000000
+
+
+class _DictScope(scoping.Scope):
+    """A typical custom scope implementing only provide()."""
+
+    def __init__(self):
+        self._binding_key_to_instance = {}
+
+    def provide(self, binding_key, default_provider_fn):
+        if binding_key not in self._binding_key_to_instance:
+            self._binding_key_to_instance[binding_key] = default_provider_fn()
+        return self._binding_key_to_instance[binding_key]
+
+
+def _provide_instance(injection_context, obj_provider, pargs, kwargs):
+    return object()
+
+
+def _best_ns_per_call(fn, num_calls):
+    return min(timeit.repeat(fn, number=num_calls, repeat=5)) * 1e9 / num_calls
+
+
+def measure_singleton_hits(num_calls):
+    """Measures the latency of providing an already-provided singleton.
+
+    Each measurement passes the same args that ObjectProvider passes, so
+    that the scope protocol's own cost (e.g., closure allocation) counts.
+
+    Args:
+      num_calls: the number of provisions per timing run
+    Returns:
+      a map from measurement name to nanoseconds per provision
+    """
+    binding_key = binding_keys.new('foo')
+    pargs, kwargs = (), {}
+    singleton_scope = scoping.SingletonScope()
+    adapted_scope = scoping.get_slotted_scope(_DictScope())
+    def ProvideV1():
+        return singleton_scope.provide(
+            binding_key,
+            lambda: _provide_instance(None, None, pargs, kwargs))
+    def ProvideSlot():
+        return singleton_scope.provide_slot(
+            0, binding_key, _provide_instance, None, None, pargs, kwargs)
+    def ProvideAdapted():
+        return adapted_scope.provide_slot(
+            0, binding_key, _provide_instance, None, None, pargs, kwargs)
+    return {
+        'v1_provide_ns': _best_ns_per_call(ProvideV1, num_calls),
+        'v2_provide_slot_ns': _best_ns_per_call(ProvideSlot, num_calls),
+        'v1_scope_adapted_to_v2_ns': _best_ns_per_call(
+            ProvideAdapted, num_calls),
+    }
+
+
+def main(argv):
+    num_calls = int(argv[1]) if len(argv) > 1 else _DEFAULT_NUM_CALLS
+    for name, ns in sorted(measure_singleton_hits(num_calls).items()):
+        print('{0:>28}: {1:7.1f} ns per singleton hit'.format(name, ns))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,184 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import argparse
+import datetime
+import json
+import platform
+import sys
+import time
+
+from benchmarks import allocations
+from benchmarks import binding_memory
+from benchmarks import dependency_graph
+from benchmarks import graph_construction
+from benchmarks import graph_memory
+from benchmarks import module_scanning
+from benchmarks import provision_observers
+from benchmarks import provisioning
+from benchmarks import singleton_scope
+from benchmarks import synthetic_scale
+from pinject import version
+
+
+_FULL_NUM_CLASSES = [1000, 10000, 100000]
+_QUICK_NUM_CLASSES = [1000, 10000]
+
+
+def _run_new_object_graph(quick):
+    results = {}
+    for num_classes in _QUICK_NUM_CLASSES if quick else _FULL_NUM_CLASSES:
+        for mode, only_use_explicit_bindings in [('implicit', False),
+                                                 ('explicit_only', True)]:
+            results['{0}.{1}'.format(mode, num_classes)] = (
+                graph_construction.measure_new_object_graph(
+                    num_classes, only_use_explicit_bindings))
+    return results
+
+
+def _run_provisioning(quick):
+    if quick:
+        return provisioning.measure_all(
+            shape_size=200, thread_counts=(1, 4), num_contention_calls=2000)
+    return provisioning.measure_all()
+
+
+def _run_singleton_scope(quick):
+    return {'hits': singleton_scope.measure_singleton_hits(
+        100000 if quick else 1000000)}
+
+
+def _run_provision_observers(quick):
+    return {'overhead': provision_observers.measure_observer_overhead(
+        2000 if quick else 20000)}
+
+
+def _run_binding_memory(quick):
+    return {str(num_classes):
+            binding_memory.measure_implicit_bindings(num_classes)
+            for num_classes in (
+                _QUICK_NUM_CLASSES if quick else _FULL_NUM_CLASSES)}
+
+
+def _run_dependency_graph(quick):
+    return {str(num_classes):
+            dependency_graph.measure_dependency_graph(num_classes)
+            for num_classes in (
+                _QUICK_NUM_CLASSES if quick else _FULL_NUM_CLASSES)}
+
+
+def _run_allocations(quick):
+    return allocations.measure_all_shapes(50 if quick else 200)
+
+
+def _run_graph_memory(quick):
+    return graph_memory.measure_all(
+        [1000] if quick else _FULL_NUM_CLASSES)
+
+
+def _run_module_scanning(quick):
+    return {str(num_modules):
+            module_scanning.measure_module_scanning(num_modules)
+            for num_modules in ([1000] if quick else [1000, 10000])}
+
+
+def _run_synthetic_packages(quick):
+    return synthetic_scale.measure_all([10, 100] if quick else [10, 100, 1000])
+
+
+# Maps each benchmark group's name to a function that takes whether to run
+# quickly (with smaller sizes and fewer iterations), and returns a map from
+# benchmark name to a map from measurement name to value.
+GROUP_NAME_TO_RUN_FN = {
+    'new_object_graph': _run_new_object_graph,
+    'provisioning': _run_provisioning,
+    'singleton_scope': _run_singleton_scope,
+    'provision_observers': _run_provision_observers,
+    'binding_memory': _run_binding_memory,
+    'dependency_graph': _run_dependency_graph,
+    'allocations': _run_allocations,
+    'graph_memory': _run_graph_memory,
+    'module_scanning': _run_module_scanning,
+    'synthetic_packages': _run_synthetic_packages,
+}
+
+
+def run_suite(group_names=None, quick=False, log_fn=None):
+    """Runs benchmark groups.
+
+    Args:
+      group_names: the names of the groups to run, or None to run them all
+      quick: whether to use smaller sizes and fewer iterations
+      log_fn: a function called with a progress message before each group,
+          or None
+    Returns:
+      a JSON-serializable dict of the metadata of the run and the results,
+          which map '<group>.<benchmark>' to a map from measurement name to
+          value
+    """
+    if group_names is None:
+        group_names = sorted(GROUP_NAME_TO_RUN_FN)
+    results = {}
+    start_secs = time.perf_counter()
+    for group_name in group_names:
+        if log_fn is not None:
+            log_fn('running {0}'.format(group_name))
+        run_fn = GROUP_NAME_TO_RUN_FN[group_name]
+        for name, measurements in run_fn(quick).items():
+            results['{0}.{1}'.format(group_name, name)] = measurements
+    return {
+        'metadata': {
+            'pinject_version': version.VERSION,
+            'python_version': platform.python_version(),
+            'python_implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'created': datetime.datetime.now(
+                datetime.timezone.utc).isoformat(),
+            'quick': quick,
+            'groups': list(group_names),
+            'total_secs': time.perf_counter() - start_secs,
+        },
+        'results': results,
+    }
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.suite',
+        description='Runs pinject benchmarks and emits the results as JSON.')
+    parser.add_argument(
+        '--group', action='append', dest='group_names',
+        choices=sorted(GROUP_NAME_TO_RUN_FN),
+        help='a benchmark group to run (repeatable; default: all)')
+    parser.add_argument(
+        '--quick', action='store_true',
+        help='use smaller sizes and fewer iterations')
+    parser.add_argument(
+        '--output', help='the file to write JSON results to (default: stdout)')
+    args = parser.parse_args(argv[1:])
+    suite_results = run_suite(
+        args.group_names, args.quick,
+        log_fn=lambda message: print(message, file=sys.stderr))
+    if args.output is None:
+        json.dump(suite_results, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
+    else:
+        with open(args.output, 'w') as output_file:
+            json.dump(suite_results, output_file, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
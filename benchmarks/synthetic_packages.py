@@ -0,0 +1,294 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import argparse
+import importlib
+import os
+import random
+import sys
+
+
+class PackageShape(object):
+    """What a synthetic package should look like.
+
+    Classes are arranged in max_depth + 1 layers, and each class outside the
+    bottom layer is injected with classes (or provided values) from the
+    layer just below it, so that the longest chain of dependencies is
+    max_depth long.
+
+    Attributes:
+      num_modules: the number of modules of classes
+      classes_per_module: the number of classes in each module
+      max_fan_out: the most classes injected into each class
+      max_depth: the length of the longest chain of dependencies
+      inject_fraction: the fraction of initializers marked with @inject()
+      annotate_fraction: the fraction of injected args annotated with
+          @annotate_arg(), which the package's binding spec binds
+      num_provider_methods: the number of provider methods in the package's
+          binding spec, whose values are injected into second-layer classes
+          along with bottom-layer classes
+      collision_fraction: the number of classes, as a fraction of the number
+          of root classes, that reuse a root class's name in another module,
+          so that their implicit bindings collide
+      seed: the seed from which everything random is reproducibly derived
+    """
+
+    def __init__(self, num_modules=10, classes_per_module=10, max_fan_out=3,
+                 max_depth=5, inject_fraction=0.0, annotate_fraction=0.0,
+                 num_provider_methods=0, collision_fraction=0.0, seed=0):
+        self.num_modules = num_modules
+        self.classes_per_module = classes_per_module
+        self.max_fan_out = max_fan_out
+        self.max_depth = max_depth
+        self.inject_fraction = inject_fraction
+        self.annotate_fraction = annotate_fraction
+        self.num_provider_methods = num_provider_methods
+        self.collision_fraction = collision_fraction
+        self.seed = seed
+
+
+class GeneratedPackage(object):
+    """A synthetic package written to disk.
+
+    The package's __init__ module has these attributes:
+
+      MODULES: the modules of classes
+      ROOT_CLASSES: the classes that nothing is injected with, each of which
+          is providable
+      BINDING_SPEC_CLASS: the BindingSpec subclass to pass (an instance of)
+          to new_object_graph()
+
+    Attributes:
+      parent_dir: the directory containing the package
+      package_name: the package's name
+      num_classes: the number of classes, not counting colliding ones
+      num_edges: the number of injected args
+      num_root_classes: the number of classes that nothing is injected with
+    """
+
+    def __init__(self, parent_dir, package_name, num_classes, num_edges,
+                 num_root_classes):
+        self.parent_dir = parent_dir
+        self.package_name = package_name
+        self.num_classes = num_classes
+        self.num_edges = num_edges
+        self.num_root_classes = num_root_classes
+
+    def import_package(self):
+        """Imports the package, adding its parent directory to sys.path."""
+        if self.parent_dir not in sys.path:
+            sys.path.insert(0, self.parent_dir)
+        importlib.invalidate_caches()
+        return importlib.import_module(self.package_name)
+
+    def unimport_package(self):
+        """Removes the package and its modules from sys.modules."""
+        prefix = self.package_name + '.'
+        for module_name in list(sys.modules):
+            if module_name == self.package_name or module_name.startswith(
+                    prefix):
+                del sys.modules[module_name]
+        if self.parent_dir in sys.path:
+            sys.path.remove(self.parent_dir)
+
+
+class _Node(object):
+
+    __slots__ = ('name', 'arg_name', 'module_index', 'layer', 'is_provided',
+                 'dependencies', 'annotated_dependencies', 'is_injected',
+                 'has_inject')
+
+    def __init__(self, name, arg_name, module_index, layer, is_provided):
+        self.name = name
+        self.arg_name = arg_name
+        self.module_index = module_index
+        self.layer = layer
+        self.is_provided = is_provided
+        self.dependencies = []
+        # The dependencies whose args are annotated.
+        self.annotated_dependencies = set()
+        self.is_injected = False
+        self.has_inject = False
+
+
+def _new_nodes(shape, rng):
+    num_classes = shape.num_modules * shape.classes_per_module
+    classes = [
+        _Node('Service{0}'.format(index), 'service_{0}'.format(index),
+              index // shape.classes_per_module, index % (shape.max_depth + 1),
+              is_provided=False)
+        for index in range(num_classes)]
+    provided = [
+        _Node(None, 'config_{0}'.format(index), None, 0, is_provided=True)
+        for index in range(shape.num_provider_methods)]
+    layer_to_nodes = [[] for _ in range(shape.max_depth + 1)]
+    for node in classes:
+        layer_to_nodes[node.layer].append(node)
+    for node in provided:
+        layer_to_nodes[0].append(node)
+    for node in classes:
+        node.has_inject = rng.random() < shape.inject_fraction
+        if node.layer == 0:
+            continue
+        candidates = layer_to_nodes[node.layer - 1]
+        num_dependencies = rng.randint(
+            1, min(shape.max_fan_out, len(candidates)))
+        for dependency in rng.sample(candidates, num_dependencies):
+            node.dependencies.append(dependency)
+            dependency.is_injected = True
+            if (not dependency.is_provided and
+                    rng.random() < shape.annotate_fraction):
+                node.annotated_dependencies.add(dependency)
+    return classes, provided
+
+
+def _get_module_source(nodes, colliding_nodes):
+    lines = ['"""A generated module of synthetic classes."""', '', '',
+             'import pinject', '']
+    for node in nodes:
+        lines.extend(['', ''])
+        lines.append('class {0}(object):'.format(node.name))
+        for dependency in node.dependencies:
+            if dependency in node.annotated_dependencies:
+                lines.append("    @pinject.annotate_arg('{0}', 'synthetic')"
+                             .format(dependency.arg_name))
+        if node.has_inject:
+            lines.append('    @pinject.inject()')
+        arg_names = [dependency.arg_name for dependency in node.dependencies]
+        lines.append('    def __init__({0}):'.format(
+            ', '.join(['self'] + arg_names)))
+        lines.append('        self.dependencies = ({0})'.format(
+            ''.join(arg_name + ', ' for arg_name in arg_names)))
+    for node in colliding_nodes:
+        lines.extend(['', ''])
+        lines.append('class {0}(object):'.format(node.name))
+        lines.append('    """Collides with another module\'s {0}."""'.format(
+            node.name))
+    return '\n'.join(lines) + '\n'
+
+
+def _get_binding_specs_source(classes, provided):
+    lines = ['"""The generated binding spec of a synthetic package."""', '', '',
+             'import pinject', '']
+    module_indices = sorted({node.module_index for node in classes})
+    for module_index in module_indices:
+        lines.append('from . import module_{0}'.format(module_index))
+    lines.extend(['', '', 'class SyntheticBindingSpec(pinject.BindingSpec):',
+                  ''])
+    annotated = sorted({dependency for node in classes
+                        for dependency in node.annotated_dependencies},
+                       key=lambda node: node.arg_name)
+    lines.append('    def configure(self, bind):')
+    for node in annotated:
+        lines.append("        bind('{0}', annotated_with='synthetic',"
+                     " to_class=module_{1}.{2})".format(
+                         node.arg_name, node.module_index, node.name))
+    if not annotated:
+        lines.append('        pass')
+    for node in provided:
+        lines.append('')
+        lines.append('    def provide_{0}(self):'.format(node.arg_name))
+        lines.append("        return {{'name': '{0}'}}".format(node.arg_name))
+    return '\n'.join(lines) + '\n'
+
+
+def _get_init_source(num_modules, roots):
+    lines = ['"""A generated synthetic package."""', '', '']
+    for module_index in range(num_modules):
+        lines.append('from . import module_{0}'.format(module_index))
+    lines.append('from .binding_specs import SyntheticBindingSpec')
+    lines.extend(['', '', 'MODULES = ['])
+    lines.extend('    module_{0},'.format(module_index)
+                 for module_index in range(num_modules))
+    lines.extend([']', 'ROOT_CLASSES = ['])
+    lines.extend('    module_{0}.{1},'.format(node.module_index, node.name)
+                 for node in roots)
+    lines.extend([']', 'BINDING_SPEC_CLASS = SyntheticBindingSpec'])
+    return '\n'.join(lines) + '\n'
+
+
+def generate_package(parent_dir, package_name, shape):
+    """Writes an importable synthetic package.
+
+    The same shape (including its seed) always yields the same source.
+
+    Args:
+      parent_dir: the directory in which to create the package's directory
+      package_name: the package's name
+      shape: a PackageShape
+    Returns:
+      a GeneratedPackage
+    """
+    rng = random.Random(shape.seed)
+    classes, provided = _new_nodes(shape, rng)
+    roots = [node for node in classes if not node.is_injected]
+    num_colliding = int(len(roots) * shape.collision_fraction)
+    module_index_to_colliding_nodes = {}
+    for root in rng.sample(roots, min(num_colliding, len(roots))):
+        if shape.num_modules < 2:
+            break
+        module_index = rng.choice([
+            index for index in range(shape.num_modules)
+            if index != root.module_index])
+        module_index_to_colliding_nodes.setdefault(module_index, []).append(
+            _Node(root.name, root.arg_name, module_index, root.layer,
+                  is_provided=False))
+
+    package_dir = os.path.join(parent_dir, package_name)
+    os.makedirs(package_dir)
+    def Write(file_name, source):
+        with open(os.path.join(package_dir, file_name), 'w') as source_file:
+            source_file.write(source)
+    for module_index in range(shape.num_modules):
+        Write('module_{0}.py'.format(module_index), _get_module_source(
+            [node for node in classes if node.module_index == module_index],
+            module_index_to_colliding_nodes.get(module_index, [])))
+    Write('binding_specs.py', _get_binding_specs_source(classes, provided))
+    Write('__init__.py', _get_init_source(shape.num_modules, roots))
+    return GeneratedPackage(
+        os.path.abspath(parent_dir), package_name, len(classes),
+        sum(len(node.dependencies) for node in classes), len(roots))
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.synthetic_packages',
+        description='Writes an importable synthetic package of injectable'
+                    ' classes.')
+    parser.add_argument('parent_dir')
+    parser.add_argument('--package-name', default='synthetic_package')
+    default_shape = PackageShape()
+    for attr, attr_type in [
+            ('num_modules', int), ('classes_per_module', int),
+            ('max_fan_out', int), ('max_depth', int),
+            ('inject_fraction', float), ('annotate_fraction', float),
+            ('num_provider_methods', int), ('collision_fraction', float),
+            ('seed', int)]:
+        parser.add_argument('--' + attr.replace('_', '-'), type=attr_type,
+                            default=getattr(default_shape, attr))
+    args = parser.parse_args(argv[1:])
+    shape = PackageShape(**{
+        attr: getattr(args, attr) for attr in vars(default_shape)})
+    generated_package = generate_package(
+        args.parent_dir, args.package_name, shape)
+    print('wrote {0} classes with {1} injected args to {2}'.format(
+        generated_package.num_classes, generated_package.num_edges,
+        os.path.join(generated_package.parent_dir,
+                     generated_package.package_name)))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
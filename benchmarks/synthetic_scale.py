@@ -0,0 +1,129 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks import synthetic_packages
+from pinject import object_graph
+
+
+# Maps the name of each synthetic package shape to the kwargs of its
+# PackageShape, leaving out the number of modules, which is scaled.
+SHAPE_NAME_TO_KWARGS = {
+    'implicit': {},
+    'explicit_only': {'inject_fraction': 1.0},
+    'mixed': {'inject_fraction': 0.5, 'annotate_fraction': 0.2,
+              'num_provider_methods': 50, 'collision_fraction': 0.1},
+    'wide': {'max_fan_out': 20, 'max_depth': 2},
+    'deep': {'max_fan_out': 2, 'max_depth': 50},
+}
+
+_DEFAULT_NUM_MODULES = [10, 100, 1000]
+
+
+def measure_synthetic_package(shape, package_name='synthetic_scale_package'):
+    """Measures importing a synthetic package and creating its object graph.
+
+    Args:
+      shape: a synthetic_packages.PackageShape
+      package_name: the name of the generated package, which must not be
+          imported already
+    Returns:
+      a map from measurement name to value: import_secs is how long the
+          package took to import, new_object_graph_secs how long creating
+          its object graph took, <phase>_secs how long each phase of
+          creating it took, first_provide_all_secs how long providing each
+          root class took the first time, and warm_provide_all_secs how
+          long it took again
+    """
+    only_use_explicit_bindings = shape.inject_fraction >= 1.0
+    parent_dir = tempfile.mkdtemp()
+    try:
+        generated_package = synthetic_packages.generate_package(
+            parent_dir, package_name, shape)
+        start_secs = time.perf_counter()
+        package = generated_package.import_package()
+        import_secs = time.perf_counter() - start_secs
+        try:
+            start_secs = time.perf_counter()
+            obj_graph = object_graph.new_object_graph(
+                modules=package.MODULES,
+                binding_specs=[package.BINDING_SPEC_CLASS()],
+                only_use_explicit_bindings=only_use_explicit_bindings,
+                collect_startup_report=True)
+            new_object_graph_secs = time.perf_counter() - start_secs
+            provide_all_secs = []
+            for _ in range(2):
+                start_secs = time.perf_counter()
+                for root_class in package.ROOT_CLASSES:
+                    obj_graph.provide(root_class)
+                provide_all_secs.append(time.perf_counter() - start_secs)
+        finally:
+            generated_package.unimport_package()
+    finally:
+        shutil.rmtree(parent_dir)
+    measurements = {
+        'num_classes': generated_package.num_classes,
+        'num_edges': generated_package.num_edges,
+        'num_root_classes': generated_package.num_root_classes,
+        'import_secs': import_secs,
+        'new_object_graph_secs': new_object_graph_secs,
+        'first_provide_all_secs': provide_all_secs[0],
+        'warm_provide_all_secs': provide_all_secs[1],
+    }
+    for phase in obj_graph.get_startup_report().phases:
+        measurements['{0}_secs'.format(phase.name)] = phase.wall_secs
+    return measurements
+
+
+def measure_all(num_modules_list=tuple(_DEFAULT_NUM_MODULES),
+                classes_per_module=10, seed=0):
+    """Measures each synthetic package shape at each scale.
+
+    Args:
+      num_modules_list: the numbers of modules at which to measure
+      classes_per_module: the number of classes in each module
+      seed: the seed from which to generate the packages
+    Returns:
+      a map from '<shape>.<num modules>' to the measurements returned by
+          measure_synthetic_package()
+    """
+    results = {}
+    for shape_name, kwargs in sorted(SHAPE_NAME_TO_KWARGS.items()):
+        for num_modules in num_modules_list:
+            shape = synthetic_packages.PackageShape(
+                num_modules=num_modules,
+                classes_per_module=classes_per_module, seed=seed, **kwargs)
+            results['{0}.{1}'.format(shape_name, num_modules)] = (
+                measure_synthetic_package(shape))
+    return results
+
+
+def main(argv):
+    num_modules_list = [int(arg) for arg in argv[1:]] or _DEFAULT_NUM_MODULES
+    for name, measurements in sorted(measure_all(num_modules_list).items()):
+        print('{0:>20}: {1:6.3f}s import, {2:6.3f}s new_object_graph(),'
+              ' {3:6.3f}s first provide of all roots'.format(
+                  name, measurements['import_secs'],
+                  measurements['new_object_graph_secs'],
+                  measurements['first_provide_all_secs']))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -34,12 +34,16 @@ for thing_name in dir(errors):
     if type(thing) == type(str):
         setattr(sys.modules[__name__], thing_name, thing)
         __all__.append(thing_name)
+from .finding import ModuleScanPolicy
+__all__.extend(['ModuleScanPolicy'])
 from .initializers import copy_args_to_internal_fields
 from .initializers import copy_args_to_public_fields
 from .object_graph import new_object_graph
 __all__.extend(['new_object_graph'])
-from .scoping import PROTOTYPE, Scope, SINGLETON
-__all__.extend(['PROTOTYPE', 'Scope', 'SINGLETON'])
+from .provision_observers import ProvisionObserver
+__all__.extend(['ProvisionObserver'])
+from .scoping import PROTOTYPE, Scope, SINGLETON, SlottedScope
+__all__.extend(['PROTOTYPE', 'Scope', 'SINGLETON', 'SlottedScope'])
 
 # TODO(kurts): figure out how to avoid breaking unittests by uncommenting this
 #   section.
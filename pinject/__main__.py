@@ -0,0 +1,320 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import argparse
+import importlib
+import json
+import sys
+import time
+
+from pinject import errors
+from pinject import finding
+from pinject import object_graph
+
+
+class _BadRefError(Exception):
+    """A command-line arg doesn't refer to an importable module or thing."""
+
+
+def _import_module(module_name):
+    try:
+        return importlib.import_module(module_name)
+    except ImportError as e:
+        raise _BadRefError('cannot import {0}: {1}'.format(module_name, e))
+
+
+def _resolve_ref(ref):
+    """Returns what a 'some.module:SomeName' reference refers to."""
+    module_name, _, qualname = ref.partition(':')
+    thing = _import_module(module_name)
+    for attr in qualname.split('.') if qualname else []:
+        try:
+            thing = getattr(thing, attr)
+        except AttributeError:
+            raise _BadRefError('{0} has no attribute {1}'.format(ref, attr))
+    return thing
+
+
+def _new_obj_graph(args):
+    if args.modules:
+        modules = [_import_module(module_name)
+                   for module_name in args.modules]
+    else:
+        modules = finding.ALL_IMPORTED_MODULES
+    if (args.include_module_prefixes or args.exclude_module_prefixes or
+            args.exclude_library_modules):
+        module_scan_policy = finding.ModuleScanPolicy(
+            args.include_module_prefixes, args.exclude_module_prefixes,
+            exclude_library_modules=args.exclude_library_modules)
+    else:
+        module_scan_policy = None
+    return object_graph.new_object_graph(
+        modules=modules,
+        binding_specs=[_resolve_ref(ref)() for ref in args.binding_specs],
+        only_use_explicit_bindings=args.only_use_explicit_bindings,
+        module_scan_policy=module_scan_policy)
+
+
+def _load_obj_graph(ref):
+    """Returns the ObjectGraph that a 'some.module:factory' reference gives.
+
+    The reference may be to an ObjectGraph, or to a function that takes no
+    args and returns one.
+    """
+    thing = _resolve_ref(ref)
+    if callable(thing):
+        thing = thing()
+    if not isinstance(thing, object_graph.ObjectGraph):
+        raise _BadRefError(
+            '{0} is neither an object graph nor a function returning'
+            ' one'.format(ref))
+    return thing
+
+
+def _write_output(args, text):
+    if args.output is None:
+        sys.stdout.write(text)
+    else:
+        with open(args.output, 'w') as output_file:
+            output_file.write(text)
+
+
+def _write_json(json_dict):
+    sys.stdout.write(json.dumps(json_dict, indent=2, sort_keys=True) + '\n')
+
+
+def _add_binding_args(parser):
+    parser.add_argument(
+        '--module', dest='modules', action='append', default=[],
+        metavar='MODULE',
+        help='a module to search for classes to bind implicitly (may be'
+        ' repeated); by default, all imported modules are searched')
+    parser.add_argument(
+        '--binding-spec', dest='binding_specs', action='append', default=[],
+        metavar='MODULE:CLASS',
+        help='a binding spec class, instantiated with no args (may be'
+        ' repeated)')
+    parser.add_argument(
+        '--include-module-prefix', dest='include_module_prefixes',
+        action='append', default=[], metavar='PREFIX',
+        help='only search modules in this package (may be repeated)')
+    parser.add_argument(
+        '--exclude-module-prefix', dest='exclude_module_prefixes',
+        action='append', default=[], metavar='PREFIX',
+        help='don\'t search modules in this package (may be repeated)')
+    parser.add_argument(
+        '--exclude-library-modules', action='store_true',
+        help='don\'t search the standard library or installed packages')
+    parser.add_argument(
+        '--only-use-explicit-bindings', action='store_true',
+        help='only bind classes marked injectable, and binding specs')
+
+
+def _compile(args):
+    # The roots are imported first, so that they're among the imported
+    # modules searched by default.
+    roots = [_resolve_ref(ref) for ref in args.roots]
+    _write_output(args, _new_obj_graph(args).generate_wiring_source(roots))
+
+
+def _stats(args):
+    counts = _load_obj_graph(args.graph).get_binding_counts()
+    if args.json:
+        _write_json(counts.to_json_dict())
+    else:
+        print(counts.format(max_collisions=args.max_collisions))
+
+
+def _graph(args):
+    obj_graph = _load_obj_graph(args.graph)
+    roots = [_resolve_ref(ref) for ref in args.roots] or None
+    dependency_graph = obj_graph.get_dependency_graph(roots)
+    if args.format == 'dot':
+        _write_output(args, dependency_graph.to_dot())
+    else:
+        _write_output(args, dependency_graph.to_json(indent=2) + '\n')
+
+
+def _time_startup(args):
+    # Importing is timed too, and object graphs created on import (e.g., by
+    # a module-level new_object_graph() call) get startup reports as well.
+    module_name = args.graph.partition(':')[0]
+    with object_graph.collecting_startup_reports():
+        start_secs = time.perf_counter()
+        _import_module(module_name)
+        import_secs = time.perf_counter() - start_secs
+        startup_report = _load_obj_graph(args.graph).get_startup_report()
+    if startup_report is None:
+        raise _BadRefError(
+            '{0} was created before {1} was imported, so its creation'
+            ' wasn\'t timed'.format(args.graph, module_name))
+    if args.json:
+        _write_json(dict(startup_report.to_dict(), import_secs=import_secs))
+    else:
+        print('imported {0} in {1:.3f}s'.format(module_name, import_secs))
+        print(startup_report.format(max_modules=args.max_modules))
+
+
+def _profile(args):
+    obj_graph = _load_obj_graph(args.graph)
+    root = _resolve_ref(args.root)
+    with obj_graph.record_trace() as trace_recorder:
+        start_secs = time.perf_counter()
+        obj_graph.provide(root)
+        first_secs = time.perf_counter() - start_secs
+    warm_secs = []
+    for _ in range(args.repeat):
+        start_secs = time.perf_counter()
+        obj_graph.provide(root)
+        warm_secs.append(time.perf_counter() - start_secs)
+    if args.trace is not None:
+        trace_recorder.write(args.trace)
+    critical_path_report = trace_recorder.get_critical_path_report()
+    if args.json:
+        _write_json({
+            'first_provide_secs': first_secs,
+            'warm_provide_secs': warm_secs,
+            'critical_path': critical_path_report.to_json_dict(),
+        })
+        return
+    print('first provide of {0} took {1:.6f}s, while tracing'.format(
+        args.root, first_secs))
+    if warm_secs:
+        print('{0} more provides took {1:.6f}s min, {2:.6f}s mean'.format(
+            len(warm_secs), min(warm_secs), sum(warm_secs) / len(warm_secs)))
+    print(critical_path_report.format(max_constructions=args.top))
+
+
+def _validate(args):
+    obj_graph = _load_obj_graph(args.graph)
+    roots = [_resolve_ref(ref) for ref in args.roots] or None
+    problems = obj_graph.validate(roots)
+    if args.json:
+        _write_json({'problems': [problem.to_dict() for problem in problems]})
+    elif problems:
+        for problem in problems:
+            print(problem)
+    else:
+        print('no problems found')
+    return 1 if problems else 0
+
+
+def _new_arg_parser():
+    parser = argparse.ArgumentParser(prog='python -m pinject')
+    subparsers = parser.add_subparsers(dest='command', metavar='COMMAND')
+    subparsers.required = True
+
+    compile_parser = subparsers.add_parser(
+        'compile', help='generate a module that wires up root classes'
+        ' without pinject',
+        description='Resolves the object graph of root classes, and'
+        ' generates a Python module with a provide_<arg name>() function'
+        ' for each, which builds the same objects as ObjectGraph.provide()'
+        ' without importing pinject.')
+    compile_parser.add_argument(
+        'roots', nargs='+', metavar='MODULE:CLASS', help='a root class')
+    _add_binding_args(compile_parser)
+    compile_parser.add_argument(
+        '--output', '-o', metavar='PATH',
+        help='where to write the module (by default, to stdout)')
+    compile_parser.set_defaults(run=_compile)
+
+    stats_parser = _add_graph_command(
+        subparsers, 'stats', 'count bindings, and list collided binding keys')
+    stats_parser.add_argument(
+        '--max-collisions', type=int, default=20, metavar='N',
+        help='the number of collided binding keys to list')
+    stats_parser.set_defaults(run=_stats)
+
+    graph_parser = _add_graph_command(
+        subparsers, 'graph', 'export which bindings are injected into which',
+        json_help=None)
+    _add_roots_arg(graph_parser, 'whose dependencies to export')
+    graph_parser.add_argument(
+        '--format', choices=['dot', 'json'], default='dot',
+        help='Graphviz DOT (the default) or JSON')
+    graph_parser.add_argument(
+        '--output', '-o', metavar='PATH',
+        help='where to write the graph (by default, to stdout)')
+    graph_parser.set_defaults(run=_graph)
+
+    time_startup_parser = _add_graph_command(
+        subparsers, 'time-startup',
+        'time importing and each phase of creating the object graph')
+    time_startup_parser.add_argument(
+        '--max-modules', type=int, default=10, metavar='N',
+        help='the number of slowest-to-scan modules to list')
+    time_startup_parser.set_defaults(run=_time_startup)
+
+    profile_parser = _add_graph_command(
+        subparsers, 'profile',
+        'time providing a root class, and find its critical path')
+    profile_parser.add_argument(
+        'root', metavar='MODULE:CLASS', help='the class to provide')
+    profile_parser.add_argument(
+        '--repeat', type=int, default=10, metavar='N',
+        help='how many more times to provide the class, once singletons'
+        ' are constructed')
+    profile_parser.add_argument(
+        '--top', type=int, default=10, metavar='N',
+        help='the number of constructions with the most self time to list')
+    profile_parser.add_argument(
+        '--trace', metavar='PATH',
+        help='where to write the first provision as Chrome trace events')
+    profile_parser.set_defaults(run=_profile)
+
+    validate_parser = _add_graph_command(
+        subparsers, 'validate',
+        'find unbound or ambiguous args, cycles, and bad scopes, without'
+        ' providing anything (exits non-zero if any are found)')
+    _add_roots_arg(validate_parser, 'whose dependencies to validate')
+    validate_parser.set_defaults(run=_validate)
+    return parser
+
+
+def _add_graph_command(subparsers, name, help_text,
+                       json_help='output JSON instead of text'):
+    parser = subparsers.add_parser(
+        name, help=help_text, description=help_text[0].upper() +
+        help_text[1:] + '.')
+    parser.add_argument(
+        'graph', metavar='MODULE:FACTORY',
+        help='an object graph, or a function taking no args that returns'
+        ' one')
+    if json_help is not None:
+        parser.add_argument('--json', action='store_true', help=json_help)
+    return parser
+
+
+def _add_roots_arg(parser, help_text):
+    parser.add_argument(
+        '--root', dest='roots', action='append', default=[],
+        metavar='MODULE:CLASS',
+        help='a class {0}, transitively (may be repeated); by default,'
+        ' all bindings'.format(help_text))
+
+
+def main(argv=None):
+    args = _new_arg_parser().parse_args(argv)
+    try:
+        return args.run(args) or 0
+    except (errors.Error, _BadRefError) as e:
+        sys.stderr.write('error: {0}\n'.format(e))
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
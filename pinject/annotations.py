@@ -17,6 +17,8 @@ limitations under the License.
 class Annotation(object):
     """A binding annotation."""
 
+    __slots__ = ('_annotation_obj', '_hash')
+
     def __init__(self, annotation_obj):
         """Initializer.
 
@@ -25,6 +27,7 @@ class Annotation(object):
               implements __eq__() and __hash__()
         """
         self._annotation_obj = annotation_obj
+        self._hash = hash(annotation_obj)
 
     def as_adjective(self):
         """Returns the annotation as an adjective phrase.
@@ -37,26 +40,39 @@ class Annotation(object):
         """
         return 'annotated with "{0}"'.format(self._annotation_obj)
 
+    @property
+    def annotation_obj(self):
+        return self._annotation_obj
+
     def __repr__(self):
         return '<{0}>'.format(self.as_adjective())
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return (isinstance(other, Annotation) and
+                self._hash == other._hash and
                 self._annotation_obj == other._annotation_obj)
 
     def __ne__(self, other):
         return not (self == other)
 
     def __hash__(self):
-        return hash(self._annotation_obj)
+        return self._hash
 
 
 class _NoAnnotation(object):
     """A polymorph for Annotation but that actually means "no annotation"."""
 
+    __slots__ = ()
+
     def as_adjective(self):
         return 'unannotated'
 
+    @property
+    def annotation_obj(self):
+        return None
+
     def __repr__(self):
         return '<{0}>'.format(self.as_adjective())
 
@@ -14,6 +14,8 @@ limitations under the License.
 """
 
 
+import weakref
+
 from . import binding_keys
 from . import provider_indirections
 
@@ -21,10 +23,22 @@ from . import provider_indirections
 class ArgBindingKey(object):
     """The binding key for an arg of a function."""
 
+    __slots__ = ('_arg_name', 'binding_key', 'provider_indirection', '_hash',
+                 '__weakref__')
+
     def __init__(self, arg_name, binding_key, provider_indirection):
         self._arg_name = arg_name
         self.binding_key = binding_key
         self.provider_indirection = provider_indirection
+        # Watch out: self._arg_name is likely also binding_key._name, and so
+        # XORing their hashes will remove the arg name from the hash.
+        # self._arg_name is really captured as part of the other two, so let's
+        # omit it.
+        self._hash = hash(binding_key) ^ hash(provider_indirection)
+
+    @property
+    def arg_name(self):
+        return self._arg_name
 
     def __repr__(self):
         return '<{0}>'.format(self)
@@ -34,7 +48,10 @@ class ArgBindingKey(object):
             self._arg_name, self.binding_key.annotation_as_adjective())
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return (isinstance(other, ArgBindingKey) and
+                self._hash == other._hash and
                 self._arg_name == other._arg_name and
                 self.binding_key == other.binding_key and
                 self.provider_indirection == other.provider_indirection)
@@ -43,12 +60,7 @@ class ArgBindingKey(object):
         return not (self == other)
 
     def __hash__(self):
-        # Watch out: self._arg_name is likely also binding_key._name, and so
-        # XORing their hashes will remove the arg name from the hash.
-        # self._arg_name is really captured as part of the other two, so let's
-        # omit it.
-        return (hash(self.binding_key) ^
-                hash(self.provider_indirection))
+        return self._hash
 
     # TODO(kurts): the methods feel unbalanced: they only use self._arg_name.
     # That should probably be a full-fledged class, and ArgBindingKey should
@@ -108,6 +120,20 @@ def create_kwargs(arg_binding_keys, provider_fn):
             for arg_binding_key in arg_binding_keys}
 
 
+def create_kwargs_from_values(arg_binding_keys, values):
+    """Creates a kwargs map for the given arg binding keys' provided values.
+
+    Args:
+      arg_binding_keys: a sequence of ArgBindingKey for some function's args
+      values: a sequence of the values provided for arg_binding_keys, in the
+          same order
+    Returns:
+      a (possibly empty) map from arg name to provided value
+    """
+    return {arg_binding_key._arg_name: value
+            for arg_binding_key, value in zip(arg_binding_keys, values)}
+
+
 _PROVIDE_PREFIX = 'provide_'
 _PROVIDE_PREFIX_LEN = len(_PROVIDE_PREFIX)
 
@@ -115,18 +141,38 @@ _PROVIDE_PREFIX_LEN = len(_PROVIDE_PREFIX)
 def new(arg_name, annotated_with=None):
     """Creates an ArgBindingKey.
 
+    Equal args yield the same (interned) ArgBindingKey for as long as
+    something else refers to it.  Since the arg name follows from the binding
+    key's name and whether the arg is a provider arg, arg binding keys are
+    interned on their (interned) binding keys, via a weak reference each.
+    That's several times cheaper than an entry in a WeakValueDictionary.
+
     Args:
       arg_name: the name of the bound arg
       annotation: an Annotation, or None to create an unannotated arg binding
           key
     Returns:
-      a new ArgBindingKey
+      an ArgBindingKey
     """
     if arg_name.startswith(_PROVIDE_PREFIX):
-        binding_key_name = arg_name[_PROVIDE_PREFIX_LEN:]
+        binding_key = binding_keys.new(
+            arg_name[_PROVIDE_PREFIX_LEN:], annotated_with)
+        arg_binding_key_ref = binding_key.provider_arg_binding_key_ref
         provider_indirection = provider_indirections.INDIRECTION
     else:
-        binding_key_name = arg_name
+        binding_key = binding_keys.new(arg_name, annotated_with)
+        arg_binding_key_ref = binding_key.arg_binding_key_ref
         provider_indirection = provider_indirections.NO_INDIRECTION
-    binding_key = binding_keys.new(binding_key_name, annotated_with)
-    return ArgBindingKey(arg_name, binding_key, provider_indirection)
+    if arg_binding_key_ref is not None:
+        arg_binding_key = arg_binding_key_ref()
+        if arg_binding_key is not None:
+            return arg_binding_key
+    # Another thread may intern an equal key in the meantime, in which case
+    # the last one wins; either way, the keys compare equal.
+    arg_binding_key = ArgBindingKey(
+        arg_name, binding_key, provider_indirection)
+    if provider_indirection is provider_indirections.INDIRECTION:
+        binding_key.provider_arg_binding_key_ref = weakref.ref(arg_binding_key)
+    else:
+        binding_key.arg_binding_key_ref = weakref.ref(arg_binding_key)
+    return arg_binding_key
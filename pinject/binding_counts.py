@@ -0,0 +1,127 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import collections
+import json
+
+from . import bindings
+
+
+_TARGET_KIND_TO_NAME = collections.OrderedDict([
+    (bindings.TO_CLASS, 'class'),
+    (bindings.TO_INSTANCE, 'instance'),
+    (bindings.TO_PROVIDER_FN, 'provider_fn'),
+])
+
+
+class BindingCounts(object):
+    """How many bindings an object graph has, of which kinds, and collisions.
+
+    Attributes:
+      num_bindings: the number of binding keys bound unambiguously, not
+          counting the internal bindings that bind(to_class=...) creates
+      num_internal_bindings: the number of those internal bindings
+      target_kind_to_count: a map from 'class', 'instance', or
+          'provider_fn' to the number of bindings to that kind of target
+      scope_to_count: a map from scope name to the number of bindings in
+          that scope
+      collisions: a list of (binding key description, [binding target
+          description, ...]) pairs, one per binding key bound ambiguously
+    """
+
+    def __init__(self, num_bindings, num_internal_bindings,
+                 target_kind_to_count, scope_to_count, collisions):
+        self.num_bindings = num_bindings
+        self.num_internal_bindings = num_internal_bindings
+        self.target_kind_to_count = target_kind_to_count
+        self.scope_to_count = scope_to_count
+        self.collisions = collisions
+
+    def to_json_dict(self):
+        return {
+            'num_bindings': self.num_bindings,
+            'num_internal_bindings': self.num_internal_bindings,
+            'target_kind_to_count': dict(self.target_kind_to_count),
+            'scope_to_count': dict(self.scope_to_count),
+            'collisions': [
+                {'binding_key': binding_key_desc,
+                 'targets': list(target_descs)}
+                for binding_key_desc, target_descs in self.collisions],
+        }
+
+    def to_json(self, indent=None):
+        return json.dumps(self.to_json_dict(), indent=indent)
+
+    def format(self, max_collisions=20):
+        """Returns these counts as human-readable text.
+
+        Args:
+          max_collisions: the number of collided binding keys to list
+        Returns:
+          a multi-line string
+        """
+        lines = ['{0} bindings ({1} more internal to bind(to_class=...)),'
+                 ' {2} collided binding keys'.format(
+                     self.num_bindings, self.num_internal_bindings,
+                     len(self.collisions))]
+        lines.append('by target: {0}'.format(', '.join(
+            '{0} {1}'.format(count, name) for name, count in
+            self.target_kind_to_count.items())))
+        lines.append('by scope: {0}'.format(', '.join(
+            '{0} {1}'.format(count, name) for name, count in
+            sorted(self.scope_to_count.items()))))
+        if self.collisions:
+            lines.append('collided binding keys:')
+            for binding_key_desc, target_descs in (
+                    self.collisions[:max_collisions]):
+                lines.append('  {0} could be any of:'.format(
+                    binding_key_desc))
+                lines.extend('    {0}'.format(target_desc)
+                             for target_desc in target_descs)
+            if len(self.collisions) > max_collisions:
+                lines.append('  ... and {0} more'.format(
+                    len(self.collisions) - max_collisions))
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.format()
+
+
+def new_binding_counts(binding_mapping):
+    """Counts the bindings of a BindingMapping.
+
+    Returns:
+      a BindingCounts
+    """
+    num_internal_bindings = 0
+    target_kind_to_count = collections.OrderedDict(
+        (name, 0) for name in _TARGET_KIND_TO_NAME.values())
+    scope_to_count = collections.Counter()
+    for binding in binding_mapping.get_bindings():
+        if binding.binding_key.name == bindings.BOUND_CLASS_BINDING_NAME:
+            num_internal_bindings += 1
+            continue
+        target_kind_to_count[_TARGET_KIND_TO_NAME[binding.target_kind]] += 1
+        scope_to_count[str(binding.scope_id)] += 1
+    collisions = sorted(
+        (str(binding_key),
+         sorted(binding.get_binding_target_desc_fn()
+                for binding in colliding_bindings))
+        for binding_key, colliding_bindings in
+        binding_mapping.get_collided_bindings().items())
+    return BindingCounts(
+        sum(target_kind_to_count.values()), num_internal_bindings,
+        target_kind_to_count, dict(scope_to_count), collisions)
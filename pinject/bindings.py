@@ -17,6 +17,8 @@ limitations under the License.
 import re
 import inspect
 import threading
+import types
+import weakref
 
 from . import binding_keys
 from . import decorators
@@ -24,23 +26,146 @@ from . import errors
 from . import locations
 from . import providing
 from . import scoping
+from . import support
 
 
 class Binding(object):
+    """An association between a binding key and a binding target.
+
+    The binding target is described by a (shared) target kind, such as
+    TO_CLASS, plus the target itself, such as the bound class, so that
+    bindings don't need to allocate closures of their own.
+
+    Attributes:
+      binding_key: the BindingKey being bound
+      target_kind: one of TO_CLASS, TO_INSTANCE, or TO_PROVIDER_FN
+      target: the bound class, instance, or provider function
+      scope_id: the ID of the scope in which the target is provided
+      slot: the binding's dense integer index within its BindingMapping, or
+          None until BindingMapping.assign_slots() is called
+    """
 
-    def __init__(self, binding_key, proviser_fn, get_binding_target_desc_fn,
-                 scope_id, get_binding_loc_fn):
+    __slots__ = ('binding_key', 'target_kind', 'target', 'scope_id', 'slot',
+                 '_get_binding_loc_fn')
+
+    def __init__(self, binding_key, target_kind, target, scope_id,
+                 get_binding_loc_fn=None):
+        """Initializer.
+
+        Args:
+          binding_key: a BindingKey
+          target_kind: one of TO_CLASS, TO_INSTANCE, or TO_PROVIDER_FN
+          target: the bound class, instance, or provider function
+          scope_id: a scope ID
+          get_binding_loc_fn: a function returning the location at which the
+              binding was created, or None if the binding was created where
+              the target (a class or provider function) is defined
+        """
         self.binding_key = binding_key
-        self.proviser_fn = proviser_fn
-        self.get_binding_target_desc_fn = get_binding_target_desc_fn
+        self.target_kind = target_kind
+        self.target = target
         self.scope_id = scope_id
+        self.slot = None
         self._get_binding_loc_fn = get_binding_loc_fn
 
     def __str__(self):
         return 'the binding at {0}, from {1} to {2}, in "{3}" scope'.format(
-            self._get_binding_loc_fn(), self.binding_key,
+            self.get_binding_loc(), self.binding_key,
             self.get_binding_target_desc_fn(), self.scope_id)
 
+    def proviser_fn(self, injection_context, obj_provider, pargs, kwargs):
+        return self.target_kind.provise(
+            self.target, injection_context, obj_provider, pargs, kwargs)
+
+    def get_injected_arg_binding_keys(self):
+        """Returns the ArgBindingKeys injected when providing from this.
+
+        Returns:
+          a tuple of ArgBindingKey
+        """
+        injection_site_fn = self.target_kind.get_injection_site_fn(
+            self.target)
+        if injection_site_fn is None:
+            return ()
+        return decorators.get_injectable_arg_binding_keys(
+            injection_site_fn, (), {})
+
+    def get_binding_target_desc_fn(self):
+        return self.target_kind.get_desc(self.target)
+
+    def get_binding_loc(self):
+        if self._get_binding_loc_fn is None:
+            return locations.get_loc(self.target)
+        return self._get_binding_loc_fn()
+
+
+# Each target kind can provise its target, either all at once (provise()),
+# or in two steps, so that the caller can provide the injected args itself
+# (get_injection_site_fn(), then instantiate() with the injected args).
+
+
+class _ToClass(object):
+    """The target kind of bindings to classes."""
+
+    def provise(self, to_class, injection_context, obj_provider, pargs, kwargs):
+        return obj_provider.provide_class(
+            to_class, injection_context, pargs, kwargs)
+
+    def get_injection_site_fn(self, to_class):
+        if support.is_constructor_defined(to_class):
+            return to_class.__init__
+        return None
+
+    def instantiate(self, to_class, pargs, kwargs):
+        return to_class(*pargs, **kwargs)
+
+    def get_desc(self, to_class):
+        return 'the class {0}'.format(locations.get_name_and_loc(to_class))
+
+
+class _ToInstance(object):
+    """The target kind of bindings to instances."""
+
+    def provise(self, to_instance, injection_context, obj_provider, pargs,
+                kwargs):
+        return self.instantiate(to_instance, pargs, kwargs)
+
+    def get_injection_site_fn(self, to_instance):
+        return None
+
+    def instantiate(self, to_instance, pargs, kwargs):
+        if pargs or kwargs:
+            raise TypeError('instance provider takes no arguments'
+                            ' ({0} given)'.format(len(pargs) + len(kwargs)))
+        return to_instance
+
+    def get_desc(self, to_instance):
+        return 'the instance {0!r}'.format(to_instance)
+
+
+class _ToProviderFn(object):
+    """The target kind of bindings to provider functions."""
+
+    def provise(self, provider_fn, injection_context, obj_provider, pargs,
+                kwargs):
+        return obj_provider.call_with_injection(
+            provider_fn, injection_context, pargs, kwargs)
+
+    def get_injection_site_fn(self, provider_fn):
+        return provider_fn
+
+    def instantiate(self, provider_fn, pargs, kwargs):
+        return provider_fn(*pargs, **kwargs)
+
+    def get_desc(self, provider_fn):
+        return 'the provider method {0}'.format(
+            locations.get_name_and_loc(provider_fn))
+
+
+TO_CLASS = _ToClass()
+TO_INSTANCE = _ToInstance()
+TO_PROVIDER_FN = _ToProviderFn()
+
 
 def _handle_explicit_binding_collision(
         colliding_binding, binding_key_to_binding, *pargs):
@@ -109,6 +234,18 @@ class BindingMapping(object):
         self._collided_binding_key_to_bindings = (
             collided_binding_key_to_bindings)
 
+    def assign_slots(self):
+        """Gives each binding a dense integer slot.
+
+        Slots let slotted scopes store instances in arrays instead of maps.
+
+        Returns:
+          the number of slots assigned
+        """
+        for slot, binding in enumerate(self._binding_key_to_binding.values()):
+            binding.slot = slot
+        return len(self._binding_key_to_binding)
+
     def verify_requirements(self, required_bindings):
         for required_binding in required_bindings:
             required_binding_key = required_binding.binding_key
@@ -122,6 +259,49 @@ class BindingMapping(object):
                 else:
                     raise errors.MissingRequiredBindingError(required_binding)
 
+    def get_scope_usability_violations(self, is_scope_usable_from_scope_fn):
+        """Finds bindings that inject bindings from unusable scopes.
+
+        This checks every binding's injected args without providing anything.
+        It doesn't check the args of classes provided directly from an object
+        graph, since those aren't known until provision.
+
+        Args:
+          is_scope_usable_from_scope_fn: a function taking two scope IDs and
+              returning whether an object in the first scope can be injected
+              into an object from the second scope
+        Returns:
+          a list of (binding, arg binding key, arg binding) triples, one per
+              arg whose binding's scope isn't usable from its binding's scope
+        """
+        violations = []
+        for binding in self._binding_key_to_binding.values():
+            for arg_binding_key in binding.get_injected_arg_binding_keys():
+                arg_binding = self.find(arg_binding_key.binding_key)
+                if (arg_binding is not None and
+                    not is_scope_usable_from_scope_fn(
+                        arg_binding.scope_id, binding.scope_id)):
+                    violations.append((binding, arg_binding_key, arg_binding))
+        return violations
+
+    def get_bindings(self):
+        """Returns all the bindings that binding keys unambiguously map to."""
+        return list(self._binding_key_to_binding.values())
+
+    def get_collided_bindings(self):
+        """Returns a map from each ambiguous binding key to its bindings."""
+        return {binding_key: list(colliding_bindings)
+                for binding_key, colliding_bindings in
+                self._collided_binding_key_to_bindings.items()}
+
+    def find(self, binding_key):
+        """Returns the binding for binding_key, or None if there's none.
+
+        Unlike get(), this doesn't need a description of the injection site,
+        which is expensive to compute and only needed for errors.
+        """
+        return self._binding_key_to_binding.get(binding_key)
+
     def get(self, binding_key, injection_site_desc):
         if binding_key in self._binding_key_to_binding:
             return self._binding_key_to_binding[binding_key]
@@ -168,25 +348,105 @@ def get_explicit_class_bindings(
         if decorators.is_explicitly_injectable(cls):
             for arg_name in get_arg_names_from_class_name(cls.__name__):
                 explicit_bindings.append(new_binding_to_class(
-                    binding_keys.new(arg_name), cls, scoping.DEFAULT_SCOPE,
-                    lambda cls=cls: locations.get_loc(cls)))
+                    binding_keys.new(arg_name), cls, scoping.DEFAULT_SCOPE))
     return explicit_bindings
 
 
+# Maps each class of binding specs to a (get_arg_names_from_provider_fn_name,
+# [(method name, [(binding key, scope ID), ...]), ...]) pair, holding what
+# get_provider_bindings() found for that function.
+_binding_spec_class_to_provider_methods = weakref.WeakKeyDictionary()
+
+
+def _get_provider_methods(
+        binding_spec_class, get_arg_names_from_provider_fn_name):
+    try:
+        cached_get_arg_names_fn, provider_methods = (
+            _binding_spec_class_to_provider_methods[binding_spec_class])
+        if cached_get_arg_names_fn is get_arg_names_from_provider_fn_name:
+            return provider_methods
+    except (KeyError, TypeError):
+        pass
+    # Reading the classes' __dict__s along the MRO, rather than calling
+    # inspect.getmembers() on the binding spec, finds the same methods
+    # without getting every attribute (e.g., evaluating properties) and
+    # sorting them all.
+    name_to_method = {}
+    for cls in reversed(binding_spec_class.__mro__):
+        for name, value in vars(cls).items():
+            if isinstance(value, (types.FunctionType, classmethod)):
+                name_to_method[name] = value
+            else:
+                name_to_method.pop(name, None)
+    provider_methods = []
+    for name, method in sorted(name_to_method.items()):
+        # A classmethod's __name__ is that of the function it wraps.
+        binding_keys_and_scope_ids = _get_binding_keys_and_scope_ids(
+            getattr(method, '__func__', method),
+            get_arg_names_from_provider_fn_name)
+        if binding_keys_and_scope_ids:
+            provider_methods.append((name, binding_keys_and_scope_ids))
+    try:
+        _binding_spec_class_to_provider_methods[binding_spec_class] = (
+            get_arg_names_from_provider_fn_name, provider_methods)
+    except TypeError:
+        pass
+    return provider_methods
+
+
+def _get_binding_keys_and_scope_ids(fn, get_arg_names_from_provider_fn_name):
+    default_arg_names = get_arg_names_from_provider_fn_name(fn.__name__)
+    return [(binding_keys.new(provider_decoration.arg_name,
+                              provider_decoration.annotated_with),
+             provider_decoration.in_scope_id)
+            for provider_decoration in decorators.get_provider_fn_decorations(
+                fn, default_arg_names)]
+
+
 def get_provider_bindings(
         binding_spec, known_scope_ids,
         get_arg_names_from_provider_fn_name=(
             providing.default_get_arg_names_from_provider_fn_name)):
+    """Gets the bindings for a binding spec's provider methods.
+
+    What's found in each class of binding specs is cached, so that only
+    binding the methods to binding_spec is repeated for each object graph.
+    So provider methods added to, or replaced on, a binding spec class after
+    it's first used aren't seen.  Methods bound to other objects that are
+    set as attributes of binding_spec itself (which hide its class's
+    attributes of the same names) are found anew each time.
+
+    Args:
+      binding_spec: a BindingSpec instance (or any object)
+      known_scope_ids: the IDs of the scopes that bindings may be in
+      get_arg_names_from_provider_fn_name: a function mapping a provider
+          method name to a sequence of the arg names for which that method
+          is a provider (if any)
+    Returns:
+      a list of Bindings
+    Raises:
+      UnknownScopeError: a provider method is in a scope not in
+          known_scope_ids
+    """
+    instance_attrs = getattr(binding_spec, '__dict__', {})
+    fns_and_binding_keys_and_scope_ids = [
+        (getattr(binding_spec, name), binding_keys_and_scope_ids)
+        for name, binding_keys_and_scope_ids in _get_provider_methods(
+            type(binding_spec), get_arg_names_from_provider_fn_name)
+        if name not in instance_attrs]
+    for name, value in sorted(instance_attrs.items()):
+        if inspect.ismethod(value):
+            fns_and_binding_keys_and_scope_ids.append(
+                (value, _get_binding_keys_and_scope_ids(
+                    value, get_arg_names_from_provider_fn_name)))
     provider_bindings = []
-    fns = inspect.getmembers(binding_spec, lambda x: inspect.ismethod(x))
-    for _, fn in fns:
-        default_arg_names = get_arg_names_from_provider_fn_name(fn.__name__)
-        fn_bindings = get_provider_fn_bindings(fn, default_arg_names)
-        for binding in fn_bindings:
-            if binding.scope_id not in known_scope_ids:
+    for fn, binding_keys_and_scope_ids in fns_and_binding_keys_and_scope_ids:
+        for binding_key, scope_id in binding_keys_and_scope_ids:
+            if scope_id not in known_scope_ids:
                 raise errors.UnknownScopeError(
-                    binding.scope_id, locations.get_name_and_loc(fn))
-        provider_bindings.extend(fn_bindings)
+                    scope_id, locations.get_name_and_loc(fn))
+            provider_bindings.append(
+                Binding(binding_key, TO_PROVIDER_FN, fn, scope_id))
     return provider_bindings
 
 
@@ -199,8 +459,7 @@ def get_implicit_class_bindings(
         arg_names = get_arg_names_from_class_name(cls.__name__)
         for arg_name in arg_names:
             implicit_bindings.append(new_binding_to_class(
-                binding_keys.new(arg_name), cls, scoping.DEFAULT_SCOPE,
-                lambda cls=cls: locations.get_loc(cls)))
+                binding_keys.new(arg_name), cls, scoping.DEFAULT_SCOPE))
     return implicit_bindings
 
 
@@ -210,7 +469,7 @@ class Binder(object):
         self._collected_bindings = collected_bindings
         self._scope_ids = scope_ids
         self._lock = threading.Lock()
-        self._class_bindings_created = []
+        self._class_bindings_created = set()
 
     def bind(self, arg_name, annotated_with=None,
              to_class=None, to_instance=None, in_scope=scoping.DEFAULT_SCOPE):
@@ -232,21 +491,15 @@ class Binder(object):
 
         # TODO(kurts): this is such a hack; isn't there a better way?
         if to_class is not None:
-            @decorators.annotate_arg('_pinject_class', (to_class, in_scope))
-            @decorators.provides(annotated_with=annotated_with,
-                                 in_scope=in_scope)
-            def provide_it(_pinject_class):
-                return _pinject_class
+            provide_it = new_bound_class_provider_fn(to_class, in_scope)
             with self._lock:
-                self._collected_bindings.extend(
-                    get_provider_fn_bindings(provide_it, [arg_name]))
+                self._collected_bindings.append(Binding(
+                    binding_key, TO_PROVIDER_FN, provide_it, in_scope))
                 if (to_class, in_scope) not in self._class_bindings_created:
                     back_frame_loc = locations.get_back_frame_loc()
-                    self._collected_bindings.append(new_binding_to_class(
-                        binding_keys.new('_pinject_class',
-                                         (to_class, in_scope)),
+                    self._collected_bindings.append(new_bound_class_binding(
                         to_class, in_scope, lambda: back_frame_loc))
-                    self._class_bindings_created.append((to_class, in_scope))
+                    self._class_bindings_created.add((to_class, in_scope))
         else:
             back_frame_loc = locations.get_back_frame_loc()
             with self._lock:
@@ -255,29 +508,65 @@ class Binder(object):
                     lambda: back_frame_loc))
 
 
-def new_binding_to_class(binding_key, to_class, in_scope, get_binding_loc_fn):
+# The name of the internal bindings to classes that bind(to_class=...) creates.
+BOUND_CLASS_BINDING_NAME = '_pinject_class'
+# The attribute, on the provider functions that bind(to_class=...) creates,
+# holding the bound class and scope.
+_BOUND_CLASS_AND_SCOPE_ATTR = '_pinject_bound_class_and_scope'
+
+
+def new_bound_class_provider_fn(to_class, in_scope):
+    """Creates the provider function that bind(to_class=...) binds to.
+
+    The provider function is injected with the class via the internal binding
+    created by new_bound_class_binding(), so that every arg name bound to the
+    same class in the same scope gets the same instance.
+
+    Args:
+      to_class: the bound class
+      in_scope: the ID of the scope in which to provide the class
+    Returns:
+      a provider function
+    """
+    def provide_it(_pinject_class):
+        return _pinject_class
+    decorators.annotate_arg_in_place(
+        provide_it, BOUND_CLASS_BINDING_NAME, (to_class, in_scope))
+    setattr(provide_it, _BOUND_CLASS_AND_SCOPE_ATTR, (to_class, in_scope))
+    return provide_it
+
+
+def get_bound_class_and_scope(provider_fn):
+    """Returns the (class, scope ID) that bind(to_class=...) bound, or None.
+
+    Args:
+      provider_fn: a provider function, possibly created by
+          new_bound_class_provider_fn()
+    """
+    return getattr(provider_fn, _BOUND_CLASS_AND_SCOPE_ATTR, None)
+
+
+def new_bound_class_binding(to_class, in_scope, get_binding_loc_fn=None):
+    """Creates the internal binding that bind(to_class=...) binds to."""
+    return new_binding_to_class(
+        binding_keys.new(BOUND_CLASS_BINDING_NAME, (to_class, in_scope)),
+        to_class, in_scope, get_binding_loc_fn)
+
+
+def new_binding_to_class(binding_key, to_class, in_scope,
+                         get_binding_loc_fn=None):
     if not inspect.isclass(to_class):
+        binding_loc = (get_binding_loc_fn() if get_binding_loc_fn is not None
+                       else locations.get_loc(to_class))
         raise errors.InvalidBindingTargetError(
-            get_binding_loc_fn(), binding_key, to_class, 'class')
-    def Proviser(injection_context, obj_provider, pargs, kwargs):
-        return obj_provider.provide_class(
-            to_class, injection_context, pargs, kwargs)
-    def GetBindingTargetDesc():
-        return 'the class {0}'.format(locations.get_name_and_loc(to_class))
-    return Binding(binding_key, Proviser, GetBindingTargetDesc, in_scope,
+            binding_loc, binding_key, to_class, 'class')
+    return Binding(binding_key, TO_CLASS, to_class, in_scope,
                    get_binding_loc_fn)
 
 
 def new_binding_to_instance(
         binding_key, to_instance, in_scope, get_binding_loc_fn):
-    def Proviser(injection_context, obj_provider, pargs, kwargs):
-        if pargs or kwargs:
-            raise TypeError('instance provider takes no arguments'
-                            ' ({0} given)'.format(len(pargs) + len(kwargs)))
-        return to_instance
-    def GetBindingTargetDesc():
-        return 'the instance {0!r}'.format(to_instance)
-    return Binding(binding_key, Proviser, GetBindingTargetDesc, in_scope,
+    return Binding(binding_key, TO_INSTANCE, to_instance, in_scope,
                    get_binding_loc_fn)
 
 
@@ -299,16 +588,8 @@ class BindingSpec(object):
 def get_provider_fn_bindings(provider_fn, default_arg_names):
     provider_decorations = decorators.get_provider_fn_decorations(
         provider_fn, default_arg_names)
-    def Proviser(injection_context, obj_provider, pargs, kwargs):
-        return obj_provider.call_with_injection(
-            provider_fn, injection_context, pargs, kwargs)
-    def GetBindingTargetDescFn():
-        return 'the provider method {0}'.format(
-            locations.get_name_and_loc(provider_fn))
     return [
         Binding(binding_keys.new(provider_decoration.arg_name,
                                  provider_decoration.annotated_with),
-                Proviser, GetBindingTargetDescFn,
-                provider_decoration.in_scope_id,
-                lambda p_fn=provider_fn: locations.get_loc(p_fn))
+                TO_PROVIDER_FN, provider_fn, provider_decoration.in_scope_id)
         for provider_decoration in provider_decorations]
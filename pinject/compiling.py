@@ -0,0 +1,381 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import ast
+import re
+import sys
+
+from . import bindings
+from . import decorators
+from . import errors
+from . import locations
+from . import provider_indirections
+from . import scoping
+from . import support
+
+
+_COMPILABLE_SCOPE_IDS = [scoping.SINGLETON, scoping.PROTOTYPE]
+
+
+def _get_importable_path(thing):
+    """Returns (module name, qualname) by which thing can be imported, or None.
+    """
+    module_name = getattr(thing, '__module__', None)
+    qualname = getattr(thing, '__qualname__', None)
+    if module_name is None or qualname is None or '<locals>' in qualname:
+        return None
+    resolved = sys.modules.get(module_name)
+    for attr in qualname.split('.'):
+        resolved = getattr(resolved, attr, None)
+    if resolved is not thing:
+        return None
+    return module_name, qualname
+
+
+def _is_literal(value):
+    try:
+        return ast.literal_eval(repr(value)) == value
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        return False
+
+
+class _CompiledBinding(object):
+    """A binding reachable from the roots, and how to generate its code."""
+
+    def __init__(self, index, binding):
+        self.index = index
+        self.binding = binding
+        # The (ArgBindingKey, _CompiledBinding) pairs injected into it.
+        self.args = []
+        # Whether some arg is injected with a function that provides it,
+        # which may pass args of its own.
+        self.is_provided_indirectly = False
+        # The module-level name of the bound instance, for bindings to
+        # instances.
+        self.instance_name = None
+
+    @property
+    def factory_name(self):
+        name = self.binding.binding_key.name
+        if name == bindings.BOUND_CLASS_BINDING_NAME:
+            name = self.binding.target.__name__
+        return '_provide_{0}_{1}'.format(
+            self.index, re.sub(r'\W', '_', name).strip('_'))
+
+    def get_bound_class_binding(self):
+        """Returns the _CompiledBinding that bind(to_class=...) delegates to.
+        """
+        if (self.binding.target_kind is bindings.TO_PROVIDER_FN and
+                bindings.get_bound_class_and_scope(self.binding.target)
+                is not None):
+            return self.args[0][1]
+        return None
+
+
+class _WiringWriter(object):
+    """Resolves the bindings reachable from root classes into source code."""
+
+    def __init__(self, binding_mapping):
+        self._binding_mapping = binding_mapping
+        self._binding_to_compiled = {}
+        self._compiled_bindings = []
+        self._module_name_to_alias = {}
+        self._thing_names = {}
+        self._import_lines = []
+        self._definition_lines = []
+        self._num_singletons = 0
+
+    def write(self, root_classes):
+        """Returns the source of a module providing each of root_classes."""
+        root_args = []
+        for root_class in root_classes:
+            if support.is_constructor_defined(root_class):
+                injection_site_fn = root_class.__init__
+            else:
+                injection_site_fn = None
+            root_args.append(self._compile_args(injection_site_fn))
+        index = 0
+        # Bindings are appended while iterating, as they're reached.
+        while index < len(self._compiled_bindings):
+            compiled = self._compiled_bindings[index]
+            binding = compiled.binding
+            compiled.args = self._compile_args(
+                binding.target_kind.get_injection_site_fn(binding.target))
+            index += 1
+        self._verify_no_cycles(root_args)
+
+        entry_point_names = []
+        functions = []
+        for compiled in self._compiled_bindings:
+            if compiled.binding.target_kind is bindings.TO_INSTANCE:
+                compiled.instance_name = self._get_instance_name(compiled)
+        for compiled in self._compiled_bindings:
+            # Where instances and bind(to_class=...) are injected directly,
+            # the injected value is used in place of a factory call.
+            if (compiled.is_provided_indirectly or
+                    (compiled.instance_name is None and
+                     compiled.get_bound_class_binding() is None)):
+                functions.append(self._get_factory_source(compiled))
+        for root_class, args in zip(root_classes, root_args):
+            entry_point_name = self._get_entry_point_name(
+                root_class, entry_point_names)
+            entry_point_names.append(entry_point_name)
+            functions.append('def {0}():\n    return {1}\n'.format(
+                entry_point_name,
+                self._get_call_source(self._get_name(root_class), args, 4)))
+
+        lines = ['"""Object wiring generated by pinject; do not edit.', '',
+                 'Each function provides a new instance of a root class, as',
+                 'ObjectGraph.provide() would:', '']
+        lines.extend('  {0}(): {1}.{2}'.format(name, root_class.__module__,
+                                               root_class.__qualname__)
+                     for name, root_class in zip(entry_point_names,
+                                                 root_classes))
+        lines.extend(['"""', '', ''])
+        if self._num_singletons:
+            lines.extend(['import threading', ''])
+        lines.extend(sorted(self._import_lines))
+        lines.extend(['', ''])
+        lines.append('__all__ = [{0}]'.format(
+            ', '.join(repr(name) for name in entry_point_names)))
+        lines.append('')
+        if self._num_singletons:
+            lines.extend([
+                '_NOT_PROVIDED = object()',
+                '_singletons = [_NOT_PROVIDED] * {0}'.format(
+                    self._num_singletons),
+                '# Like pinject\'s singleton scope, re-entrant, so that'
+                ' providing a',
+                '# singleton can provide other singletons.',
+                '_lock = threading.RLock()'])
+        lines.extend(self._definition_lines)
+        return '\n'.join(lines) + '\n\n\n' + '\n\n'.join(functions)
+
+    def _compile_args(self, injection_site_fn):
+        if injection_site_fn is None:
+            return []
+        args = []
+        for arg_binding_key in decorators.get_injectable_arg_binding_keys(
+                injection_site_fn, (), {}):
+            binding = self._binding_mapping.find(arg_binding_key.binding_key)
+            if binding is None:
+                # This raises the appropriate error.
+                binding = self._binding_mapping.get(
+                    arg_binding_key.binding_key,
+                    locations.get_name_and_loc(injection_site_fn))
+            compiled = self._binding_to_compiled.get(binding)
+            if compiled is None:
+                compiled = self._add_binding(binding)
+            if (arg_binding_key.provider_indirection is
+                    provider_indirections.INDIRECTION):
+                compiled.is_provided_indirectly = True
+            args.append((arg_binding_key, compiled))
+        return args
+
+    def _add_binding(self, binding):
+        if binding.scope_id not in _COMPILABLE_SCOPE_IDS:
+            raise errors.UncompilableBindingError(
+                str(binding), 'only singleton and prototype scopes can be'
+                ' compiled')
+        compiled = _CompiledBinding(len(self._compiled_bindings), binding)
+        self._binding_to_compiled[binding] = compiled
+        self._compiled_bindings.append(compiled)
+        return compiled
+
+    def _verify_no_cycles(self, root_args):
+        """Raises CyclicInjectionError if providing would recurse forever.
+
+        Args injected with functions that provide them don't count, since
+        those functions needn't be called while providing.
+        """
+        unvisited, in_progress, done = 0, 1, 2
+        states = [unvisited] * len(self._compiled_bindings)
+        def GetDirectDependencies(args):
+            return iter([
+                compiled for arg_binding_key, compiled in args
+                if (arg_binding_key.provider_indirection is
+                    provider_indirections.NO_INDIRECTION)])
+        for args in root_args:
+            stack = [(None, GetDirectDependencies(args))]
+            while stack:
+                for compiled in stack[-1][1]:
+                    if states[compiled.index] == in_progress:
+                        binding_stack = [c.binding for c, _ in stack[1:]]
+                        start = binding_stack.index(compiled.binding)
+                        raise errors.CyclicInjectionError(
+                            binding_stack[start:] + [compiled.binding])
+                    if states[compiled.index] == unvisited:
+                        states[compiled.index] = in_progress
+                        stack.append(
+                            (compiled, GetDirectDependencies(compiled.args)))
+                        break
+                else:
+                    compiled, _ = stack.pop()
+                    if compiled is not None:
+                        states[compiled.index] = done
+
+    def _get_name(self, thing):
+        """Returns a module-level name bound to an importable class or fn."""
+        try:
+            return self._thing_names[thing]
+        except KeyError:
+            pass
+        path = _get_importable_path(thing)
+        if path is None:
+            raise errors.UncompilableBindingError(
+                locations.get_name_and_loc(thing),
+                'it is not importable by its qualified name')
+        module_name, qualname = path
+        module_alias = self._module_name_to_alias.get(module_name)
+        if module_alias is None:
+            module_alias = '_m{0}'.format(len(self._module_name_to_alias))
+            self._module_name_to_alias[module_name] = module_alias
+            self._import_lines.append('import {0} as {1}'.format(
+                module_name, module_alias))
+        name = '_{0}_{1}'.format(qualname.replace('.', '_').lstrip('_'),
+                                 len(self._thing_names))
+        self._thing_names[thing] = name
+        self._definition_lines.append('{0} = {1}.{2}'.format(
+            name, module_alias, qualname))
+        return name
+
+    def _get_binding_spec_name(self, binding):
+        binding_spec = getattr(binding.target, '__self__', None)
+        method_name = getattr(binding.target, '__name__', None)
+        if (binding_spec is None or method_name is None or
+                getattr(binding_spec, method_name, None) != binding.target):
+            raise errors.UncompilableBindingError(
+                str(binding), 'only provider methods of binding specs can be'
+                ' compiled')
+        try:
+            return self._thing_names[binding_spec]
+        except KeyError:
+            pass
+        if getattr(binding_spec, '__dict__', None):
+            raise errors.UncompilableBindingError(
+                str(binding), 'its binding spec has attributes, so generated'
+                ' code can\'t re-create it')
+        class_name = self._get_name(type(binding_spec))
+        name = '_binding_spec_{0}'.format(len(self._thing_names))
+        self._thing_names[binding_spec] = name
+        self._definition_lines.append('{0} = {1}()'.format(name, class_name))
+        return name
+
+    def _get_instance_name(self, compiled):
+        instance = compiled.binding.target
+        if _get_importable_path(instance) is not None:
+            return self._get_name(instance)
+        if not _is_literal(instance):
+            raise errors.UncompilableBindingError(
+                str(compiled.binding), 'only instances that are literals, or'
+                ' that are importable by their qualified names, can be'
+                ' compiled')
+        name = '_instance_{0}'.format(compiled.index)
+        self._definition_lines.append('{0} = {1!r}'.format(name, instance))
+        return name
+
+    def _get_arg_source(self, arg_binding_key, compiled):
+        if (arg_binding_key.provider_indirection is
+                provider_indirections.INDIRECTION):
+            return compiled.factory_name
+        if compiled.instance_name is not None:
+            return compiled.instance_name
+        bound_class_compiled = compiled.get_bound_class_binding()
+        if bound_class_compiled is not None:
+            return self._get_arg_source(
+                compiled.args[0][0], bound_class_compiled)
+        return '{0}()'.format(compiled.factory_name)
+
+    def _get_call_source(self, callee, args, indent,
+                         pass_through_args=False):
+        arg_sources = []
+        if pass_through_args:
+            arg_sources.append('*pargs')
+        arg_sources.extend(
+            '{0}={1}'.format(arg_binding_key.arg_name,
+                             self._get_arg_source(arg_binding_key, compiled))
+            for arg_binding_key, compiled in args)
+        if pass_through_args:
+            arg_sources.append('**kwargs')
+        if not arg_sources:
+            return '{0}()'.format(callee)
+        return '{0}(\n{1})'.format(
+            callee, ',\n'.join(' ' * (indent + 4) + arg_source
+                               for arg_source in arg_sources))
+
+    def _get_factory_source(self, compiled):
+        binding = compiled.binding
+        header = 'def {0}():\n'.format(compiled.factory_name)
+        if compiled.instance_name is not None:
+            return header + '    return {0}\n'.format(compiled.instance_name)
+        bound_class_compiled = compiled.get_bound_class_binding()
+        if bound_class_compiled is not None:
+            return header + '    return {0}()\n'.format(
+                bound_class_compiled.factory_name)
+        if binding.target_kind is bindings.TO_CLASS:
+            callee = self._get_name(binding.target)
+        else:
+            callee = '{0}.{1}'.format(self._get_binding_spec_name(binding),
+                                      binding.target.__name__)
+        if compiled.is_provided_indirectly:
+            header = 'def {0}(*pargs, **kwargs):\n'.format(
+                compiled.factory_name)
+        if binding.scope_id is scoping.PROTOTYPE:
+            return header + '    return {0}\n'.format(self._get_call_source(
+                callee, compiled.args, 4, compiled.is_provided_indirectly))
+        call_source = self._get_call_source(
+            callee, compiled.args, 16, compiled.is_provided_indirectly)
+        slot = self._num_singletons
+        self._num_singletons += 1
+        return header + (
+            '    provided = _singletons[{0}]\n'
+            '    if provided is _NOT_PROVIDED:\n'
+            '        with _lock:\n'
+            '            provided = _singletons[{0}]\n'
+            '            if provided is _NOT_PROVIDED:\n'
+            '                provided = {1}\n'
+            '                _singletons[{0}] = provided\n'
+            '    return provided\n').format(slot, call_source)
+
+    def _get_entry_point_name(self, root_class, entry_point_names):
+        arg_names = bindings.default_get_arg_names_from_class_name(
+            root_class.__name__)
+        name = 'provide_{0}'.format(
+            arg_names[0] if arg_names else
+            re.sub(r'\W', '_', root_class.__name__).strip('_').lower())
+        if name in entry_point_names:
+            name = '{0}_{1}'.format(name, len(entry_point_names))
+        return name
+
+
+def generate_wiring_source(binding_mapping, root_classes):
+    """Generates a Python module that provides root classes without pinject.
+
+    Every binding reachable from the roots becomes a factory function, so
+    all the lookups that pinject does while providing are done once, here.
+    Unlike pinject, the generated functions don't check that nothing
+    provided is None.
+
+    Args:
+      binding_mapping: the BindingMapping of an object graph
+      root_classes: the classes to provide
+    Returns:
+      the source of the module, as a string
+    Raises:
+      Error: a root class isn't providable, or a binding reachable from one
+          can't be compiled
+    """
+    return _WiringWriter(binding_mapping).write(root_classes)
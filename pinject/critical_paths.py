@@ -0,0 +1,179 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import json
+
+
+class Construction(object):
+    """One binding's construction of a new value during a recorded run."""
+
+    __slots__ = ('binding_key_desc', 'name', 'start_secs', 'end_secs',
+                 'self_secs', 'dependencies', 'finish_secs',
+                 'critical_dependency')
+
+    def __init__(self, binding_key_desc, name, start_secs):
+        self.binding_key_desc = binding_key_desc
+        self.name = name
+        self.start_secs = start_secs
+        self.end_secs = None
+        self.self_secs = None
+        self.dependencies = []
+        # The earliest this could finish if everything ran in parallel.
+        self.finish_secs = None
+        self.critical_dependency = None
+
+    def to_dict(self):
+        return {'binding_key': self.binding_key_desc, 'name': self.name,
+                'self_secs': self.self_secs,
+                'parallel_finish_secs': self.finish_secs,
+                'dependencies': [dependency.binding_key_desc
+                                 for dependency in self.dependencies]}
+
+
+class CriticalPathReport(object):
+    """The critical path of a recorded run, and what parallelism could save.
+
+    Each construction's self time excludes constructing its dependencies.
+    With unlimited parallelism, a construction could start as soon as all of
+    its dependencies were constructed, so the run would take as long as the
+    critical path: the chain of dependencies with the most self time.
+    """
+
+    def __init__(self, constructions):
+        """Initializer.
+
+        Args:
+          constructions: the Constructions of the run, each of whose
+              finish_secs and critical_dependency are set
+        """
+        self.constructions = constructions
+        self.sequential_secs = sum(
+            construction.self_secs for construction in constructions)
+        self.critical_path = []
+        if constructions:
+            construction = max(constructions,
+                               key=lambda construction: construction.finish_secs)
+            while construction is not None:
+                self.critical_path.append(construction)
+                construction = construction.critical_dependency
+            self.critical_path.reverse()
+        self.critical_path_secs = sum(
+            construction.self_secs for construction in self.critical_path)
+
+    def get_potential_savings_secs(self):
+        """Returns how much time an ideal parallel schedule could save."""
+        return self.sequential_secs - self.critical_path_secs
+
+    def to_json_dict(self):
+        return {
+            'sequential_secs': self.sequential_secs,
+            'critical_path_secs': self.critical_path_secs,
+            'potential_savings_secs': self.get_potential_savings_secs(),
+            'critical_path': [construction.binding_key_desc
+                              for construction in self.critical_path],
+            'constructions': [construction.to_dict()
+                              for construction in self.constructions],
+        }
+
+    def to_json(self, indent=None):
+        return json.dumps(self.to_json_dict(), indent=indent)
+
+    def format(self, max_constructions=10):
+        """Returns this report as human-readable text.
+
+        Args:
+          max_constructions: the number of constructions with the most self
+              time to list, besides those on the critical path
+        Returns:
+          a multi-line string
+        """
+        lines = [
+            '{0} constructions took {1:.3f}s; the critical path takes'
+            ' {2:.3f}s, so ideal parallelism could save {3:.3f}s'.format(
+                len(self.constructions), self.sequential_secs,
+                self.critical_path_secs, self.get_potential_savings_secs()),
+            'critical path, from first constructed:']
+        for construction in self.critical_path:
+            lines.append('  {0:<48} {1:9.3f}s self'.format(
+                construction.name, construction.self_secs))
+        slowest = sorted(self.constructions,
+                         key=lambda construction: construction.self_secs,
+                         reverse=True)[:max_constructions]
+        if slowest:
+            lines.append('most self time:')
+            for construction in slowest:
+                lines.append('  {0:<48} {1:9.3f}s self'.format(
+                    construction.name, construction.self_secs))
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.format()
+
+
+def new_critical_path_report(trace_events):
+    """Analyzes the provisions recorded as trace events.
+
+    Args:
+      trace_events: trace event dicts, as recorded by a TraceRecorder
+    Returns:
+      a CriticalPathReport
+    """
+    constructions = []
+    binding_key_desc_to_last_construction = {}
+    tid_to_stack = {}
+    for event in trace_events:
+        stack = tid_to_stack.setdefault(event['tid'], [])
+        ts_secs = event['ts'] / 1e6
+        if event['ph'] == 'B':
+            # Each stack entry is [binding key desc, name, start secs,
+            # Construction of direct dependencies, duration of constructing
+            # them].
+            stack.append([event['args']['binding_key'], event['name'],
+                          ts_secs, [], 0.0])
+            continue
+        if not stack:
+            continue
+        binding_key_desc, name, start_secs, dependencies, dependency_secs = (
+            stack.pop())
+        if event['args'].get('cache_hit'):
+            dependency = binding_key_desc_to_last_construction.get(
+                binding_key_desc)
+            construction_secs = 0.0
+        else:
+            dependency = Construction(binding_key_desc, name, start_secs)
+            dependency.end_secs = ts_secs
+            dependency.self_secs = max(
+                ts_secs - start_secs - dependency_secs, 0.0)
+            dependency.dependencies = dependencies
+            constructions.append(dependency)
+            binding_key_desc_to_last_construction[binding_key_desc] = (
+                dependency)
+            construction_secs = ts_secs - start_secs
+        if stack:
+            if dependency is not None:
+                stack[-1][3].append(dependency)
+            stack[-1][4] += construction_secs
+
+    # Constructions are in the order they ended, so each one's dependencies
+    # come before it.
+    for construction in constructions:
+        construction.finish_secs = construction.self_secs
+        for dependency in construction.dependencies:
+            finish_secs = construction.self_secs + dependency.finish_secs
+            if finish_secs > construction.finish_secs:
+                construction.finish_secs = finish_secs
+                construction.critical_dependency = dependency
+    return CriticalPathReport(constructions)
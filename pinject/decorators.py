@@ -14,6 +14,10 @@ limitations under the License.
 """
 
 
+import inspect
+import threading
+import weakref
+
 import decorator
 
 from . import arg_binding_keys
@@ -53,6 +57,28 @@ def annotate_arg(arg_name, with_annotation):
                                 arg_binding_key=arg_binding_key)
 
 
+def annotate_arg_in_place(fn, arg_name, with_annotation):
+    """Annotates the only injected arg of a function that pinject creates.
+
+    Unlike @annotate_arg, this doesn't wrap fn in a signature-preserving
+    function, which is much more expensive to create, and so it's only for
+    functions that nothing else decorates.
+
+    Args:
+      fn: a function with no pinject decorations
+      arg_name: the name of the arg to annotate
+      with_annotation: an annotation object
+    Returns:
+      fn
+    """
+    setattr(fn, _ARG_BINDING_KEYS_ATTR,
+            [arg_binding_keys.new(arg_name, with_annotation)])
+    setattr(fn, _IS_WRAPPER_ATTR, True)
+    setattr(fn, _ORIG_FN_ATTR, fn)
+    setattr(fn, _PROVIDER_DECORATIONS_ATTR, [])
+    return fn
+
+
 def inject(arg_names=None, all_except=None):
     """Marks an initializer explicitly as injectable.
 
@@ -142,6 +168,8 @@ class ProviderDecoration(object):
       in_scope_id: a scope ID
     """
 
+    __slots__ = ('arg_name', 'annotated_with', 'in_scope_id')
+
     def __init__(self, arg_name, annotated_with, in_scope_id):
         self.arg_name = arg_name
         self.annotated_with = annotated_with
@@ -210,6 +238,7 @@ def _get_pinject_decorated_fn(fn):
         setattr(pinject_decorated_fn, _IS_WRAPPER_ATTR, True)
         setattr(pinject_decorated_fn, _ORIG_FN_ATTR, fn)
         setattr(pinject_decorated_fn, _PROVIDER_DECORATIONS_ATTR, [])
+        _INJECTABLE_CLASS_REGISTRY.register_init(pinject_decorated_fn, fn)
     return pinject_decorated_fn
 
 
@@ -263,12 +292,200 @@ def _get_pinject_wrapper(
     return get_pinject_decorated_fn_with_additions
 
 
+def get_orig_fn(fn):
+    """Returns the function that pinject decorators were applied to."""
+    return getattr(fn, _ORIG_FN_ATTR, fn)
+
+
 def is_explicitly_injectable(cls):
     return (hasattr(cls, '__init__') and
             hasattr(cls.__init__, _IS_WRAPPER_ATTR))
 
 
+class _InjectableClassRegistry(object):
+    """Tracks the classes whose initializers pinject decorators decorate.
+
+    Decorators are applied to __init__ before its class exists, so they
+    register the decorated initializer, and its class is looked up, by
+    qualified name in the initializer's globals, the first time it's
+    needed.  A decorated function not defined as some class's __init__
+    (e.g., assigned to __init__ in a class body) can't be attributed to a
+    class that way, so it's kept as unattributed, for finding.py to look
+    for its class in modules.  If a scan of all modules finds no class for
+    it (e.g., it's a binding spec's provider method decorated only with
+    @annotate_arg), it's kept as unowned, along with the modules scanned
+    for it, so that later scans only look in modules imported since.
+    Initializers, classes, and modules are weakly referenced, so that
+    registering them doesn't keep them alive.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Maps each decorated initializer whose class hasn't been looked up
+        # yet to its class's qualified name, split into attribute names.
+        self._pending_init_to_class_attrs = weakref.WeakKeyDictionary()
+        self._unattributed_fns = weakref.WeakSet()
+        self._unowned_fns = weakref.WeakSet()
+        # The modules scanned for every unowned fn.
+        self._modules_scanned_for_unowned_fns = weakref.WeakSet()
+        self._classes = weakref.WeakSet()
+
+    def register_init(self, pinject_decorated_fn, fn):
+        class_qualname, _, fn_name = getattr(
+            fn, '__qualname__', '').rpartition('.')
+        # Classes defined in functions aren't found by scanning modules
+        # either, so they're not registered.
+        if '<locals>' in class_qualname or not hasattr(fn, '__globals__'):
+            return
+        with self._lock:
+            if fn_name == '__init__' and class_qualname:
+                self._pending_init_to_class_attrs[pinject_decorated_fn] = (
+                    class_qualname.split('.'))
+            else:
+                self._unattributed_fns.add(pinject_decorated_fn)
+
+    def get_classes(self):
+        """Returns the registered classes, explicitly injectable or not."""
+        with self._lock:
+            for init_fn, class_attrs in list(
+                    self._pending_init_to_class_attrs.items()):
+                cls = getattr(init_fn, _ORIG_FN_ATTR).__globals__.get(
+                    class_attrs[0])
+                for attr in class_attrs[1:]:
+                    cls = getattr(cls, '__dict__', {}).get(attr)
+                if inspect.isclass(cls):
+                    self._classes.add(cls)
+                    del self._pending_init_to_class_attrs[init_fn]
+            return list(self._classes)
+
+    def get_unattributed_fns(self):
+        """Returns the decorated fns that may be some unknown class's init.
+
+        Provider functions aren't initializers, so they're left out.
+        """
+        with self._lock:
+            return [fn for fn in self._unattributed_fns
+                    if not getattr(fn, _PROVIDER_DECORATIONS_ATTR)]
+
+    def get_unowned_fns(self, modules):
+        """Returns the unowned fns, and which of modules to scan for them."""
+        with self._lock:
+            return (list(self._unowned_fns),
+                    [module for module in modules
+                     if module not in self._modules_scanned_for_unowned_fns])
+
+    def add_classes(self, classes):
+        """Registers classes whose __init__ was unattributed or unowned."""
+        with self._lock:
+            for cls in classes:
+                self._classes.add(cls)
+                init_fn = vars(cls).get('__init__')
+                self._unattributed_fns.discard(init_fn)
+                self._unowned_fns.discard(init_fn)
+
+    def set_unowned(self, fns, scanned_modules, rescanned_unowned_fns):
+        """Registers fns that scanned_modules contain no class for.
+
+        Args:
+          fns: the fns that the scan found no class for
+          scanned_modules: the modules scanned
+          rescanned_unowned_fns: whether the scan looked for all unowned fns
+              in all of the modules, rather than only in the modules not
+              already scanned for them
+        """
+        with self._lock:
+            if rescanned_unowned_fns:
+                self._modules_scanned_for_unowned_fns.clear()
+            for fn in fns:
+                self._unattributed_fns.discard(fn)
+                self._unowned_fns.add(fn)
+            for module in scanned_modules:
+                try:
+                    self._modules_scanned_for_unowned_fns.add(module)
+                except TypeError:
+                    # sys.modules may hold objects other than modules,
+                    # which aren't weakly referenceable, and are scanned
+                    # every time.
+                    pass
+
+
+_INJECTABLE_CLASS_REGISTRY = _InjectableClassRegistry()
+
+
+def get_explicitly_injectable_classes():
+    """Returns the classes that pinject decorators make explicitly injectable.
+
+    That's the classes whose __init__ is decorated with @inject,
+    @annotate_arg, etc., and their subclasses that inherit it, as long as
+    they're defined at the top level of a module, or nested in such a class
+    (i.e., not in a function), and the module has been imported.  Classes
+    whose decorated __init__ is defined outside the class body are only
+    included once add_explicitly_injectable_classes() has added them.
+    """
+    classes = set()
+    to_visit = _INJECTABLE_CLASS_REGISTRY.get_classes()
+    while to_visit:
+        cls = to_visit.pop()
+        if cls not in classes and is_explicitly_injectable(cls):
+            classes.add(cls)
+            to_visit.extend(type.__subclasses__(cls))
+    return classes
+
+
+def get_unattributed_injectable_fns():
+    """Returns decorated fns that may be the __init__ of unregistered classes.
+
+    They're decorated functions that weren't defined as __init__ in a class
+    body, and aren't provider functions, e.g., a module-level function
+    assigned to __init__ in a class body.
+    """
+    return _INJECTABLE_CLASS_REGISTRY.get_unattributed_fns()
+
+
+def get_unowned_injectable_fns(modules):
+    """Returns unattributed fns that no class was found for.
+
+    Args:
+      modules: the modules that may need scanning for their classes
+    Returns:
+      the unowned fns, and the modules in modules not yet scanned for all
+          of them
+    """
+    return _INJECTABLE_CLASS_REGISTRY.get_unowned_fns(modules)
+
+
+def add_explicitly_injectable_classes(classes):
+    """Registers classes found to have an unattributed fn as __init__."""
+    _INJECTABLE_CLASS_REGISTRY.add_classes(classes)
+
+
+def set_unowned_injectable_fns(fns, scanned_modules, rescanned_unowned_fns):
+    """Registers unattributed fns that no class in scanned_modules has."""
+    _INJECTABLE_CLASS_REGISTRY.set_unowned(
+        fns, scanned_modules, rescanned_unowned_fns)
+
+
+# Maps a function to its injectable arg binding keys.  Those depend only on the
+# function and its decorations, so there's no need to recompute them (and
+# reallocate the arg binding keys) every time the function is injected into,
+# which adds up over tens of thousands of classes.
+_FN_TO_INJECTABLE_ARG_BINDING_KEYS = weakref.WeakKeyDictionary()
+
+
 def get_injectable_arg_binding_keys(fn, direct_pargs, direct_kwargs):
+    # get() doesn't raise (and make this catch) a KeyError on a miss.
+    all_arg_binding_keys = _FN_TO_INJECTABLE_ARG_BINDING_KEYS.get(fn)
+    if all_arg_binding_keys is None:
+        all_arg_binding_keys = _get_injectable_arg_binding_keys(fn)
+        try:
+            _FN_TO_INJECTABLE_ARG_BINDING_KEYS[fn] = all_arg_binding_keys
+        except TypeError:
+            # fn isn't weakly referenceable, and so can't be memoized.
+            pass
+    return all_arg_binding_keys
+
+
+def _get_injectable_arg_binding_keys(fn):
     non_injectable_arg_names = []
     if hasattr(fn, _IS_WRAPPER_ATTR):
         existing_arg_binding_keys = getattr(fn, _ARG_BINDING_KEYS_ATTR)
@@ -284,15 +501,19 @@ def get_injectable_arg_binding_keys(fn, direct_pargs, direct_kwargs):
     num_args_with_defaults = len(defaults) if defaults is not None else 0
     if num_args_with_defaults:
         arg_names = arg_names[:-num_args_with_defaults]
+    if not existing_arg_binding_keys and not non_injectable_arg_names:
+        # The common case of an undecorated function: every arg without a
+        # default is injected, unannotated.
+        return tuple([arg_binding_keys.new(arg_name)
+                      for arg_name in _remove_self_if_exists(arg_names)])
     unbound_injectable_arg_names = arg_binding_keys.get_unbound_arg_names(
         [arg_name for arg_name in _remove_self_if_exists(arg_names)
          if arg_name not in non_injectable_arg_names],
         existing_arg_binding_keys)
 
-    all_arg_binding_keys = list(existing_arg_binding_keys)
-    all_arg_binding_keys.extend([arg_binding_keys.new(arg_name)
-                                 for arg_name in unbound_injectable_arg_names])
-    return all_arg_binding_keys
+    return tuple(existing_arg_binding_keys) + tuple(
+        [arg_binding_keys.new(arg_name)
+         for arg_name in unbound_injectable_arg_names])
 
 
 # TODO(kurts): this feels icky.  Is there no way around this, because
@@ -0,0 +1,397 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import collections
+import json
+
+from . import annotations
+from . import binding_keys
+from . import bindings
+from . import decorators
+from . import provider_indirections
+from . import support
+
+
+class DependencyGraph(object):
+    """The static graph of which bindings are injected into which.
+
+    Nodes are binding keys, plus any root classes.  There's an edge from one
+    node to another for each injected arg of the first that the second is
+    bound to.  Nothing is instantiated to compute the graph.
+
+    Query methods take a node as a BindingKey, a root class, or an
+    unannotated arg name.
+
+    Internally, nodes are numbered densely, and all edges are kept in one
+    flat list of node numbers, ordered by the node they're from, rather than
+    in a list per node.  That way, building a graph of hundreds of thousands
+    of bindings allocates a handful of objects beyond the arg binding keys,
+    and is cheap to query.
+    """
+
+    def __init__(self, nodes, node_to_index, node_to_binding,
+                 dependency_starts, dependencies, dependency_arg_binding_keys,
+                 unresolved_args):
+        """Initializer.
+
+        Args:
+          nodes: the BindingKeys and root classes in the graph
+          node_to_index: a map from each node to its number
+          node_to_binding: a list mapping node number to the Binding for that
+              node, or None for root classes
+          dependency_starts: a list mapping node number to where that node's
+              dependencies start in dependencies, plus a final element for
+              where they end
+          dependencies: a list of the node numbers of each node's
+              dependencies, one node after another
+          dependency_arg_binding_keys: a list of the ArgBindingKeys for
+              dependencies, parallel to it
+          unresolved_args: a list of (node, ArgBindingKey) pairs, one for
+              each injected arg not unambiguously bound to anything
+        """
+        self._nodes = nodes
+        self._node_to_index = node_to_index
+        self._node_to_binding = node_to_binding
+        self._dependency_starts = dependency_starts
+        self._dependencies = dependencies
+        self._dependency_arg_binding_keys = dependency_arg_binding_keys
+        self._unresolved_args = unresolved_args
+        self._node_to_dependents = None
+        self._node_to_depth = None
+
+    def get_nodes(self):
+        """Returns the binding keys and root classes in the graph."""
+        return list(self._nodes)
+
+    def get_num_edges(self):
+        return len(self._dependencies)
+
+    def get_unresolved_args(self):
+        """Returns (node, ArgBindingKey) pairs for args bound to nothing.
+
+        Args whose binding keys are bound ambiguously are included.
+        """
+        return list(self._unresolved_args)
+
+    def get_dependencies(self, node):
+        """Returns the nodes directly injected into a node."""
+        index = self._get_index(node)
+        return [self._nodes[dependency] for dependency in
+                self._dependencies[self._dependency_starts[index]:
+                                   self._dependency_starts[index + 1]]]
+
+    def get_dependents(self, node):
+        """Returns the nodes that a node is directly injected into."""
+        return [self._nodes[dependent] for dependent in
+                self._get_node_to_dependents()[self._get_index(node)]]
+
+    def get_transitive_dependents(self, node):
+        """Returns the nodes that a node is injected into, even indirectly.
+
+        These are what may be affected by changing the node's binding.
+        """
+        node_to_dependents = self._get_node_to_dependents()
+        start = self._get_index(node)
+        seen = {start}
+        queue = collections.deque([start])
+        while queue:
+            for dependent in node_to_dependents[queue.popleft()]:
+                if dependent not in seen:
+                    seen.add(dependent)
+                    queue.append(dependent)
+        seen.discard(start)
+        return [self._nodes[index] for index in sorted(seen)]
+
+    def get_fan_in(self, node):
+        """Returns how many nodes a node is directly injected into."""
+        return len(self._get_node_to_dependents()[self._get_index(node)])
+
+    def get_fan_out(self, node):
+        """Returns how many nodes are directly injected into a node."""
+        index = self._get_index(node)
+        return (self._dependency_starts[index + 1] -
+                self._dependency_starts[index])
+
+    def get_depth(self, node):
+        """Returns the length of the longest dependency chain below a node.
+
+        Nodes without dependencies have depth 0.  Dependencies that would
+        form a cycle are ignored.
+        """
+        return self._get_node_to_depth()[self._get_index(node)]
+
+    def get_max_depth(self):
+        return max(self._get_node_to_depth() or [0])
+
+    def get_cycles(self):
+        """Returns chains of nodes that would be injected into themselves.
+
+        Each cycle is a list of nodes, each injected into the one before it,
+        with the first node repeated at the end.  Provider args (e.g.,
+        provide_foo) don't count, since the function they inject needn't be
+        called during provision.  Each cycle is found once, from where the
+        search first entered it.
+        """
+        unvisited, in_progress, done = 0, 1, 2
+        states = [unvisited] * len(self._nodes)
+        cycles = []
+        def GetDirectDependencies(index):
+            return iter([
+                self._dependencies[edge] for edge in range(
+                    self._dependency_starts[index],
+                    self._dependency_starts[index + 1])
+                if not _is_provider(self._dependency_arg_binding_keys[edge])])
+        for start in range(len(self._nodes)):
+            if states[start] != unvisited:
+                continue
+            states[start] = in_progress
+            stack = [(start, GetDirectDependencies(start))]
+            while stack:
+                for dependency in stack[-1][1]:
+                    if states[dependency] == in_progress:
+                        path = [index for index, _ in stack]
+                        cycles.append(
+                            [self._nodes[index] for index in
+                             path[path.index(dependency):] + [dependency]])
+                    elif states[dependency] == unvisited:
+                        states[dependency] = in_progress
+                        stack.append(
+                            (dependency, GetDirectDependencies(dependency)))
+                        break
+                else:
+                    index, _ = stack.pop()
+                    states[index] = done
+        return cycles
+
+    def to_json_dict(self):
+        """Returns the graph as a JSON-serializable dict."""
+        node_to_depth = self._get_node_to_depth()
+        return {
+            'nodes': [dict(self._get_node_desc(index), id=index,
+                           depth=node_to_depth[index])
+                      for index in range(len(self._nodes))],
+            'edges': [
+                {'from': index, 'to': dependency,
+                 'arg': arg_binding_key.arg_name,
+                 'is_provider': _is_provider(arg_binding_key)}
+                for index, dependency, arg_binding_key in self._get_edges()],
+            'unresolved': [
+                {'from': self._node_to_index[node],
+                 'arg': arg_binding_key.arg_name}
+                for node, arg_binding_key in self._unresolved_args],
+        }
+
+    def to_json(self, indent=None):
+        return json.dumps(self.to_json_dict(), indent=indent)
+
+    def to_dot(self, graph_name='pinject'):
+        """Returns the graph in the Graphviz DOT language.
+
+        Edges for provider args (e.g., provide_foo) are dashed, since they
+        inject a function that provides the dependency, rather than the
+        dependency itself.
+        """
+        lines = ['digraph {0} {{'.format(_quote_dot(graph_name)),
+                 '  node [shape=box];']
+        for index in range(len(self._nodes)):
+            desc = self._get_node_desc(index)
+            label = desc['name']
+            if desc['annotation'] is not None:
+                label += '\n' + desc['annotation']
+            if desc['target'] is not None:
+                label += '\n' + desc['target']
+            lines.append('  n{0} [label={1}];'.format(
+                index, _quote_dot(label)))
+        for index, dependency, arg_binding_key in self._get_edges():
+            if _is_provider(arg_binding_key):
+                attrs = ' [style=dashed]'
+            else:
+                attrs = ''
+            lines.append('  n{0} -> n{1}{2};'.format(
+                index, dependency, attrs))
+        lines.append('}')
+        return '\n'.join(lines) + '\n'
+
+    def _get_index(self, node):
+        if isinstance(node, str):
+            node = binding_keys.new(node)
+        return self._node_to_index[node]
+
+    def _get_node_desc(self, index):
+        node = self._nodes[index]
+        binding = self._node_to_binding[index]
+        if binding is None:
+            return {'name': node.__name__, 'annotation': None,
+                    'target': None, 'scope': None}
+        annotation = node.annotation_as_adjective()
+        if annotation == annotations.NO_ANNOTATION.as_adjective():
+            annotation = None
+        return {'name': node.name, 'annotation': annotation,
+                'target': _get_target_name(binding),
+                'scope': str(binding.scope_id)}
+
+    def _get_edges(self):
+        """Yields (node number, dependency node number, ArgBindingKey)."""
+        for index in range(len(self._nodes)):
+            for edge in range(self._dependency_starts[index],
+                              self._dependency_starts[index + 1]):
+                yield (index, self._dependencies[edge],
+                       self._dependency_arg_binding_keys[edge])
+
+    def _get_node_to_dependents(self):
+        if self._node_to_dependents is None:
+            node_to_dependents = [[] for _ in self._nodes]
+            for index, dependency, _ in self._get_edges():
+                node_to_dependents[dependency].append(index)
+            self._node_to_dependents = node_to_dependents
+        return self._node_to_dependents
+
+    def _get_node_to_depth(self):
+        if self._node_to_depth is None:
+            self._node_to_depth = _get_node_to_depth(
+                self._dependency_starts, self._dependencies)
+        return self._node_to_depth
+
+
+def _get_node_to_depth(dependency_starts, dependencies):
+    """Computes each node's longest dependency chain, without recursion.
+
+    Args:
+      dependency_starts: a list mapping node number to where that node's
+          dependencies start in dependencies, plus a final element for where
+          they end
+      dependencies: a list of the node numbers of each node's dependencies,
+          one node after another
+    Returns:
+      a list mapping node number to depth
+    """
+    num_nodes = len(dependency_starts) - 1
+    def GetDependencies(index):
+        return dependencies[dependency_starts[index]:
+                            dependency_starts[index + 1]]
+    unvisited, in_progress, done = 0, 1, 2
+    states = [unvisited] * num_nodes
+    node_to_depth = [0] * num_nodes
+    for start in range(num_nodes):
+        if states[start] != unvisited:
+            continue
+        states[start] = in_progress
+        start_dependencies = GetDependencies(start)
+        stack = [(start, start_dependencies, iter(start_dependencies))]
+        while stack:
+            index, index_dependencies, unexplored = stack[-1]
+            for dependency in unexplored:
+                if states[dependency] == unvisited:
+                    states[dependency] = in_progress
+                    dependency_dependencies = GetDependencies(dependency)
+                    stack.append((dependency, dependency_dependencies,
+                                  iter(dependency_dependencies)))
+                    break
+            else:
+                stack.pop()
+                states[index] = done
+                depth = 0
+                for dependency in index_dependencies:
+                    if states[dependency] == done:
+                        depth = max(depth, node_to_depth[dependency] + 1)
+                node_to_depth[index] = depth
+    return node_to_depth
+
+
+def _is_provider(arg_binding_key):
+    return (arg_binding_key.provider_indirection is
+            provider_indirections.INDIRECTION)
+
+
+def _get_target_name(binding):
+    if binding.target_kind is bindings.TO_INSTANCE:
+        return 'instance of {0}'.format(type(binding.target).__name__)
+    return getattr(binding.target, '__name__', None)
+
+
+def _quote_dot(text):
+    return '"{0}"'.format(
+        text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+
+
+def new_dependency_graph(binding_mapping, root_classes=None):
+    """Computes the dependency graph of a binding mapping.
+
+    Args:
+      binding_mapping: a BindingMapping
+      root_classes: the classes whose dependencies to include, transitively,
+          or None to include all bindings
+    Returns:
+      a DependencyGraph
+    """
+    return _new_dependency_graph(binding_mapping, root_classes)
+
+
+def _new_dependency_graph(binding_mapping, root_classes):
+    nodes = []
+    node_to_index = {}
+    node_to_binding = []
+    node_to_arg_binding_keys = []
+    def AddNode(node, binding, arg_binding_keys_):
+        node_to_index[node] = len(nodes)
+        nodes.append(node)
+        node_to_binding.append(binding)
+        node_to_arg_binding_keys.append(arg_binding_keys_)
+
+    if root_classes is None:
+        node_to_binding.extend(binding_mapping.get_bindings())
+        nodes.extend([binding.binding_key for binding in node_to_binding])
+        node_to_index.update({node: index for index, node in enumerate(nodes)})
+        node_to_arg_binding_keys.extend(
+            [binding.get_injected_arg_binding_keys()
+             for binding in node_to_binding])
+    else:
+        for root_class in root_classes:
+            if root_class in node_to_index:
+                continue
+            if support.is_constructor_defined(root_class):
+                arg_binding_keys_ = decorators.get_injectable_arg_binding_keys(
+                    root_class.__init__, (), {})
+            else:
+                arg_binding_keys_ = ()
+            AddNode(root_class, None, arg_binding_keys_)
+
+    dependency_starts = []
+    dependencies = []
+    dependency_arg_binding_keys = []
+    unresolved_args = []
+    # Nodes are added while iterating, for dependencies reachable from roots.
+    index = 0
+    while index < len(nodes):
+        dependency_starts.append(len(dependencies))
+        for arg_binding_key in node_to_arg_binding_keys[index]:
+            binding_key = arg_binding_key.binding_key
+            dependency = node_to_index.get(binding_key)
+            if dependency is None:
+                binding = binding_mapping.find(binding_key)
+                if binding is None:
+                    unresolved_args.append((nodes[index], arg_binding_key))
+                    continue
+                dependency = len(nodes)
+                AddNode(binding_key, binding,
+                        binding.get_injected_arg_binding_keys())
+            dependencies.append(dependency)
+            dependency_arg_binding_keys.append(arg_binding_key)
+        index += 1
+    dependency_starts.append(len(dependencies))
+    return DependencyGraph(nodes, node_to_index, node_to_binding,
+                           dependency_starts, dependencies,
+                           dependency_arg_binding_keys, unresolved_args)
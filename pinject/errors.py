@@ -42,6 +42,27 @@ class BadDependencyScopeError(Error):
                 binding_key, injection_site_desc, to_scope_id, from_scope_id))
 
 
+class BadDependencyScopesError(Error):
+
+    def __init__(self, violations):
+        Error.__init__(
+            self, 'bindings inject from scopes not usable from their own'
+            ' scopes:\n{0}'.format('\n'.join(
+                '  when injecting {0} into {1}, scope {2} is not usable from'
+                ' scope {3}'.format(
+                    arg_binding_key, binding.get_binding_target_desc_fn(),
+                    arg_binding.scope_id, binding.scope_id)
+                for binding, arg_binding_key, arg_binding in violations)))
+
+
+class BadWarmupProfileError(Error):
+
+    def __init__(self, path):
+        Error.__init__(
+            self, '{0} is not a warmup profile written by'
+            ' WarmupProfileRecorder.write()'.format(path))
+
+
 class ConfigureMethodMissingArgsError(Error):
 
     def __init__(self, configure_fn, possible_args):
@@ -257,6 +278,14 @@ class TooManyArgsToInjectDecoratorError(Error):
             ' all_except'.format(decorator_loc))
 
 
+class UncompilableBindingError(Error):
+
+    def __init__(self, desc, reason):
+        Error.__init__(
+            self, 'cannot compile {0} into generated code: {1}'.format(
+                desc, reason))
+
+
 class UnknownScopeError(Error):
 
     def __init__(self, scope_id, binding_loc):
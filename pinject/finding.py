@@ -14,61 +14,257 @@ limitations under the License.
 """
 
 
-import inspect
+import os
+import site
 import sys
+import sysconfig
+import weakref
+
+from . import decorators
+from . import startup_reports
 
 
 ALL_IMPORTED_MODULES = object()
 
 
-def find_classes(modules, classes):
+class ModuleScanPolicy(object):
+    """Which modules to search for classes to bind implicitly.
+
+    A module matches a prefix if the prefix is its name, or the name of a
+    package containing it, so 'foo' matches 'foo' and 'foo.bar', but not
+    'foobar'.  A module matching an exclude prefix is never searched.  If
+    there are include prefixes, then only modules matching them are
+    searched; otherwise, all modules except library modules (if
+    exclude_library_modules) are searched.
+    """
+
+    def __init__(self, include_prefixes=(), exclude_prefixes=(),
+                 exclude_library_modules=True):
+        """Initializer.
+
+        Args:
+          include_prefixes: a sequence of module name prefixes
+          exclude_prefixes: a sequence of module name prefixes
+          exclude_library_modules: whether to skip built-in modules, and
+              modules in the standard library or site-packages directories,
+              unless they match include_prefixes
+        """
+        self.include_prefixes = tuple(include_prefixes)
+        self.exclude_prefixes = tuple(exclude_prefixes)
+        self.exclude_library_modules = exclude_library_modules
+
+    def should_scan(self, module):
+        module_name = getattr(module, '__name__', None)
+        if not isinstance(module_name, str):
+            return not self.include_prefixes
+        if _has_prefix(module_name, self.exclude_prefixes):
+            return False
+        if self.include_prefixes:
+            return _has_prefix(module_name, self.include_prefixes)
+        return not (self.exclude_library_modules and
+                    _is_library_module(module))
+
+    def __repr__(self):
+        return ('ModuleScanPolicy(include_prefixes={0!r},'
+                ' exclude_prefixes={1!r}, exclude_library_modules={2!r})'
+                .format(list(self.include_prefixes),
+                        list(self.exclude_prefixes),
+                        self.exclude_library_modules))
+
+
+def _has_prefix(module_name, prefixes):
+    for prefix in prefixes:
+        if (module_name == prefix or
+                module_name.startswith(prefix) and
+                module_name[len(prefix)] == '.'):
+            return True
+    return False
+
+
+# The directories holding the standard library and installed packages, each
+# ending with a path separator, computed when first needed.
+_library_dirs = None
+# Maps each module checked by _is_library_module() to whether it's one.
+_module_to_is_library = weakref.WeakKeyDictionary()
+
+
+def _get_library_dirs():
+    global _library_dirs
+    if _library_dirs is None:
+        dirs = set(sysconfig.get_paths().get(name) for name in [
+            'stdlib', 'platstdlib', 'purelib', 'platlib'])
+        # site.getsitepackages() is missing in some virtualenvs.
+        if hasattr(site, 'getsitepackages'):
+            dirs.update(site.getsitepackages())
+        if hasattr(site, 'getusersitepackages'):
+            dirs.add(site.getusersitepackages())
+        _library_dirs = tuple(
+            os.path.join(os.path.realpath(dir_path), '')
+            for dir_path in dirs if dir_path)
+    return _library_dirs
+
+
+def _is_library_module(module):
+    try:
+        return _module_to_is_library[module]
+    except (KeyError, TypeError):
+        pass
+    module_name = module.__name__
+    if (module_name in sys.builtin_module_names or
+            module_name.partition('.')[0] in getattr(
+                sys, 'stdlib_module_names', ())):
+        is_library = True
+    else:
+        path = getattr(module, '__file__', None)
+        is_library = (isinstance(path, str) and
+                      os.path.realpath(path).startswith(_get_library_dirs()))
+    try:
+        _module_to_is_library[module] = is_library
+    except TypeError:
+        pass
+    return is_library
+
+
+def find_classes(modules, classes,
+                 startup_report=startup_reports.NULL_STARTUP_REPORT,
+                 module_scan_policy=None):
     if classes is not None:
         all_classes = set(classes)
     else:
         all_classes = set()
-    for module in _get_explicit_or_default_modules(modules):
+    for module in get_explicit_or_default_modules(
+            modules, module_scan_policy):
         # TODO(kurts): how is a module getting to be None??
         if module is not None:
-            all_classes |= _find_classes_in_module(module)
+            with startup_report.time_module_scan(module):
+                all_classes |= _find_classes_in_module(module)
     return all_classes
 
 
-def _get_explicit_or_default_modules(modules):
+def find_explicitly_injectable_classes(modules, classes,
+                                       module_scan_policy=None):
+    """Finds the classes that find_classes() would, if they're injectable.
+
+    Given ALL_IMPORTED_MODULES, rather than scanning modules, this looks up
+    the classes that pinject decorators have registered, so it takes time
+    proportional to the number of those classes, not to the number of
+    module members; registered classes are found under their own names in
+    the modules defining them.  Only decorated functions that the
+    decorators couldn't attribute to a class (e.g., assigned to __init__ in
+    a class body) need modules scanned: first the modules defining them,
+    then, if that doesn't find all their classes, all modules (and later,
+    for the functions still without a class, only the modules imported
+    since, so that, e.g., binding spec provider methods decorated only with
+    @annotate_arg don't make every call scan all modules).  Explicitly
+    given modules are scanned, since there are usually few of them.
+
+    Args:
+      modules: the modules in which to find classes, ALL_IMPORTED_MODULES,
+          or None
+      classes: classes to return whether or not they're injectable, or None
+      module_scan_policy: a ModuleScanPolicy restricting the modules in
+          which to find classes, or None
+    Returns:
+      a set of classes
+    """
+    if classes is not None:
+        all_classes = set(classes)
+    else:
+        all_classes = set()
+    if modules is None:
+        return all_classes
+    if modules is not ALL_IMPORTED_MODULES:
+        for module in get_explicit_or_default_modules(
+                modules, module_scan_policy):
+            if module is not None:
+                all_classes.update(
+                    cls for cls in _find_classes_in_module(module)
+                    if decorators.is_explicitly_injectable(cls))
+        return all_classes
+    _add_classes_of_unattributed_fns(module_scan_policy)
+    for cls in decorators.get_explicitly_injectable_classes():
+        module = sys.modules.get(cls.__module__)
+        if (getattr(module, '__dict__', {}).get(cls.__name__) is cls and
+                (module_scan_policy is None or
+                 module_scan_policy.should_scan(module))):
+            all_classes.add(cls)
+    return all_classes
+
+
+def _add_classes_of_unattributed_fns(module_scan_policy):
+    modules = get_explicit_or_default_modules(
+        ALL_IMPORTED_MODULES, module_scan_policy)
+    fns = decorators.get_unattributed_injectable_fns()
+    unowned_fns, unscanned_modules = decorators.get_unowned_injectable_fns(
+        modules)
+    if fns:
+        defining_module_globals_ids = {
+            id(decorators.get_orig_fn(fn).__globals__) for fn in fns}
+        defining_modules = [
+            module for module in modules
+            if id(getattr(module, '__dict__', None)) in
+            defining_module_globals_ids]
+        fns = _add_classes_of_fns(fns, defining_modules)
+    if fns:
+        # Scanning all modules anyway, so unowned fns may as well be looked
+        # for in all of them too.
+        fns.extend(unowned_fns)
+        decorators.set_unowned_injectable_fns(
+            _add_classes_of_fns(fns, modules), modules,
+            rescanned_unowned_fns=True)
+    elif unowned_fns and unscanned_modules:
+        decorators.set_unowned_injectable_fns(
+            _add_classes_of_fns(unowned_fns, unscanned_modules),
+            unscanned_modules, rescanned_unowned_fns=False)
+
+
+def _add_classes_of_fns(fns, modules):
+    """Registers the classes in modules with fns as __init__.
+
+    Returns:
+      the fns that no class in modules has as __init__
+    """
+    fn_ids = {id(fn) for fn in fns}
+    found_classes = set()
+    for module in modules:
+        for cls in _find_classes_in_module(module):
+            if id(vars(cls).get('__init__')) in fn_ids:
+                found_classes.add(cls)
+    decorators.add_explicitly_injectable_classes(found_classes)
+    fn_ids.difference_update(id(vars(cls)['__init__'])
+                             for cls in found_classes)
+    return [fn for fn in fns if id(fn) in fn_ids]
+
+
+def get_explicit_or_default_modules(modules, module_scan_policy=None):
     if modules is ALL_IMPORTED_MODULES:
-        return list(sys.modules.values())
+        modules = list(sys.modules.values())
     elif modules is None:
         return []
+    if module_scan_policy is not None:
+        modules = [module for module in modules
+                   if module is not None and
+                   module_scan_policy.should_scan(module)]
     return modules
 
 
 def _find_classes_in_module(module):
-    classes = set()
-
+    # Reading the module's __dict__, rather than calling
+    # inspect.getmembers(), doesn't call a module-level __getattr__ (which
+    # may lazily import other modules), doesn't sort the members, and
+    # doesn't get attributes of the members: checking the type of each
+    # member, rather than using isinstance(), doesn't get its __class__,
+    # which, e.g., SWIG's global cvar raises NameError for.
+    #
+    # The classes found aren't memoized per module.  Python doesn't expose a
+    # dict's version, and fingerprinting the members to validate a memo costs
+    # about as much as this scan.  A cheaper check, such as the number of
+    # members, would miss members rebound by importlib.reload() or
+    # mock.patch().
     try:
-        # Handle find_classes_in_module when module.__bases__ is not a tuple:
-        #   https://github.com/google/pinject/pull/54
-        #
-        # modules, such tensorboard.compat.tensorflow_stub (2.2.2) return the
-        # __bases__ attribute as an integer, instead of the expected tuple
-        #
-        # when the inspect.getmembers() function attemps to iterate through it
-        # an error is raised
-        #
-        # this pre-empts this error, by assigning an empty tuple to avoid TypeError
-        if not isinstance(module.__bases__, tuple):
-            module.__bases__ = ()
-    except AttributeError:
-        pass
-
-    for member_name, member in inspect.getmembers(module):
-        try:
-            if inspect.isclass(member) and not member_name == '__class__':
-                classes.add(member)
-        except NameError:
-            # In Python 3 calling isinstance() on SWIG's global cvar property
-            # raises:
-            #     "NameError: Unknown C global variable"
-            # In that case just continue, otherwise let the Error through.
-            if not member_name == 'cvar':
-                raise
-    return classes
+        members = list(vars(module).values())
+    except TypeError:
+        # sys.modules may hold objects other than modules.
+        return set()
+    return {member for member in members
+            if issubclass(type(member), type)}
@@ -14,6 +14,8 @@ limitations under the License.
 """
 
 
+import threading
+
 from . import errors
 from . import locations
 from . import scoping
@@ -22,15 +24,23 @@ from . import scoping
 class InjectionContextFactory(object):
     """A creator of _InjectionContexts."""
 
-    def __init__(self, is_scope_usable_from_scope_fn):
+    def __init__(self, is_scope_usable_from_scope_fn, scope_ids=()):
         """Initializer.
 
         Args:
           is_scope_usable_from_scope_fn: a function taking two scope IDs and
               returning whether an object in the first scope can be injected
               into an object from the second scope
+          scope_ids: the known scope IDs, for each pair of which
+              is_scope_usable_from_scope_fn is evaluated up front
         """
-        self._is_scope_usable_from_scope_fn = is_scope_usable_from_scope_fn
+        self._scope_usability = scoping.ScopeUsabilityMatrix(
+            is_scope_usable_from_scope_fn, scope_ids)
+
+    def is_scope_usable_from_scope(self, to_scope_id, from_scope_id):
+        """Returns whether to_scope_id is usable from from_scope_id."""
+        return self._scope_usability.is_scope_usable_from_scope(
+            to_scope_id, from_scope_id)
 
     def new(self, injection_site_fn):
         """Creates a _InjectionContext.
@@ -41,31 +51,84 @@ class InjectionContextFactory(object):
           a new empty _InjectionContext in the default scope
         """
         return _InjectionContext(
-            injection_site_fn, binding_stack=[], scope_id=scoping.UNSCOPED,
-            is_scope_usable_from_scope_fn=self._is_scope_usable_from_scope_fn)
+            injection_site_fn, binding=None, parent=None,
+            scope_id=scoping.UNSCOPED, scope_usability=self._scope_usability)
+
+
+# Walking the ancestors of a context this shallow to check for a cycle is
+# cheaper than allocating an _InjectionPath; deeper contexts use one, so that
+# checking isn't quadratic in the depth of chains of dependencies.
+_MAX_WALKED_DEPTH = 8
+
+
+class _InjectionPath(object):
+    """The injection contexts from the top level to the latest one in a thread.
+
+    Checking a child binding for a cycle looks up the depth at which it was
+    last in progress, rather than walking the linked list of contexts, so
+    that each check takes constant rather than linear time.  Contexts are
+    only ever added right below their parent, replacing whatever was below
+    it, so a context is on the path (and so are its ancestors) iff it's the
+    one at its depth.  Contexts are recorded by ID, so that the path doesn't
+    keep them alive; while a context is alive, no other context that's added
+    to the path can have its ID.
+    """
+
+    __slots__ = ('context_ids', 'bindings', 'binding_to_depth',
+                 'thread_ident')
+
+    def __init__(self, contexts):
+        """Initializer.
+
+        Args:
+          contexts: the contexts from the top level to the latest one
+        """
+        self.context_ids = [id(context) for context in contexts]
+        self.bindings = [context._binding for context in contexts]
+        self.binding_to_depth = {
+            binding: depth for depth, binding in enumerate(self.bindings)}
+        self.thread_ident = threading.get_ident()
 
 
 class _InjectionContext(object):
-    """The context of dependency-injecting some bound value."""
+    """The context of dependency-injecting some bound value.
+
+    Injection contexts form a linked list from the current binding back to the
+    top, rather than each holding a copy of the whole binding stack, so that
+    deep injection takes linear rather than quadratic memory.  Each also
+    holds its depth, so that observing a provision needn't walk the list, and
+    the _InjectionPath it was last on, for checking for cycles.
+    """
+
+    __slots__ = ('_injection_site_fn', '_binding', '_parent', '_scope_id',
+                 '_scope_usability', '_usable_scope_ids', '_depth', '_path')
 
-    def __init__(self, injection_site_fn, binding_stack, scope_id,
-                 is_scope_usable_from_scope_fn):
+    def __init__(self, injection_site_fn, binding, parent, scope_id,
+                 scope_usability, path=None):
         """Initializer.
 
         Args:
           injection_site_fn: the function currently being injected into
-          binding_stack: a sequence of the bindings whose use in injection is
-              in-progress, from the highest level (first) to the current level
-              (last)
-          scope_id: the scope ID of the current (last) binding's scope
-          is_scope_usable_from_scope_fn: a function taking two scope IDs and
-              returning whether an object in the first scope can be injected
-              into an object from the second scope
+          binding: the current binding, whose use in injection is in progress,
+              or None at the top level
+          parent: the _InjectionContext of the next-higher level, or None at
+              the top level
+          scope_id: the scope ID of the current binding's scope
+          scope_usability: the ScopeUsabilityMatrix for checking whether
+              child bindings' scopes are usable from scope_id
+          path: the _InjectionPath that this context is being added to, or
+              None
         """
         self._injection_site_fn = injection_site_fn
-        self._binding_stack = binding_stack
+        self._binding = binding
+        self._parent = parent
         self._scope_id = scope_id
-        self._is_scope_usable_from_scope_fn = is_scope_usable_from_scope_fn
+        self._scope_usability = scope_usability
+        self._usable_scope_ids = scope_usability.get_usable_scope_ids(scope_id)
+        self._depth = 0 if parent is None else parent._depth
+        if binding is not None:
+            self._depth += 1
+        self._path = path
 
     def get_child(self, injection_site_fn, binding):
         """Creates a child injection context.
@@ -80,18 +143,75 @@ class _InjectionContext(object):
           a new _InjectionContext
         """
         child_scope_id = binding.scope_id
-        new_binding_stack = self._binding_stack + [binding]
-        if binding in self._binding_stack:
-            raise errors.CyclicInjectionError(new_binding_stack)
-        if not self._is_scope_usable_from_scope_fn(
-                child_scope_id, self._scope_id):
+        depth = self._depth
+        if depth < _MAX_WALKED_DEPTH:
+            context = self
+            while context is not None:
+                if context._binding is binding:
+                    raise errors.CyclicInjectionError(
+                        self._get_binding_stack() + [binding])
+                context = context._parent
+            path = None
+        else:
+            path = self._get_path()
+            binding_depth = path.binding_to_depth.get(binding)
+            if (binding_depth is not None and binding_depth <= depth and
+                    path.bindings[binding_depth] is binding):
+                raise errors.CyclicInjectionError(
+                    self._get_binding_stack() + [binding])
+        if (child_scope_id not in self._usable_scope_ids and
+                not self._scope_usability.is_scope_usable_from_scope(
+                    child_scope_id, self._scope_id)):
             raise errors.BadDependencyScopeError(
                 self.get_injection_site_desc(),
                 self._scope_id, child_scope_id, binding.binding_key)
-        return _InjectionContext(
-            injection_site_fn, new_binding_stack, child_scope_id,
-            self._is_scope_usable_from_scope_fn)
+        child = _InjectionContext(
+            injection_site_fn, binding, self, child_scope_id,
+            self._scope_usability, path)
+        if path is not None:
+            del path.context_ids[depth + 1:]
+            del path.bindings[depth + 1:]
+            path.context_ids.append(id(child))
+            path.bindings.append(binding)
+            path.binding_to_depth[binding] = depth + 1
+        return child
+
+    def _get_path(self):
+        """Returns the _InjectionPath that this context is the latest on."""
+        depth = self._depth
+        path = self._path
+        if (path is None or path.thread_ident != threading.get_ident() or
+                len(path.context_ids) <= depth or
+                path.context_ids[depth] != id(self)):
+            # This context isn't the latest at its depth in this thread
+            # (e.g., its parent was shallow enough to walk, or it's been
+            # injected into a provider function called later, or in another
+            # thread), so a new path starts from its ancestors.
+            contexts = []
+            context = self
+            while context is not None:
+                contexts.append(context)
+                context = context._parent
+            contexts.reverse()
+            path = _InjectionPath(contexts)
+            self._path = path
+        return path
+
+    def get_depth(self):
+        """Returns the number of bindings in progress, including this one."""
+        return self._depth
 
     def get_injection_site_desc(self):
         """Returns a description of the current injection site."""
         return locations.get_name_and_loc(self._injection_site_fn)
+
+    def _get_binding_stack(self):
+        """Returns the in-progress bindings, from the top level to this one."""
+        binding_stack = []
+        context = self
+        while context is not None:
+            if context._binding is not None:
+                binding_stack.append(context._binding)
+            context = context._parent
+        binding_stack.reverse()
+        return binding_stack
@@ -0,0 +1,396 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import bisect
+import collections
+import dis
+import json
+import tracemalloc
+import types
+
+from . import bindings
+from . import decorators
+from . import provision_observers
+
+
+# The default number of frames that tracemalloc stores per allocation.  An
+# allocation is attributed to a binding only if its initializer or provider
+# function is among those frames.
+DEFAULT_NFRAMES = 32
+
+
+class BindingMemory(object):
+    """The memory still allocated that one binding's construction allocated.
+
+    Attributes:
+      binding: the Binding
+      binding_spec_desc: the name of the BindingSpec class that created the
+          binding, or None if no binding spec did
+      size_bytes: the total size of the allocated memory blocks
+      num_blocks: the number of allocated memory blocks
+    """
+
+    __slots__ = ('binding', 'binding_spec_desc', 'size_bytes', 'num_blocks')
+
+    def __init__(self, binding, binding_spec_desc):
+        self.binding = binding
+        self.binding_spec_desc = binding_spec_desc
+        self.size_bytes = 0
+        self.num_blocks = 0
+
+    def to_dict(self):
+        binding_key = self.binding.binding_key
+        return {'binding_key': str(binding_key), 'name': binding_key.name,
+                'annotation': binding_key.annotation_as_adjective(),
+                'target': _get_target_desc(self.binding),
+                'scope': str(self.binding.scope_id),
+                'binding_spec': self.binding_spec_desc,
+                'size_bytes': self.size_bytes, 'num_blocks': self.num_blocks}
+
+
+class Allocator(object):
+    """A line of code whose allocations a binding's construction retains."""
+
+    __slots__ = ('filename', 'lineno', 'binding', 'size_bytes', 'num_blocks')
+
+    def __init__(self, filename, lineno, binding):
+        self.filename = filename
+        self.lineno = lineno
+        self.binding = binding
+        self.size_bytes = 0
+        self.num_blocks = 0
+
+    def to_dict(self):
+        return {'filename': self.filename, 'lineno': self.lineno,
+                'binding_key': str(self.binding.binding_key),
+                'size_bytes': self.size_bytes, 'num_blocks': self.num_blocks}
+
+
+class MemoryReport(object):
+    """Memory still allocated, attributed to the bindings that allocated it.
+
+    Memory is attributed to a binding if it was allocated while the
+    binding's initializer or provider function was running, including in
+    functions it called, but not while constructing the binding's
+    dependencies.  Since only memory still allocated is counted, memory
+    kept alive by a scope (e.g., a singleton and what it refers to) is
+    counted, and memory that has been freed isn't.
+    """
+
+    def __init__(self, binding_memories, allocators, unattributed_size_bytes):
+        """Initializer.
+
+        Args:
+          binding_memories: BindingMemory objects, for bindings to which some
+              memory was attributed
+          allocators: Allocator objects
+          unattributed_size_bytes: the size of the memory still allocated
+              that wasn't attributed to any binding
+        """
+        self.binding_memories = sorted(
+            binding_memories, key=lambda binding_memory: (
+                -binding_memory.size_bytes,
+                binding_memory.binding.binding_key.name))
+        self.allocators = sorted(
+            allocators, key=lambda allocator: -allocator.size_bytes)
+        self.attributed_size_bytes = sum(
+            binding_memory.size_bytes for binding_memory in binding_memories)
+        self.unattributed_size_bytes = unattributed_size_bytes
+        self.scope_to_size_bytes = collections.defaultdict(int)
+        self.binding_spec_to_size_bytes = collections.defaultdict(int)
+        for binding_memory in binding_memories:
+            self.scope_to_size_bytes[
+                str(binding_memory.binding.scope_id)] += (
+                    binding_memory.size_bytes)
+            self.binding_spec_to_size_bytes[
+                binding_memory.binding_spec_desc] += binding_memory.size_bytes
+
+    def to_json_dict(self, max_allocators=100):
+        return {
+            'attributed_size_bytes': self.attributed_size_bytes,
+            'unattributed_size_bytes': self.unattributed_size_bytes,
+            'scopes': _get_sorted_sizes(self.scope_to_size_bytes, 'scope'),
+            'binding_specs': _get_sorted_sizes(
+                self.binding_spec_to_size_bytes, 'binding_spec'),
+            'bindings': [binding_memory.to_dict()
+                         for binding_memory in self.binding_memories],
+            'top_allocators': [allocator.to_dict() for allocator in
+                               self.allocators[:max_allocators]],
+        }
+
+    def to_json(self, indent=None):
+        return json.dumps(self.to_json_dict(), indent=indent)
+
+    def format(self, max_bindings=10, max_allocators=10):
+        """Returns this report as human-readable text.
+
+        Args:
+          max_bindings: the number of bindings retaining the most memory to
+              list
+          max_allocators: the number of lines of code whose allocations are
+              retained the most to list
+        Returns:
+          a multi-line string
+        """
+        lines = ['{0} retained by bindings, {1} not attributed to'
+                 ' bindings'.format(_format_size(self.attributed_size_bytes),
+                                    _format_size(self.unattributed_size_bytes))]
+        def AddSizes(title, desc_to_size_bytes, none_desc):
+            lines.append(title)
+            for item in _get_sorted_sizes(desc_to_size_bytes, 'desc'):
+                desc = item['desc']
+                lines.append('  {0:<48} {1:>10}'.format(
+                    none_desc if desc is None else desc,
+                    _format_size(item['size_bytes'])))
+        AddSizes('by scope:', self.scope_to_size_bytes, None)
+        AddSizes('by binding spec:', self.binding_spec_to_size_bytes,
+                 '(no binding spec)')
+        lines.append('by binding:')
+        for binding_memory in self.binding_memories[:max_bindings]:
+            lines.append('  {0:<48} {1:>10} in {2} blocks'.format(
+                binding_memory.binding.binding_key.name,
+                _format_size(binding_memory.size_bytes),
+                binding_memory.num_blocks))
+        lines.append('top allocators:')
+        for allocator in self.allocators[:max_allocators]:
+            lines.append('  {0:<48} {1:>10} for {2}'.format(
+                '{0}:{1}'.format(allocator.filename, allocator.lineno),
+                _format_size(allocator.size_bytes),
+                allocator.binding.binding_key.name))
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.format()
+
+
+def _get_sorted_sizes(desc_to_size_bytes, desc_name):
+    return [{desc_name: desc, 'size_bytes': size_bytes}
+            for desc, size_bytes in sorted(
+                desc_to_size_bytes.items(),
+                key=lambda item: (-item[1], str(item[0])))]
+
+
+def _format_size(size_bytes):
+    for unit in ['B', 'KiB', 'MiB']:
+        if size_bytes < 1024:
+            return '{0:.1f} {1}'.format(size_bytes, unit)
+        size_bytes /= 1024.0
+    return '{0:.1f} GiB'.format(size_bytes)
+
+
+def _get_target_desc(binding):
+    if binding.target_kind is bindings.TO_INSTANCE:
+        return 'instance of {0}'.format(type(binding.target).__name__)
+    return getattr(binding.target, '__name__', None)
+
+
+def _get_target_code(binding):
+    """Returns the code whose frames allocate for a binding, or None."""
+    if binding.target_kind is bindings.TO_CLASS:
+        fn = getattr(binding.target, '__init__', None)
+    elif binding.target_kind is bindings.TO_PROVIDER_FN:
+        fn = binding.target
+    else:
+        # Instances were allocated before being bound.
+        return None
+    fn = decorators.get_orig_fn(getattr(fn, '__func__', fn))
+    fn = getattr(fn, '__func__', fn)
+    return getattr(fn, '__code__', None)
+
+
+def _get_last_lineno(code):
+    """Returns the last line of code, including any functions it defines."""
+    last_lineno = code.co_firstlineno
+    codes = [code]
+    while codes:
+        code = codes.pop()
+        for _, lineno in dis.findlinestarts(code):
+            if lineno is not None and lineno > last_lineno:
+                last_lineno = lineno
+        codes.extend(const for const in code.co_consts
+                     if isinstance(const, types.CodeType))
+    return last_lineno
+
+
+class _BindingLocator(object):
+    """Finds the binding whose initializer or provider a frame is in."""
+
+    def __init__(self, bindings_):
+        """Initializer.
+
+        Args:
+          bindings_: Bindings, in order of preference for bindings whose
+              targets share code
+        """
+        seen_codes = set()
+        filename_to_ranges = collections.defaultdict(list)
+        for binding in bindings_:
+            code = _get_target_code(binding)
+            if code is None or code in seen_codes:
+                continue
+            seen_codes.add(code)
+            filename_to_ranges[code.co_filename].append(
+                (code.co_firstlineno, _get_last_lineno(code), binding))
+        # Each file's ranges are sorted by first line, and the first lines
+        # are kept in a parallel list so that they can be bisected.  Another
+        # parallel list has the maximum last line of the ranges so far.
+        self._filename_to_ranges = {}
+        for filename, ranges in filename_to_ranges.items():
+            ranges.sort(key=lambda range_: range_[0])
+            max_last_linenos = []
+            max_last_lineno = 0
+            for _, last_lineno, _ in ranges:
+                max_last_lineno = max(max_last_lineno, last_lineno)
+                max_last_linenos.append(max_last_lineno)
+            self._filename_to_ranges[filename] = (
+                [range_[0] for range_ in ranges], max_last_linenos, ranges)
+
+    def find(self, filename, lineno):
+        """Returns the Binding for a frame, or None."""
+        try:
+            first_linenos, max_last_linenos, ranges = (
+                self._filename_to_ranges[filename])
+        except KeyError:
+            return None
+        # Ranges can nest (e.g., a provider function defined within
+        # another), so look for the innermost range containing the line.
+        index = bisect.bisect_right(first_linenos, lineno) - 1
+        while index >= 0 and max_last_linenos[index] >= lineno:
+            first_lineno, last_lineno, binding = ranges[index]
+            if lineno <= last_lineno:
+                return binding
+            index -= 1
+        return None
+
+
+def new_memory_report(snapshot, bindings_, binding_key_to_binding_spec):
+    """Attributes the memory in a tracemalloc snapshot to bindings.
+
+    Args:
+      snapshot: a tracemalloc.Snapshot
+      bindings_: the Bindings to attribute memory to, in order of preference
+          for bindings whose targets share code
+      binding_key_to_binding_spec: a map from BindingKey to the BindingSpec
+          that created its binding
+    Returns:
+      a MemoryReport
+    """
+    binding_locator = _BindingLocator(bindings_)
+    binding_to_memory = {}
+    allocator_key_to_allocator = {}
+    unattributed_size_bytes = 0
+    snapshot = snapshot.filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__)])
+    for statistic in snapshot.statistics('traceback'):
+        # Frames are ordered from oldest to most recent.
+        for frame in reversed(statistic.traceback):
+            binding = binding_locator.find(frame.filename, frame.lineno)
+            if binding is not None:
+                break
+        else:
+            unattributed_size_bytes += statistic.size
+            continue
+        binding_memory = binding_to_memory.get(binding)
+        if binding_memory is None:
+            binding_spec = binding_key_to_binding_spec.get(binding.binding_key)
+            binding_memory = BindingMemory(
+                binding, None if binding_spec is None
+                else type(binding_spec).__name__)
+            binding_to_memory[binding] = binding_memory
+        binding_memory.size_bytes += statistic.size
+        binding_memory.num_blocks += statistic.count
+        allocation_frame = statistic.traceback[-1]
+        allocator_key = (allocation_frame.filename, allocation_frame.lineno,
+                         binding)
+        allocator = allocator_key_to_allocator.get(allocator_key)
+        if allocator is None:
+            allocator = Allocator(*allocator_key)
+            allocator_key_to_allocator[allocator_key] = allocator
+        allocator.size_bytes += statistic.size
+        allocator.num_blocks += statistic.count
+    return MemoryReport(list(binding_to_memory.values()),
+                        list(allocator_key_to_allocator.values()),
+                        unattributed_size_bytes)
+
+
+class MemoryAccountant(provision_observers.ObservingContextManager):
+    """Attributes memory allocated during a with-block to bindings.
+
+    tracemalloc traces allocations while in the with-block (unless it was
+    already tracing, in which case allocations made since it started are
+    included too).  On leaving the with-block, a snapshot of the memory
+    still allocated is taken, so that get_report() reports on memory
+    retained at that point.
+    """
+
+    def __init__(self, obj_graph, bindings_, binding_key_to_binding_spec,
+                 nframes=DEFAULT_NFRAMES):
+        """Initializer.
+
+        Args:
+          obj_graph: the ObjectGraph whose bindings to account memory to
+          bindings_: the Bindings of obj_graph
+          binding_key_to_binding_spec: a map from BindingKey to the
+              BindingSpec that created its binding
+          nframes: the number of frames for tracemalloc to store per
+              allocation, if it's not already tracing
+        """
+        super(MemoryAccountant, self).__init__(obj_graph)
+        self._bindings = bindings_
+        self._binding_key_to_binding_spec = binding_key_to_binding_spec
+        self._nframes = nframes
+        # Used as an insertion-ordered set.
+        self._constructed_bindings = {}
+        self._started_tracing = False
+        self._snapshot = None
+
+    def __enter__(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self._nframes)
+            self._started_tracing = True
+        return super(MemoryAccountant, self).__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super(MemoryAccountant, self).__exit__(
+            exc_type, exc_value, traceback)
+        self._snapshot = tracemalloc.take_snapshot()
+        if self._started_tracing:
+            tracemalloc.stop()
+        return False
+
+    def on_provide_end(self, binding, scope_id, depth, is_cache_hit,
+                       elapsed_secs):
+        if not is_cache_hit:
+            # A binding constructed again (e.g., in prototype scope) keeps
+            # its first position, which decides attribution when bindings
+            # share an initializer.
+            self._constructed_bindings[binding] = None
+
+    def get_report(self):
+        """Attributes the memory still allocated to bindings.
+
+        Returns:
+          a MemoryReport, as of leaving the with-block, or as of now if still
+              in it
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = tracemalloc.take_snapshot()
+        # If bindings share an initializer (e.g., a class bound under two
+        # names), memory is attributed to whichever was constructed first.
+        return new_memory_report(
+            snapshot, list(self._constructed_bindings) + list(self._bindings),
+            self._binding_key_to_binding_spec)
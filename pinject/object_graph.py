@@ -14,17 +14,52 @@ limitations under the License.
 """
 
 
+import contextlib
+import threading
+
+from . import arg_binding_keys
+from . import binding_counts
 from . import bindings
+from . import compiling
 from . import decorators
+from . import dependency_graphs
 from . import errors
 from . import finding
 from . import injection_contexts
 from . import locations
+from . import memory_accounting
 from . import object_providers
+from . import provider_indirections
 from . import providing
+from . import provision_stats
 from . import required_bindings as required_bindings_lib
 from . import scoping
+from . import snapshots
+from . import startup_reports
 from . import support
+from . import trace_events
+from . import validation
+from . import warmup_profiles
+
+
+# Whether a with-block of collecting_startup_reports() is running.
+_collect_all_startup_reports = False
+
+
+@contextlib.contextmanager
+def collecting_startup_reports():
+    """Makes new_object_graph() collect startup reports in a with-block.
+
+    This is for tools, such as python -m pinject, that create object graphs
+    by calling code that doesn't pass collect_startup_report=True itself.
+    """
+    global _collect_all_startup_reports
+    was_collecting = _collect_all_startup_reports
+    _collect_all_startup_reports = True
+    try:
+        yield
+    finally:
+        _collect_all_startup_reports = was_collecting
 
 
 def new_object_graph(
@@ -37,7 +72,9 @@ def new_object_graph(
         get_arg_names_from_provider_fn_name=(
             providing.default_get_arg_names_from_provider_fn_name),
         id_to_scope=None, is_scope_usable_from_scope=lambda _1, _2: True,
-        use_short_stack_traces=True):
+        verify_scope_usability=False, use_short_stack_traces=True,
+        collect_startup_report=False, collect_provision_stats=False,
+        snapshot=None, module_scan_policy=None):
     """Creates a new object graph.
 
     Args:
@@ -65,15 +102,37 @@ def new_object_graph(
           returning whether an object in the first scope can be injected into
           an object from the second scope; by default, injection is allowed
           from any scope into any other scope
+      verify_scope_usability: whether to check, when creating the object
+          graph, every binding's injected args against
+          is_scope_usable_from_scope, and to report all violations at once,
+          rather than finding them one at a time during provision
       use_short_stack_traces: whether to shorten the stack traces for
           exceptions that Pinject raises, so that they don't contain the
           innards of Pinject
+      collect_startup_report: whether to time the phases of creating the
+          object graph, for ObjectGraph.get_startup_report()
+      collect_provision_stats: whether to count provisions per binding key,
+          for ObjectGraph.get_provision_stats()
+      snapshot: the path of a file in which to keep a snapshot of the
+          object graph's bindings; if the file holds a snapshot taken from
+          the same source files, binding specs, and options, then the
+          bindings are loaded from it instead of finding classes and calling
+          binding specs, and otherwise the snapshot is (re)written, unless
+          some binding can't be referred to from another process (e.g., a
+          binding to an instance); with ALL_IMPORTED_MODULES and no
+          module_scan_policy, library modules aren't searched, as with a
+          default ModuleScanPolicy; if None (the default), then no snapshot
+      module_scan_policy: a ModuleScanPolicy choosing which of modules to
+          search for classes (e.g., to skip the standard library and
+          installed packages); if None (the default), then all of them
     Returns:
       an ObjectGraph
     Raises:
       Error: the object graph is not creatable as specified
 
     """
+    collect_startup_report = (
+        collect_startup_report or _collect_all_startup_reports)
     try:
         if modules is not None and modules is not finding.ALL_IMPORTED_MODULES:
             support.verify_module_types(modules, 'modules')
@@ -91,64 +150,82 @@ def new_object_graph(
         if is_scope_usable_from_scope is not None:
             support.verify_callable(is_scope_usable_from_scope,
                                     'is_scope_usable_from_scope')
-        injection_context_factory = injection_contexts.InjectionContextFactory(
-            is_scope_usable_from_scope)
-        id_to_scope = scoping.get_id_to_scope_with_defaults(id_to_scope)
-        bindable_scopes = scoping.BindableScopes(id_to_scope)
-        known_scope_ids = id_to_scope.keys()
+        if collect_startup_report:
+            startup_report = startup_reports.StartupReport()
+        else:
+            startup_report = startup_reports.NULL_STARTUP_REPORT
+        with startup_report.time_phase('scopes'):
+            id_to_scope = scoping.get_id_to_scope_with_defaults(id_to_scope)
+            bindable_scopes = scoping.BindableScopes(id_to_scope)
+            known_scope_ids = id_to_scope.keys()
+            injection_context_factory = (
+                injection_contexts.InjectionContextFactory(
+                    is_scope_usable_from_scope, known_scope_ids))
 
-        found_classes = finding.find_classes(modules, classes)
-        if only_use_explicit_bindings:
-            implicit_class_bindings = []
+        if (snapshot is not None and
+                modules is finding.ALL_IMPORTED_MODULES and
+                module_scan_policy is None):
+            # Library modules hold classes (e.g., builtins) that can't be
+            # referred to from a snapshot, and hashing their sources would
+            # dominate startup.
+            module_scan_policy = finding.ModuleScanPolicy()
+        def GetSnapshotKey():
+            return _get_snapshot_key(
+                modules, classes, all_binding_specs,
+                only_use_explicit_bindings, configure_method_name,
+                dependencies_method_name, get_arg_names_from_class_name,
+                get_arg_names_from_provider_fn_name, known_scope_ids,
+                module_scan_policy)
+        loaded_bindings = None
+        snapshot_key = None
+        if snapshot is not None:
+            with startup_report.time_phase('read_snapshot'):
+                all_binding_specs = _get_all_binding_specs(
+                    binding_specs, dependencies_method_name)
+                existing_snapshot = snapshots.read_snapshot(snapshot)
+            # Source files are only hashed if there's a snapshot to check.
+            if existing_snapshot is not None:
+                with startup_report.time_phase('snapshot_key'):
+                    snapshot_key = GetSnapshotKey()
+                with startup_report.time_phase('load_snapshot'):
+                    loaded_bindings = snapshots.load_snapshot(
+                        existing_snapshot, snapshot_key, all_binding_specs,
+                        known_scope_ids)
+        if loaded_bindings is not None:
+            (binding_key_to_binding, collided_binding_key_to_bindings,
+             binding_key_to_binding_spec, counts) = loaded_bindings
         else:
-            implicit_class_bindings = bindings.get_implicit_class_bindings(
-                found_classes, get_arg_names_from_class_name)
-        explicit_bindings = bindings.get_explicit_class_bindings(
-            found_classes, get_arg_names_from_class_name)
-        binder = bindings.Binder(explicit_bindings, known_scope_ids)
-        required_bindings = required_bindings_lib.RequiredBindings()
-        if binding_specs is not None:
-            binding_specs = list(binding_specs)
-            processed_binding_specs = set()
-            while binding_specs:
-                binding_spec = binding_specs.pop()
-                if binding_spec in processed_binding_specs:
-                    continue
-                processed_binding_specs.add(binding_spec)
-                all_kwargs = {'bind': binder.bind,
-                              'require': required_bindings.require}
-                has_configure = hasattr(binding_spec, configure_method_name)
-                if has_configure:
-                    configure_method = getattr(binding_spec, configure_method_name)
-                    configure_kwargs = _pare_to_present_args(
-                        all_kwargs, configure_method)
-                    if not configure_kwargs:
-                        raise errors.ConfigureMethodMissingArgsError(
-                            configure_method, all_kwargs.keys())
-                    try:
-                        configure_method(**configure_kwargs)
-                    except NotImplementedError:
-                        has_configure = False
-                dependencies = None
-                if hasattr(binding_spec, dependencies_method_name):
-                    dependencies_method = (
-                        getattr(binding_spec, dependencies_method_name))
-                    dependencies = dependencies_method()
-                    binding_specs.extend(dependencies)
-                provider_bindings = bindings.get_provider_bindings(
-                    binding_spec, known_scope_ids,
-                    get_arg_names_from_provider_fn_name)
-                explicit_bindings.extend(provider_bindings)
-                if (not has_configure and
-                    not dependencies and
-                    not provider_bindings):
-                    raise errors.EmptyBindingSpecError(binding_spec)
-        binding_key_to_binding, collided_binding_key_to_bindings = (
-            bindings.get_overall_binding_key_to_binding_maps(
-                [implicit_class_bindings, explicit_bindings]))
+            (binding_key_to_binding, collided_binding_key_to_bindings,
+             binding_key_to_binding_spec, counts) = _get_bindings(
+                 modules, classes, binding_specs, only_use_explicit_bindings,
+                 known_scope_ids, configure_method_name,
+                 dependencies_method_name, get_arg_names_from_class_name,
+                 get_arg_names_from_provider_fn_name, module_scan_policy,
+                 startup_report)
+            if snapshot is not None:
+                with startup_report.time_phase('new_snapshot'):
+                    new_snapshot = snapshots.new_snapshot(
+                        binding_key_to_binding,
+                        collided_binding_key_to_bindings,
+                        binding_key_to_binding_spec, all_binding_specs,
+                        counts)
+                # Nor are they hashed if there's no snapshot to write.
+                if new_snapshot is not None:
+                    if snapshot_key is None:
+                        with startup_report.time_phase('snapshot_key'):
+                            snapshot_key = GetSnapshotKey()
+                    with startup_report.time_phase('write_snapshot'):
+                        snapshots.write_snapshot(
+                            snapshot, new_snapshot, snapshot_key)
+        startup_report.record_counts(*counts)
         binding_mapping = bindings.BindingMapping(
             binding_key_to_binding, collided_binding_key_to_bindings)
-        binding_mapping.verify_requirements(required_bindings.get())
+        if verify_scope_usability:
+            with startup_report.time_phase('verify_scope_usability'):
+                violations = binding_mapping.get_scope_usability_violations(
+                    injection_context_factory.is_scope_usable_from_scope)
+            if violations:
+                raise errors.BadDependencyScopesError(violations)
     except errors.Error as e:
         if use_short_stack_traces:
             raise e
@@ -157,11 +234,176 @@ def new_object_graph(
 
     is_injectable_fn = {True: decorators.is_explicitly_injectable,
                         False: (lambda cls: True)}[only_use_explicit_bindings]
-    obj_provider = object_providers.ObjectProvider(
-        binding_mapping, bindable_scopes, allow_injecting_none)
+    with startup_report.time_phase('object_provider'):
+        obj_provider = object_providers.ObjectProvider(
+            binding_mapping, bindable_scopes, allow_injecting_none)
+    if collect_provision_stats:
+        provision_stats_collector = (
+            provision_stats.ProvisionStatsCollector())
+        obj_provider.add_observer(provision_stats_collector)
+    else:
+        provision_stats_collector = None
     return ObjectGraph(
         obj_provider, injection_context_factory, is_injectable_fn,
-        use_short_stack_traces)
+        use_short_stack_traces,
+        startup_report=startup_report if collect_startup_report else None,
+        provision_stats_collector=provision_stats_collector,
+        binding_mapping=binding_mapping,
+        binding_key_to_binding_spec=binding_key_to_binding_spec)
+
+
+def _get_snapshot_key(
+        modules, classes, all_binding_specs, only_use_explicit_bindings,
+        configure_method_name, dependencies_method_name,
+        get_arg_names_from_class_name, get_arg_names_from_provider_fn_name,
+        known_scope_ids, module_scan_policy):
+    return snapshots.get_snapshot_key(
+        finding.get_explicit_or_default_modules(modules, module_scan_policy),
+        classes or [], all_binding_specs, {
+            'only_use_explicit_bindings': only_use_explicit_bindings,
+            'configure_method_name': configure_method_name,
+            'dependencies_method_name': dependencies_method_name,
+            'get_arg_names_from_class_name': snapshots.get_fn_option(
+                get_arg_names_from_class_name),
+            'get_arg_names_from_provider_fn_name': snapshots.get_fn_option(
+                get_arg_names_from_provider_fn_name),
+            'scope_ids': sorted(str(scope_id) for scope_id in known_scope_ids),
+        })
+
+
+def _get_bindings(
+        modules, classes, binding_specs, only_use_explicit_bindings,
+        known_scope_ids, configure_method_name, dependencies_method_name,
+        get_arg_names_from_class_name, get_arg_names_from_provider_fn_name,
+        module_scan_policy, startup_report):
+    """Finds classes, and gets bindings for them and from binding specs.
+
+    Returns:
+      a (binding key to binding map, binding key to collided bindings map,
+          binding key to binding spec map, counts) tuple, where counts are
+          the args to StartupReport.record_counts()
+    Raises:
+      Error: the bindings are invalid, or a required binding is missing
+    """
+    with startup_report.time_phase('find_classes'):
+        if only_use_explicit_bindings:
+            found_classes = finding.find_explicitly_injectable_classes(
+                modules, classes, module_scan_policy)
+        else:
+            found_classes = finding.find_classes(
+                modules, classes, startup_report, module_scan_policy)
+    with startup_report.time_phase('implicit_bindings'):
+        if only_use_explicit_bindings:
+            implicit_class_bindings = []
+        else:
+            implicit_class_bindings = bindings.get_implicit_class_bindings(
+                found_classes, get_arg_names_from_class_name)
+    with startup_report.time_phase('explicit_class_bindings'):
+        explicit_bindings = bindings.get_explicit_class_bindings(
+            found_classes, get_arg_names_from_class_name)
+    binder = bindings.Binder(explicit_bindings, known_scope_ids)
+    required_bindings = required_bindings_lib.RequiredBindings()
+    binding_key_to_binding_spec = {}
+    with startup_report.time_phase('binding_specs'):
+        _process_binding_specs(
+            binding_specs, binder, required_bindings, explicit_bindings,
+            known_scope_ids, configure_method_name,
+            dependencies_method_name, get_arg_names_from_provider_fn_name,
+            startup_report, binding_key_to_binding_spec)
+    with startup_report.time_phase('binding_maps'):
+        binding_key_to_binding, collided_binding_key_to_bindings = (
+            bindings.get_overall_binding_key_to_binding_maps(
+                [implicit_class_bindings, explicit_bindings]))
+    with startup_report.time_phase('verify_requirements'):
+        bindings.BindingMapping(
+            binding_key_to_binding, collided_binding_key_to_bindings
+        ).verify_requirements(required_bindings.get())
+    counts = (len(found_classes), len(implicit_class_bindings),
+              len(explicit_bindings), len(binding_key_to_binding),
+              len(collided_binding_key_to_bindings))
+    return (binding_key_to_binding, collided_binding_key_to_bindings,
+            binding_key_to_binding_spec, counts)
+
+
+def _get_all_binding_specs(binding_specs, dependencies_method_name):
+    """Returns binding specs and their dependencies, without configuring them.
+
+    Binding specs are visited in the same order as _process_binding_specs()
+    visits them.
+    """
+    if binding_specs is None:
+        return []
+    binding_specs = list(binding_specs)
+    all_binding_specs = []
+    visited_binding_specs = set()
+    while binding_specs:
+        binding_spec = binding_specs.pop()
+        if binding_spec in visited_binding_specs:
+            continue
+        visited_binding_specs.add(binding_spec)
+        all_binding_specs.append(binding_spec)
+        if hasattr(binding_spec, dependencies_method_name):
+            binding_specs.extend(
+                getattr(binding_spec, dependencies_method_name)())
+    return all_binding_specs
+
+
+def _process_binding_specs(
+        binding_specs, binder, required_bindings, explicit_bindings,
+        known_scope_ids, configure_method_name, dependencies_method_name,
+        get_arg_names_from_provider_fn_name, startup_report,
+        binding_key_to_binding_spec):
+    """Gets bindings from binding specs and their dependencies, transitively.
+
+    Explicit bindings from configure methods are added via binder, and
+    provider method bindings are appended to explicit_bindings.  The binding
+    spec that created each of those bindings is recorded in
+    binding_key_to_binding_spec.
+    """
+    if binding_specs is None:
+        return
+    binding_specs = list(binding_specs)
+    processed_binding_specs = set()
+    while binding_specs:
+        binding_spec = binding_specs.pop()
+        if binding_spec in processed_binding_specs:
+            continue
+        processed_binding_specs.add(binding_spec)
+        num_bindings_before = len(explicit_bindings)
+        all_kwargs = {'bind': binder.bind,
+                      'require': required_bindings.require}
+        has_configure = hasattr(binding_spec, configure_method_name)
+        if has_configure:
+            configure_method = getattr(binding_spec, configure_method_name)
+            configure_kwargs = _pare_to_present_args(
+                all_kwargs, configure_method)
+            if not configure_kwargs:
+                raise errors.ConfigureMethodMissingArgsError(
+                    configure_method, all_kwargs.keys())
+            try:
+                with startup_report.time_binding_spec(
+                        binding_spec, configure_method_name):
+                    configure_method(**configure_kwargs)
+            except NotImplementedError:
+                has_configure = False
+        dependencies = None
+        if hasattr(binding_spec, dependencies_method_name):
+            dependencies_method = (
+                getattr(binding_spec, dependencies_method_name))
+            dependencies = dependencies_method()
+            binding_specs.extend(dependencies)
+        with startup_report.time_binding_spec(
+                binding_spec, 'provider_methods'):
+            provider_bindings = bindings.get_provider_bindings(
+                binding_spec, known_scope_ids,
+                get_arg_names_from_provider_fn_name)
+        explicit_bindings.extend(provider_bindings)
+        for binding in explicit_bindings[num_bindings_before:]:
+            binding_key_to_binding_spec[binding.binding_key] = binding_spec
+        if (not has_configure and
+            not dependencies and
+            not provider_bindings):
+            raise errors.EmptyBindingSpecError(binding_spec)
 
 
 def _pare_to_present_args(kwargs, fn):
@@ -174,11 +416,225 @@ class ObjectGraph(object):
     """A graph of objects instantiable with dependency injection."""
 
     def __init__(self, obj_provider, injection_context_factory,
-                 is_injectable_fn, use_short_stack_traces):
+                 is_injectable_fn, use_short_stack_traces,
+                 startup_report=None, provision_stats_collector=None,
+                 binding_mapping=None, binding_key_to_binding_spec=None):
         self._obj_provider = obj_provider
         self._injection_context_factory = injection_context_factory
         self._is_injectable_fn = is_injectable_fn
         self._use_short_stack_traces = use_short_stack_traces
+        self._startup_report = startup_report
+        self._provision_stats_collector = provision_stats_collector
+        self._binding_mapping = binding_mapping
+        self._binding_key_to_binding_spec = binding_key_to_binding_spec or {}
+
+    def get_startup_report(self):
+        """Returns where the time went while creating this object graph.
+
+        Returns:
+          a StartupReport, or None unless new_object_graph() was called with
+              collect_startup_report=True
+        """
+        return self._startup_report
+
+    def get_provision_stats(self):
+        """Returns per-binding-key provision counts and construction times.
+
+        Returns:
+          a ProvisionStats snapshot, or None unless new_object_graph() was
+              called with collect_provision_stats=True
+        """
+        if self._provision_stats_collector is None:
+            return None
+        return self._provision_stats_collector.get_snapshot()
+
+    def get_dependency_graph(self, roots=None):
+        """Computes which bindings would be injected into which.
+
+        Nothing is instantiated.
+
+        Args:
+          roots: the classes whose dependencies to include, transitively, as
+              if they were passed to provide(), or None (the default) to
+              include all bindings
+        Returns:
+          a DependencyGraph
+        Raises:
+          Error: roots are not all classes
+        """
+        if roots is not None:
+            roots = list(roots)
+            support.verify_class_types(roots, 'roots')
+        return dependency_graphs.new_dependency_graph(
+            self._binding_mapping, roots)
+
+    def generate_wiring_source(self, roots):
+        """Generates a Python module that provides roots without pinject.
+
+        The module has a function per root class, named provide_ plus the
+        class's default arg name (e.g., provide_foo_bar() for FooBar), which
+        wires up a new instance the way provide() would, but without
+        importing pinject, and with all bindings resolved ahead of time.
+        Singletons are cached in the module, so each import of it acts like
+        a separate object graph.  Nothing is instantiated while generating.
+
+        Args:
+          roots: the classes to provide
+        Returns:
+          the source of the module, as a string
+        Raises:
+          Error: roots are not all classes, a root isn't providable, or a
+              binding reachable from a root is bound to something that
+              generated code can't refer to, such as a non-literal instance
+              or a provider function that isn't a binding spec method
+        """
+        roots = list(roots)
+        support.verify_class_types(roots, 'roots')
+        for root in roots:
+            if not self._is_injectable_fn(root):
+                raise errors.NonExplicitlyBoundClassError(
+                    locations.get_back_frame_loc(), root)
+        return compiling.generate_wiring_source(self._binding_mapping, roots)
+
+    def get_binding_counts(self):
+        """Counts this object graph's bindings, by kind and scope.
+
+        Returns:
+          a BindingCounts, which also lists the binding keys bound
+              ambiguously
+        """
+        return binding_counts.new_binding_counts(self._binding_mapping)
+
+    def validate(self, roots=None):
+        """Finds what would make providing fail, without providing anything.
+
+        That's args that nothing, or more than one thing, is bound to,
+        cyclic injections, and injections from scopes that aren't usable
+        from the scopes injected into.
+
+        Args:
+          roots: the classes whose dependencies to check, transitively, as
+              if they were passed to provide(), or None (the default) to
+              check all bindings
+        Returns:
+          a list of validation.Problems, which is empty if nothing was found
+        Raises:
+          Error: roots are not all classes
+        """
+        return validation.find_problems(
+            self._binding_mapping, self.get_dependency_graph(roots),
+            self._injection_context_factory.is_scope_usable_from_scope)
+
+    def add_provision_observer(self, observer):
+        """Starts calling an observer whenever a bound value is provided.
+
+        Args:
+          observer: a ProvisionObserver
+        """
+        self._obj_provider.add_observer(observer)
+
+    def remove_provision_observer(self, observer):
+        """Stops calling an observer added by add_provision_observer().
+
+        Args:
+          observer: a ProvisionObserver
+        """
+        self._obj_provider.remove_observer(observer)
+
+    def record_trace(self):
+        """Records provisions as Chrome trace events during a with-block.
+
+        For example:
+
+            with obj_graph.record_trace() as trace_recorder:
+                obj_graph.provide(SomeClass)
+            trace_recorder.write('trace.json')
+
+        Returns:
+          a TraceRecorder
+        """
+        return trace_events.TraceRecorder(self)
+
+    def record_warmup_profile(self):
+        """Records which singletons are constructed during a with-block.
+
+        For example, while warming up with representative traffic:
+
+            with obj_graph.record_warmup_profile() as profile_recorder:
+                handle_sample_requests(obj_graph)
+            profile_recorder.write('warmup_profile.json')
+
+        Returns:
+          a WarmupProfileRecorder
+        """
+        return warmup_profiles.WarmupProfileRecorder(self)
+
+    def account_memory(self, nframes=memory_accounting.DEFAULT_NFRAMES):
+        """Attributes memory allocated during a with-block to bindings.
+
+        For example:
+
+            with obj_graph.account_memory() as memory_accountant:
+                app = obj_graph.provide(SomeClass)
+            print(memory_accountant.get_report())
+
+        This uses tracemalloc, which slows down allocations considerably, so
+        it's meant for diagnosis rather than production.
+
+        Args:
+          nframes: the number of frames for tracemalloc to store per
+              allocation, if it's not already tracing; allocations are only
+              attributed to a binding if its initializer or provider function
+              is among those frames
+        Returns:
+          a MemoryAccountant
+        """
+        return memory_accounting.MemoryAccountant(
+            self, self._binding_mapping.get_bindings(),
+            self._binding_key_to_binding_spec, nframes)
+
+    def warm_from_profile(self, path, in_background=False):
+        """Constructs the singletons in a warmup profile ahead of use.
+
+        Singletons are constructed in the order they were recorded, so that
+        each one's singleton dependencies are already constructed.  Profile
+        entries that no longer match a singleton binding are skipped.
+
+        Warming is either synchronous or in one background thread, not in a
+        pool of threads: the singleton scope holds its lock while
+        constructing each singleton, so parallel workers would construct
+        them one at a time anyway.
+
+        Args:
+          path: the path of a profile written by
+              WarmupProfileRecorder.write()
+          in_background: whether to construct the singletons in a daemon
+              thread, instead of before returning
+        Returns:
+          the started threading.Thread if in_background, else None
+        Raises:
+          Error: the file isn't a warmup profile, or (unless in_background)
+              a singleton isn't providable
+        """
+        bindings_to_warm = warmup_profiles.get_bindings_to_warm(
+            self._binding_mapping, warmup_profiles.read_profile(path))
+        def Warm():
+            for binding in bindings_to_warm:
+                binding_key = binding.binding_key
+                self._obj_provider.provide_from_arg_binding_key(
+                    self.warm_from_profile,
+                    arg_binding_keys.ArgBindingKey(
+                        binding_key.name, binding_key,
+                        provider_indirections.NO_INDIRECTION),
+                    self._injection_context_factory.new(
+                        self.warm_from_profile))
+        if not in_background:
+            Warm()
+            return None
+        thread = threading.Thread(target=Warm, name='pinject-warmup')
+        thread.daemon = True
+        thread.start()
+        return thread
 
     def provide(self, cls):
         """Provides an instance of the given class.
@@ -14,10 +14,70 @@ limitations under the License.
 """
 
 
-from . import support
+import time
+
 from . import arg_binding_keys
+from . import bindings
 from . import decorators
 from . import errors
+from . import provider_indirections
+from . import scoping
+
+
+class _Frame(object):
+    """A binding target being provided, whose args are being provided.
+
+    Frames live on the explicit stack of ObjectProvider._provide_frames(),
+    which takes the place of the call stack, so that deep object graphs don't
+    hit the recursion limit.
+
+    The observation slot is only set while provision observers are
+    registered, so it's deliberately left unset by the initializer.
+    """
+
+    __slots__ = ('target_kind', 'target', 'injection_context',
+                 'injection_site_fn', 'arg_binding_keys', 'provided_args',
+                 'direct_pargs', 'direct_kwargs', 'binding', 'started_scope',
+                 'requesting_site_fn', 'requesting_arg_binding_key',
+                 'observation')
+
+    def __init__(self, target_kind, target, injection_context,
+                 direct_pargs, direct_kwargs, binding=None,
+                 started_scope=None, requesting_site_fn=None,
+                 requesting_arg_binding_key=None):
+        """Initializer.
+
+        Args:
+          target_kind: the target kind of target, e.g., bindings.TO_CLASS
+          target: the class, instance, or provider function to provide from
+          injection_context: the _InjectionContext for providing target
+          direct_pargs: the positional args passed directly to target
+          direct_kwargs: the keyword args passed directly to target
+          binding: the Binding for target, or None if target isn't being
+              provided via a binding
+          started_scope: the slotted scope whose start_providing_slot() was
+              called for binding, or None
+          requesting_site_fn: the function whose arg is to be injected with
+              what's provided, or None
+          requesting_arg_binding_key: the ArgBindingKey of the arg to be
+              injected with what's provided, or None
+        """
+        self.target_kind = target_kind
+        self.target = target
+        self.injection_context = injection_context
+        self.injection_site_fn = target_kind.get_injection_site_fn(target)
+        if self.injection_site_fn is not None:
+            self.arg_binding_keys = decorators.get_injectable_arg_binding_keys(
+                self.injection_site_fn, direct_pargs, direct_kwargs)
+        else:
+            self.arg_binding_keys = ()
+        self.provided_args = []
+        self.direct_pargs = direct_pargs
+        self.direct_kwargs = direct_kwargs
+        self.binding = binding
+        self.started_scope = started_scope
+        self.requesting_site_fn = requesting_site_fn
+        self.requesting_arg_binding_key = requesting_arg_binding_key
 
 
 class ObjectProvider(object):
@@ -26,54 +86,51 @@ class ObjectProvider(object):
         self._binding_mapping = binding_mapping
         self._bindable_scopes = bindable_scopes
         self._allow_injecting_none = allow_injecting_none
+        self._observers = ()
+        binding_mapping.assign_slots()
+
+    def add_observer(self, observer):
+        """Starts calling a ProvisionObserver on each provision.
+
+        While there are no observers, provision runs uninstrumented code, so
+        that observability costs nothing unless it's used.
+        """
+        # Replaced, not mutated, so that provisions in progress in other
+        # threads keep iterating over the observers they started with.
+        self._observers = self._observers + (observer,)
+        self._start_providing_arg = self._observed_start_providing_arg
+        self._finish_providing = self._observed_finish_providing
+        self._abandon_providing = self._observed_abandon_providing
+
+    def remove_observer(self, observer):
+        """Stops calling a ProvisionObserver added by add_observer()."""
+        observers = list(self._observers)
+        observers.remove(observer)
+        self._observers = tuple(observers)
+        if not self._observers:
+            del self._start_providing_arg
+            del self._finish_providing
+            del self._abandon_providing
 
     def provide_from_arg_binding_key(
             self, injection_site_fn, arg_binding_key, injection_context):
-        binding_key = arg_binding_key.binding_key
-        binding = self._binding_mapping.get(
-            binding_key, injection_context.get_injection_site_desc())
-        scope = self._bindable_scopes.get_sub_scope(binding)
-        def Provide(*pargs, **kwargs):
-            # TODO(kurts): probably capture back frame's file:line for
-            # DirectlyPassingInjectedArgsError.
-            child_injection_context = injection_context.get_child(
-                injection_site_fn, binding)
-            provided = scope.provide(
-                binding_key,
-                lambda: binding.proviser_fn(child_injection_context, self,
-                                            pargs, kwargs))
-            if (provided is None) and not self._allow_injecting_none:
-                raise errors.InjectingNoneDisallowedError(
-                    binding.get_binding_target_desc_fn())
-            return provided
-        provider_indirection = arg_binding_key.provider_indirection
-        try:
-            provided = provider_indirection.StripIndirectionIfNeeded(Provide)
-        except TypeError:
-            # TODO(kurts): it feels like there may be other TypeErrors that
-            # occur.  Instead, decorators.get_injectable_arg_binding_keys()
-            # should probably do all appropriate validation?
-            raise errors.OnlyInstantiableViaProviderFunctionError(
-                injection_site_fn, arg_binding_key,
-                binding.get_binding_target_desc_fn())
+        provided = self._start_providing_arg(
+            injection_site_fn, arg_binding_key, injection_context)
+        if type(provided) is _Frame:
+            provided = self._provide_frames(provided)
         return provided
 
     def provide_class(self, cls, injection_context,
                       direct_init_pargs, direct_init_kwargs):
-        if support.is_constructor_defined(cls):
-            init_pargs, init_kwargs = self.get_injection_pargs_kwargs(
-                cls.__init__, injection_context,
-                direct_init_pargs, direct_init_kwargs)
-        else:
-            init_pargs = direct_init_pargs
-            init_kwargs = direct_init_kwargs
-        return cls(*init_pargs, **init_kwargs)
+        return self._provide_frames(_Frame(
+            bindings.TO_CLASS, cls, injection_context,
+            direct_init_pargs, direct_init_kwargs))
 
     def call_with_injection(self, provider_fn, injection_context,
                             direct_pargs, direct_kwargs):
-        pargs, kwargs = self.get_injection_pargs_kwargs(
-            provider_fn, injection_context, direct_pargs, direct_kwargs)
-        return provider_fn(*pargs, **kwargs)
+        return self._provide_frames(_Frame(
+            bindings.TO_PROVIDER_FN, provider_fn, injection_context,
+            direct_pargs, direct_kwargs))
 
     def get_injection_pargs_kwargs(self, fn, injection_context,
                                    direct_pargs, direct_kwargs):
@@ -82,6 +139,12 @@ class ObjectProvider(object):
                 fn, direct_pargs, direct_kwargs),
             lambda abk: self.provide_from_arg_binding_key(
                 fn, abk, injection_context))
+        return direct_pargs, self._get_all_kwargs(
+            fn, injection_context, di_kwargs, direct_kwargs)
+
+    def _get_all_kwargs(self, fn, injection_context, di_kwargs, direct_kwargs):
+        if not direct_kwargs:
+            return di_kwargs
         duplicated_args = set(di_kwargs.keys()) & set(direct_kwargs.keys())
         if duplicated_args:
             raise errors.DirectlyPassingInjectedArgsError(
@@ -89,4 +152,263 @@ class ObjectProvider(object):
                 fn)
         all_kwargs = dict(di_kwargs)
         all_kwargs.update(direct_kwargs)
-        return direct_pargs, all_kwargs
+        return all_kwargs
+
+    def _get_binding(self, binding_key, injection_context):
+        binding = self._binding_mapping.find(binding_key)
+        if binding is None:
+            # This raises the appropriate error.
+            binding = self._binding_mapping.get(
+                binding_key, injection_context.get_injection_site_desc())
+        return binding
+
+    def _start_providing_arg(
+            self, injection_site_fn, arg_binding_key, injection_context):
+        """Starts providing the value for an arg.
+
+        Args:
+          injection_site_fn: the function whose arg is being injected
+          arg_binding_key: the ArgBindingKey of the arg being injected
+          injection_context: the _InjectionContext of injection_site_fn
+        Returns:
+          either the provided value, or a _Frame whose providing must be
+              finished by _provide_frames()
+        """
+        binding = self._get_binding(
+            arg_binding_key.binding_key, injection_context)
+        provider_indirection = arg_binding_key.provider_indirection
+        if provider_indirection is not provider_indirections.NO_INDIRECTION:
+            return provider_indirection.StripIndirectionIfNeeded(
+                self._new_provide_fn(
+                    injection_site_fn, binding, injection_context))
+        try:
+            child_injection_context = injection_context.get_child(
+                injection_site_fn, binding)
+            scope = self._bindable_scopes.get_slotted_sub_scope(binding)
+            if hasattr(scope, 'start_providing_slot'):
+                provided = scope.start_providing_slot(
+                    binding.slot, binding.binding_key)
+                if provided is scoping.NOT_PROVIDED:
+                    try:
+                        return _Frame(
+                            binding.target_kind, binding.target,
+                            child_injection_context, (), {}, binding, scope,
+                            injection_site_fn, arg_binding_key)
+                    except BaseException:
+                        scope.abandon_providing_slot(
+                            binding.slot, binding.binding_key)
+                        raise
+            else:
+                provided = scope.provide_slot(
+                    binding.slot, binding.binding_key, binding.proviser_fn,
+                    child_injection_context, self, (), {})
+        except TypeError:
+            # TODO(kurts): it feels like there may be other TypeErrors that
+            # occur.  Instead, decorators.get_injectable_arg_binding_keys()
+            # should probably do all appropriate validation?
+            raise errors.OnlyInstantiableViaProviderFunctionError(
+                injection_site_fn, arg_binding_key,
+                binding.get_binding_target_desc_fn())
+        return self._verify_provided(provided, binding)
+
+    def _observed_start_providing_arg(
+            self, injection_site_fn, arg_binding_key, injection_context):
+        """Like _start_providing_arg(), but calls provision observers."""
+        if (arg_binding_key.provider_indirection is not
+            provider_indirections.NO_INDIRECTION):
+            return ObjectProvider._start_providing_arg(
+                self, injection_site_fn, arg_binding_key, injection_context)
+        binding = self._get_binding(
+            arg_binding_key.binding_key, injection_context)
+        scope = self._bindable_scopes.get_slotted_sub_scope(binding)
+        observers = self._observers
+        depth = injection_context.get_depth() + 1
+        for observer in observers:
+            observer.on_provide_start(binding, binding.scope_id, depth)
+        start_secs = time.perf_counter()
+        try:
+            if hasattr(scope, 'start_providing_slot'):
+                provided = ObjectProvider._start_providing_arg(
+                    self, injection_site_fn, arg_binding_key,
+                    injection_context)
+                if type(provided) is _Frame:
+                    provided.observation = (observers, depth, start_secs)
+                    return provided
+                is_cache_hit = True
+            else:
+                try:
+                    child_injection_context = injection_context.get_child(
+                        injection_site_fn, binding)
+                    provided, is_cache_hit = self._provide_slot_noting_hit(
+                        scope, binding, child_injection_context, (), {})
+                except TypeError:
+                    raise errors.OnlyInstantiableViaProviderFunctionError(
+                        injection_site_fn, arg_binding_key,
+                        binding.get_binding_target_desc_fn())
+                provided = self._verify_provided(provided, binding)
+        except Exception as e:
+            elapsed_secs = time.perf_counter() - start_secs
+            for observer in observers:
+                observer.on_provide_failure(
+                    binding, binding.scope_id, depth, e, elapsed_secs)
+            raise
+        elapsed_secs = time.perf_counter() - start_secs
+        for observer in observers:
+            observer.on_provide_end(binding, binding.scope_id, depth,
+                                    is_cache_hit, elapsed_secs)
+        return provided
+
+    def _provide_slot_noting_hit(self, scope, binding, child_injection_context,
+                                 pargs, kwargs):
+        """Provides via a scope's provide_slot(), noting if it was cached.
+
+        The scope provides in one step, so only wrapping what it calls to
+        provide a new value shows whether it had one already.
+
+        Returns:
+          a (provided value, whether it was a cache hit) pair
+        """
+        provided_new = []
+        def ObservedProviserFn(*args):
+            provided_new.append(True)
+            return binding.proviser_fn(*args)
+        provided = scope.provide_slot(
+            binding.slot, binding.binding_key, ObservedProviserFn,
+            child_injection_context, self, pargs, kwargs)
+        return provided, not provided_new
+
+    def _provide_frames(self, root_frame):
+        """Provides from a frame, iteratively providing its args first.
+
+        Args:
+          root_frame: the _Frame to provide from
+        Returns:
+          the value provided from root_frame
+        """
+        stack = [root_frame]
+        try:
+            while True:
+                frame = stack[-1]
+                num_provided_args = len(frame.provided_args)
+                if num_provided_args < len(frame.arg_binding_keys):
+                    provided = self._start_providing_arg(
+                        frame.injection_site_fn,
+                        frame.arg_binding_keys[num_provided_args],
+                        frame.injection_context)
+                    if type(provided) is _Frame:
+                        stack.append(provided)
+                    else:
+                        frame.provided_args.append(provided)
+                    continue
+                provided = self._finish_providing(frame)
+                stack.pop()
+                if not stack:
+                    return provided
+                stack[-1].provided_args.append(provided)
+        except BaseException as e:
+            for frame in reversed(stack):
+                self._abandon_providing(frame, e)
+            raise
+
+    def _finish_providing(self, frame):
+        """Provides from a frame whose injected args are all provided."""
+        try:
+            if frame.injection_site_fn is not None:
+                kwargs = self._get_all_kwargs(
+                    frame.injection_site_fn, frame.injection_context,
+                    arg_binding_keys.create_kwargs_from_values(
+                        frame.arg_binding_keys, frame.provided_args),
+                    frame.direct_kwargs)
+            else:
+                kwargs = frame.direct_kwargs
+            provided = frame.target_kind.instantiate(
+                frame.target, frame.direct_pargs, kwargs)
+        except TypeError:
+            if frame.requesting_arg_binding_key is None:
+                raise
+            raise errors.OnlyInstantiableViaProviderFunctionError(
+                frame.requesting_site_fn, frame.requesting_arg_binding_key,
+                frame.binding.get_binding_target_desc_fn())
+        if frame.started_scope is not None:
+            scope = frame.started_scope
+            frame.started_scope = None
+            provided = scope.finish_providing_slot(
+                frame.binding.slot, frame.binding.binding_key, provided)
+        if frame.binding is not None:
+            provided = self._verify_provided(provided, frame.binding)
+        return provided
+
+    def _abandon_providing(self, frame, error):
+        """Cleans up after a frame whose providing failed."""
+        if frame.started_scope is not None:
+            frame.started_scope.abandon_providing_slot(
+                frame.binding.slot, frame.binding.binding_key)
+
+    def _observed_abandon_providing(self, frame, error):
+        """Like _abandon_providing(), but calls provision observers."""
+        ObjectProvider._abandon_providing(self, frame, error)
+        try:
+            observers, depth, start_secs = frame.observation
+        except AttributeError:
+            return
+        if isinstance(error, Exception):
+            elapsed_secs = time.perf_counter() - start_secs
+            for observer in observers:
+                observer.on_provide_failure(
+                    frame.binding, frame.binding.scope_id, depth, error,
+                    elapsed_secs)
+
+    def _observed_finish_providing(self, frame):
+        """Like _finish_providing(), but calls provision observers."""
+        provided = ObjectProvider._finish_providing(self, frame)
+        try:
+            observers, depth, start_secs = frame.observation
+        except AttributeError:
+            return provided
+        elapsed_secs = time.perf_counter() - start_secs
+        for observer in observers:
+            observer.on_provide_end(frame.binding, frame.binding.scope_id,
+                                    depth, False, elapsed_secs)
+        return provided
+
+    def _verify_provided(self, provided, binding):
+        if (provided is None) and not self._allow_injecting_none:
+            raise errors.InjectingNoneDisallowedError(
+                binding.get_binding_target_desc_fn())
+        return provided
+
+    def _new_provide_fn(self, injection_site_fn, binding, injection_context):
+        scope = self._bindable_scopes.get_slotted_sub_scope(binding)
+        def Provide(*pargs, **kwargs):
+            # TODO(kurts): probably capture back frame's file:line for
+            # DirectlyPassingInjectedArgsError.
+            child_injection_context = injection_context.get_child(
+                injection_site_fn, binding)
+            # Observers may have been added since the provider function was
+            # injected, so they're checked on each call.
+            observers = self._observers
+            if not observers:
+                provided = scope.provide_slot(
+                    binding.slot, binding.binding_key, binding.proviser_fn,
+                    child_injection_context, self, pargs, kwargs)
+                return self._verify_provided(provided, binding)
+            depth = child_injection_context.get_depth()
+            for observer in observers:
+                observer.on_provide_start(binding, binding.scope_id, depth)
+            start_secs = time.perf_counter()
+            try:
+                provided, is_cache_hit = self._provide_slot_noting_hit(
+                    scope, binding, child_injection_context, pargs, kwargs)
+                provided = self._verify_provided(provided, binding)
+            except Exception as e:
+                elapsed_secs = time.perf_counter() - start_secs
+                for observer in observers:
+                    observer.on_provide_failure(
+                        binding, binding.scope_id, depth, e, elapsed_secs)
+                raise
+            elapsed_secs = time.perf_counter() - start_secs
+            for observer in observers:
+                observer.on_provide_end(binding, binding.scope_id, depth,
+                                        is_cache_hit, elapsed_secs)
+            return provided
+        return Provide
@@ -0,0 +1,93 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+class ProvisionObserver(object):
+    """An observer of an object graph providing bound values.
+
+    Subclasses override whichever of the methods they need.  Observers are
+    called on the providing thread, while provision is in progress, so they
+    should be quick and must not use the object graph.
+    """
+
+    def on_provide_start(self, binding, scope_id, depth):
+        """Called before providing a value for an injected arg.
+
+        Args:
+          binding: the Binding being provided from, whose binding_key is the
+              binding key of the injected arg
+          scope_id: the ID of the scope of binding
+          depth: how many bindings deep the provision is, where injecting
+              into the class passed to ObjectGraph.provide() is depth 1
+        """
+        pass
+
+    def on_provide_end(self, binding, scope_id, depth, is_cache_hit,
+                       elapsed_secs):
+        """Called after successfully providing a value for an injected arg.
+
+        Args:
+          binding: the Binding provided from
+          scope_id: the ID of the scope of binding
+          depth: how many bindings deep the provision is
+          is_cache_hit: whether the scope returned a value it already had,
+              rather than a new one from binding
+          elapsed_secs: the wall time taken to provide the value, including
+              the time to provide its dependencies
+        """
+        pass
+
+    def on_provide_failure(self, binding, scope_id, depth, error,
+                           elapsed_secs):
+        """Called after failing to provide a value for an injected arg.
+
+        When providing a dependency fails, providing each value that depends
+        on it fails too, so this is called for each of them, innermost first.
+
+        Args:
+          binding: the Binding whose provision failed
+          scope_id: the ID of the scope of binding
+          depth: how many bindings deep the provision is
+          error: the exception that made provision fail
+          elapsed_secs: the wall time taken until provision failed
+        """
+        pass
+
+
+class ObservingContextManager(ProvisionObserver):
+    """A provision observer of an object graph for a with-block.
+
+    Entering the with-block adds the observer to the object graph, and
+    leaving it removes the observer.  Since observers are called on each
+    providing thread without a lock, subclasses record what they observe
+    with single operations that CPython makes atomic, such as list.append()
+    or setting a dict item.
+    """
+
+    def __init__(self, obj_graph):
+        """Initializer.
+
+        Args:
+          obj_graph: the ObjectGraph to observe
+        """
+        self._obj_graph = obj_graph
+
+    def __enter__(self):
+        self._obj_graph.add_provision_observer(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._obj_graph.remove_provision_observer(self)
+        return False
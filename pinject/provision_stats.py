@@ -0,0 +1,302 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import bisect
+import json
+import os
+import tempfile
+import threading
+import weakref
+
+from . import provision_observers
+
+
+# The upper bounds, in seconds, of the construction time histogram buckets.
+# The last bucket, for longer constructions, is unbounded.
+CONSTRUCTION_SECS_BUCKET_BOUNDS = (
+    0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0,
+    5.0, 10.0)
+
+
+class BindingStats(object):
+    """Counters and a construction time histogram for one binding key."""
+
+    __slots__ = ('num_cache_hits', 'num_cache_misses', 'num_failures',
+                 'construction_secs_sum', 'construction_secs_bucket_counts')
+
+    def __init__(self):
+        self.num_cache_hits = 0
+        self.num_cache_misses = 0
+        self.num_failures = 0
+        self.construction_secs_sum = 0.0
+        self.construction_secs_bucket_counts = [0] * (
+            len(CONSTRUCTION_SECS_BUCKET_BOUNDS) + 1)
+
+    @property
+    def num_provisions(self):
+        return self.num_cache_hits + self.num_cache_misses + self.num_failures
+
+    def add(self, other):
+        """Adds the counts from another BindingStats to this one's."""
+        self.num_cache_hits += other.num_cache_hits
+        self.num_cache_misses += other.num_cache_misses
+        self.num_failures += other.num_failures
+        self.construction_secs_sum += other.construction_secs_sum
+        for index, count in enumerate(other.construction_secs_bucket_counts):
+            self.construction_secs_bucket_counts[index] += count
+
+    def get_construction_secs_percentile(self, percentile):
+        """Estimates a percentile of construction times.
+
+        Args:
+          percentile: a number from 0 to 100
+        Returns:
+          the upper bound of the histogram bucket containing the percentile,
+              which is infinity for the last bucket, or None if nothing has
+              been constructed
+        """
+        if not self.num_cache_misses:
+            return None
+        rank = percentile / 100.0 * self.num_cache_misses
+        num_seen = 0
+        for index, count in enumerate(self.construction_secs_bucket_counts):
+            num_seen += count
+            if count and num_seen >= rank:
+                break
+        if index < len(CONSTRUCTION_SECS_BUCKET_BOUNDS):
+            return CONSTRUCTION_SECS_BUCKET_BOUNDS[index]
+        return float('inf')
+
+    def to_dict(self):
+        return {
+            'num_provisions': self.num_provisions,
+            'num_cache_hits': self.num_cache_hits,
+            'num_cache_misses': self.num_cache_misses,
+            'num_failures': self.num_failures,
+            'construction_secs_sum': self.construction_secs_sum,
+            'construction_secs_p50': self.get_construction_secs_percentile(50),
+            'construction_secs_p90': self.get_construction_secs_percentile(90),
+            'construction_secs_p99': self.get_construction_secs_percentile(99),
+        }
+
+
+class ProvisionStats(object):
+    """A snapshot of the provision stats of an object graph."""
+
+    def __init__(self, binding_key_to_stats):
+        """Initializer.
+
+        Args:
+          binding_key_to_stats: a map from BindingKey to BindingStats
+        """
+        self.binding_key_to_stats = binding_key_to_stats
+
+    def _get_sorted_items(self):
+        return sorted(self.binding_key_to_stats.items(),
+                      key=lambda item: (item[0].name,
+                                        item[0].annotation_as_adjective()))
+
+    def to_dict(self):
+        """Returns these stats as a JSON-serializable dict."""
+        return {'bindings': [
+            dict(stats.to_dict(), name=binding_key.name,
+                 annotation=binding_key.annotation_as_adjective())
+            for binding_key, stats in self._get_sorted_items()]}
+
+    def to_prometheus_text(self, prefix='pinject'):
+        """Returns these stats in the Prometheus text exposition format.
+
+        Args:
+          prefix: the prefix of the metric names
+        Returns:
+          a string
+        """
+        lines = []
+        def AddMetric(name, metric_type, help_text, samples):
+            lines.append('# HELP {0}_{1} {2}'.format(prefix, name, help_text))
+            lines.append('# TYPE {0}_{1} {2}'.format(prefix, name, metric_type))
+            for suffix, labels, value in samples:
+                lines.append('{0}_{1}{2}{{{3}}} {4}'.format(
+                    prefix, name, suffix, ','.join(
+                        '{0}="{1}"'.format(label_name, _escape_label(label))
+                        for label_name, label in labels),
+                    _format_number(value)))
+        items = self._get_sorted_items()
+        def GetLabels(binding_key, *extra_labels):
+            return (('name', binding_key.name),
+                    ('annotation', binding_key.annotation_as_adjective()),
+                    ) + extra_labels
+        for name, attr, help_text in [
+                ('cache_hits_total', 'num_cache_hits',
+                 'Provisions returning a value already in scope.'),
+                ('cache_misses_total', 'num_cache_misses',
+                 'Provisions constructing a new value.'),
+                ('failures_total', 'num_failures', 'Failed provisions.')]:
+            AddMetric(name, 'counter', help_text, [
+                ('', GetLabels(binding_key), getattr(stats, attr))
+                for binding_key, stats in items])
+        histogram_samples = []
+        for binding_key, stats in items:
+            cumulative_count = 0
+            bounds = CONSTRUCTION_SECS_BUCKET_BOUNDS + (float('inf'),)
+            for bound, count in zip(bounds,
+                                    stats.construction_secs_bucket_counts):
+                cumulative_count += count
+                histogram_samples.append(
+                    ('_bucket', GetLabels(binding_key, ('le', bound)),
+                     cumulative_count))
+            histogram_samples.append(
+                ('_sum', GetLabels(binding_key), stats.construction_secs_sum))
+            histogram_samples.append(
+                ('_count', GetLabels(binding_key), stats.num_cache_misses))
+        AddMetric('construction_seconds', 'histogram',
+                  'Time to construct new values, including dependencies.',
+                  histogram_samples)
+        return '\n'.join(lines) + '\n'
+
+    def write_json(self, path):
+        """Atomically writes these stats as JSON to a local file."""
+        _write_atomically(path, json.dumps(self.to_dict(), indent=2))
+
+    def write_prometheus_text(self, path, prefix='pinject'):
+        """Atomically writes these stats in Prometheus format to a local file.
+
+        The file is suitable for, e.g., the node exporter's textfile
+        collector.
+        """
+        _write_atomically(path, self.to_prometheus_text(prefix))
+
+
+def _escape_label(label):
+    if isinstance(label, float):
+        return _format_number(label)
+    return (str(label).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(value)
+
+
+def _write_atomically(path, text):
+    dir_name = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=dir_name, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as temp_file:
+            temp_file.write(text)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+class ProvisionStatsCollector(provision_observers.ProvisionObserver):
+    """A provision observer that counts provisions per binding key.
+
+    Each thread counts into its own shard, so that collecting stats doesn't
+    make request threads contend with each other.  Shards are only merged
+    when a snapshot is taken, or, once their threads have exited, when
+    another thread's shard is added, so that a process that starts a thread
+    per request doesn't keep a shard per thread it ever started.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        # (weak reference to a thread, the thread's shard) pairs.
+        self._thread_refs_and_shards = []
+        # Maps binding key to the merged stats of threads that have exited.
+        self._retired_binding_key_to_stats = {}
+        self._shards_lock = threading.Lock()
+
+    def _get_shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = {}
+            self._local.shard = shard
+            with self._shards_lock:
+                self._retire_shards_of_exited_threads()
+                self._thread_refs_and_shards.append(
+                    (weakref.ref(threading.current_thread()), shard))
+            return shard
+
+    def _retire_shards_of_exited_threads(self):
+        """Merges the shards of exited threads into the retired stats.
+
+        The caller must hold self._shards_lock.
+        """
+        thread_refs_and_shards = []
+        for thread_ref, shard in self._thread_refs_and_shards:
+            thread = thread_ref()
+            if thread is None or not thread.is_alive():
+                _add_shard(self._retired_binding_key_to_stats, shard)
+            else:
+                thread_refs_and_shards.append((thread_ref, shard))
+        self._thread_refs_and_shards = thread_refs_and_shards
+
+    def _get_stats(self, binding_key):
+        shard = self._get_shard()
+        stats = shard.get(binding_key)
+        if stats is None:
+            stats = BindingStats()
+            shard[binding_key] = stats
+        return stats
+
+    def on_provide_end(self, binding, scope_id, depth, is_cache_hit,
+                       elapsed_secs):
+        stats = self._get_stats(binding.binding_key)
+        if is_cache_hit:
+            stats.num_cache_hits += 1
+        else:
+            stats.num_cache_misses += 1
+            stats.construction_secs_sum += elapsed_secs
+            stats.construction_secs_bucket_counts[bisect.bisect_left(
+                CONSTRUCTION_SECS_BUCKET_BOUNDS, elapsed_secs)] += 1
+
+    def on_provide_failure(self, binding, scope_id, depth, error,
+                           elapsed_secs):
+        self._get_stats(binding.binding_key).num_failures += 1
+
+    def get_snapshot(self):
+        """Returns the stats so far, merged across threads.
+
+        Counts from provisions in progress in other threads may or may not be
+        included.
+
+        Returns:
+          a ProvisionStats
+        """
+        binding_key_to_stats = {}
+        with self._shards_lock:
+            self._retire_shards_of_exited_threads()
+            _add_shard(binding_key_to_stats,
+                       self._retired_binding_key_to_stats)
+            shards = [shard for _, shard in self._thread_refs_and_shards]
+        for shard in shards:
+            _add_shard(binding_key_to_stats, shard)
+        return ProvisionStats(binding_key_to_stats)
+
+
+def _add_shard(binding_key_to_stats, shard):
+    """Adds a map from binding key to BindingStats to another such map."""
+    # Copying a dict is atomic, so this is safe while the shard's thread adds
+    # to it.
+    for binding_key, stats in dict(shard).items():
+        if binding_key not in binding_key_to_stats:
+            binding_key_to_stats[binding_key] = BindingStats()
+        binding_key_to_stats[binding_key].add(stats)
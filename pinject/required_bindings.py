@@ -20,6 +20,8 @@ from . import locations
 
 class RequiredBinding(object):
 
+    __slots__ = ('binding_key', 'require_loc')
+
     def __init__(self, binding_key, require_loc):
         self.binding_key = binding_key
         self.require_loc = require_loc
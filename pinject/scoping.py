@@ -41,30 +41,178 @@ class Scope(object):
         raise NotImplementedError()
 
 
+class SlottedScope(object):
+    """A scope that stores what it provides by binding slot.
+
+    This is the second-generation scope interface.  Each binding in an object
+    graph has a dense integer slot, so a slotted scope can cache instances in
+    an array indexed by slot instead of hashing binding keys.  The default
+    provider function is passed along with its args, so that callers don't
+    have to allocate a closure per provision.
+
+    Slots are only unique within a single object graph.  A slotted scope
+    instance that is shared among object graphs should key its cache on the
+    binding key instead.
+
+    Scopes implementing only provide() (i.e., the Scope interface) still
+    work: they are adapted to this interface.
+
+    A slotted scope may optionally also split provide_slot() in two, so that
+    Pinject provides the instance itself instead of being called back.  That
+    lets Pinject provide arbitrarily deep object graphs without recursing.
+    The split methods are:
+
+      start_providing_slot(slot, binding_key): returns the cached instance for
+          the slot, or NOT_PROVIDED, in which case exactly one of the other
+          two methods is later called for the slot, from the same thread
+      finish_providing_slot(slot, binding_key, instance): caches the newly
+          provided instance if appropriate, and returns it
+      abandon_providing_slot(slot, binding_key): gives up providing for the
+          slot, because providing failed
+    """
+
+    def provide_slot(self, slot, binding_key, default_provider_fn,
+                     *default_provider_args):
+        raise NotImplementedError()
+
+
 class PrototypeScope(object):
 
     def provide(self, binding_key, default_provider_fn):
         return default_provider_fn()
 
+    def provide_slot(self, slot, binding_key, default_provider_fn,
+                     *default_provider_args):
+        return default_provider_fn(*default_provider_args)
+
+    def start_providing_slot(self, slot, binding_key):
+        return NOT_PROVIDED
+
+    def finish_providing_slot(self, slot, binding_key, instance):
+        return instance
+
+    def abandon_providing_slot(self, slot, binding_key):
+        pass
+
+
+class _NotProvided(object):
+    def __repr__(self):
+        return '<not provided>'
+NOT_PROVIDED = _NotProvided()
+
 
 class SingletonScope(object):
+    """Provides at most one instance per binding.
+
+    Instances are stored by binding slot.  The first slotted provision for a
+    binding records its binding key's slot, so that provide(), which only
+    has the binding key, uses the same instance.  An instance that provide()
+    provides before that is kept by binding key until the binding's slot is
+    known, at which point it moves to the slot.
+    """
 
     def __init__(self):
-        self._binding_key_to_instance = {}
+        self._binding_key_to_unslotted_instance = {}
+        self._binding_key_to_slot = {}
         self._providing_binding_keys = set()
+        self._slot_to_instance = []
         # The lock is re-entrant so that default_provider_fn can provide
         # something else in singleton scope.
         self._rlock = threading.RLock()
 
     def provide(self, binding_key, default_provider_fn):
         with self._rlock:
+            slot = self._binding_key_to_slot.get(binding_key)
+            if slot is not None:
+                return self.provide_slot(slot, binding_key, default_provider_fn)
+            unslotted_instances = self._binding_key_to_unslotted_instance
             try:
-                return self._binding_key_to_instance[binding_key]
+                return unslotted_instances[binding_key]
             except KeyError:
                 instance = default_provider_fn()
-                self._binding_key_to_instance[binding_key] = instance
+                unslotted_instances[binding_key] = instance
                 return instance
 
+    def provide_slot(self, slot, binding_key, default_provider_fn,
+                     *default_provider_args):
+        # Reading a list item is atomic, so a singleton that's already been
+        # provided can be returned without taking the lock.
+        try:
+            instance = self._slot_to_instance[slot]
+        except IndexError:
+            instance = NOT_PROVIDED
+        if instance is not NOT_PROVIDED:
+            return instance
+        with self._rlock:
+            instance = self._get_slot_instance(slot, binding_key)
+            if instance is NOT_PROVIDED:
+                instance = default_provider_fn(*default_provider_args)
+                self._slot_to_instance[slot] = instance
+            return instance
+
+    def start_providing_slot(self, slot, binding_key):
+        try:
+            instance = self._slot_to_instance[slot]
+        except IndexError:
+            instance = NOT_PROVIDED
+        if instance is not NOT_PROVIDED:
+            return instance
+        # The lock stays held until the instance is finished or abandoned,
+        # just as provide_slot() holds it while calling default_provider_fn.
+        self._rlock.acquire()
+        instance = self._get_slot_instance(slot, binding_key)
+        if instance is not NOT_PROVIDED:
+            self._rlock.release()
+        return instance
+
+    def finish_providing_slot(self, slot, binding_key, instance):
+        try:
+            self._slot_to_instance[slot] = instance
+        finally:
+            self._rlock.release()
+        return instance
+
+    def abandon_providing_slot(self, slot, binding_key):
+        self._rlock.release()
+
+    def _get_slot_instance(self, slot, binding_key):
+        """Returns the instance for a slot, or NOT_PROVIDED.
+
+        The lock must be held.  This records the binding key's slot, and
+        moves any instance that provide() provided for the binding key to
+        the slot.
+        """
+        slot_to_instance = self._slot_to_instance
+        if slot >= len(slot_to_instance):
+            slot_to_instance.extend(
+                [NOT_PROVIDED] * (slot + 1 - len(slot_to_instance)))
+        instance = slot_to_instance[slot]
+        if instance is NOT_PROVIDED:
+            self._binding_key_to_slot[binding_key] = slot
+            instance = self._binding_key_to_unslotted_instance.pop(
+                binding_key, NOT_PROVIDED)
+            slot_to_instance[slot] = instance
+        return instance
+
+
+class _ScopeAdapter(object):
+    """Adapts a Scope to the SlottedScope interface."""
+
+    def __init__(self, scope):
+        self._scope = scope
+
+    def provide_slot(self, slot, binding_key, default_provider_fn,
+                     *default_provider_args):
+        return self._scope.provide(
+            binding_key, lambda: default_provider_fn(*default_provider_args))
+
+
+def get_slotted_scope(scope):
+    """Returns the given scope as a SlottedScope, adapting it if necessary."""
+    if hasattr(scope, 'provide_slot'):
+        return scope
+    return _ScopeAdapter(scope)
+
 
 class _UnscopedScopeId(object):
     def __str__(self):
@@ -72,6 +220,52 @@ class _UnscopedScopeId(object):
 UNSCOPED = _UnscopedScopeId()
 
 
+class ScopeUsabilityMatrix(object):
+    """Which scopes are usable from which, for all pairs of known scope IDs.
+
+    The is_scope_usable_from_scope policy is evaluated once per pair of known
+    scope IDs, so that checking an injection during provision is a set
+    lookup.  Pairs involving unknown scope IDs are passed to the policy.
+    """
+
+    def __init__(self, is_scope_usable_from_scope_fn, scope_ids=()):
+        """Initializer.
+
+        Args:
+          is_scope_usable_from_scope_fn: a function taking two scope IDs and
+              returning whether an object in the first scope can be injected
+              into an object from the second scope
+          scope_ids: the known scope IDs, not including UNSCOPED
+        """
+        self._is_scope_usable_from_scope_fn = is_scope_usable_from_scope_fn
+        self._scope_ids = frozenset(scope_ids)
+        self._from_scope_id_to_usable_scope_ids = {
+            from_scope_id: frozenset(
+                to_scope_id for to_scope_id in self._scope_ids
+                if is_scope_usable_from_scope_fn(to_scope_id, from_scope_id))
+            for from_scope_id in self._scope_ids | frozenset([UNSCOPED])}
+
+    def get_usable_scope_ids(self, from_scope_id):
+        """Returns the known scope IDs usable from a scope.
+
+        Args:
+          from_scope_id: a scope ID
+        Returns:
+          a frozenset of the known scope IDs usable from from_scope_id, which
+              is empty if from_scope_id is unknown
+        """
+        return self._from_scope_id_to_usable_scope_ids.get(
+            from_scope_id, frozenset())
+
+    def is_scope_usable_from_scope(self, to_scope_id, from_scope_id):
+        """Returns whether to_scope_id is usable from from_scope_id."""
+        usable_scope_ids = self._from_scope_id_to_usable_scope_ids.get(
+            from_scope_id)
+        if usable_scope_ids is not None and to_scope_id in self._scope_ids:
+            return to_scope_id in usable_scope_ids
+        return self._is_scope_usable_from_scope_fn(to_scope_id, from_scope_id)
+
+
 def get_id_to_scope_with_defaults(id_to_scope=None):
     if id_to_scope is not None:
         for scope_id in _BUILTIN_SCOPES:
@@ -90,6 +284,12 @@ class BindableScopes(object):
 
     def __init__(self, id_to_scope):
         self._id_to_scope = id_to_scope
+        self._id_to_slotted_scope = {
+            scope_id: get_slotted_scope(scope)
+            for scope_id, scope in id_to_scope.items()}
 
     def get_sub_scope(self, binding):
         return self._id_to_scope[binding.scope_id]
+
+    def get_slotted_sub_scope(self, binding):
+        return self._id_to_slotted_scope[binding.scope_id]
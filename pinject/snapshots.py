@@ -0,0 +1,379 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import hashlib
+import importlib
+import json
+import os
+import platform
+import sys
+
+from . import binding_keys
+from . import bindings
+from . import scoping
+from . import version
+
+
+_SNAPSHOT_VERSION = 1
+_BUILTIN_SCOPE_NAME_TO_ID = {
+    'singleton': scoping.SINGLETON,
+    'prototype': scoping.PROTOTYPE,
+}
+_BUILTIN_SCOPE_ID_TO_NAME = {
+    scope_id: name for name, scope_id in _BUILTIN_SCOPE_NAME_TO_ID.items()}
+# The types of annotation objects and custom scope IDs that survive a round
+# trip through JSON unchanged.
+_JSON_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+class _UnsnapshottableError(Exception):
+    """Something in an object graph can't be stored in a snapshot."""
+
+
+class _StaleSnapshotError(Exception):
+    """A snapshot no longer describes the code it was taken from."""
+
+
+def _get_ref(thing):
+    """Returns an importable 'module:qualname' reference to a class or fn."""
+    module_name = getattr(thing, '__module__', None)
+    qualname = getattr(thing, '__qualname__', None)
+    if module_name is None or qualname is None or '<locals>' in qualname:
+        raise _UnsnapshottableError(thing)
+    ref = '{0}:{1}'.format(module_name, qualname)
+    try:
+        if _resolve_ref(ref) is not thing:
+            raise _UnsnapshottableError(thing)
+    except (ImportError, AttributeError):
+        raise _UnsnapshottableError(thing)
+    return ref
+
+
+def _resolve_ref(ref):
+    module_name, qualname = ref.split(':')
+    thing = sys.modules.get(module_name)
+    if thing is None:
+        thing = importlib.import_module(module_name)
+    for attr in qualname.split('.'):
+        thing = getattr(thing, attr)
+    return thing
+
+
+def _get_scalar(value):
+    if not isinstance(value, _JSON_SCALAR_TYPES):
+        raise _UnsnapshottableError(value)
+    return value
+
+
+def _get_scope_json(scope_id):
+    if scope_id in _BUILTIN_SCOPE_ID_TO_NAME:
+        return _BUILTIN_SCOPE_ID_TO_NAME[scope_id]
+    return {'id': _get_scalar(scope_id)}
+
+
+def _get_scope_id(scope_json, known_scope_ids):
+    if isinstance(scope_json, dict):
+        scope_id = scope_json['id']
+    else:
+        scope_id = _BUILTIN_SCOPE_NAME_TO_ID[scope_json]
+    if scope_id not in known_scope_ids:
+        raise _StaleSnapshotError(scope_json)
+    return scope_id
+
+
+def _get_file_digest(path):
+    try:
+        with open(path, 'rb') as source_file:
+            return hashlib.sha256(source_file.read()).hexdigest()
+    except (IOError, OSError):
+        return 'unreadable'
+
+
+def get_snapshot_key(modules, classes, binding_specs, options):
+    """Hashes everything that an object graph's bindings are derived from.
+
+    That's the source files of the modules searched for classes, of the
+    classes, and of the binding specs and their base classes (which may
+    define provider methods), plus the binding specs' attributes
+    (which their configure methods may depend on), and the options passed to
+    new_object_graph() that affect bindings.  Attributes and options with no
+    stable description (e.g., whose repr() includes an address) make the key
+    differ from run to run, so that a snapshot is never wrongly reused.
+
+    Args:
+      modules: the modules searched for classes
+      classes: the classes to bind implicitly
+      binding_specs: all the binding specs, including dependencies
+      options: a JSON-serializable dict of other inputs
+    Returns:
+      a hex digest
+    """
+    module_names = set()
+    paths = set()
+    def AddModule(module):
+        module_names.add(getattr(module, '__name__', repr(module)))
+        path = getattr(module, '__file__', None)
+        if path is not None:
+            paths.add(path)
+    for module in modules:
+        if module is not None:
+            AddModule(module)
+    things = list(classes)
+    for binding_spec in binding_specs:
+        things.extend(
+            cls for cls in type(binding_spec).__mro__
+            if cls is not bindings.BindingSpec and cls is not object)
+    for thing in things:
+        module = sys.modules.get(thing.__module__)
+        if module is not None:
+            AddModule(module)
+    binding_spec_states = sorted(
+        json.dumps([type(binding_spec).__module__,
+                    type(binding_spec).__qualname__,
+                    getattr(binding_spec, '__dict__', {})],
+                   sort_keys=True, default=repr)
+        for binding_spec in binding_specs)
+    hasher = hashlib.sha256()
+    hasher.update(json.dumps({
+        'pinject_version': version.VERSION,
+        'python_version': platform.python_version(),
+        'modules': sorted(module_names),
+        'files': [[path, _get_file_digest(path)] for path in sorted(paths)],
+        'classes': sorted('{0}:{1}'.format(cls.__module__, cls.__qualname__)
+                          for cls in classes),
+        'binding_specs': binding_spec_states,
+        'options': options,
+    }, sort_keys=True, default=repr).encode('utf-8'))
+    return hasher.hexdigest()
+
+
+def get_fn_option(fn):
+    """Describes a function passed to new_object_graph(), for options."""
+    try:
+        return _get_ref(fn)
+    except _UnsnapshottableError:
+        return repr(fn)
+
+
+def _get_binding_json(binding, binding_spec, binding_spec_to_ref):
+    binding_key = binding.binding_key
+    binding_json = {'name': binding_key.name,
+                    'scope': _get_scope_json(binding.scope_id)}
+    if binding_spec is not None:
+        binding_json['binding_spec'] = binding_spec_to_ref[binding_spec]
+    if binding_key.name == bindings.BOUND_CLASS_BINDING_NAME:
+        binding_json['bound_class'] = _get_ref(binding.target)
+        return binding_json
+    binding_json['annotation'] = _get_scalar(binding_key.annotated_with)
+    if binding.target_kind is bindings.TO_CLASS:
+        binding_json['to_class'] = _get_ref(binding.target)
+        return binding_json
+    if binding.target_kind is bindings.TO_PROVIDER_FN:
+        bound_class_and_scope = bindings.get_bound_class_and_scope(
+            binding.target)
+        if bound_class_and_scope is not None:
+            to_class, in_scope = bound_class_and_scope
+            binding_json['to_bound_class'] = _get_ref(to_class)
+            binding_json['bound_class_scope'] = _get_scope_json(in_scope)
+            return binding_json
+        method_self = getattr(binding.target, '__self__', None)
+        if method_self in binding_spec_to_ref:
+            method_name = binding.target.__name__
+            if getattr(method_self, method_name, None) != binding.target:
+                raise _UnsnapshottableError(binding.target)
+            binding_json['provider_method'] = method_name
+            binding_json['provider_binding_spec'] = (
+                binding_spec_to_ref[method_self])
+            return binding_json
+    # Instances, and provider functions other than binding spec methods,
+    # can't be referred to from another process.
+    raise _UnsnapshottableError(binding)
+
+
+def _get_sort_key(binding_json):
+    return json.dumps(binding_json, sort_keys=True)
+
+
+def new_snapshot(binding_key_to_binding, collided_binding_key_to_bindings,
+                 binding_key_to_binding_spec, binding_specs, counts):
+    """Describes an object graph's bindings, if they can all be described.
+
+    Bindings are listed in a deterministic order, so that the same inputs
+    always yield the same snapshot, and loading it assigns the same binding
+    slots.  The snapshot's key is only added by write_snapshot(), so that
+    computing it can be skipped if there's nothing to write.
+
+    Args:
+      binding_key_to_binding: a map from binding key to binding
+      collided_binding_key_to_bindings: a map from binding key to the
+          bindings that collided on it
+      binding_key_to_binding_spec: a map from binding key to the binding spec
+          that created it
+      binding_specs: all the binding specs, including dependencies
+      counts: the counts to record in startup reports when loading, as passed
+          to StartupReport.record_counts()
+    Returns:
+      a JSON-serializable dict, or None if some binding can't be referred to
+          from another process (e.g., a binding to an instance, or to a class
+          defined in a function)
+    """
+    try:
+        binding_spec_to_ref = {binding_spec: _get_ref(type(binding_spec))
+                               for binding_spec in binding_specs}
+        def GetBindingJson(binding):
+            return _get_binding_json(
+                binding, binding_key_to_binding_spec.get(binding.binding_key),
+                binding_spec_to_ref)
+        bindings_json = sorted(
+            [GetBindingJson(binding)
+             for binding in binding_key_to_binding.values()],
+            key=_get_sort_key)
+        collisions_json = sorted(
+            [sorted([GetBindingJson(binding) for binding in collided_bindings],
+                    key=_get_sort_key)
+             for collided_bindings in
+             collided_binding_key_to_bindings.values()],
+            key=_get_sort_key)
+    except _UnsnapshottableError:
+        return None
+    return {'version': _SNAPSHOT_VERSION,
+            'counts': list(counts), 'bindings': bindings_json,
+            'collisions': collisions_json}
+
+
+class _BindingLoader(object):
+
+    def __init__(self, ref_to_binding_spec, known_scope_ids):
+        self._ref_to_binding_spec = ref_to_binding_spec
+        self._known_scope_ids = known_scope_ids
+        # Maps (class, scope ID) to the provider function for bindings to it,
+        # which every arg name bound to it shares.
+        self._bound_class_and_scope_to_provider_fn = {}
+
+    def get_binding_spec(self, binding_json):
+        ref = binding_json.get('binding_spec')
+        if ref is None:
+            return None
+        return self._ref_to_binding_spec[ref]
+
+    def load(self, binding_json):
+        scope_id = _get_scope_id(binding_json['scope'], self._known_scope_ids)
+        if 'bound_class' in binding_json:
+            return bindings.new_bound_class_binding(
+                _resolve_ref(binding_json['bound_class']), scope_id)
+        binding_key = binding_keys.new(binding_json['name'],
+                                       binding_json['annotation'])
+        if 'to_class' in binding_json:
+            return bindings.new_binding_to_class(
+                binding_key, _resolve_ref(binding_json['to_class']), scope_id)
+        if 'to_bound_class' in binding_json:
+            bound_class_and_scope = (
+                _resolve_ref(binding_json['to_bound_class']),
+                _get_scope_id(binding_json['bound_class_scope'],
+                              self._known_scope_ids))
+            provider_fn = self._bound_class_and_scope_to_provider_fn.get(
+                bound_class_and_scope)
+            if provider_fn is None:
+                provider_fn = bindings.new_bound_class_provider_fn(
+                    *bound_class_and_scope)
+                self._bound_class_and_scope_to_provider_fn[
+                    bound_class_and_scope] = provider_fn
+        else:
+            provider_fn = getattr(
+                self._ref_to_binding_spec[
+                    binding_json['provider_binding_spec']],
+                binding_json['provider_method'])
+        return bindings.Binding(binding_key, bindings.TO_PROVIDER_FN,
+                                provider_fn, scope_id)
+
+
+def read_snapshot(path):
+    """Reads a snapshot written by write_snapshot().
+
+    Returns:
+      the snapshot, or None if there's no snapshot of this version at path
+    """
+    try:
+        with open(path) as snapshot_file:
+            snapshot = json.load(snapshot_file)
+    except (IOError, OSError, ValueError):
+        return None
+    if (not isinstance(snapshot, dict) or
+            snapshot.get('version') != _SNAPSHOT_VERSION):
+        return None
+    return snapshot
+
+
+def load_snapshot(snapshot, snapshot_key, binding_specs, known_scope_ids):
+    """Loads an object graph's bindings from a snapshot, if it's current.
+
+    Args:
+      snapshot: a snapshot returned by read_snapshot()
+      snapshot_key: the key returned by get_snapshot_key() for the object
+          graph being created
+      binding_specs: all the binding specs, including dependencies
+      known_scope_ids: the IDs of the object graph's scopes
+    Returns:
+      a (binding key to binding map, binding key to collided bindings map,
+          binding key to binding spec map, counts) tuple, or None if the
+          snapshot isn't current
+    """
+    if snapshot.get('key') != snapshot_key:
+        return None
+    try:
+        loader = _BindingLoader(
+            {_get_ref(type(binding_spec)): binding_spec
+             for binding_spec in binding_specs}, known_scope_ids)
+        binding_key_to_binding = {}
+        binding_key_to_binding_spec = {}
+        for binding_json in snapshot['bindings']:
+            binding = loader.load(binding_json)
+            binding_key_to_binding[binding.binding_key] = binding
+            binding_spec = loader.get_binding_spec(binding_json)
+            if binding_spec is not None:
+                binding_key_to_binding_spec[binding.binding_key] = binding_spec
+        collided_binding_key_to_bindings = {}
+        for collided_bindings_json in snapshot['collisions']:
+            collided_bindings = set(
+                loader.load(binding_json)
+                for binding_json in collided_bindings_json)
+            collided_binding_key_to_bindings[
+                next(iter(collided_bindings)).binding_key] = collided_bindings
+        counts = tuple(snapshot['counts'])
+    except (_StaleSnapshotError, _UnsnapshottableError, ImportError,
+            AttributeError, KeyError, TypeError, ValueError):
+        return None
+    return (binding_key_to_binding, collided_binding_key_to_bindings,
+            binding_key_to_binding_spec, counts)
+
+
+def write_snapshot(path, snapshot, snapshot_key):
+    """Writes a snapshot returned by new_snapshot(), with its key.
+
+    The snapshot is written to a temporary file that then replaces path, so
+    that processes starting concurrently never read a partial snapshot.
+    """
+    snapshot = dict(snapshot, key=snapshot_key)
+    tmp_path = '{0}.{1}.tmp'.format(path, os.getpid())
+    try:
+        with open(tmp_path, 'w') as snapshot_file:
+            json.dump(snapshot, snapshot_file, indent=1, sort_keys=True)
+            snapshot_file.write('\n')
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
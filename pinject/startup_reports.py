@@ -0,0 +1,201 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import time
+
+
+class PhaseTiming(object):
+    """The time taken by one phase of creating an object graph."""
+
+    __slots__ = ('name', 'wall_secs', 'cpu_secs')
+
+    def __init__(self, name, wall_secs, cpu_secs):
+        self.name = name
+        self.wall_secs = wall_secs
+        self.cpu_secs = cpu_secs
+
+    def to_dict(self):
+        return {'name': self.name, 'wall_secs': self.wall_secs,
+                'cpu_secs': self.cpu_secs}
+
+
+class _Timer(object):
+    """Times a with-block, passing the wall and CPU seconds to a function."""
+
+    def __init__(self, record_fn):
+        self._record_fn = record_fn
+        self._start_wall_secs = None
+        self._start_cpu_secs = None
+
+    def __enter__(self):
+        self._start_wall_secs = time.perf_counter()
+        self._start_cpu_secs = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._record_fn(time.perf_counter() - self._start_wall_secs,
+                        time.process_time() - self._start_cpu_secs)
+        return False
+
+
+class StartupReport(object):
+    """Where the time went while creating an object graph.
+
+    Phases are listed in the order that new_object_graph() runs them.  Module
+    scan times and binding spec times break down the find_classes and
+    binding_specs phases respectively.
+    """
+
+    def __init__(self):
+        self.phases = []
+        self.module_name_to_scan_secs = {}
+        self.binding_spec_times = []
+        self.num_classes = 0
+        self.num_implicit_bindings = 0
+        self.num_explicit_bindings = 0
+        self.num_bindings = 0
+        self.num_collided_binding_keys = 0
+
+    def time_phase(self, name):
+        """Returns a context manager timing a phase of graph creation."""
+        return _Timer(lambda wall_secs, cpu_secs: self.phases.append(
+            PhaseTiming(name, wall_secs, cpu_secs)))
+
+    def time_module_scan(self, module):
+        """Returns a context manager timing finding classes in a module.
+
+        sys.modules may hold objects other than modules, so one without a
+        string __name__ is reported by its repr().
+        """
+        module_name = getattr(module, '__name__', None)
+        if not isinstance(module_name, str):
+            module_name = repr(module)
+        def Record(wall_secs, unused_cpu_secs):
+            self.module_name_to_scan_secs[module_name] = wall_secs
+        return _Timer(Record)
+
+    def time_binding_spec(self, binding_spec, step):
+        """Returns a context manager timing a step of using a binding spec.
+
+        Args:
+          binding_spec: a BindingSpec instance
+          step: the name of what's being done with binding_spec, e.g.,
+              "configure"
+        Returns:
+          a context manager
+        """
+        def Record(wall_secs, cpu_secs):
+            self.binding_spec_times.append(PhaseTiming(
+                '{0}.{1}'.format(type(binding_spec).__name__, step),
+                wall_secs, cpu_secs))
+        return _Timer(Record)
+
+    def record_counts(self, num_classes, num_implicit_bindings,
+                      num_explicit_bindings, num_bindings,
+                      num_collided_binding_keys):
+        """Records how much graph creation found."""
+        self.num_classes = num_classes
+        self.num_implicit_bindings = num_implicit_bindings
+        self.num_explicit_bindings = num_explicit_bindings
+        self.num_bindings = num_bindings
+        self.num_collided_binding_keys = num_collided_binding_keys
+
+    def get_total_wall_secs(self):
+        return sum(phase.wall_secs for phase in self.phases)
+
+    def get_total_cpu_secs(self):
+        return sum(phase.cpu_secs for phase in self.phases)
+
+    def to_dict(self):
+        """Returns this report as a JSON-serializable dict."""
+        return {
+            'total_wall_secs': self.get_total_wall_secs(),
+            'total_cpu_secs': self.get_total_cpu_secs(),
+            'phases': [phase.to_dict() for phase in self.phases],
+            'module_name_to_scan_secs': dict(self.module_name_to_scan_secs),
+            'binding_spec_times': [
+                timing.to_dict() for timing in self.binding_spec_times],
+            'num_classes': self.num_classes,
+            'num_implicit_bindings': self.num_implicit_bindings,
+            'num_explicit_bindings': self.num_explicit_bindings,
+            'num_bindings': self.num_bindings,
+            'num_collided_binding_keys': self.num_collided_binding_keys,
+        }
+
+    def format(self, max_modules=10):
+        """Returns this report as human-readable text.
+
+        Args:
+          max_modules: the number of slowest-to-scan modules to list
+        Returns:
+          a multi-line string
+        """
+        lines = ['object graph created in {0:.3f}s wall, {1:.3f}s CPU'.format(
+            self.get_total_wall_secs(), self.get_total_cpu_secs())]
+        for phase in self.phases:
+            lines.append('  {0:<24} {1:9.3f}s wall {2:9.3f}s CPU'.format(
+                phase.name, phase.wall_secs, phase.cpu_secs))
+        slowest_modules = sorted(
+            self.module_name_to_scan_secs.items(),
+            key=lambda item: item[1], reverse=True)[:max_modules]
+        if slowest_modules:
+            lines.append('slowest of {0} modules scanned:'.format(
+                len(self.module_name_to_scan_secs)))
+            for module_name, scan_secs in slowest_modules:
+                lines.append('  {0:<48} {1:9.3f}s'.format(
+                    module_name, scan_secs))
+        if self.binding_spec_times:
+            lines.append('binding specs:')
+            for timing in self.binding_spec_times:
+                lines.append('  {0:<48} {1:9.3f}s'.format(
+                    timing.name, timing.wall_secs))
+        lines.append(
+            '{0} classes, {1} implicit bindings, {2} explicit bindings,'
+            ' {3} binding keys, {4} collided binding keys'.format(
+                self.num_classes, self.num_implicit_bindings,
+                self.num_explicit_bindings, self.num_bindings,
+                self.num_collided_binding_keys))
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.format()
+
+
+class _NullTimer(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+_NULL_TIMER = _NullTimer()
+
+
+class _NullStartupReport(object):
+    """A StartupReport stand-in that records nothing, at almost no cost."""
+
+    def time_phase(self, name):
+        return _NULL_TIMER
+
+    def time_module_scan(self, module):
+        return _NULL_TIMER
+
+    def time_binding_spec(self, binding_spec, step):
+        return _NULL_TIMER
+
+    def record_counts(self, *unused_counts):
+        pass
+NULL_STARTUP_REPORT = _NullStartupReport()
@@ -16,6 +16,7 @@ limitations under the License.
 
 import six
 import inspect
+import types
 
 from . import errors
 
@@ -47,6 +48,21 @@ def is_constructor_defined(cls):
 
 def get_method_args(fn):
     if six.PY3:
+        if (type(fn) is types.FunctionType and
+            not hasattr(fn, '__signature__')):
+            # Reading a plain function's code object gives the same answer
+            # as getfullargspec(), many times faster.
+            code = fn.__code__
+            arg_names = list(code.co_varnames[:code.co_argcount])
+            index = code.co_argcount + code.co_kwonlyargcount
+            varargs = None
+            if code.co_flags & inspect.CO_VARARGS:
+                varargs = code.co_varnames[index]
+                index += 1
+            keywords = None
+            if code.co_flags & inspect.CO_VARKEYWORDS:
+                keywords = code.co_varnames[index]
+            return arg_names, varargs, keywords, fn.__defaults__
         spec = inspect.getfullargspec(fn)
         return spec.args, spec.varargs, spec.varkw, spec.defaults
     arg_names, varargs, keywords, defaults = inspect.getargspec(fn)
@@ -0,0 +1,84 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import json
+import os
+import threading
+import time
+
+from . import critical_paths
+from . import provision_observers
+
+
+class TraceRecorder(provision_observers.ObservingContextManager):
+    """Records provisions as Chrome trace events.
+
+    Each provision becomes a begin event and an end event, which nest like
+    the provisions themselves, so that a trace viewer (e.g.,
+    chrome://tracing or Perfetto) shows a timeline per thread.
+    """
+
+    def __init__(self, obj_graph):
+        """Initializer.
+
+        Args:
+          obj_graph: the ObjectGraph whose provisions to record
+        """
+        super(TraceRecorder, self).__init__(obj_graph)
+        self._events = []
+        self._pid = os.getpid()
+
+    def _add_event(self, phase, binding, args):
+        # Events from all threads go in one list, in the order they happen;
+        # each event's tid tells a trace viewer which timeline it's on.
+        self._events.append({
+            'name': binding.binding_key.name, 'cat': 'pinject', 'ph': phase,
+            'ts': time.perf_counter() * 1e6, 'pid': self._pid,
+            'tid': threading.get_ident(), 'args': args})
+
+    def on_provide_start(self, binding, scope_id, depth):
+        self._add_event('B', binding, {
+            'binding_key': str(binding.binding_key),
+            'scope': str(scope_id), 'depth': depth})
+
+    def on_provide_end(self, binding, scope_id, depth, is_cache_hit,
+                       elapsed_secs):
+        self._add_event('E', binding, {'cache_hit': is_cache_hit})
+
+    def on_provide_failure(self, binding, scope_id, depth, error,
+                           elapsed_secs):
+        self._add_event('E', binding, {'error': repr(error)})
+
+    def get_events(self):
+        """Returns the trace events recorded so far, as dicts."""
+        return list(self._events)
+
+    def get_critical_path_report(self):
+        """Analyzes the recorded provisions' critical path.
+
+        Returns:
+          a CriticalPathReport
+        """
+        return critical_paths.new_critical_path_report(self.get_events())
+
+    def to_json_dict(self):
+        """Returns the recorded trace in the Chrome trace event format."""
+        return {'traceEvents': self.get_events(), 'displayTimeUnit': 'ms'}
+
+    def write(self, path):
+        """Writes the recorded trace as JSON to a local file."""
+        with open(path, 'w') as trace_file:
+            json.dump(self.to_json_dict(), trace_file)
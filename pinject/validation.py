@@ -0,0 +1,91 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+from . import errors
+from . import locations
+
+
+# Problem kinds.
+UNBOUND_ARG = 'unbound_arg'
+AMBIGUOUS_ARG = 'ambiguous_arg'
+CYCLE = 'cycle'
+BAD_SCOPE = 'bad_scope'
+
+
+class Problem(object):
+    """Something that would make providing fail, found without providing.
+
+    Attributes:
+      kind: one of UNBOUND_ARG, AMBIGUOUS_ARG, CYCLE, or BAD_SCOPE
+      message: a description of the problem, like that of the error that
+          providing would raise
+    """
+
+    def __init__(self, kind, message):
+        self.kind = kind
+        self.message = message
+
+    def to_dict(self):
+        return {'kind': self.kind, 'message': self.message}
+
+    def __str__(self):
+        return '{0}: {1}'.format(self.kind, self.message)
+
+
+def _get_node_desc(binding_mapping, node):
+    if isinstance(node, type):
+        return locations.get_name_and_loc(node)
+    return binding_mapping.find(node).get_binding_target_desc_fn()
+
+
+def find_problems(binding_mapping, dependency_graph,
+                  is_scope_usable_from_scope_fn):
+    """Finds what would make providing from a dependency graph fail.
+
+    Args:
+      binding_mapping: the BindingMapping that dependency_graph was
+          computed from
+      dependency_graph: a DependencyGraph
+      is_scope_usable_from_scope_fn: a function taking two scope IDs and
+          returning whether an object in the first scope can be injected
+          into an object from the second scope
+    Returns:
+      a list of Problems, unbound and ambiguous args first, then cycles,
+          then injections from unusable scopes
+    """
+    problems = []
+    for node, arg_binding_key in dependency_graph.get_unresolved_args():
+        try:
+            binding_mapping.get(arg_binding_key.binding_key,
+                                _get_node_desc(binding_mapping, node))
+        except errors.AmbiguousArgNameError as e:
+            problems.append(Problem(AMBIGUOUS_ARG, str(e)))
+        except errors.Error as e:
+            problems.append(Problem(UNBOUND_ARG, str(e)))
+    for cycle in dependency_graph.get_cycles():
+        problems.append(Problem(
+            CYCLE, str(errors.CyclicInjectionError(
+                [_get_node_desc(binding_mapping, node) for node in cycle]))))
+    nodes = set(dependency_graph.get_nodes())
+    for binding, arg_binding_key, arg_binding in (
+            binding_mapping.get_scope_usability_violations(
+                is_scope_usable_from_scope_fn)):
+        if binding.binding_key in nodes:
+            problems.append(Problem(BAD_SCOPE, str(
+                errors.BadDependencyScopeError(
+                    binding.get_binding_target_desc_fn(), binding.scope_id,
+                    arg_binding.scope_id, arg_binding_key.binding_key))))
+    return problems
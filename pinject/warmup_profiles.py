@@ -0,0 +1,117 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import json
+
+from . import bindings
+from . import errors
+from . import provision_observers
+from . import scoping
+
+
+_PROFILE_VERSION = 1
+
+
+def _get_profile_key(binding_key):
+    return binding_key.name, binding_key.annotation_as_adjective()
+
+
+class WarmupProfileRecorder(provision_observers.ObservingContextManager):
+    """Records which singletons are constructed, in order.
+
+    Singletons are recorded in the order their construction ended, so each
+    one comes after the singletons it depends on.
+    """
+
+    def __init__(self, obj_graph):
+        """Initializer.
+
+        Args:
+          obj_graph: the ObjectGraph whose singleton constructions to record
+        """
+        super(WarmupProfileRecorder, self).__init__(obj_graph)
+        self._binding_keys = []
+
+    def on_provide_end(self, binding, scope_id, depth, is_cache_hit,
+                       elapsed_secs):
+        if (not is_cache_hit and scope_id is scoping.SINGLETON and
+            # bind(to_class=...) binds the class under an internal binding
+            # key, annotated with an object whose description varies from
+            # run to run.  Warming the binding that bind() was called for
+            # warms that binding too.
+            binding.binding_key.name != bindings.BOUND_CLASS_BINDING_NAME):
+            self._binding_keys.append(binding.binding_key)
+
+    def get_binding_keys(self):
+        """Returns the binding keys of the singletons constructed, in order."""
+        return list(self._binding_keys)
+
+    def to_json_dict(self):
+        return {'version': _PROFILE_VERSION, 'bindings': [
+            {'name': name, 'annotation': annotation}
+            for name, annotation in (
+                _get_profile_key(binding_key)
+                for binding_key in self.get_binding_keys())]}
+
+    def write(self, path):
+        """Writes the recorded profile as JSON to a local file."""
+        with open(path, 'w') as profile_file:
+            json.dump(self.to_json_dict(), profile_file, indent=2)
+
+
+def read_profile(path):
+    """Reads a warmup profile written by WarmupProfileRecorder.write().
+
+    Args:
+      path: the path of the profile file
+    Returns:
+      a list of (binding name, annotation adjective) pairs, in the order to
+          warm them
+    Raises:
+      Error: the file isn't a warmup profile
+    """
+    with open(path) as profile_file:
+        try:
+            profile = json.load(profile_file)
+        except ValueError:
+            profile = None
+    if (not isinstance(profile, dict) or
+        profile.get('version') != _PROFILE_VERSION):
+        raise errors.BadWarmupProfileError(path)
+    return [(entry['name'], entry['annotation'])
+            for entry in profile['bindings']]
+
+
+def get_bindings_to_warm(binding_mapping, profile_keys):
+    """Finds the singleton bindings to warm for a profile.
+
+    Profile entries that no longer match a singleton binding are skipped,
+    since the code may have changed since the profile was recorded.
+
+    Args:
+      binding_mapping: a BindingMapping
+      profile_keys: (binding name, annotation adjective) pairs, as returned
+          by read_profile()
+    Returns:
+      a list of Bindings
+    """
+    profile_key_to_binding = {
+        _get_profile_key(binding.binding_key): binding
+        for binding in binding_mapping.get_bindings()
+        if binding.scope_id is scoping.SINGLETON}
+    return [profile_key_to_binding[profile_key]
+            for profile_key in profile_keys
+            if profile_key in profile_key_to_binding]
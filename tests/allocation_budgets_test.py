@@ -0,0 +1,72 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import platform
+import tracemalloc
+import unittest
+
+from benchmarks import allocations
+
+
+# The most memory that providing each canonical graph shape may allocate at
+# once, in bytes.  These are about 1.5 times what CPython 3.11 measures, so
+# that they catch regressions in the provision path (e.g., allocating per
+# arg in object_providers, injection_contexts, or arg_binding_keys) without
+# breaking on small differences between Python versions.  If a change
+# legitimately needs more, raise the budget in the same change, and say why.
+_PEAK_BYTES_PER_PROVIDE_BUDGETS = {
+    'annotated_args.prototype': 2300,
+    'annotated_args.singleton': 1950,
+    'chain.prototype': 3850,
+    'chain.singleton': 900,
+    'diamond.prototype': 2500,
+    'diamond.singleton': 1000,
+    'fan_out.prototype': 2850,
+    'fan_out.singleton': 950,
+    'provider_indirection.prototype': 4100,
+    'provider_indirection.singleton': 2400,
+}
+# Providing shouldn't leave anything allocated but what it returns, which is
+# dropped.
+_LEAKED_BLOCKS_PER_PROVIDE_BUDGET = 0.1
+
+
+@unittest.skipUnless(
+    platform.python_implementation() == 'CPython' and
+    hasattr(tracemalloc, 'reset_peak'),
+    'allocation budgets are for CPython 3.9 or later')
+class AllocationBudgetsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.measurements = allocations.measure_all_shapes(num_provides=50)
+
+    def test_budgets_cover_all_shapes(self):
+        self.assertEqual(set(_PEAK_BYTES_PER_PROVIDE_BUDGETS),
+                         set(self.measurements))
+
+    def test_peak_bytes_per_provide_within_budget(self):
+        for name, budget in sorted(_PEAK_BYTES_PER_PROVIDE_BUDGETS.items()):
+            with self.subTest(name):
+                self.assertLessEqual(
+                    self.measurements[name]['peak_bytes_per_provide'], budget)
+
+    def test_leaked_blocks_per_provide_within_budget(self):
+        for name, measurement in sorted(self.measurements.items()):
+            with self.subTest(name):
+                self.assertLessEqual(
+                    measurement['leaked_blocks_per_provide'],
+                    _LEAKED_BLOCKS_PER_PROVIDE_BUDGET)
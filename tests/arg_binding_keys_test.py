@@ -14,7 +14,9 @@ limitations under the License.
 """
 
 
+import gc
 import unittest
+import weakref
 
 from pinject import arg_binding_keys
 from pinject import binding_keys
@@ -170,3 +172,30 @@ class NewArgBindingKeyTest(unittest.TestCase):
         arg_binding_key = arg_binding_keys.new('provide_foo')
         self.assertEqual('the arg named "provide_foo" unannotated',
                          str(arg_binding_key))
+
+    def test_interns_equal_arg_binding_keys(self):
+        self.assertIs(arg_binding_keys.new('provide_foo', 'an-annotation'),
+                      arg_binding_keys.new('provide_foo', 'an-annotation'))
+        self.assertIs(arg_binding_keys.new('an-arg-name'),
+                      arg_binding_keys.new('an-arg-name'))
+
+    def test_interns_provider_and_direct_args_separately(self):
+        provider_arg_binding_key = arg_binding_keys.new('provide_foo')
+        arg_binding_key = arg_binding_keys.new('foo')
+        self.assertIsNot(provider_arg_binding_key, arg_binding_key)
+        self.assertIs(provider_arg_binding_key.binding_key,
+                      arg_binding_key.binding_key)
+        self.assertIs(provider_arg_binding_key,
+                      arg_binding_keys.new('provide_foo'))
+        self.assertIs(arg_binding_key, arg_binding_keys.new('foo'))
+
+    def test_shares_binding_key_with_binding_keys_new(self):
+        self.assertIs(binding_keys.new('foo', 'an-annotation'),
+                      arg_binding_keys.new(
+                          'provide_foo', 'an-annotation').binding_key)
+
+    def test_releases_arg_binding_keys_no_longer_referred_to(self):
+        arg_binding_key_ref = weakref.ref(
+            arg_binding_keys.new('unreferenced-name'))
+        gc.collect()
+        self.assertIsNone(arg_binding_key_ref())
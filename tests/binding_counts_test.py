@@ -0,0 +1,88 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import json
+import unittest
+
+from pinject import bindings
+from pinject import object_graph
+from pinject import scoping
+
+
+class Foo(object):
+    pass
+
+
+class Outer(object):
+    class Foo(object):
+        pass
+
+
+class Bar(object):
+    def __init__(self, foo):
+        pass
+
+
+class SomeBindingSpec(bindings.BindingSpec):
+
+    def configure(self, bind):
+        bind('baz', to_class=Bar, in_scope=scoping.PROTOTYPE)
+        bind('other_baz', to_class=Bar, in_scope=scoping.PROTOTYPE)
+        bind('name', to_instance='some-name')
+
+    def provide_qux(self):
+        return 'qux'
+
+
+class BindingCountsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.counts = object_graph.new_object_graph(
+            modules=None, classes=[Foo, Outer.Foo, Bar],
+            binding_specs=[SomeBindingSpec()]).get_binding_counts()
+
+    def test_counts_bindings_by_target_kind_and_scope(self):
+        # bar, plus baz and other_baz (to provider functions, which share
+        # one internal binding to Bar), name, and qux.
+        self.assertEqual(5, self.counts.num_bindings)
+        self.assertEqual(1, self.counts.num_internal_bindings)
+        self.assertEqual({'class': 1, 'instance': 1, 'provider_fn': 3},
+                         self.counts.target_kind_to_count)
+        self.assertEqual({'singleton scope': 3, 'prototype scope': 2},
+                         self.counts.scope_to_count)
+
+    def test_lists_collisions(self):
+        [(binding_key_desc, target_descs)] = self.counts.collisions
+        self.assertIn('"foo"', binding_key_desc)
+        self.assertEqual(2, len(target_descs))
+        self.assertTrue(all(target_desc.startswith('the class')
+                            for target_desc in target_descs))
+
+    def test_to_json(self):
+        json_dict = json.loads(self.counts.to_json())
+        self.assertEqual(5, json_dict['num_bindings'])
+        self.assertEqual(1, len(json_dict['collisions']))
+        self.assertEqual(2, len(json_dict['collisions'][0]['targets']))
+
+    def test_format(self):
+        text = self.counts.format(max_collisions=0)
+        self.assertIn('5 bindings', text)
+        self.assertIn('1 collided binding keys', text)
+        self.assertIn('... and 1 more', text)
+        self.assertIn('could be any of', self.counts.format())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,7 +14,9 @@ limitations under the License.
 """
 
 
+import gc
 import unittest
+import weakref
 
 from pinject import annotations
 from pinject import binding_keys
@@ -82,3 +84,26 @@ class NewBindingKeyTest(unittest.TestCase):
         self.assertEqual(
             'the binding name "an-arg-name" (annotated with "an-annotation")',
             str(binding_key))
+
+    def test_interns_equal_binding_keys(self):
+        self.assertIs(binding_keys.new('an-arg-name', 'an-annotation'),
+                      binding_keys.new('an-arg-name', 'an-annotation'))
+        self.assertIs(binding_keys.new('an-arg-name'),
+                      binding_keys.new('an-arg-name'))
+
+    def test_does_not_intern_unequal_binding_keys(self):
+        self.assertIsNot(binding_keys.new('an-arg-name', 'an-annotation'),
+                         binding_keys.new('an-arg-name', 'other-annotation'))
+        self.assertIsNot(binding_keys.new('an-arg-name'),
+                         binding_keys.new('an-arg-name', 'an-annotation'))
+
+    def test_interned_binding_key_equals_uninterned_one(self):
+        self.assertEqual(
+            binding_keys.BindingKey('an-arg-name',
+                                    annotations.Annotation('an-annotation')),
+            binding_keys.new('an-arg-name', 'an-annotation'))
+
+    def test_releases_binding_keys_no_longer_referred_to(self):
+        binding_key_ref = weakref.ref(binding_keys.new('unreferenced-name'))
+        gc.collect()
+        self.assertIsNone(binding_key_ref())
@@ -22,6 +22,7 @@ from pinject import binding_keys
 from pinject import decorators
 from pinject import errors
 from pinject import injection_contexts
+from pinject import locations
 from pinject import required_bindings
 from pinject import scoping
 
@@ -41,6 +42,42 @@ def new_in_default_scope(binding_key):
         get_binding_loc_fn=lambda: 'unknown')
 
 
+class BindingTest(unittest.TestCase):
+
+    def test_str_uses_given_binding_loc(self):
+        binding = bindings_lib.new_binding_to_instance(
+            binding_keys.new('foo'), 'a-foo', 'a-scope-id',
+            get_binding_loc_fn=lambda: 'a-loc')
+        self.assertEqual(
+            'the binding at a-loc, from the binding name "foo" (unannotated)'
+            ' to the instance \'a-foo\', in "a-scope-id" scope',
+            str(binding))
+
+    def test_binding_loc_defaults_to_target_loc(self):
+        class SomeClass(object):
+            pass
+        binding = bindings_lib.new_binding_to_class(
+            binding_keys.new('some_class'), SomeClass, 'a-scope-id')
+        self.assertEqual(locations.get_loc(SomeClass),
+                         binding.get_binding_loc())
+
+    def test_bindings_share_target_kind(self):
+        class SomeClass(object):
+            pass
+        class OtherClass(object):
+            pass
+        [some_binding, other_binding] = (
+            bindings_lib.get_implicit_class_bindings([SomeClass, OtherClass]))
+        self.assertIs(bindings_lib.TO_CLASS, some_binding.target_kind)
+        self.assertIs(bindings_lib.TO_CLASS, other_binding.target_kind)
+
+    def test_has_no_instance_dict(self):
+        binding = bindings_lib.new_binding_to_instance(
+            binding_keys.new('foo'), 'a-foo', 'a-scope-id',
+            get_binding_loc_fn=lambda: 'a-loc')
+        self.assertFalse(hasattr(binding, '__dict__'))
+
+
 class GetBindingKeyToBindingMapsTest(unittest.TestCase):
 
     def setUp(self):
@@ -151,6 +188,37 @@ class GetOverallBindingKeyToBindingMapsTest(unittest.TestCase):
 
 class BindingMappingTest(unittest.TestCase):
 
+    def test_assigns_dense_slots(self):
+        binding_one = new_in_default_scope(binding_keys.new('one'))
+        binding_two = new_in_default_scope(binding_keys.new('two'))
+        binding_mapping = bindings_lib.BindingMapping(
+            {binding_one.binding_key: binding_one,
+             binding_two.binding_key: binding_two}, {})
+        self.assertIsNone(binding_one.slot)
+        self.assertEqual(2, binding_mapping.assign_slots())
+        self.assertEqual({0, 1}, {binding_one.slot, binding_two.slot})
+
+    def test_finds_scope_usability_violations(self):
+        class SomeClass(object):
+            def __init__(self, foo, bar):
+                pass
+        binding = bindings_lib.new_binding_to_class(
+            binding_keys.new('some_class'), SomeClass, 'wide-scope')
+        foo_binding = bindings_lib.new_binding_to_instance(
+            binding_keys.new('foo'), 'a-foo', 'narrow-scope', lambda: 'unused')
+        bar_binding = bindings_lib.new_binding_to_instance(
+            binding_keys.new('bar'), 'a-bar', 'wide-scope', lambda: 'unused')
+        binding_mapping = bindings_lib.BindingMapping(
+            {b.binding_key: b for b in [binding, foo_binding, bar_binding]},
+            {})
+        violations = binding_mapping.get_scope_usability_violations(
+            lambda to_scope, from_scope: to_scope != 'narrow-scope')
+        self.assertEqual(1, len(violations))
+        violating_binding, arg_binding_key, arg_binding = violations[0]
+        self.assertIs(binding, violating_binding)
+        self.assertEqual(binding_keys.new('foo'), arg_binding_key.binding_key)
+        self.assertIs(foo_binding, arg_binding)
+
     def test_success(self):
         binding_mapping = bindings_lib.BindingMapping(
             {'a-binding-key': 'a-binding'}, {})
@@ -323,6 +391,110 @@ class GetProviderBindingsTest(unittest.TestCase):
                           bindings_lib.get_provider_bindings,
                           SomeBindingSpec(), known_scope_ids=[])
 
+    def test_returns_bindings_for_inherited_and_class_methods(self):
+        class SomeBindingSpec(bindings_lib.BindingSpec):
+            def provide_foo(self):
+                return 'a-foo'
+            def provide_bar(self):
+                return 'a-bar'
+        class SomeSubBindingSpec(SomeBindingSpec):
+            def provide_foo(self):
+                return 'another-foo'
+            @classmethod
+            def provide_baz(cls):
+                return 'a-baz'
+            @staticmethod
+            def provide_bar():
+                return 'a-static-bar'
+        provider_bindings = bindings_lib.get_provider_bindings(
+            SomeSubBindingSpec(), scoping._BUILTIN_SCOPES)
+        self.assertEqual(
+            {binding_keys.new('foo'): 'another-foo',
+             binding_keys.new('baz'): 'a-baz'},
+            {binding.binding_key: call_provisor_fn(binding)
+             for binding in provider_bindings})
+
+    def test_does_not_evaluate_properties(self):
+        class SomeBindingSpec(bindings_lib.BindingSpec):
+            @property
+            def some_property(self):
+                raise AssertionError('evaluated')
+            def provide_foo(self):
+                return 'a-foo'
+        [provider_binding] = bindings_lib.get_provider_bindings(
+            SomeBindingSpec(), scoping._BUILTIN_SCOPES)
+        self.assertEqual(binding_keys.new('foo'), provider_binding.binding_key)
+
+    def test_binds_cached_provider_methods_to_each_binding_spec(self):
+        class SomeBindingSpec(bindings_lib.BindingSpec):
+            def __init__(self, foo):
+                self._foo = foo
+            def provide_foo(self):
+                return self._foo
+        get_arg_names_calls = []
+        def get_arg_names(fn_name):
+            get_arg_names_calls.append(fn_name)
+            return ['foo'] if fn_name == 'provide_foo' else []
+        provided_foos = []
+        for foo in ['a-foo', 'another-foo']:
+            [provider_binding] = bindings_lib.get_provider_bindings(
+                SomeBindingSpec(foo), scoping._BUILTIN_SCOPES,
+                get_arg_names_from_provider_fn_name=get_arg_names)
+            provided_foos.append(call_provisor_fn(provider_binding))
+        self.assertEqual(['a-foo', 'another-foo'], provided_foos)
+        self.assertEqual(1, get_arg_names_calls.count('provide_foo'))
+
+    def test_returns_bindings_for_methods_set_on_binding_spec(self):
+        class SomeProvider(object):
+            def provide_foo(self):
+                return 'a-foo'
+            def provide_bar(self):
+                return 'a-bar'
+        class SomeBindingSpec(bindings_lib.BindingSpec):
+            def __init__(self):
+                self.provide_foo = SomeProvider().provide_foo
+                self.provide_baz = None
+            def provide_baz(self):
+                return 'a-baz'
+        binding_spec = SomeBindingSpec()
+        provider_bindings = bindings_lib.get_provider_bindings(
+            binding_spec, scoping._BUILTIN_SCOPES)
+        self.assertEqual(
+            {binding_keys.new('foo'): 'a-foo'},
+            {binding.binding_key: call_provisor_fn(binding)
+             for binding in provider_bindings})
+        binding_spec.provide_bar = SomeProvider().provide_bar
+        provider_bindings = bindings_lib.get_provider_bindings(
+            binding_spec, scoping._BUILTIN_SCOPES)
+        self.assertEqual(
+            {binding_keys.new('foo'): 'a-foo',
+             binding_keys.new('bar'): 'a-bar'},
+            {binding.binding_key: call_provisor_fn(binding)
+             for binding in provider_bindings})
+
+    def test_does_not_see_methods_added_to_class_after_first_use(self):
+        class SomeBindingSpec(bindings_lib.BindingSpec):
+            def provide_foo(self):
+                return 'a-foo'
+        bindings_lib.get_provider_bindings(
+            SomeBindingSpec(), scoping._BUILTIN_SCOPES)
+        SomeBindingSpec.provide_bar = lambda self: 'a-bar'
+        provider_bindings = bindings_lib.get_provider_bindings(
+            SomeBindingSpec(), scoping._BUILTIN_SCOPES)
+        self.assertEqual([binding_keys.new('foo')],
+                         [binding.binding_key
+                          for binding in provider_bindings])
+
+    def test_checks_scopes_of_cached_provider_methods(self):
+        class SomeBindingSpec(bindings_lib.BindingSpec):
+            def provide_foo(self):
+                return 'a-foo'
+        bindings_lib.get_provider_bindings(
+            SomeBindingSpec(), scoping._BUILTIN_SCOPES)
+        self.assertRaises(errors.UnknownScopeError,
+                          bindings_lib.get_provider_bindings,
+                          SomeBindingSpec(), known_scope_ids=[])
+
 
 class GetImplicitClassBindingsTest(unittest.TestCase):
 
@@ -0,0 +1,382 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import ast
+import io
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+
+from benchmarks import synthetic_packages
+from pinject import __main__ as pinject_main
+from pinject import bindings
+from pinject import decorators
+from pinject import errors
+from pinject import object_graph
+from pinject import scoping
+
+
+class Foo(object):
+    pass
+
+
+class Bar(object):
+    def __init__(self, foo):
+        self.foo = foo
+
+
+class Baz(object):
+    pass
+
+
+class CompiledRoot(object):
+    @decorators.annotate_arg('baz', 'annotated')
+    def __init__(self, bar, baz, some_value, other_baz, fresh_foo, greeting,
+                 handler):
+        self.bar = bar
+        self.baz = baz
+        self.some_value = some_value
+        self.other_baz = other_baz
+        self.fresh_foo = fresh_foo
+        self.greeting = greeting
+        self.handler = handler
+
+
+def handle_request():
+    pass
+
+
+class SomeBindingSpec(bindings.BindingSpec):
+
+    def configure(self, bind):
+        bind('baz', annotated_with='annotated', to_class=Baz)
+        bind('other_baz', to_class=Baz)
+        bind('fresh_foo', to_class=Foo, in_scope=scoping.PROTOTYPE)
+        bind('greeting', to_instance=('hello', 1))
+        bind('handler', to_instance=handle_request)
+
+    def provide_some_value(self, foo):
+        return [foo]
+
+
+class Widget(object):
+    @decorators.inject(['foo'])
+    def __init__(self, name, foo):
+        self.name = name
+        self.foo = foo
+
+
+class WidgetFactory(object):
+    def __init__(self, provide_widget, provide_bar):
+        self.provide_widget = provide_widget
+        self.provide_bar = provide_bar
+
+
+class CyclicFoo(object):
+    def __init__(self, cyclic_bar):
+        pass
+
+
+class CyclicBar(object):
+    def __init__(self, cyclic_foo):
+        pass
+
+
+class NeedsMissing(object):
+    def __init__(self, missing):
+        pass
+
+
+class NeedsUnliteralInstance(object):
+    def __init__(self, unliteral):
+        pass
+
+
+class UnliteralInstanceBindingSpec(bindings.BindingSpec):
+
+    def configure(self, bind):
+        bind('unliteral', to_instance=object())
+
+
+class NeedsCustomScope(object):
+    def __init__(self, scoped):
+        pass
+
+
+class CustomScopeBindingSpec(bindings.BindingSpec):
+
+    def configure(self, bind):
+        bind('scoped', to_class=Foo, in_scope='custom')
+
+
+_SCALAR_TYPES = (str, bytes, int, float, bool, type(None))
+
+
+def _load_wiring(source):
+    """Executes generated source as a new module."""
+    module = types.ModuleType('generated_wiring')
+    exec(compile(source, '<generated wiring>', 'exec'), module.__dict__)
+    return module
+
+
+class SameObjectGraphAsserter(object):
+    """Checks that two objects are the roots of isomorphic object graphs.
+
+    Objects are compared by type, and by their attributes (or, for lists,
+    tuples, and dicts, by their elements), recursively, and must share
+    sub-objects in the same way: wherever one graph has the same object
+    twice, so must the other.
+    """
+
+    def __init__(self, test_case):
+        self._test_case = test_case
+        self._expected_id_to_actual = {}
+        self._actual_ids = set()
+
+    def check(self, expected, actual, path='root'):
+        stack = [(expected, actual, path)]
+        while stack:
+            expected, actual, path = stack.pop()
+            self._test_case.assertIs(type(expected), type(actual), path)
+            if isinstance(expected, _SCALAR_TYPES):
+                self._test_case.assertEqual(expected, actual, path)
+                continue
+            if id(expected) in self._expected_id_to_actual:
+                self._test_case.assertIs(
+                    self._expected_id_to_actual[id(expected)], actual,
+                    '{0} should be shared'.format(path))
+                continue
+            self._test_case.assertNotIn(
+                id(actual), self._actual_ids,
+                '{0} should not be shared'.format(path))
+            self._expected_id_to_actual[id(expected)] = actual
+            self._actual_ids.add(id(actual))
+            if isinstance(expected, (list, tuple)):
+                self._test_case.assertEqual(len(expected), len(actual), path)
+                stack.extend((e, a, '{0}[{1}]'.format(path, index))
+                             for index, (e, a) in enumerate(
+                                 zip(expected, actual)))
+            elif isinstance(expected, dict):
+                self._test_case.assertEqual(
+                    sorted(expected), sorted(actual), path)
+                stack.extend((expected[key], actual[key],
+                              '{0}[{1!r}]'.format(path, key))
+                             for key in expected)
+            elif callable(expected) and not isinstance(expected, type):
+                # Functions that provide values can't be compared, short of
+                # calling them.
+                continue
+            else:
+                self._test_case.assertEqual(
+                    sorted(vars(expected)), sorted(vars(actual)), path)
+                stack.extend((value, vars(actual)[name],
+                              '{0}.{1}'.format(path, name))
+                             for name, value in vars(expected).items())
+
+
+class GenerateWiringSourceTest(unittest.TestCase):
+
+    def _new_obj_graph(self, classes, binding_specs=(), **kwargs):
+        return object_graph.new_object_graph(
+            modules=None, classes=classes, binding_specs=list(binding_specs),
+            **kwargs)
+
+    def _compile(self, obj_graph, roots):
+        return _load_wiring(obj_graph.generate_wiring_source(roots))
+
+    def _assert_same_object_graph(self, expected, actual):
+        SameObjectGraphAsserter(self).check(expected, actual)
+
+    def test_builds_same_object_graph_as_provide(self):
+        obj_graph = self._new_obj_graph(
+            [Foo, Bar, CompiledRoot], [SomeBindingSpec()])
+        wiring = self._compile(obj_graph, [CompiledRoot])
+        root = wiring.provide_compiled_root()
+        self._assert_same_object_graph(obj_graph.provide(CompiledRoot), root)
+        self.assertIs(root.baz, root.other_baz)
+        self.assertIs(root.bar.foo, root.some_value[0])
+        self.assertIsNot(root.bar.foo, root.fresh_foo)
+        self.assertEqual(('hello', 1), root.greeting)
+        self.assertIs(handle_request, root.handler)
+
+    def test_roots_are_new_but_singletons_are_shared(self):
+        obj_graph = self._new_obj_graph(
+            [Foo, Bar, CompiledRoot], [SomeBindingSpec()])
+        wiring = self._compile(obj_graph, [CompiledRoot])
+        first_root = wiring.provide_compiled_root()
+        second_root = wiring.provide_compiled_root()
+        self.assertIsNot(first_root, second_root)
+        self.assertIs(first_root.bar, second_root.bar)
+        self.assertIsNot(first_root.fresh_foo, second_root.fresh_foo)
+
+    def test_each_load_acts_as_separate_object_graph(self):
+        obj_graph = self._new_obj_graph([Foo, Bar])
+        source = obj_graph.generate_wiring_source([Bar])
+        self.assertIsNot(_load_wiring(source).provide_bar().foo,
+                         _load_wiring(source).provide_bar().foo)
+
+    def test_provider_args_pass_args_through(self):
+        obj_graph = self._new_obj_graph([Foo, Bar, Widget, WidgetFactory])
+        wiring = self._compile(obj_graph, [WidgetFactory])
+        widget_factory = wiring.provide_widget_factory()
+        expected_widget_factory = obj_graph.provide(WidgetFactory)
+        widget = widget_factory.provide_widget('some-name')
+        self._assert_same_object_graph(
+            [expected_widget_factory.provide_widget('some-name'),
+             expected_widget_factory.provide_bar()],
+            [widget, widget_factory.provide_bar()])
+        self.assertEqual('some-name', widget.name)
+        self.assertIs(widget.foo, widget_factory.provide_bar().foo)
+
+    def test_generated_source_does_not_import_pinject(self):
+        obj_graph = self._new_obj_graph(
+            [Foo, Bar, CompiledRoot], [SomeBindingSpec()])
+        source = obj_graph.generate_wiring_source([CompiledRoot])
+        imported_names = [
+            alias.name for node in ast.walk(ast.parse(source))
+            if isinstance(node, (ast.Import, ast.ImportFrom))
+            for alias in node.names]
+        self.assertIn(__name__, imported_names)
+        self.assertEqual([], [name for name in imported_names
+                              if name.split('.')[0] == 'pinject'])
+
+    def test_multiple_roots(self):
+        obj_graph = self._new_obj_graph([Foo, Bar])
+        wiring = self._compile(obj_graph, [Foo, Bar])
+        self.assertEqual(['provide_foo', 'provide_bar'], wiring.__all__)
+        self.assertIsInstance(wiring.provide_foo(), Foo)
+        self.assertIsInstance(wiring.provide_bar(), Bar)
+
+    def test_cyclic_dependencies_raise_error(self):
+        obj_graph = self._new_obj_graph([CyclicFoo, CyclicBar])
+        self.assertRaises(errors.CyclicInjectionError,
+                          obj_graph.generate_wiring_source, [CyclicFoo])
+
+    def test_missing_binding_raises_error(self):
+        obj_graph = self._new_obj_graph([NeedsMissing])
+        self.assertRaises(errors.NothingInjectableForArgError,
+                          obj_graph.generate_wiring_source, [NeedsMissing])
+
+    def test_non_literal_instance_raises_error(self):
+        obj_graph = self._new_obj_graph(
+            [NeedsUnliteralInstance], [UnliteralInstanceBindingSpec()])
+        self.assertRaises(
+            errors.UncompilableBindingError,
+            obj_graph.generate_wiring_source, [NeedsUnliteralInstance])
+
+    def test_custom_scope_raises_error(self):
+        obj_graph = self._new_obj_graph(
+            [NeedsCustomScope], [CustomScopeBindingSpec()],
+            id_to_scope={'custom': scoping.PrototypeScope()})
+        self.assertRaises(errors.UncompilableBindingError,
+                          obj_graph.generate_wiring_source, [NeedsCustomScope])
+
+    def test_local_class_raises_error(self):
+        class LocalClass(object):
+            pass
+        obj_graph = self._new_obj_graph([LocalClass])
+        self.assertRaises(errors.UncompilableBindingError,
+                          obj_graph.generate_wiring_source, [LocalClass])
+
+    def test_non_explicitly_injectable_root_raises_error(self):
+        obj_graph = self._new_obj_graph([Foo], only_use_explicit_bindings=True)
+        self.assertRaises(errors.NonExplicitlyBoundClassError,
+                          obj_graph.generate_wiring_source, [Foo])
+
+    def test_non_class_root_raises_error(self):
+        obj_graph = self._new_obj_graph([Foo])
+        self.assertRaises(errors.WrongArgElementTypeError,
+                          obj_graph.generate_wiring_source, [Foo()])
+
+
+class SyntheticPackageWiringTest(unittest.TestCase):
+
+    def setUp(self):
+        self.parent_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.generated_package.unimport_package()
+        shutil.rmtree(self.parent_dir)
+
+    def test_builds_same_object_graphs_as_provide(self):
+        self.generated_package = synthetic_packages.generate_package(
+            self.parent_dir, 'compiled_synthetic',
+            synthetic_packages.PackageShape(
+                num_modules=5, inject_fraction=0.3, annotate_fraction=0.3,
+                num_provider_methods=3, seed=3))
+        package = self.generated_package.import_package()
+        obj_graph = object_graph.new_object_graph(
+            modules=package.MODULES,
+            binding_specs=[package.BINDING_SPEC_CLASS()])
+        wiring = _load_wiring(
+            obj_graph.generate_wiring_source(package.ROOT_CLASSES))
+        asserter = SameObjectGraphAsserter(self)
+        asserter.check(
+            [obj_graph.provide(root_class)
+             for root_class in package.ROOT_CLASSES],
+            [getattr(wiring, name)() for name in wiring.__all__])
+
+
+class CompileCommandTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.output_path = os.path.join(self.temp_dir, 'wiring.py')
+        self.orig_stderr = sys.stderr
+        sys.stderr = io.StringIO()
+
+    def tearDown(self):
+        sys.stderr = self.orig_stderr
+        shutil.rmtree(self.temp_dir)
+
+    def test_writes_wiring_module(self):
+        self.assertEqual(0, pinject_main.main([
+            'compile', '{0}:CompiledRoot'.format(__name__),
+            '--module', __name__,
+            '--binding-spec', '{0}:SomeBindingSpec'.format(__name__),
+            '--output', self.output_path]))
+        with open(self.output_path) as output_file:
+            wiring = _load_wiring(output_file.read())
+        self.assertIsInstance(wiring.provide_compiled_root(), CompiledRoot)
+
+    def test_writes_wiring_module_from_packages_to_scan(self):
+        self.assertEqual(0, pinject_main.main([
+            'compile', '{0}:CompiledRoot'.format(__name__),
+            '--include-module-prefix', __name__,
+            '--binding-spec', '{0}:SomeBindingSpec'.format(__name__),
+            '--output', self.output_path]))
+        with open(self.output_path) as output_file:
+            wiring = _load_wiring(output_file.read())
+        self.assertIsInstance(wiring.provide_compiled_root(), CompiledRoot)
+
+    def test_unresolvable_root_fails(self):
+        self.assertEqual(1, pinject_main.main([
+            'compile', '{0}:NoSuchClass'.format(__name__),
+            '--module', __name__]))
+        self.assertIn('NoSuchClass', sys.stderr.getvalue())
+
+    def test_uncompilable_binding_fails(self):
+        self.assertEqual(1, pinject_main.main([
+            'compile', '{0}:CyclicFoo'.format(__name__),
+            '--module', __name__]))
+        self.assertIn('cyclic', sys.stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+
+import json
+import unittest
+
+from pinject import critical_paths
+from pinject import object_graph
+
+
+def _new_events(*phase_name_ms_hit_tuples):
+    events = []
+    for phase, name, ms, is_cache_hit in phase_name_ms_hit_tuples:
+        if phase == 'B':
+            args = {'binding_key': name}
+        else:
+            args = {'cache_hit': is_cache_hit}
+        events.append({'ph': phase, 'name': name, 'ts': ms * 1000.0,
+                       'tid': 1, 'args': args})
+    return events
+
+
+class NewCriticalPathReportTest(unittest.TestCase):
+
+    def setUp(self):
+        # root needs foo (3ms) and bar (5ms, needing foo, already built).
+        self.report = critical_paths.new_critical_path_report(_new_events(
+            ('B', 'root', 0, None),
+            ('B', 'foo', 1, None), ('E', 'foo', 4, False),
+            ('B', 'bar', 4, None),
+            ('B', 'foo', 5, None), ('E', 'foo', 5, True),
+            ('E', 'bar', 10, False),
+            ('E', 'root', 11, False)))
+
+    def test_computes_self_times(self):
+        self.assertEqual(
+            {'foo': 3.0, 'bar': 6.0, 'root': 2.0},
+            {construction.name: round(construction.self_secs * 1000, 6)
+             for construction in self.report.constructions})
+
+    def test_follows_cache_hits_to_earlier_constructions(self):
+        bar = [construction for construction in self.report.constructions
+               if construction.name == 'bar'][0]
+        self.assertEqual(['foo'],
+                         [dependency.name for dependency in bar.dependencies])
+
+    def test_finds_critical_path_and_savings(self):
+        self.assertEqual(['foo', 'bar', 'root'],
+                         [construction.name
+                          for construction in self.report.critical_path])
+        self.assertAlmostEqual(0.011, self.report.sequential_secs)
+        self.assertAlmostEqual(0.011, self.report.critical_path_secs)
+        self.assertAlmostEqual(0.0, self.report.get_potential_savings_secs())
+
+    def test_finds_savings_from_independent_dependencies(self):
+        report = critical_paths.new_critical_path_report(_new_events(
+            ('B', 'root', 0, None),
+            ('B', 'foo', 0, None), ('E', 'foo', 3, False),
+            ('B', 'bar', 3, None), ('E', 'bar', 8, False),
+            ('E', 'root', 9, False)))
+        self.assertEqual(['bar', 'root'],
+                         [construction.name
+                          for construction in report.critical_path])
+        self.assertAlmostEqual(0.003, report.get_potential_savings_secs())
+
+    def test_exports_json_and_text(self):
+        report_dict = json.loads(self.report.to_json())
+        self.assertEqual(['foo', 'bar', 'root'], report_dict['critical_path'])
+        self.assertIn('critical path', self.report.format())
+
+    def test_handles_no_events(self):
+        report = critical_paths.new_critical_path_report([])
+        self.assertEqual([], report.critical_path)
+        self.assertEqual(0, report.get_potential_savings_secs())
+
+
+class Foo(object):
+    pass
+
+
+class SomeClass(object):
+    def __init__(self, foo):
+        pass
+
+
+class TraceRecorderCriticalPathTest(unittest.TestCase):
+
+    def test_analyzes_recorded_provision(self):
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[Foo, SomeClass])
+        with obj_graph.record_trace() as trace_recorder:
+            obj_graph.provide(SomeClass)
+        report = trace_recorder.get_critical_path_report()
+        self.assertEqual(['foo'], [construction.name
+                                   for construction in report.critical_path])
@@ -309,16 +309,69 @@ class IsExplicitlyInjectableTest(unittest.TestCase):
         self.assertTrue(decorators.is_explicitly_injectable(SomeClass))
 
 
+class RegisteredInjectable(object):
+    @decorators.inject()
+    def __init__(self):
+        pass
+
+
+class RegisteredInjectableSubclass(RegisteredInjectable):
+    pass
+
+
+class RegisteredInjectableOuter(object):
+    class Nested(object):
+        @decorators.annotate_arg('foo', 'an-annotation')
+        def __init__(self, foo):
+            pass
+
+
+class GetExplicitlyInjectableClassesTest(unittest.TestCase):
+
+    def test_finds_module_level_class(self):
+        self.assertIn(RegisteredInjectable,
+                      decorators.get_explicitly_injectable_classes())
+
+    def test_finds_subclass_inheriting_decorated_initializer(self):
+        self.assertIn(RegisteredInjectableSubclass,
+                      decorators.get_explicitly_injectable_classes())
+
+    def test_finds_nested_class(self):
+        self.assertIn(RegisteredInjectableOuter.Nested,
+                      decorators.get_explicitly_injectable_classes())
+
+    def test_does_not_find_class_defined_in_function(self):
+        class SomeClass(object):
+            @decorators.inject()
+            def __init__(self):
+                pass
+        self.assertNotIn(SomeClass,
+                         decorators.get_explicitly_injectable_classes())
+
+    def test_does_not_find_class_with_only_decorated_provider_methods(self):
+        self.assertNotIn(RegisteredInjectableOuter,
+                         decorators.get_explicitly_injectable_classes())
+
+
 class GetInjectableArgBindingKeysTest(unittest.TestCase):
 
     def assert_fn_has_injectable_arg_binding_keys(self, fn, arg_binding_keys):
         self.assertEqual(
-            arg_binding_keys,
+            tuple(arg_binding_keys),
             decorators.get_injectable_arg_binding_keys(fn, [], {}))
 
     def test_fn_with_no_args_returns_nothing(self):
         self.assert_fn_has_injectable_arg_binding_keys(lambda: None, [])
 
+    def test_returns_same_immutable_arg_binding_keys_each_time(self):
+        def fn(foo):
+            pass
+        arg_binding_keys_ = decorators.get_injectable_arg_binding_keys(
+            fn, [], {})
+        self.assertIsInstance(arg_binding_keys_, tuple)
+        self.assertIs(arg_binding_keys_,
+                      decorators.get_injectable_arg_binding_keys(fn, [], {}))
+
     def test_fn_with_unannotated_arg_returns_unannotated_binding_key(self):
         self.assert_fn_has_injectable_arg_binding_keys(
             lambda foo: None, [arg_binding_keys.new('foo')])
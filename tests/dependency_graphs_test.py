@@ -0,0 +1,185 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+
+import gc
+import json
+import unittest
+
+from pinject import binding_keys
+from pinject import bindings
+from pinject import dependency_graphs
+from pinject import object_graph
+
+
+class Root(object):
+    def __init__(self, middle, leaf):
+        pass
+
+
+class Middle(object):
+    def __init__(self, provide_leaf):
+        pass
+
+
+class Leaf(object):
+    pass
+
+
+class Orphan(object):
+    def __init__(self, missing):
+        pass
+
+
+class CyclicA(object):
+    def __init__(self, cyclic_b):
+        pass
+
+
+class CyclicB(object):
+    def __init__(self, cyclic_a, provide_leaf):
+        pass
+
+
+class ProvidedCyclic(object):
+    def __init__(self, provide_provided_cyclic):
+        pass
+
+
+def _new_binding_mapping(classes):
+    binding_key_to_binding, collided_binding_key_to_bindings = (
+        bindings.get_overall_binding_key_to_binding_maps(
+            [bindings.get_implicit_class_bindings(classes), []]))
+    return bindings.BindingMapping(
+        binding_key_to_binding, collided_binding_key_to_bindings)
+
+
+class NewDependencyGraphTest(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = dependency_graphs.new_dependency_graph(
+            _new_binding_mapping([Root, Middle, Leaf, Orphan]))
+
+    def test_includes_all_bindings_without_roots(self):
+        self.assertEqual(
+            {binding_keys.new(name)
+             for name in ['root', 'middle', 'leaf', 'orphan']},
+            set(self.graph.get_nodes()))
+        self.assertEqual(3, self.graph.get_num_edges())
+
+    def test_leaves_garbage_collection_enabled_while_building(self):
+        binding_mapping = _new_binding_mapping([Root, Middle, Leaf, Orphan])
+        gc_enabled_while_building = []
+        def GetBindings(get_bindings=binding_mapping.get_bindings):
+            gc_enabled_while_building.append(gc.isenabled())
+            return get_bindings()
+        binding_mapping.get_bindings = GetBindings
+        dependency_graphs.new_dependency_graph(binding_mapping)
+        self.assertEqual([True], gc_enabled_while_building)
+
+    def test_includes_only_what_roots_need(self):
+        graph = dependency_graphs.new_dependency_graph(
+            _new_binding_mapping([Root, Middle, Leaf, Orphan]), [Middle])
+        self.assertEqual([Middle, binding_keys.new('leaf')],
+                         graph.get_nodes())
+
+    def test_gets_dependencies_and_dependents(self):
+        self.assertEqual([binding_keys.new('middle'), binding_keys.new('leaf')],
+                         self.graph.get_dependencies('root'))
+        self.assertEqual({binding_keys.new('root'), binding_keys.new('middle')},
+                         set(self.graph.get_dependents('leaf')))
+        self.assertEqual(2, self.graph.get_fan_in('leaf'))
+        self.assertEqual(2, self.graph.get_fan_out('root'))
+
+    def test_gets_transitive_dependents(self):
+        self.assertEqual([binding_keys.new('root')],
+                         self.graph.get_transitive_dependents('middle'))
+        self.assertEqual(
+            {binding_keys.new('root'), binding_keys.new('middle')},
+            set(self.graph.get_transitive_dependents('leaf')))
+
+    def test_gets_depths(self):
+        self.assertEqual(2, self.graph.get_depth('root'))
+        self.assertEqual(0, self.graph.get_depth('leaf'))
+        self.assertEqual(2, self.graph.get_max_depth())
+
+    def test_gets_unresolved_args(self):
+        [(node, arg_binding_key)] = self.graph.get_unresolved_args()
+        self.assertEqual(binding_keys.new('orphan'), node)
+        self.assertEqual('missing', arg_binding_key.arg_name)
+
+    def test_computes_depth_of_deep_chain_without_recursion(self):
+        dependency_starts = list(range(10000)) + [9999]
+        dependencies = list(range(1, 10000))
+        node_to_depth = dependency_graphs._get_node_to_depth(
+            dependency_starts, dependencies)
+        self.assertEqual(9999, node_to_depth[0])
+
+    def test_ignores_cycles_when_computing_depth(self):
+        self.assertEqual(
+            [1, 0], dependency_graphs._get_node_to_depth([0, 1, 2], [1, 0]))
+
+    def test_gets_cycles(self):
+        graph = dependency_graphs.new_dependency_graph(
+            _new_binding_mapping([CyclicA, CyclicB, Leaf, ProvidedCyclic]))
+        cyclic_a, cyclic_b = (binding_keys.new('cyclic_a'),
+                              binding_keys.new('cyclic_b'))
+        self.assertIn(graph.get_cycles(), [[[cyclic_a, cyclic_b, cyclic_a]],
+                                           [[cyclic_b, cyclic_a, cyclic_b]]])
+
+    def test_provider_args_do_not_form_cycles(self):
+        graph = dependency_graphs.new_dependency_graph(
+            _new_binding_mapping([ProvidedCyclic]))
+        self.assertEqual([], graph.get_cycles())
+        self.assertEqual([], self.graph.get_cycles())
+
+
+class DependencyGraphExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = dependency_graphs.new_dependency_graph(
+            _new_binding_mapping([Root, Middle, Leaf]))
+
+    def test_to_json(self):
+        graph_dict = json.loads(self.graph.to_json())
+        name_to_node = {node['name']: node for node in graph_dict['nodes']}
+        self.assertEqual('Leaf', name_to_node['leaf']['target'])
+        self.assertEqual(2, name_to_node['root']['depth'])
+        provider_edges = [edge for edge in graph_dict['edges']
+                          if edge['is_provider']]
+        self.assertEqual(
+            [(name_to_node['middle']['id'], name_to_node['leaf']['id'],
+              'provide_leaf')],
+            [(edge['from'], edge['to'], edge['arg'])
+             for edge in provider_edges])
+
+    def test_to_dot(self):
+        dot = self.graph.to_dot()
+        self.assertTrue(dot.startswith('digraph "pinject" {\n'))
+        self.assertIn('[label="leaf\\nLeaf"];', dot)
+        self.assertEqual(1, dot.count('[style=dashed]'))
+        self.assertEqual(3, dot.count(' -> '))
+
+
+class ObjectGraphGetDependencyGraphTest(unittest.TestCase):
+
+    def test_gets_dependency_graph_from_roots(self):
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[Root, Middle, Leaf])
+        graph = obj_graph.get_dependency_graph([Root])
+        self.assertEqual(
+            [Root, binding_keys.new('middle'), binding_keys.new('leaf')],
+            graph.get_nodes())
@@ -17,13 +17,38 @@ limitations under the License.
 import inspect
 import mock
 import sys
+import types
 import unittest
 
+from pinject import bindings
+from pinject import decorators
 from pinject import finding
 
 
-cvar = "Mock SWIG cvar attribute."
-foo = "some other mock attribute"
+class FoundInjectable(object):
+    @decorators.inject()
+    def __init__(self):
+        pass
+
+
+def _init_defined_outside_class(self):
+    pass
+
+
+class FoundInjectableWithInitDefinedOutside(object):
+    __init__ = decorators.inject()(_init_defined_outside_class)
+
+
+def _init_of_later_class(self):
+    pass
+
+
+class AnnotatedProviderBindingSpec(bindings.BindingSpec):
+
+    @decorators.annotate_arg('foo', 'an-annotation')
+    def provide_bar(self, foo):
+        pass
+
 
 class FindClassesTest(unittest.TestCase):
 
@@ -52,43 +77,36 @@ class FindClassesTest(unittest.TestCase):
                                  classes=None))
 
     def test_swig_cvar_nameerror(self):
-        this_module = sys.modules[FindClassesTest.__module__]
-        # This tests a special case exception that find_classes silences, which
-        # originates from calling isinstance on SWIG's global cvar raises a
-        # NameError in python 3. To avoid recursion from mocking the builtin,
-        # we mock inspect.isclass while holding onto a reference to the actual
-        # function.
-        isclass = inspect.isclass
-
-        # Tests that the right error is silenced.
-        def cvar_raises_nameerror(value):
-            if value == cvar:
-                raise NameError()
-            return isclass(value)
-        with mock.patch.object(inspect, 'isclass') as mock_isclass:
-            mock_isclass.side_effect = cvar_raises_nameerror
-            self.assertNotIn(cvar,
-                    finding.find_classes(modules=[this_module], classes=None))
-
-        # Tests that the wrong error type is let through.
-        def cvar_raises_valueerror(value):
-            if value == cvar:
-                raise ValueError()
-            return isclass(value)
-        with mock.patch.object(inspect, 'isclass') as mock_isclass:
-            mock_isclass.side_effect = cvar_raises_valueerror
-            with self.assertRaises(ValueError):
-                finding.find_classes(modules=[this_module], classes=None)
-
-        # Tests that an error relating to another attribute is let through.
-        def foo_raises_nameerror(value):
-            if value == foo:
-                raise NameError()
-            return isclass(value)
-        with mock.patch.object(inspect, 'isclass') as mock_isclass:
-            mock_isclass.side_effect = foo_raises_nameerror
-            with self.assertRaises(NameError):
-                finding.find_classes(modules=[this_module], classes=None)
+        # In Python 3, calling isinstance() on SWIG's global cvar raises
+        # NameError: "Unknown C global variable", because getting its
+        # __class__ does.  find_classes() shouldn't get members' attributes.
+        class FakeSwigCvar(object):
+            @property
+            def __class__(self):
+                raise NameError('Unknown C global variable')
+        module = types.ModuleType('some_swig_module')
+        module.cvar = FakeSwigCvar()
+        module.SomeClass = FindClassesTest
+        self.assertEqual(
+            {FindClassesTest},
+            finding.find_classes(modules=[module], classes=None))
+
+    def test_does_not_get_lazy_module_attributes(self):
+        module = types.ModuleType('some_lazy_module')
+        module.__dir__ = lambda: ['SomeLazyClass']
+        module.__getattr__ = mock.Mock(side_effect=AssertionError)
+        module.SomeClass = FindClassesTest
+        self.assertEqual(
+            {FindClassesTest},
+            finding.find_classes(modules=[module], classes=None))
+        self.assertFalse(module.__getattr__.called)
+
+    def test_ignores_non_modules_in_sys_modules(self):
+        with mock.patch.dict(sys.modules, {'some_non_module': 7}):
+            self.assertIn(
+                FindClassesTest,
+                finding.find_classes(modules=finding.ALL_IMPORTED_MODULES,
+                                     classes=None))
 
     def test__find_classes_in_module_when_module_bases_is_not_tuple(self):
         # Test for the case when the __bases__ attributes of an imported
@@ -103,3 +121,138 @@ class FindClassesTest(unittest.TestCase):
         this_module.__bases__ = 0
         self.assertIn(FindClassesTest,
                       finding.find_classes(modules=[this_module], classes=None))
+
+
+class FindExplicitlyInjectableClassesTest(unittest.TestCase):
+
+    def test_finds_passed_in_classes_even_if_not_injectable(self):
+        class SomeClass(object):
+            pass
+        self.assertEqual(
+            {SomeClass},
+            finding.find_explicitly_injectable_classes(
+                modules=None, classes=[SomeClass]))
+
+    def test_finds_injectable_classes_in_passed_in_modules(self):
+        this_module = sys.modules[FindClassesTest.__module__]
+        found_classes = finding.find_explicitly_injectable_classes(
+            modules=[this_module], classes=None)
+        self.assertIn(FoundInjectable, found_classes)
+        self.assertNotIn(FindClassesTest, found_classes)
+
+    def test_finds_injectable_classes_imported_under_other_names(self):
+        module = types.ModuleType('some_module')
+        module.Alias = FoundInjectable
+        self.assertEqual(
+            {FoundInjectable},
+            finding.find_explicitly_injectable_classes(
+                modules=[module], classes=None))
+
+    def test_finds_classes_in_modules_that_are_not_imported(self):
+        module = types.ModuleType('some_unimported_module')
+        module.inject = decorators.inject
+        exec('class SomeClass(object):\n'
+             '    @inject()\n'
+             '    def __init__(self):\n'
+             '        pass\n', module.__dict__)
+        self.assertEqual(
+            {module.SomeClass},
+            finding.find_explicitly_injectable_classes(
+                modules=[module], classes=None))
+
+    def test_finds_classes_with_init_defined_outside_class_body(self):
+        this_module = sys.modules[FindClassesTest.__module__]
+        for modules in [[this_module], finding.ALL_IMPORTED_MODULES]:
+            self.assertIn(
+                FoundInjectableWithInitDefinedOutside,
+                finding.find_explicitly_injectable_classes(
+                    modules=modules, classes=None))
+
+    def test_does_not_rescan_modules_for_fns_without_class(self):
+        finding.find_explicitly_injectable_classes(
+            modules=finding.ALL_IMPORTED_MODULES, classes=None)
+        self.assertIn(AnnotatedProviderBindingSpec.provide_bar,
+                      decorators.get_unowned_injectable_fns([])[0])
+        with mock.patch.object(finding, '_find_classes_in_module',
+                               wraps=finding._find_classes_in_module) as scan:
+            finding.find_explicitly_injectable_classes(
+                modules=finding.ALL_IMPORTED_MODULES, classes=None)
+        self.assertEqual([], scan.call_args_list)
+
+    def test_finds_later_class_with_init_of_fn_without_class(self):
+        decorated_init = decorators.inject()(_init_of_later_class)
+        finding.find_explicitly_injectable_classes(
+            modules=finding.ALL_IMPORTED_MODULES, classes=None)
+        module = types.ModuleType('module_imported_later')
+        module.LaterClass = type('LaterClass', (object,),
+                                 {'__init__': decorated_init,
+                                  '__module__': module.__name__})
+        sys.modules[module.__name__] = module
+        try:
+            self.assertIn(
+                module.LaterClass,
+                finding.find_explicitly_injectable_classes(
+                    modules=finding.ALL_IMPORTED_MODULES, classes=None))
+        finally:
+            del sys.modules[module.__name__]
+
+    def test_reads_sys_modules_for_all_imported_modules(self):
+        self.assertIn(
+            FoundInjectable,
+            finding.find_explicitly_injectable_classes(
+                modules=finding.ALL_IMPORTED_MODULES, classes=None))
+
+
+class ModuleScanPolicyTest(unittest.TestCase):
+
+    def new_module(self, name, path=None):
+        module = types.ModuleType(name)
+        if path is not None:
+            module.__file__ = path
+        return module
+
+    def test_include_prefixes_match_packages_and_their_modules(self):
+        policy = finding.ModuleScanPolicy(include_prefixes=['foo'])
+        self.assertTrue(policy.should_scan(self.new_module('foo')))
+        self.assertTrue(policy.should_scan(self.new_module('foo.bar')))
+        self.assertFalse(policy.should_scan(self.new_module('foobar')))
+        self.assertFalse(policy.should_scan(self.new_module('bar')))
+
+    def test_exclude_prefixes_take_precedence(self):
+        policy = finding.ModuleScanPolicy(include_prefixes=['foo'],
+                                          exclude_prefixes=['foo.bar'])
+        self.assertTrue(policy.should_scan(self.new_module('foo.baz')))
+        self.assertFalse(policy.should_scan(self.new_module('foo.bar.baz')))
+
+    def test_excludes_library_modules_by_default(self):
+        policy = finding.ModuleScanPolicy()
+        self.assertFalse(policy.should_scan(sys))
+        self.assertFalse(policy.should_scan(inspect))
+        self.assertFalse(policy.should_scan(mock))
+        self.assertTrue(policy.should_scan(sys.modules[__name__]))
+
+    def test_includes_library_modules_matching_include_prefixes(self):
+        policy = finding.ModuleScanPolicy(include_prefixes=['mock'])
+        self.assertTrue(policy.should_scan(mock))
+
+    def test_can_include_library_modules(self):
+        policy = finding.ModuleScanPolicy(exclude_library_modules=False)
+        self.assertTrue(policy.should_scan(inspect))
+
+    def test_find_classes_skips_modules_not_to_scan(self):
+        this_module = sys.modules[FindClassesTest.__module__]
+        found_classes = finding.find_classes(
+            modules=finding.ALL_IMPORTED_MODULES, classes=None,
+            module_scan_policy=finding.ModuleScanPolicy(
+                include_prefixes=[this_module.__name__]))
+        self.assertIn(FindClassesTest, found_classes)
+        self.assertNotIn(unittest.TestCase, found_classes)
+
+    def test_find_explicitly_injectable_classes_skips_modules_not_to_scan(
+            self):
+        self.assertNotIn(
+            FoundInjectable,
+            finding.find_explicitly_injectable_classes(
+                modules=finding.ALL_IMPORTED_MODULES, classes=None,
+                module_scan_policy=finding.ModuleScanPolicy(
+                    exclude_prefixes=[FoundInjectable.__module__])))
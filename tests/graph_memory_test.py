@@ -0,0 +1,48 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import sys
+import unittest
+
+from benchmarks import graph_memory
+
+
+class MeasureGraphMemoryTest(unittest.TestCase):
+
+    def test_explicit_modes_bind_only_synthetic_classes(self):
+        for mode in ['explicit_modules', 'only_use_explicit_bindings']:
+            with self.subTest(mode=mode):
+                result = graph_memory.measure_graph_memory(100, mode)
+                self.assertEqual(100, result['num_bindings'])
+                self.assertGreater(result['graph_retained_bytes'], 0)
+                self.assertGreater(result['singletons_retained_bytes'], 0)
+                self.assertIn('bindings.py',
+                              result['graph_retained_bytes_by_file'])
+
+    def test_all_imported_modules_finds_more_classes(self):
+        result = graph_memory.measure_graph_memory(
+            100, 'all_imported_modules')
+        self.assertGreater(result['num_found_classes'], 100)
+        self.assertFalse([module_name for module_name in sys.modules
+                          if module_name.startswith('synthetic_module_')])
+
+    def test_rejects_unknown_mode(self):
+        self.assertRaises(ValueError, graph_memory.measure_graph_memory,
+                          100, 'unknown')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,8 +14,11 @@ limitations under the License.
 """
 
 
+import threading
 import unittest
 
+import mock
+
 from pinject import binding_keys
 from pinject import bindings
 from pinject import errors
@@ -47,11 +50,86 @@ class InjectionContextTest(unittest.TestCase):
                 other_binding_key, 'unused-instance', 'new-scope',
                 lambda: 'unused-desc'))
 
+    def test_gets_depth_of_in_progress_bindings(self):
+        child_injection_context = self.injection_context.get_child(
+            _UNUSED_INJECTION_SITE_FN,
+            bindings.new_binding_to_instance(
+                binding_keys.new('bar'), 'unused-instance', 'new-scope',
+                lambda: 'unused-desc'))
+        self.assertEqual(1, self.injection_context.get_depth())
+        self.assertEqual(2, child_injection_context.get_depth())
+
     def test_get_child_raises_error_when_binding_already_seen(self):
         self.assertRaises(errors.CyclicInjectionError,
                           self.injection_context.get_child,
                           _UNUSED_INJECTION_SITE_FN, self.binding)
 
+    def _new_binding(self, name):
+        return bindings.new_binding_to_instance(
+            binding_keys.new(name), 'unused-instance', 'curr-scope',
+            lambda: 'unused-desc')
+
+    def _get_chain(self, num_bindings):
+        injection_context = self.injection_context
+        chain = [injection_context]
+        for index in range(num_bindings):
+            injection_context = injection_context.get_child(
+                _UNUSED_INJECTION_SITE_FN, self._new_binding(str(index)))
+            chain.append(injection_context)
+        return chain
+
+    def test_get_child_raises_error_when_binding_seen_deep_in_chain(self):
+        chain = self._get_chain(100)
+        for ancestor in [chain[0], chain[50], chain[98]]:
+            self.assertRaises(errors.CyclicInjectionError,
+                              chain[-1].get_child,
+                              _UNUSED_INJECTION_SITE_FN, ancestor._binding)
+
+    def test_get_child_checks_deep_chain_in_linear_time(self):
+        with mock.patch.object(
+                injection_contexts, '_InjectionPath',
+                wraps=injection_contexts._InjectionPath) as new_path:
+            self._get_chain(1000)
+        # Only the first context too deep to walk walks its ancestors, to
+        # start the path that all its descendants are checked against.
+        self.assertEqual(1, new_path.call_count)
+
+    def test_get_child_allows_binding_seen_in_other_branch(self):
+        chain = self._get_chain(20)
+        other_binding = self._new_binding('other')
+        chain[10].get_child(_UNUSED_INJECTION_SITE_FN, other_binding)
+        sibling = chain[10].get_child(
+            _UNUSED_INJECTION_SITE_FN, self._new_binding('sibling'))
+        sibling.get_child(_UNUSED_INJECTION_SITE_FN, other_binding)
+        self.assertRaises(errors.CyclicInjectionError, sibling.get_child,
+                          _UNUSED_INJECTION_SITE_FN, chain[5]._binding)
+
+    def test_get_child_of_earlier_context_checks_its_own_ancestors(self):
+        chain = self._get_chain(20)
+        # E.g., a provider function injected at chain[15], called later.
+        chain[15].get_child(_UNUSED_INJECTION_SITE_FN, chain[18]._binding)
+        self.assertRaises(errors.CyclicInjectionError, chain[15].get_child,
+                          _UNUSED_INJECTION_SITE_FN, chain[12]._binding)
+        self.assertRaises(errors.CyclicInjectionError, chain[-1].get_child,
+                          _UNUSED_INJECTION_SITE_FN, chain[18]._binding)
+
+    def test_get_child_checks_ancestors_in_another_thread(self):
+        chain = self._get_chain(20)
+        errors_raised = []
+        def GetChildren():
+            chain[15].get_child(_UNUSED_INJECTION_SITE_FN, chain[18]._binding)
+            try:
+                chain[15].get_child(
+                    _UNUSED_INJECTION_SITE_FN, chain[12]._binding)
+            except errors.CyclicInjectionError as e:
+                errors_raised.append(e)
+        thread = threading.Thread(target=GetChildren)
+        thread.start()
+        thread.join()
+        self.assertEqual(1, len(errors_raised))
+        self.assertRaises(errors.CyclicInjectionError, chain[-1].get_child,
+                          _UNUSED_INJECTION_SITE_FN, chain[18]._binding)
+
     def test_get_child_raises_error_when_scope_not_usable(self):
         other_binding_key = binding_keys.new('bar')
         self.assertRaises(
@@ -61,6 +139,25 @@ class InjectionContextTest(unittest.TestCase):
                 other_binding_key, 'unused-instance', 'unusable-scope',
                 lambda: 'unused-desc'))
 
+    def test_get_child_checks_known_scopes_without_calling_policy(self):
+        policy_calls = []
+        def IsUsable(to_scope, from_scope):
+            policy_calls.append((to_scope, from_scope))
+            return to_scope != 'unusable-scope'
+        injection_context_factory = injection_contexts.InjectionContextFactory(
+            IsUsable, ['curr-scope', 'unusable-scope'])
+        del policy_calls[:]
+        injection_context = injection_context_factory.new(
+            _UNUSED_INJECTION_SITE_FN).get_child(
+                _UNUSED_INJECTION_SITE_FN, self.binding)
+        self.assertRaises(
+            errors.BadDependencyScopeError, injection_context.get_child,
+            _UNUSED_INJECTION_SITE_FN,
+            bindings.new_binding_to_instance(
+                binding_keys.new('bar'), 'unused-instance', 'unusable-scope',
+                lambda: 'unused-desc'))
+        self.assertEqual([], policy_calls)
+
     def test_get_injection_site_desc(self):
         injection_context_factory = injection_contexts.InjectionContextFactory(
             lambda _1, _2: True)
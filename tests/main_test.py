@@ -0,0 +1,171 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from pinject import __main__ as pinject_main
+from pinject import object_graph
+
+
+class Leaf(object):
+    pass
+
+
+class Middle(object):
+    def __init__(self, leaf):
+        self.leaf = leaf
+
+
+class Root(object):
+    def __init__(self, middle, provide_leaf):
+        self.middle = middle
+
+
+class Orphan(object):
+    def __init__(self, missing):
+        pass
+
+
+class Outer(object):
+    class Leaf(object):
+        pass
+
+
+def new_obj_graph():
+    return object_graph.new_object_graph(
+        modules=None, classes=[Leaf, Middle, Root])
+
+
+def new_invalid_obj_graph():
+    return object_graph.new_object_graph(
+        modules=None, classes=[Leaf, Outer.Leaf, Middle, Orphan])
+
+
+existing_obj_graph = new_obj_graph()
+
+
+def _get_ref(name):
+    return '{0}:{1}'.format(__name__, name)
+
+
+class MainTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.orig_stdout = sys.stdout
+        self.orig_stderr = sys.stderr
+        sys.stdout = io.StringIO()
+        sys.stderr = io.StringIO()
+
+    def tearDown(self):
+        sys.stdout = self.orig_stdout
+        sys.stderr = self.orig_stderr
+        shutil.rmtree(self.temp_dir)
+
+    def _run(self, *argv):
+        return pinject_main.main(list(argv))
+
+    def _get_json_output(self):
+        return json.loads(sys.stdout.getvalue())
+
+    def test_stats(self):
+        self.assertEqual(0, self._run('stats', _get_ref('new_obj_graph')))
+        self.assertIn('3 bindings', sys.stdout.getvalue())
+
+    def test_stats_as_json_lists_collisions(self):
+        self.assertEqual(0, self._run(
+            'stats', _get_ref('new_invalid_obj_graph'), '--json'))
+        self.assertEqual(1, len(self._get_json_output()['collisions']))
+
+    def test_stats_of_existing_obj_graph(self):
+        self.assertEqual(
+            0, self._run('stats', _get_ref('existing_obj_graph')))
+
+    def test_graph_as_dot(self):
+        self.assertEqual(0, self._run('graph', _get_ref('new_obj_graph')))
+        self.assertTrue(sys.stdout.getvalue().startswith('digraph'))
+
+    def test_graph_as_json_from_root_to_file(self):
+        output_path = os.path.join(self.temp_dir, 'graph.json')
+        self.assertEqual(0, self._run(
+            'graph', _get_ref('new_obj_graph'), '--root', _get_ref('Middle'),
+            '--format', 'json', '--output', output_path))
+        with open(output_path) as output_file:
+            self.assertEqual(2, len(json.load(output_file)['nodes']))
+
+    def test_time_startup(self):
+        self.assertEqual(0, self._run(
+            'time-startup', _get_ref('new_obj_graph'), '--json'))
+        output = self._get_json_output()
+        self.assertIn('import_secs', output)
+        self.assertIn('find_classes',
+                      [phase['name'] for phase in output['phases']])
+
+    def test_time_startup_of_existing_obj_graph_fails(self):
+        self.assertEqual(1, self._run(
+            'time-startup', _get_ref('existing_obj_graph')))
+        self.assertIn('wasn\'t timed', sys.stderr.getvalue())
+
+    def test_profile(self):
+        trace_path = os.path.join(self.temp_dir, 'trace.json')
+        self.assertEqual(0, self._run(
+            'profile', _get_ref('new_obj_graph'), _get_ref('Root'),
+            '--repeat', '3', '--trace', trace_path))
+        output = sys.stdout.getvalue()
+        self.assertIn('first provide of', output)
+        self.assertIn('3 more provides', output)
+        self.assertIn('critical path', output)
+        self.assertTrue(os.path.exists(trace_path))
+
+    def test_profile_as_json(self):
+        self.assertEqual(0, self._run(
+            'profile', _get_ref('new_obj_graph'), _get_ref('Root'), '--json'))
+        output = self._get_json_output()
+        self.assertEqual(10, len(output['warm_provide_secs']))
+        self.assertEqual(
+            2, len(output['critical_path']['constructions']))
+
+    def test_validate_valid_graph(self):
+        self.assertEqual(0, self._run('validate', _get_ref('new_obj_graph')))
+        self.assertIn('no problems found', sys.stdout.getvalue())
+
+    def test_validate_invalid_graph_fails(self):
+        self.assertEqual(1, self._run(
+            'validate', _get_ref('new_invalid_obj_graph'), '--json'))
+        self.assertEqual(
+            ['ambiguous_arg', 'unbound_arg'],
+            sorted(problem['kind']
+                   for problem in self._get_json_output()['problems']))
+
+    def test_validate_from_root(self):
+        self.assertEqual(0, self._run(
+            'validate', _get_ref('new_invalid_obj_graph'),
+            '--root', _get_ref('Outer.Leaf')))
+
+    def test_unresolvable_graph_ref_fails(self):
+        self.assertEqual(1, self._run('stats', _get_ref('no_such_factory')))
+        self.assertEqual(1, self._run('stats', 'no_such_module:factory'))
+        self.assertEqual(1, self._run('stats', _get_ref('Leaf')))
+        self.assertIn('neither an object graph', sys.stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
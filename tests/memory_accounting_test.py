@@ -0,0 +1,189 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import json
+import threading
+import tracemalloc
+import unittest
+
+from pinject import bindings
+from pinject import decorators
+from pinject import object_graph
+from pinject import scoping
+
+
+_SIZE_BYTES = 1000000
+
+
+class BigFoo(object):
+    def __init__(self):
+        self.data = bytearray(_SIZE_BYTES)
+
+
+class NeedsBigFoo(object):
+    def __init__(self, big_foo):
+        self.big_foo = big_foo
+        self.data = bytearray(_SIZE_BYTES // 2)
+
+
+class Transient(object):
+    def __init__(self):
+        self.data = bytearray(_SIZE_BYTES)
+
+
+class SomeBindingSpec(bindings.BindingSpec):
+
+    def configure(self, bind):
+        bind('transient', to_class=Transient, in_scope=scoping.PROTOTYPE)
+
+    def provide_big_bar(self):
+        return bytearray(_SIZE_BYTES * 2)
+
+
+class CustomScope(object):
+
+    def __init__(self):
+        self._binding_key_to_instance = {}
+        self._rlock = threading.RLock()
+
+    def provide(self, binding_key, default_provider_fn):
+        with self._rlock:
+            if binding_key not in self._binding_key_to_instance:
+                self._binding_key_to_instance[binding_key] = (
+                    default_provider_fn())
+            return self._binding_key_to_instance[binding_key]
+
+
+class NeedsAll(object):
+    def __init__(self, needs_big_foo, big_bar, transient):
+        pass
+
+
+class MemoryAccountantTest(unittest.TestCase):
+
+    def _get_size_bytes(self, report, name):
+        [size_bytes] = [
+            binding_memory.size_bytes
+            for binding_memory in report.binding_memories
+            if binding_memory.binding.binding_key.name == name]
+        return size_bytes
+
+    def _provide_all(self):
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[BigFoo, NeedsBigFoo, NeedsAll],
+            binding_specs=[SomeBindingSpec()])
+        with obj_graph.account_memory() as memory_accountant:
+            needs_all = obj_graph.provide(NeedsAll)
+        return needs_all, memory_accountant.get_report()
+
+    def test_attributes_retained_memory_to_bindings(self):
+        needs_all, report = self._provide_all()
+        self.assertGreaterEqual(self._get_size_bytes(report, 'big_foo'),
+                                _SIZE_BYTES)
+        self.assertGreaterEqual(self._get_size_bytes(report, 'big_bar'),
+                                _SIZE_BYTES * 2)
+
+    def test_does_not_attribute_dependencies_to_dependents(self):
+        needs_all, report = self._provide_all()
+        self.assertLess(self._get_size_bytes(report, 'needs_big_foo'),
+                        _SIZE_BYTES)
+
+    def test_does_not_count_freed_memory(self):
+        needs_all, report = self._provide_all()
+        self.assertEqual([], [
+            binding_memory for binding_memory in report.binding_memories
+            if binding_memory.size_bytes >= _SIZE_BYTES and
+            binding_memory.binding.scope_id is scoping.PROTOTYPE])
+
+    def test_totals_by_scope_and_binding_spec(self):
+        needs_all, report = self._provide_all()
+        self.assertGreaterEqual(
+            report.scope_to_size_bytes['singleton scope'],
+            _SIZE_BYTES * 3.5)
+        self.assertGreaterEqual(
+            report.binding_spec_to_size_bytes['SomeBindingSpec'],
+            _SIZE_BYTES * 2)
+        self.assertGreaterEqual(report.binding_spec_to_size_bytes[None],
+                                _SIZE_BYTES * 1.5)
+
+    def test_covers_custom_scopes(self):
+        class CustomScopeBindingSpec(bindings.BindingSpec):
+            def configure(self, bind):
+                bind('big_foo', to_class=BigFoo, in_scope='custom')
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[NeedsBigFoo],
+            binding_specs=[CustomScopeBindingSpec()],
+            id_to_scope={'custom': CustomScope()})
+        with obj_graph.account_memory() as memory_accountant:
+            obj_graph.provide(NeedsBigFoo)
+        report = memory_accountant.get_report()
+        self.assertGreaterEqual(report.scope_to_size_bytes['custom'],
+                                _SIZE_BYTES)
+
+    def test_lists_top_allocators(self):
+        needs_all, report = self._provide_all()
+        top_allocator = report.allocators[0]
+        self.assertEqual('big_bar', top_allocator.binding.binding_key.name)
+        self.assertTrue(top_allocator.filename.endswith(
+            'memory_accounting_test.py'))
+
+    def test_reports_within_with_block(self):
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[BigFoo])
+        with obj_graph.account_memory() as memory_accountant:
+            needs_big_foo = obj_graph.provide(NeedsBigFoo)
+            report = memory_accountant.get_report()
+        self.assertGreaterEqual(self._get_size_bytes(report, 'big_foo'),
+                                _SIZE_BYTES)
+
+    def test_stops_tracing_only_if_it_started(self):
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[BigFoo])
+        with obj_graph.account_memory():
+            self.assertTrue(tracemalloc.is_tracing())
+        self.assertFalse(tracemalloc.is_tracing())
+        tracemalloc.start()
+        try:
+            with obj_graph.account_memory():
+                pass
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+
+    def test_attributes_to_decorated_initializers(self):
+        class DecoratedFoo(object):
+            @decorators.inject()
+            def __init__(self):
+                self.data = bytearray(_SIZE_BYTES)
+        class NeedsDecoratedFoo(object):
+            def __init__(self, decorated_foo):
+                pass
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[DecoratedFoo, NeedsDecoratedFoo])
+        with obj_graph.account_memory() as memory_accountant:
+            obj_graph.provide(NeedsDecoratedFoo)
+        self.assertGreaterEqual(
+            self._get_size_bytes(memory_accountant.get_report(),
+                                 'decorated_foo'),
+            _SIZE_BYTES)
+
+    def test_formats_and_exports_json(self):
+        needs_all, report = self._provide_all()
+        self.assertIn('big_bar', report.format())
+        report_dict = json.loads(report.to_json())
+        self.assertEqual('big_bar', report_dict['bindings'][0]['name'])
+        self.assertEqual('SomeBindingSpec',
+                         report_dict['bindings'][0]['binding_spec'])
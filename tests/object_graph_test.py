@@ -14,15 +14,39 @@ limitations under the License.
 """
 
 
+import sys
+import threading
+import types
 import unittest
 
+from pinject import binding_keys
 from pinject import bindings
 from pinject import decorators
 from pinject import errors
+from pinject import finding
 from pinject import object_graph
+from pinject import provision_observers
 from pinject import scoping
 
 
+def _new_chain_classes(length):
+    """Returns classes Link0, ..., each of whose initializers injects the next.
+    """
+    classes = []
+    for index in reversed(range(length)):
+        if classes:
+            namespace = {}
+            exec('def __init__(self, link_{0}):\n'
+                 '    self.next_link = link_{0}\n'.format(index + 1), namespace)
+            init = namespace['__init__']
+        else:
+            init = lambda self: None
+        classes.append(type('Link{0}'.format(index), (object,),
+                            {'__init__': init}))
+    classes.reverse()
+    return classes
+
+
 class NewObjectGraphTest(unittest.TestCase):
 
     def test_can_create_object_graph_with_all_defaults(self):
@@ -171,6 +195,173 @@ class NewObjectGraphTest(unittest.TestCase):
         some_class_two = obj_graph.provide(SomeClass)
         self.assertIs(some_class_one.foo, some_class_two.foo)
 
+    def test_creates_object_graph_using_given_scope_without_slots(self):
+        class FooScope(scoping.Scope):
+            def __init__(self):
+                self.provided = {}
+            def provide(self, binding_key, default_provider_fn):
+                if binding_key not in self.provided:
+                    self.provided[binding_key] = default_provider_fn()
+                return self.provided[binding_key]
+        class SomeClass(object):
+            def __init__(self, foo):
+                self.foo = foo
+        class SomeBindingSpec(bindings.BindingSpec):
+            @decorators.provides(in_scope='foo-scope')
+            def provide_foo(self):
+                return object()
+        foo_scope = FooScope()
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[SomeClass],
+            binding_specs=[SomeBindingSpec()],
+            id_to_scope={'foo-scope': foo_scope})
+        some_class_one = obj_graph.provide(SomeClass)
+        some_class_two = obj_graph.provide(SomeClass)
+        self.assertIs(some_class_one.foo, some_class_two.foo)
+        self.assertEqual([some_class_one.foo], list(foo_scope.provided.values()))
+
+    def test_observes_cache_hits_and_misses(self):
+        class FooScope(scoping.Scope):
+            def __init__(self):
+                self.provided = {}
+            def provide(self, binding_key, default_provider_fn):
+                if binding_key not in self.provided:
+                    self.provided[binding_key] = default_provider_fn()
+                return self.provided[binding_key]
+        class SomeClass(object):
+            def __init__(self, foo, bar):
+                pass
+        class Bar(object):
+            def __init__(self, foo):
+                pass
+        class SomeBindingSpec(bindings.BindingSpec):
+            @decorators.provides(in_scope='foo-scope')
+            def provide_foo(self):
+                return object()
+        class RecordingObserver(provision_observers.ProvisionObserver):
+            def __init__(self):
+                self.events = []
+            def on_provide_end(self, binding, scope_id, depth, is_cache_hit,
+                               elapsed_secs):
+                self.events.append((binding.binding_key, depth, is_cache_hit))
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[SomeClass, Bar],
+            binding_specs=[SomeBindingSpec()],
+            id_to_scope={'foo-scope': FooScope()})
+        observer = RecordingObserver()
+        obj_graph.add_provision_observer(observer)
+        obj_graph.provide(SomeClass)
+        foo, bar = binding_keys.new('foo'), binding_keys.new('bar')
+        self.assertEqual([(foo, 1, False), (foo, 2, True), (bar, 1, False)],
+                         observer.events)
+        del observer.events[:]
+        obj_graph.provide(SomeClass)
+        self.assertEqual([(foo, 1, True), (bar, 1, True)], observer.events)
+        obj_graph.remove_provision_observer(observer)
+        obj_graph.provide(SomeClass)
+        self.assertEqual(2, len(observer.events))
+
+    def test_observes_provisions_via_provider_functions(self):
+        class Factory(object):
+            def __init__(self, provide_foo):
+                self.provide_foo = provide_foo
+        class Foo(object):
+            def __init__(self, bar):
+                pass
+        class Bar(object):
+            pass
+        class RecordingObserver(provision_observers.ProvisionObserver):
+            def __init__(self):
+                self.events = []
+            def on_provide_end(self, binding, scope_id, depth, is_cache_hit,
+                               elapsed_secs):
+                self.events.append((binding.binding_key, depth, is_cache_hit))
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[Factory, Foo, Bar])
+        factory = obj_graph.provide(Factory)
+        observer = RecordingObserver()
+        obj_graph.add_provision_observer(observer)
+        factory.provide_foo()
+        factory.provide_foo()
+        foo, bar = binding_keys.new('foo'), binding_keys.new('bar')
+        self.assertEqual([(bar, 2, False), (foo, 1, False), (foo, 1, True)],
+                         observer.events)
+
+    def test_observing_context_manager_observes_only_in_with_block(self):
+        class SomeClass(object):
+            def __init__(self, foo):
+                pass
+        class Foo(object):
+            pass
+        class RecordingObserver(
+                provision_observers.ObservingContextManager):
+            def __init__(self, obj_graph):
+                super(RecordingObserver, self).__init__(obj_graph)
+                self.binding_keys = []
+            def on_provide_end(self, binding, scope_id, depth, is_cache_hit,
+                               elapsed_secs):
+                self.binding_keys.append(binding.binding_key)
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[SomeClass, Foo])
+        with RecordingObserver(obj_graph) as observer:
+            obj_graph.provide(SomeClass)
+        obj_graph.provide(SomeClass)
+        self.assertEqual([binding_keys.new('foo')], observer.binding_keys)
+
+    def test_collects_provision_stats_if_asked(self):
+        class SomeClass(object):
+            def __init__(self, foo, bar):
+                pass
+        class Foo(object):
+            pass
+        class Bar(object):
+            def __init__(self, foo):
+                raise ValueError()
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[SomeClass, Foo, Bar],
+            collect_provision_stats=True)
+        self.assertRaises(ValueError, obj_graph.provide, SomeClass)
+        binding_key_to_stats = (
+            obj_graph.get_provision_stats().binding_key_to_stats)
+        foo_stats = binding_key_to_stats[binding_keys.new('foo')]
+        self.assertEqual((1, 1, 0), (foo_stats.num_cache_misses,
+                                     foo_stats.num_cache_hits,
+                                     foo_stats.num_failures))
+        bar_stats = binding_key_to_stats[binding_keys.new('bar')]
+        self.assertEqual(1, bar_stats.num_failures)
+
+    def test_doesnt_collect_provision_stats_by_default(self):
+        obj_graph = object_graph.new_object_graph(modules=None)
+        self.assertIsNone(obj_graph.get_provision_stats())
+
+    def test_creates_object_graph_using_given_slotted_scope(self):
+        class FooScope(scoping.SlottedScope):
+            def __init__(self):
+                self.slot_to_instance = {}
+            def provide_slot(self, slot, binding_key, default_provider_fn,
+                             *default_provider_args):
+                if slot not in self.slot_to_instance:
+                    self.slot_to_instance[slot] = default_provider_fn(
+                        *default_provider_args)
+                return self.slot_to_instance[slot]
+        class SomeClass(object):
+            def __init__(self, foo):
+                self.foo = foo
+        class SomeBindingSpec(bindings.BindingSpec):
+            @decorators.provides(in_scope='foo-scope')
+            def provide_foo(self):
+                return object()
+        foo_scope = FooScope()
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[SomeClass],
+            binding_specs=[SomeBindingSpec()],
+            id_to_scope={'foo-scope': foo_scope})
+        some_class_one = obj_graph.provide(SomeClass)
+        some_class_two = obj_graph.provide(SomeClass)
+        self.assertIs(some_class_one.foo, some_class_two.foo)
+        self.assertEqual([some_class_one.foo],
+                         list(foo_scope.slot_to_instance.values()))
+
     def test_raises_exception_if_modules_is_wrong_type(self):
         self.assertRaises(errors.WrongArgTypeError,
                           object_graph.new_object_graph, modules=42)
@@ -198,6 +389,98 @@ class NewObjectGraphTest(unittest.TestCase):
                           object_graph.new_object_graph,
                           is_scope_usable_from_scope=42)
 
+    def test_evaluates_scope_usability_once_per_pair_of_scopes(self):
+        class SomeClass(object):
+            def __init__(self, foo):
+                pass
+        class Foo(object):
+            pass
+        usability_checks = []
+        def IsUsable(to_scope_id, from_scope_id):
+            usability_checks.append((to_scope_id, from_scope_id))
+            return True
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[SomeClass, Foo],
+            is_scope_usable_from_scope=IsUsable)
+        num_checks_at_creation = len(usability_checks)
+        obj_graph.provide(SomeClass)
+        obj_graph.provide(SomeClass)
+        self.assertEqual(num_checks_at_creation, len(usability_checks))
+
+    def test_reports_all_scope_usability_violations_if_verifying(self):
+        class SomeClass(object):
+            def __init__(self, foo, bar):
+                pass
+        class Foo(object):
+            pass
+        class Bar(object):
+            pass
+        class SomeBindingSpec(bindings.BindingSpec):
+            def configure(self, bind):
+                bind('foo', to_class=Foo, in_scope='narrow-scope')
+                bind('bar', to_class=Bar, in_scope='narrow-scope')
+        try:
+            object_graph.new_object_graph(
+                modules=None, classes=[SomeClass],
+                binding_specs=[SomeBindingSpec()],
+                id_to_scope={'narrow-scope': scoping.PrototypeScope()},
+                is_scope_usable_from_scope=(
+                    lambda to_scope, from_scope: (to_scope != 'narrow-scope' or
+                                                  from_scope == 'narrow-scope')),
+                verify_scope_usability=True)
+            self.fail('expected BadDependencyScopesError')
+        except errors.BadDependencyScopesError as e:
+            self.assertIn('"foo"', str(e))
+            self.assertIn('"bar"', str(e))
+            self.assertEqual(2, str(e).count('is not usable'))
+
+    def test_doesnt_verify_scope_usability_by_default(self):
+        class SomeClass(object):
+            def __init__(self, foo):
+                pass
+        class Foo(object):
+            pass
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[SomeClass, Foo],
+            is_scope_usable_from_scope=lambda _1, _2: False)
+        self.assertRaises(errors.BadDependencyScopeError,
+                          obj_graph.provide, SomeClass)
+
+    def test_collects_startup_report_if_asked(self):
+        class SomeClass(object):
+            def __init__(self, foo):
+                pass
+        class SomeBindingSpec(bindings.BindingSpec):
+            def configure(self, bind):
+                bind('foo', to_instance='a-foo')
+        obj_graph = object_graph.new_object_graph(
+            modules=[sys.modules[__name__]], classes=[SomeClass],
+            binding_specs=[SomeBindingSpec()], collect_startup_report=True)
+        startup_report = obj_graph.get_startup_report()
+        self.assertEqual(
+            ['scopes', 'find_classes', 'implicit_bindings',
+             'explicit_class_bindings', 'binding_specs', 'binding_maps',
+             'verify_requirements', 'object_provider'],
+            [phase.name for phase in startup_report.phases])
+        self.assertEqual([__name__],
+                         list(startup_report.module_name_to_scan_secs))
+        self.assertIn('SomeBindingSpec.configure',
+                      [timing.name
+                       for timing in startup_report.binding_spec_times])
+        self.assertEqual(1, startup_report.num_explicit_bindings)
+        self.assertLessEqual(1, startup_report.num_bindings)
+
+    def test_doesnt_collect_startup_report_by_default(self):
+        obj_graph = object_graph.new_object_graph(modules=None)
+        self.assertIsNone(obj_graph.get_startup_report())
+
+    def test_collects_startup_reports_while_collecting(self):
+        with object_graph.collecting_startup_reports():
+            obj_graph = object_graph.new_object_graph(modules=None)
+        self.assertIsNotNone(obj_graph.get_startup_report())
+        obj_graph = object_graph.new_object_graph(modules=None)
+        self.assertIsNone(obj_graph.get_startup_report())
+
     def test_raises_exception_if_configure_method_has_no_expected_args(self):
         class SomeBindingSpec(bindings.BindingSpec):
             def configure(self):
@@ -504,6 +787,28 @@ class ObjectGraphProvideTest(unittest.TestCase):
         class_one = obj_graph.provide(SomeClass)
         self.assertEqual('a-foo', class_one.foo)
 
+    def test_finds_class_with_inject_decorated_init_from_module_function(
+            self):
+        module = types.ModuleType('module_with_init_from_function')
+        module.pinject_decorators = decorators
+        exec('def _init(self, foo_dependency):\n'
+             '    self.foo_dependency = foo_dependency\n'
+             'class FooDependency(object):\n'
+             '    __init__ = pinject_decorators.inject()(lambda self: None)\n'
+             'class SomeClass(object):\n'
+             '    __init__ = pinject_decorators.inject()(_init)\n',
+             module.__dict__)
+        sys.modules[module.__name__] = module
+        try:
+            for modules in [[module], finding.ALL_IMPORTED_MODULES]:
+                obj_graph = object_graph.new_object_graph(
+                    modules=modules, only_use_explicit_bindings=True)
+                some_class = obj_graph.provide(module.SomeClass)
+                self.assertIsInstance(some_class.foo_dependency,
+                                      module.FooDependency)
+        finally:
+            del sys.modules[module.__name__]
+
     def test_non_explicitly_injectable_class_cannot_be_directly_provided(self):
         class SomeClass(object):
             def __init__(self):
@@ -720,6 +1025,48 @@ class ObjectGraphProvideTest(unittest.TestCase):
         self.assertRaises(errors.InjectingNoneDisallowedError,
                           obj_graph.provide, SomeClass)
 
+    def test_can_provide_chain_deeper_than_recursion_limit(self):
+        classes = _new_chain_classes(sys.getrecursionlimit() * 2)
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=classes)
+        link = obj_graph.provide(classes[0])
+        for cls in classes[1:]:
+            link = link.next_link
+            self.assertIsInstance(link, cls)
+
+    def test_can_provide_deep_chain_in_prototype_scope(self):
+        classes = _new_chain_classes(sys.getrecursionlimit() * 2)
+        class SomeBindingSpec(bindings.BindingSpec):
+            def configure(self, bind):
+                for index, cls in enumerate(classes):
+                    bind('link_{0}'.format(index), to_class=cls,
+                         in_scope=scoping.PROTOTYPE)
+        obj_graph = object_graph.new_object_graph(
+            modules=None, binding_specs=[SomeBindingSpec()])
+        self.assertIsNot(obj_graph.provide(classes[0]).next_link,
+                         obj_graph.provide(classes[0]).next_link)
+
+    def test_releases_singleton_scope_after_failed_provision(self):
+        class SomeClass(object):
+            def __init__(self, foo):
+                self.foo = foo
+        class SomeBindingSpec(bindings.BindingSpec):
+            def provide_foo(self, bar):
+                raise ValueError('bar is not good enough')
+            def provide_bar(self):
+                return 'a-bar'
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[SomeClass],
+            binding_specs=[SomeBindingSpec()])
+        self.assertRaises(ValueError, obj_graph.provide, SomeClass)
+        def ProvideAgain():
+            self.assertRaises(ValueError, obj_graph.provide, SomeClass)
+        thread = threading.Thread(target=ProvideAgain)
+        thread.daemon = True
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+
     def test_raises_exception_if_trying_to_provide_nonclass(self):
         class SomeClass(object):
             pass
@@ -22,6 +22,7 @@ from pinject import decorators
 from pinject import errors
 from pinject import injection_contexts
 from pinject import object_providers
+from pinject import provision_observers
 from pinject import scoping
 
 
@@ -44,6 +45,24 @@ def new_injection_context():
 _UNUSED_INJECTION_SITE_FN = lambda: None
 
 
+class _RecordingObserver(provision_observers.ProvisionObserver):
+
+    def __init__(self):
+        self.events = []
+
+    def on_provide_start(self, binding, scope_id, depth):
+        self.events.append(('start', binding.binding_key, depth))
+
+    def on_provide_end(self, binding, scope_id, depth, is_cache_hit,
+                       elapsed_secs):
+        self.events.append(
+            ('end', binding.binding_key, depth, is_cache_hit))
+
+    def on_provide_failure(self, binding, scope_id, depth, error,
+                           elapsed_secs):
+        self.events.append(('failure', binding.binding_key, depth))
+
+
 class ObjectProviderTest(unittest.TestCase):
 
     def test_provides_from_arg_binding_key_successfully(self):
@@ -124,3 +143,48 @@ class ObjectProviderTest(unittest.TestCase):
             foo, new_injection_context(), [], {})
         self.assertEqual([], pargs)
         self.assertEqual({'bar': 'a-bar'}, kwargs)
+
+    def test_calls_observers_around_provision(self):
+        arg_binding_key = arg_binding_keys.new('an-arg-name')
+        obj_provider = new_obj_provider(arg_binding_key, 'an-instance')
+        observer = _RecordingObserver()
+        obj_provider.add_observer(observer)
+        obj_provider.provide_from_arg_binding_key(
+            _UNUSED_INJECTION_SITE_FN, arg_binding_key,
+            new_injection_context())
+        binding_key = arg_binding_key.binding_key
+        self.assertEqual([('start', binding_key, 1),
+                          ('end', binding_key, 1, False)], observer.events)
+
+    def test_stops_calling_removed_observers(self):
+        arg_binding_key = arg_binding_keys.new('an-arg-name')
+        obj_provider = new_obj_provider(arg_binding_key, 'an-instance')
+        observer = _RecordingObserver()
+        obj_provider.add_observer(observer)
+        obj_provider.remove_observer(observer)
+        obj_provider.provide_from_arg_binding_key(
+            _UNUSED_INJECTION_SITE_FN, arg_binding_key,
+            new_injection_context())
+        self.assertEqual([], observer.events)
+        self.assertNotIn('_start_providing_arg', vars(obj_provider))
+
+    def test_calls_observers_on_failure(self):
+        class SomeClass(object):
+            def __init__(self):
+                raise ValueError()
+        arg_binding_key = arg_binding_keys.new('some_class')
+        binding_key = arg_binding_key.binding_key
+        binding = bindings.new_binding_to_class(
+            binding_key, SomeClass, 'a-scope')
+        obj_provider = object_providers.ObjectProvider(
+            bindings.BindingMapping({binding_key: binding}, {}),
+            scoping.BindableScopes({'a-scope': scoping.PrototypeScope()}),
+            allow_injecting_none=False)
+        observer = _RecordingObserver()
+        obj_provider.add_observer(observer)
+        self.assertRaises(
+            ValueError, obj_provider.provide_from_arg_binding_key,
+            _UNUSED_INJECTION_SITE_FN, arg_binding_key,
+            new_injection_context())
+        self.assertEqual([('start', binding_key, 1),
+                          ('failure', binding_key, 1)], observer.events)
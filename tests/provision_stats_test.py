@@ -0,0 +1,158 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from pinject import binding_keys
+from pinject import bindings
+from pinject import provision_stats
+
+
+def _new_binding(name):
+    return bindings.new_binding_to_instance(
+        binding_keys.new(name), 'an-instance', 'a-scope', lambda: 'unused')
+
+
+class BindingStatsTest(unittest.TestCase):
+
+    def test_estimates_percentiles_from_buckets(self):
+        stats = provision_stats.BindingStats()
+        self.assertIsNone(stats.get_construction_secs_percentile(50))
+        stats.num_cache_misses = 10
+        stats.construction_secs_bucket_counts[0] = 9
+        stats.construction_secs_bucket_counts[-1] = 1
+        self.assertEqual(provision_stats.CONSTRUCTION_SECS_BUCKET_BOUNDS[0],
+                         stats.get_construction_secs_percentile(50))
+        self.assertEqual(float('inf'),
+                         stats.get_construction_secs_percentile(99))
+
+    def test_adds_other_stats(self):
+        stats = provision_stats.BindingStats()
+        other_stats = provision_stats.BindingStats()
+        other_stats.num_cache_hits = 2
+        other_stats.num_failures = 1
+        stats.add(other_stats)
+        stats.add(other_stats)
+        self.assertEqual(4, stats.num_cache_hits)
+        self.assertEqual(6, stats.num_provisions)
+
+
+class ProvisionStatsCollectorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.collector = provision_stats.ProvisionStatsCollector()
+        self.binding = _new_binding('foo')
+
+    def test_counts_hits_misses_and_failures(self):
+        self.collector.on_provide_end(self.binding, 'a-scope', 1, False, 0.002)
+        self.collector.on_provide_end(self.binding, 'a-scope', 1, True, 0.0)
+        self.collector.on_provide_failure(
+            self.binding, 'a-scope', 1, ValueError(), 0.0)
+        stats = self.collector.get_snapshot().binding_key_to_stats[
+            self.binding.binding_key]
+        self.assertEqual(1, stats.num_cache_hits)
+        self.assertEqual(1, stats.num_cache_misses)
+        self.assertEqual(1, stats.num_failures)
+        self.assertEqual(0.005, stats.get_construction_secs_percentile(50))
+
+    def test_merges_counts_from_all_threads(self):
+        def ProvideSomeTimes():
+            for _ in range(100):
+                self.collector.on_provide_end(
+                    self.binding, 'a-scope', 1, True, 0.0)
+        threads = [threading.Thread(target=ProvideSomeTimes)
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        ProvideSomeTimes()
+        stats = self.collector.get_snapshot().binding_key_to_stats[
+            self.binding.binding_key]
+        self.assertEqual(500, stats.num_cache_hits)
+
+
+    def test_retires_shards_of_exited_threads(self):
+        def ProvideOnce():
+            self.collector.on_provide_end(
+                self.binding, 'a-scope', 1, True, 0.0)
+        for _ in range(3):
+            threads = [threading.Thread(target=ProvideOnce)
+                       for _ in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            stats = self.collector.get_snapshot().binding_key_to_stats[
+                self.binding.binding_key]
+        self.assertEqual(30, stats.num_cache_hits)
+        self.assertEqual([], self.collector._thread_refs_and_shards)
+        ProvideOnce()
+        stats = self.collector.get_snapshot().binding_key_to_stats[
+            self.binding.binding_key]
+        self.assertEqual(31, stats.num_cache_hits)
+        self.assertEqual(1, len(self.collector._thread_refs_and_shards))
+
+
+class ProvisionStatsTest(unittest.TestCase):
+
+    def setUp(self):
+        collector = provision_stats.ProvisionStatsCollector()
+        collector.on_provide_end(_new_binding('foo'), 'a-scope', 1, False,
+                                 0.002)
+        self.stats = collector.get_snapshot()
+
+    def test_to_dict(self):
+        self.assertEqual(
+            [{'name': 'foo', 'annotation': 'unannotated', 'num_provisions': 1,
+              'num_cache_hits': 0, 'num_cache_misses': 1, 'num_failures': 0,
+              'construction_secs_sum': 0.002,
+              'construction_secs_p50': 0.005, 'construction_secs_p90': 0.005,
+              'construction_secs_p99': 0.005}],
+            self.stats.to_dict()['bindings'])
+
+    def test_to_prometheus_text(self):
+        text = self.stats.to_prometheus_text()
+        self.assertIn('# TYPE pinject_cache_misses_total counter\n', text)
+        self.assertIn('pinject_cache_misses_total{name="foo",'
+                      'annotation="unannotated"} 1\n', text)
+        self.assertIn('pinject_construction_seconds_bucket{name="foo",'
+                      'annotation="unannotated",le="+Inf"} 1\n', text)
+        self.assertIn('pinject_construction_seconds_count{name="foo",'
+                      'annotation="unannotated"} 1\n', text)
+
+    def test_writes_files(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            json_path = os.path.join(temp_dir, 'stats.json')
+            self.stats.write_json(json_path)
+            with open(json_path) as json_file:
+                self.assertEqual(self.stats.to_dict(), json.load(json_file))
+            prometheus_path = os.path.join(temp_dir, 'stats.prom')
+            self.stats.write_prometheus_text(prometheus_path)
+            with open(prometheus_path) as prometheus_file:
+                self.assertEqual(self.stats.to_prometheus_text(),
+                                 prometheus_file.read())
+            self.assertEqual(['stats.json', 'stats.prom'],
+                             sorted(os.listdir(temp_dir)))
+        finally:
+            shutil.rmtree(temp_dir)
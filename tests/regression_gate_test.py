@@ -0,0 +1,138 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from benchmarks import regression_gate
+
+
+def _new_run(name_to_median_us, calibration_us=100.0, noise=0.02, seed=0):
+    rng = random.Random(seed)
+    def Samples(median_us):
+        return [median_us * rng.uniform(1 - noise, 1 + noise)
+                for _ in range(20)]
+    return {
+        'metadata': {},
+        'samples_us': {name: Samples(median_us)
+                       for name, median_us in name_to_median_us.items()},
+        'calibration_samples_us': {name: Samples(calibration_us)
+                                   for name in name_to_median_us},
+    }
+
+
+class CompareTest(unittest.TestCase):
+
+    def test_no_regression_when_unchanged(self):
+        comparisons = regression_gate.compare(
+            _new_run({'provide.a': 10.0}, seed=1),
+            _new_run({'provide.a': 10.0}, seed=2))
+        self.assertEqual(['provide.a'], [c.name for c in comparisons])
+        self.assertFalse(comparisons[0].is_regression)
+        self.assertAlmostEqual(1.0, comparisons[0].ratio, delta=0.05)
+
+    def test_detects_doubling(self):
+        [comparison] = regression_gate.compare(
+            _new_run({'provide.a': 10.0}, seed=1),
+            _new_run({'provide.a': 20.0}, seed=2))
+        self.assertTrue(comparison.is_regression)
+        self.assertAlmostEqual(2.0, comparison.ratio, delta=0.1)
+        self.assertLess(comparison.ratio_low, comparison.ratio)
+        self.assertGreater(comparison.ratio_high, comparison.ratio)
+        self.assertLess(comparison.p_value, regression_gate.DEFAULT_SIGNIFICANCE)
+
+    def test_slowdown_within_threshold_is_not_regression(self):
+        [comparison] = regression_gate.compare(
+            _new_run({'provide.a': 10.0}, seed=1),
+            _new_run({'provide.a': 11.0}, seed=2), threshold=0.25)
+        self.assertFalse(comparison.is_regression)
+
+    def test_noisy_slowdown_is_not_significant(self):
+        [comparison] = regression_gate.compare(
+            _new_run({'provide.a': 10.0}, noise=0.9, seed=1),
+            _new_run({'provide.a': 13.0}, noise=0.9, seed=2), threshold=0.25)
+        self.assertFalse(comparison.is_regression)
+
+    def test_normalizes_by_calibration(self):
+        # A machine twice as slow runs both the benchmark and the
+        # calibration workload twice as slowly.
+        [comparison] = regression_gate.compare(
+            _new_run({'provide.a': 10.0}, calibration_us=100.0, seed=1),
+            _new_run({'provide.a': 20.0}, calibration_us=200.0, seed=2))
+        self.assertFalse(comparison.is_regression)
+        self.assertAlmostEqual(1.0, comparison.ratio, delta=0.05)
+
+    def test_only_compares_benchmarks_in_both_runs(self):
+        comparisons = regression_gate.compare(
+            _new_run({'provide.a': 10.0, 'provide.b': 10.0}),
+            _new_run({'provide.b': 10.0, 'provide.c': 10.0}))
+        self.assertEqual(['provide.b'], [c.name for c in comparisons])
+
+    def test_format_marks_regressions(self):
+        [comparison] = regression_gate.compare(
+            _new_run({'provide.a': 10.0}, seed=1),
+            _new_run({'provide.a': 20.0}, seed=2))
+        self.assertIn('REGRESSION', comparison.format())
+
+
+class MainTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _write_run(self, file_name, run):
+        path = os.path.join(self.tmp_dir, file_name)
+        with open(path, 'w') as run_file:
+            json.dump(run, run_file)
+        return path
+
+    def test_fails_on_regression(self):
+        baseline_path = self._write_run(
+            'baseline.json', _new_run({'provide.a': 10.0}, seed=1))
+        current_path = self._write_run(
+            'current.json', _new_run({'provide.a': 20.0}, seed=2))
+        self.assertEqual(1, regression_gate.main(
+            ['regression_gate', '--baseline', baseline_path,
+             '--current', current_path]))
+
+    def test_passes_without_regression(self):
+        baseline_path = self._write_run(
+            'baseline.json', _new_run({'provide.a': 10.0}, seed=1))
+        current_path = self._write_run(
+            'current.json', _new_run({'provide.a': 10.0}, seed=2))
+        self.assertEqual(0, regression_gate.main(
+            ['regression_gate', '--baseline', baseline_path,
+             '--current', current_path]))
+
+    def test_stored_baseline_covers_gated_benchmarks(self):
+        with open(regression_gate.DEFAULT_BASELINE_PATH) as baseline_file:
+            baseline_run = json.load(baseline_file)
+        names = set(baseline_run['samples_us'])
+        for prefix in ['new_object_graph.', 'provide.', 'decorate.']:
+            self.assertTrue(any(name.startswith(prefix) for name in names),
+                            prefix)
+        self.assertEqual(names, set(baseline_run['calibration_samples_us']))
+
+
+if __name__ == '__main__':
+    unittest.main()
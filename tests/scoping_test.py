@@ -14,6 +14,7 @@ limitations under the License.
 """
 
 
+import threading
 import unittest
 
 from pinject import bindings
@@ -36,6 +37,15 @@ class PrototypeScopeTest(unittest.TestCase):
             list(range(10)),
             [scope.provide(binding_key, provider_fn) for _ in range(10)])
 
+    def test_always_calls_provider_fn_with_args_by_slot(self):
+        scope = scoping.PrototypeScope()
+        binding_key = binding_keys.new('unused')
+        self.assertEqual(
+            [(0, 'a-parg'), (1, 'a-parg')],
+            [scope.provide_slot(0, binding_key, lambda *pargs: pargs, i,
+                                'a-parg')
+             for i in range(2)])
+
 
 class SingletonScopeTest(unittest.TestCase):
 
@@ -62,6 +72,121 @@ class SingletonScopeTest(unittest.TestCase):
                          self.scope.provide(self.binding_key_one,
                                             provide_from_singleton_scope))
 
+    def test_calls_provider_fn_just_once_for_same_slot(self):
+        self.assertIs(
+            self.scope.provide_slot(3, self.binding_key_one, self.provider_fn),
+            self.scope.provide_slot(3, self.binding_key_one, self.provider_fn))
+
+    def test_calls_provider_fn_multiple_times_for_different_slots(self):
+        self.assertIsNot(
+            self.scope.provide_slot(0, self.binding_key_one, self.provider_fn),
+            self.scope.provide_slot(1, self.binding_key_two, self.provider_fn))
+
+    def test_passes_provider_args_to_provider_fn(self):
+        self.assertEqual(
+            ('a-parg', 'another-parg'),
+            self.scope.provide_slot(0, self.binding_key_one,
+                                    lambda *pargs: pargs,
+                                    'a-parg', 'another-parg'))
+
+    def test_can_call_provider_fn_that_calls_back_to_slot(self):
+        def provide_from_singleton_scope():
+            return self.scope.provide_slot(
+                5, self.binding_key_two, lambda: 'provided')
+        self.assertEqual('provided',
+                         self.scope.provide_slot(0, self.binding_key_one,
+                                                 provide_from_singleton_scope))
+        self.assertEqual('provided',
+                         self.scope.provide_slot(5, self.binding_key_two,
+                                                 self.provider_fn))
+
+    def test_shares_instance_provided_by_binding_key_with_its_slot(self):
+        instance = self.scope.provide(self.binding_key_one, self.provider_fn)
+        self.assertIs(
+            instance,
+            self.scope.provide_slot(3, self.binding_key_one, self.provider_fn))
+        self.assertIs(
+            instance,
+            self.scope.provide(self.binding_key_one, self.provider_fn))
+
+    def test_shares_instance_provided_by_slot_with_its_binding_key(self):
+        instance = self.scope.provide_slot(
+            3, self.binding_key_one, self.provider_fn)
+        self.assertIs(
+            instance,
+            self.scope.provide(self.binding_key_one, self.provider_fn))
+        self.assertIs(
+            instance, self.scope.start_providing_slot(3, self.binding_key_one))
+
+    def test_shares_instance_provided_by_binding_key_with_split_methods(self):
+        instance = self.scope.provide(self.binding_key_one, self.provider_fn)
+        self.assertIs(
+            instance, self.scope.start_providing_slot(3, self.binding_key_one))
+
+    def test_provides_once_per_slot_across_threads(self):
+        provided = []
+        def provider_fn():
+            provided.append(object())
+            return provided[-1]
+        threads = [
+            threading.Thread(target=self.scope.provide_slot,
+                             args=(0, self.binding_key_one, provider_fn))
+            for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(1, len(provided))
+
+
+class GetSlottedScopeTest(unittest.TestCase):
+
+    def test_returns_slotted_scope_as_is(self):
+        scope = scoping.SingletonScope()
+        self.assertIs(scope, scoping.get_slotted_scope(scope))
+
+    def test_adapts_scope_with_only_provide(self):
+        class SomeScope(scoping.Scope):
+            def provide(self, binding_key, default_provider_fn):
+                return 'provided-' + default_provider_fn()
+        slotted_scope = scoping.get_slotted_scope(SomeScope())
+        self.assertEqual(
+            'provided-a-parg',
+            slotted_scope.provide_slot(0, binding_keys.new('unused'),
+                                       lambda parg: parg, 'a-parg'))
+
+
+class ScopeUsabilityMatrixTest(unittest.TestCase):
+
+    def setUp(self):
+        self.policy_calls = []
+        def IsUsable(to_scope, from_scope):
+            self.policy_calls.append((to_scope, from_scope))
+            return to_scope != 'narrow-scope' or from_scope == 'narrow-scope'
+        self.matrix = scoping.ScopeUsabilityMatrix(
+            IsUsable, ['narrow-scope', 'wide-scope'])
+
+    def test_evaluates_policy_once_per_pair_of_known_scopes(self):
+        self.assertEqual(6, len(self.policy_calls))
+        self.assertTrue(self.matrix.is_scope_usable_from_scope(
+            'narrow-scope', 'narrow-scope'))
+        self.assertFalse(self.matrix.is_scope_usable_from_scope(
+            'narrow-scope', 'wide-scope'))
+        self.assertFalse(self.matrix.is_scope_usable_from_scope(
+            'narrow-scope', scoping.UNSCOPED))
+        self.assertEqual(6, len(self.policy_calls))
+
+    def test_gets_usable_scope_ids(self):
+        self.assertEqual({'wide-scope'},
+                         self.matrix.get_usable_scope_ids('wide-scope'))
+        self.assertEqual(set(), self.matrix.get_usable_scope_ids('unknown'))
+
+    def test_calls_policy_for_unknown_scopes(self):
+        self.assertFalse(self.matrix.is_scope_usable_from_scope(
+            'narrow-scope', 'unknown-scope'))
+        self.assertEqual(('narrow-scope', 'unknown-scope'),
+                         self.policy_calls[-1])
+
 
 class GetIdToScopeWithDefaultsTest(unittest.TestCase):
 
@@ -100,3 +225,12 @@ class BindableScopesTest(unittest.TestCase):
             lambda: 'unused-desc')
         self.assertEqual(
             'usable-scope', self.bindable_scopes.get_sub_scope(usable_binding))
+
+    def test_get_slotted_sub_scope_successfully(self):
+        scope = scoping.SingletonScope()
+        bindable_scopes = scoping.BindableScopes({'usable-scope-id': scope})
+        usable_binding = bindings.new_binding_to_instance(
+            binding_keys.new('foo'), 'unused-instance', 'usable-scope-id',
+            lambda: 'unused-desc')
+        self.assertIs(
+            scope, bindable_scopes.get_slotted_sub_scope(usable_binding))
@@ -0,0 +1,292 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+
+from pinject import bindings
+from pinject import decorators
+from pinject import errors
+from pinject import object_graph
+from pinject import scoping
+from pinject import snapshots
+
+
+class Foo(object):
+    def __init__(self):
+        pass
+
+
+class Bar(object):
+    def __init__(self, foo):
+        self.foo = foo
+
+
+class Baz(object):
+    pass
+
+
+class Root(object):
+    @decorators.annotate_arg('baz', 'annotated')
+    def __init__(self, bar, baz, some_value, other_baz, fresh_foo):
+        self.bar = bar
+        self.baz = baz
+        self.some_value = some_value
+        self.other_baz = other_baz
+        self.fresh_foo = fresh_foo
+
+
+class Outer(object):
+    class Foo(object):
+        pass
+
+
+class SnapshottedFromAllModules(object):
+    def __init__(self, snapshotted_value):
+        self.snapshotted_value = snapshotted_value
+
+
+class SomeBindingSpec(bindings.BindingSpec):
+
+    def configure(self, bind):
+        bind('baz', annotated_with='annotated', to_class=Baz)
+        bind('other_baz', to_class=Baz)
+        bind('fresh_foo', to_class=Foo, in_scope=scoping.PROTOTYPE)
+
+    def provide_some_value(self, foo):
+        return 'some-value'
+
+
+class ParameterizedBindingSpec(bindings.BindingSpec):
+
+    def __init__(self, value):
+        self._value = value
+
+    def configure(self, bind):
+        bind('param', to_instance=self._value)
+
+
+class AllModulesBindingSpec(bindings.BindingSpec):
+
+    def provide_snapshotted_value(self):
+        return 'snapshotted-value'
+
+
+class DependentBindingSpec(bindings.BindingSpec):
+
+    def dependencies(self):
+        return [SomeBindingSpec()]
+
+    def provide_dependent_value(self):
+        return 'dependent-value'
+
+
+class SnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.snapshot_path = os.path.join(self.temp_dir, 'snapshot.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _new_obj_graph(self, classes=(Foo, Bar, Root),
+                       binding_specs=(SomeBindingSpec(),), **kwargs):
+        return object_graph.new_object_graph(
+            modules=None, classes=classes, binding_specs=binding_specs,
+            snapshot=self.snapshot_path, collect_startup_report=True,
+            **kwargs)
+
+    def _get_phase_names(self, obj_graph):
+        return [phase.name for phase in obj_graph.get_startup_report().phases]
+
+    def _read_snapshot(self):
+        with open(self.snapshot_path) as snapshot_file:
+            return snapshot_file.read()
+
+    def test_writes_snapshot_then_loads_it(self):
+        first_obj_graph = self._new_obj_graph()
+        self.assertIn('find_classes', self._get_phase_names(first_obj_graph))
+        self.assertIn('write_snapshot', self._get_phase_names(first_obj_graph))
+        self.assertTrue(os.path.exists(self.snapshot_path))
+        obj_graph = self._new_obj_graph()
+        phase_names = self._get_phase_names(obj_graph)
+        self.assertIn('load_snapshot', phase_names)
+        self.assertNotIn('find_classes', phase_names)
+        self.assertNotIn('binding_specs', phase_names)
+        self.assertNotIn('write_snapshot', phase_names)
+        self.assertEqual(
+            first_obj_graph.get_startup_report().num_bindings,
+            obj_graph.get_startup_report().num_bindings)
+
+    def test_loaded_bindings_provide_same_graph(self):
+        self._new_obj_graph()
+        root = self._new_obj_graph().provide(Root)
+        self.assertIsInstance(root.bar, Bar)
+        self.assertIsInstance(root.bar.foo, Foo)
+        self.assertIsInstance(root.baz, Baz)
+        self.assertEqual('some-value', root.some_value)
+        # Arg names bound to the same class in the same scope share it.
+        self.assertIs(root.baz, root.other_baz)
+        # Prototype scope survives the snapshot.
+        self.assertIsNot(root.bar.foo, root.fresh_foo)
+
+    def test_snapshot_is_reproducible(self):
+        self._new_obj_graph()
+        first_snapshot = self._read_snapshot()
+        os.remove(self.snapshot_path)
+        self._new_obj_graph()
+        self.assertEqual(first_snapshot, self._read_snapshot())
+
+    def test_changed_options_rewrite_snapshot(self):
+        self._new_obj_graph()
+        obj_graph = self._new_obj_graph(
+            get_arg_names_from_class_name=lambda class_name: [])
+        self.assertIn('write_snapshot', self._get_phase_names(obj_graph))
+        self.assertIn('find_classes', self._get_phase_names(obj_graph))
+
+    def test_changed_classes_rewrite_snapshot(self):
+        self._new_obj_graph()
+        obj_graph = self._new_obj_graph(classes=(Foo, Bar, Root, Outer.Foo))
+        self.assertIn('find_classes', self._get_phase_names(obj_graph))
+        self.assertIn('collisions', self._read_snapshot())
+
+    def test_loaded_collisions_are_still_ambiguous(self):
+        classes = (Foo, Bar, Outer.Foo)
+        self._new_obj_graph(classes=classes)
+        obj_graph = self._new_obj_graph(classes=classes)
+        self.assertNotIn('find_classes', self._get_phase_names(obj_graph))
+        self.assertRaises(errors.AmbiguousArgNameError, obj_graph.provide, Bar)
+
+    def test_binding_spec_dependencies_are_loaded(self):
+        binding_specs = [DependentBindingSpec()]
+        self._new_obj_graph(binding_specs=binding_specs)
+        obj_graph = self._new_obj_graph(binding_specs=binding_specs)
+        self.assertNotIn('binding_specs', self._get_phase_names(obj_graph))
+        self.assertEqual('some-value', obj_graph.provide(Root).some_value)
+
+    def test_binding_to_instance_is_not_snapshotted(self):
+        obj_graph = self._new_obj_graph(
+            classes=(Foo,), binding_specs=[ParameterizedBindingSpec(3)])
+        self.assertFalse(os.path.exists(self.snapshot_path))
+        phase_names = self._get_phase_names(obj_graph)
+        self.assertIn('new_snapshot', phase_names)
+        # Sources aren't hashed, since there's no snapshot to key.
+        self.assertNotIn('snapshot_key', phase_names)
+        self.assertNotIn('write_snapshot', phase_names)
+
+    def test_local_class_is_not_snapshotted(self):
+        class LocalClass(object):
+            pass
+        self._new_obj_graph(classes=(LocalClass,), binding_specs=None)
+        self.assertFalse(os.path.exists(self.snapshot_path))
+
+    def test_corrupt_snapshot_is_rewritten(self):
+        with open(self.snapshot_path, 'w') as snapshot_file:
+            snapshot_file.write('not json')
+        obj_graph = self._new_obj_graph()
+        self.assertIn('write_snapshot', self._get_phase_names(obj_graph))
+        self.assertIn('"version"', self._read_snapshot())
+
+    def test_writes_and_loads_snapshot_with_all_imported_modules(self):
+        def NewObjGraph():
+            return object_graph.new_object_graph(
+                binding_specs=[AllModulesBindingSpec()],
+                snapshot=self.snapshot_path, collect_startup_report=True)
+        first_obj_graph = NewObjGraph()
+        self.assertIn('write_snapshot', self._get_phase_names(first_obj_graph))
+        self.assertTrue(os.path.exists(self.snapshot_path))
+        obj_graph = NewObjGraph()
+        phase_names = self._get_phase_names(obj_graph)
+        self.assertIn('load_snapshot', phase_names)
+        self.assertNotIn('find_classes', phase_names)
+        self.assertNotIn('write_snapshot', phase_names)
+        self.assertEqual(
+            'snapshotted-value',
+            obj_graph.provide(SnapshottedFromAllModules).snapshotted_value)
+
+    def test_no_snapshot_by_default(self):
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[Foo], collect_startup_report=True)
+        self.assertNotIn('snapshot_key', self._get_phase_names(obj_graph))
+
+
+class GetSnapshotKeyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.module = types.ModuleType('some_module')
+        self.module.__file__ = os.path.join(self.temp_dir, 'some_module.py')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write_source(self, source):
+        with open(self.module.__file__, 'w') as source_file:
+            source_file.write(source)
+
+    def _get_key(self, binding_specs=(), options=None):
+        return snapshots.get_snapshot_key(
+            [self.module], [], list(binding_specs), options or {})
+
+    def test_same_inputs_yield_same_key(self):
+        self._write_source('class Foo(object): pass\n')
+        self.assertEqual(self._get_key(), self._get_key())
+
+    def test_changed_source_changes_key(self):
+        self._write_source('class Foo(object): pass\n')
+        key = self._get_key()
+        self._write_source('class Bar(object): pass\n')
+        self.assertNotEqual(key, self._get_key())
+
+    def test_changed_binding_spec_attributes_change_key(self):
+        self._write_source('')
+        self.assertNotEqual(
+            self._get_key([ParameterizedBindingSpec(1)]),
+            self._get_key([ParameterizedBindingSpec(2)]))
+
+    def test_changed_binding_spec_base_class_source_changes_key(self):
+        self._write_source('')
+        base_module = types.ModuleType('some_base_module')
+        base_module.__file__ = os.path.join(self.temp_dir,
+                                            'some_base_module.py')
+        sys.modules[base_module.__name__] = base_module
+        self.addCleanup(sys.modules.pop, base_module.__name__)
+        BaseBindingSpec = type('BaseBindingSpec', (bindings.BindingSpec,),
+                               {'__module__': base_module.__name__})
+        class SubBindingSpec(BaseBindingSpec):
+            pass
+        def WriteBaseSource(source):
+            with open(base_module.__file__, 'w') as source_file:
+                source_file.write(source)
+        WriteBaseSource('class BaseBindingSpec(BindingSpec): pass\n')
+        key = self._get_key([SubBindingSpec()])
+        WriteBaseSource('class BaseBindingSpec(BindingSpec):\n'
+                        '    def provide_foo(self): pass\n')
+        self.assertNotEqual(key, self._get_key([SubBindingSpec()]))
+
+    def test_changed_options_change_key(self):
+        self._write_source('')
+        self.assertNotEqual(self._get_key(options={'a': 1}),
+                            self._get_key(options={'a': 2}))
+
+
+if __name__ == '__main__':
+    unittest.main()
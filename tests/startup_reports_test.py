@@ -0,0 +1,106 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+
+import json
+import unittest
+
+from pinject import startup_reports
+
+
+class StartupReportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.startup_report = startup_reports.StartupReport()
+
+    def test_times_phases_in_order(self):
+        with self.startup_report.time_phase('first'):
+            pass
+        with self.startup_report.time_phase('second'):
+            pass
+        self.assertEqual(['first', 'second'],
+                         [phase.name for phase in self.startup_report.phases])
+        self.assertTrue(all(phase.wall_secs >= 0 and phase.cpu_secs >= 0
+                            for phase in self.startup_report.phases))
+
+    def test_times_phase_that_raises(self):
+        try:
+            with self.startup_report.time_phase('failing'):
+                raise ValueError()
+        except ValueError:
+            pass
+        self.assertEqual(['failing'],
+                         [phase.name for phase in self.startup_report.phases])
+
+    def test_times_module_scans_by_module_name(self):
+        with self.startup_report.time_module_scan(unittest):
+            pass
+        self.assertEqual(
+            ['unittest'],
+            list(self.startup_report.module_name_to_scan_secs.keys()))
+
+    def test_times_scans_of_modules_without_names_by_repr(self):
+        class NamelessModule(object):
+            def __repr__(self):
+                return '<nameless module>'
+        class ModuleWithOddName(object):
+            __name__ = None
+            def __repr__(self):
+                return '<module with odd name>'
+        for module in [NamelessModule(), ModuleWithOddName()]:
+            with self.startup_report.time_module_scan(module):
+                pass
+        self.assertEqual(
+            {'<nameless module>', '<module with odd name>'},
+            set(self.startup_report.module_name_to_scan_secs))
+
+    def test_names_binding_spec_times_by_class_and_step(self):
+        class SomeBindingSpec(object):
+            pass
+        with self.startup_report.time_binding_spec(
+                SomeBindingSpec(), 'configure'):
+            pass
+        self.assertEqual(
+            ['SomeBindingSpec.configure'],
+            [timing.name for timing in self.startup_report.binding_spec_times])
+
+    def test_to_dict_is_json_serializable(self):
+        with self.startup_report.time_phase('some_phase'):
+            pass
+        self.startup_report.record_counts(1, 2, 3, 4, 5)
+        report_dict = json.loads(json.dumps(self.startup_report.to_dict()))
+        self.assertEqual('some_phase', report_dict['phases'][0]['name'])
+        self.assertEqual(5, report_dict['num_collided_binding_keys'])
+
+    def test_format_mentions_phases_and_counts(self):
+        with self.startup_report.time_phase('some_phase'):
+            pass
+        self.startup_report.record_counts(1, 2, 3, 4, 5)
+        text = self.startup_report.format()
+        self.assertIn('some_phase', text)
+        self.assertIn('5 collided binding keys', text)
+
+
+class NullStartupReportTest(unittest.TestCase):
+
+    def test_records_nothing(self):
+        null_report = startup_reports.NULL_STARTUP_REPORT
+        with null_report.time_phase('unused'):
+            pass
+        with null_report.time_module_scan(unittest):
+            pass
+        null_report.record_counts(1, 2, 3, 4, 5)
+        self.assertFalse(hasattr(null_report, 'phases'))
@@ -191,3 +191,21 @@ class GetMethodArgsTest(unittest.TestCase):
 
     def test_raises_exception_if_not_method(self):
         self.assertRaises(TypeError, support.get_method_args, None)
+
+    def test_agrees_with_getfullargspec(self):
+        def positional(a, b=1):
+            pass
+        def keyword_only(a, *, b, c=2, **kwargs):
+            pass
+        def all_kinds(a, b=1, *args, c, **kwargs):
+            x = 1
+        def with_signature(a):
+            pass
+        with_signature.__signature__ = inspect.signature(lambda b, c: None)
+        for fn in [positional, keyword_only, all_kinds, with_signature,
+                   GetMethodArgsTest.test_agrees_with_getfullargspec,
+                   self.test_agrees_with_getfullargspec]:
+            spec = inspect.getfullargspec(fn)
+            self.assertEqual(
+                (spec.args, spec.varargs, spec.varkw, spec.defaults),
+                support.get_method_args(fn), fn)
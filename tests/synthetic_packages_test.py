@@ -0,0 +1,149 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmarks import synthetic_packages
+from pinject import object_graph
+
+
+class GeneratePackageTest(unittest.TestCase):
+
+    def setUp(self):
+        self.parent_dir = tempfile.mkdtemp()
+        self.generated_packages = []
+
+    def tearDown(self):
+        for generated_package in self.generated_packages:
+            generated_package.unimport_package()
+        shutil.rmtree(self.parent_dir)
+
+    def _generate(self, package_name, **kwargs):
+        generated_package = synthetic_packages.generate_package(
+            self.parent_dir, package_name,
+            synthetic_packages.PackageShape(**kwargs))
+        self.generated_packages.append(generated_package)
+        return generated_package
+
+    def _read_sources(self, package_name):
+        package_dir = os.path.join(self.parent_dir, package_name)
+        file_name_to_source = {}
+        for file_name in os.listdir(package_dir):
+            if file_name.endswith('.py'):
+                with open(os.path.join(package_dir, file_name)) as source_file:
+                    file_name_to_source[file_name] = source_file.read()
+        return file_name_to_source
+
+    def _provide_all_roots(self, generated_package,
+                           only_use_explicit_bindings=False):
+        package = generated_package.import_package()
+        obj_graph = object_graph.new_object_graph(
+            modules=package.MODULES,
+            binding_specs=[package.BINDING_SPEC_CLASS()],
+            only_use_explicit_bindings=only_use_explicit_bindings)
+        return [obj_graph.provide(root_class)
+                for root_class in package.ROOT_CLASSES]
+
+    def test_same_seed_generates_same_sources(self):
+        kwargs = {'annotate_fraction': 0.3, 'inject_fraction': 0.5,
+                  'num_provider_methods': 3, 'collision_fraction': 0.5,
+                  'seed': 7}
+        self._generate('same_seed_a', **kwargs)
+        self._generate('same_seed_b', **kwargs)
+        self.assertEqual(self._read_sources('same_seed_a'),
+                         self._read_sources('same_seed_b'))
+
+    def test_different_seeds_generate_different_sources(self):
+        self._generate('seed_one', seed=1)
+        self._generate('seed_two', seed=2)
+        self.assertNotEqual(self._read_sources('seed_one'),
+                            self._read_sources('seed_two'))
+
+    def test_writes_requested_number_of_modules_and_classes(self):
+        generated_package = self._generate(
+            'counted', num_modules=4, classes_per_module=5)
+        package = generated_package.import_package()
+        self.assertEqual(20, generated_package.num_classes)
+        self.assertEqual(4, len(package.MODULES))
+        self.assertEqual(
+            [5, 5, 5, 5],
+            [len([name for name in vars(module) if name.startswith('Service')])
+             for module in package.MODULES])
+
+    def test_dependencies_respect_fan_out_and_depth(self):
+        generated_package = self._generate(
+            'bounded', num_modules=5, classes_per_module=10, max_fan_out=2,
+            max_depth=3)
+        package = generated_package.import_package()
+        def GetDepth(obj):
+            return 1 + max([GetDepth(dependency)
+                            for dependency in obj.dependencies], default=-1)
+        roots = self._provide_all_roots(generated_package)
+        self.assertEqual(generated_package.num_root_classes,
+                         len(package.ROOT_CLASSES))
+        self.assertLessEqual(max(GetDepth(root) for root in roots), 3)
+        for module in package.MODULES:
+            for name, cls in vars(module).items():
+                if name.startswith('Service'):
+                    self.assertLessEqual(
+                        cls.__init__.__code__.co_argcount - 1, 2)
+
+    def test_mixed_package_is_providable(self):
+        generated_package = self._generate(
+            'mixed', num_modules=6, classes_per_module=8, inject_fraction=0.5,
+            annotate_fraction=0.5, num_provider_methods=4,
+            collision_fraction=1.0, seed=3)
+        self.assertEqual(generated_package.num_root_classes,
+                         len(self._provide_all_roots(generated_package)))
+
+    def test_explicit_only_package_is_providable(self):
+        generated_package = self._generate(
+            'explicit_only', num_modules=3, inject_fraction=1.0,
+            annotate_fraction=0.5)
+        self.assertEqual(
+            generated_package.num_root_classes,
+            len(self._provide_all_roots(
+                generated_package, only_use_explicit_bindings=True)))
+
+    def test_colliding_class_names_collide(self):
+        generated_package = self._generate(
+            'colliding', num_modules=4, collision_fraction=1.0)
+        package = generated_package.import_package()
+        obj_graph = object_graph.new_object_graph(
+            modules=package.MODULES,
+            binding_specs=[package.BINDING_SPEC_CLASS()],
+            collect_startup_report=True)
+        self.assertEqual(
+            generated_package.num_root_classes,
+            obj_graph.get_startup_report().num_collided_binding_keys)
+
+    def test_provider_methods_are_injected(self):
+        generated_package = self._generate(
+            'provided', num_modules=2, classes_per_module=20, max_depth=1,
+            num_provider_methods=3)
+        source = self._read_sources('provided')['binding_specs.py']
+        self.assertEqual(3, source.count('def provide_config_'))
+        self.assertTrue(any(
+            isinstance(dependency, dict)
+            for root in self._provide_all_roots(generated_package)
+            for dependency in root.dependencies))
+
+
+if __name__ == '__main__':
+    unittest.main()
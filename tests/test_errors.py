@@ -19,6 +19,7 @@ limitations under the License.
 import six
 import inspect
 import sys
+import tempfile
 import traceback
 import types
 
@@ -65,6 +66,28 @@ def print_bad_dependency_scope_error():
                             obj_graph.provide, Bar)
 
 
+def print_bad_dependency_scopes_error():
+    class Foo(object):
+        pass
+    class Bar(object):
+        def __init__(self, foo):
+            pass
+    _print_raised_exception(
+        errors.BadDependencyScopesError, object_graph.new_object_graph,
+        modules=None, classes=[Foo, Bar],
+        is_scope_usable_from_scope=lambda _1, _2: False,
+        verify_scope_usability=True)
+
+
+def print_bad_warmup_profile_error():
+    obj_graph = object_graph.new_object_graph(modules=None, classes=[])
+    with tempfile.NamedTemporaryFile('w', suffix='.json') as profile_file:
+        profile_file.write('{}')
+        profile_file.flush()
+        _print_raised_exception(errors.BadWarmupProfileError,
+                                obj_graph.warm_from_profile, profile_file.name)
+
+
 def print_configure_method_missing_args_error():
     class SomeBindingSpec(bindings.BindingSpec):
         def configure(self):
@@ -327,6 +350,19 @@ def print_too_many_args_to_inject_decorator_error():
                             do_bad_inject)
 
 
+def print_uncompilable_binding_error():
+    class SomeClass(object):
+        def __init__(self, foo):
+            pass
+    class SomeBindingSpec(bindings.BindingSpec):
+        def configure(self, bind):
+            bind('foo', to_instance=object())
+    obj_graph = object_graph.new_object_graph(
+        modules=None, classes=[SomeClass], binding_specs=[SomeBindingSpec()])
+    _print_raised_exception(errors.UncompilableBindingError,
+                            obj_graph.generate_wiring_source, [SomeClass])
+
+
 def print_unknown_scope_error():
     class SomeBindingSpec(bindings.BindingSpec):
         def configure(self, bind):
@@ -0,0 +1,99 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from pinject import object_graph
+
+
+class Foo(object):
+    pass
+
+
+class Bar(object):
+    def __init__(self, foo):
+        pass
+
+
+class SomeClass(object):
+    def __init__(self, foo, bar):
+        pass
+
+
+class TraceRecorderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[Foo, Bar, SomeClass])
+
+    def test_records_nested_begin_and_end_events(self):
+        with self.obj_graph.record_trace() as trace_recorder:
+            self.obj_graph.provide(SomeClass)
+        events = trace_recorder.get_events()
+        self.assertEqual(
+            [('B', 'foo'), ('E', 'foo'), ('B', 'bar'), ('B', 'foo'),
+             ('E', 'foo'), ('E', 'bar')],
+            [(event['ph'], event['name']) for event in events])
+        self.assertEqual([False, True, False],
+                         [event['args']['cache_hit'] for event in events
+                          if event['ph'] == 'E'])
+        self.assertEqual([1, 1, 2], [event['args']['depth'] for event in events
+                                     if event['ph'] == 'B'])
+        self.assertEqual({threading.get_ident()},
+                         {event['tid'] for event in events})
+        self.assertEqual('singleton scope', events[0]['args']['scope'])
+        timestamps = [event['ts'] for event in events]
+        self.assertEqual(sorted(timestamps), timestamps)
+
+    def test_records_only_during_with_block(self):
+        with self.obj_graph.record_trace() as trace_recorder:
+            pass
+        self.obj_graph.provide(SomeClass)
+        self.assertEqual([], trace_recorder.get_events())
+
+    def test_ends_failed_provisions(self):
+        class Failing(object):
+            def __init__(self):
+                raise ValueError()
+        class NeedsFailing(object):
+            def __init__(self, failing):
+                pass
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[Failing, NeedsFailing])
+        with obj_graph.record_trace() as trace_recorder:
+            self.assertRaises(ValueError, obj_graph.provide, NeedsFailing)
+        [begin_event, end_event] = trace_recorder.get_events()
+        self.assertEqual(('B', 'E'), (begin_event['ph'], end_event['ph']))
+        self.assertIn('ValueError', end_event['args']['error'])
+
+    def test_writes_chrome_trace_json(self):
+        with self.obj_graph.record_trace() as trace_recorder:
+            self.obj_graph.provide(SomeClass)
+        temp_dir = tempfile.mkdtemp()
+        try:
+            trace_path = os.path.join(temp_dir, 'trace.json')
+            trace_recorder.write(trace_path)
+            with open(trace_path) as trace_file:
+                trace = json.load(trace_file)
+        finally:
+            shutil.rmtree(temp_dir)
+        self.assertEqual(6, len(trace['traceEvents']))
@@ -0,0 +1,116 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import unittest
+
+from pinject import bindings
+from pinject import object_graph
+from pinject import scoping
+from pinject import validation
+
+
+class Foo(object):
+    pass
+
+
+class Outer(object):
+    class Foo(object):
+        pass
+
+
+class NeedsFoo(object):
+    def __init__(self, foo):
+        pass
+
+
+class NeedsMissing(object):
+    def __init__(self, missing):
+        pass
+
+
+class CyclicA(object):
+    def __init__(self, cyclic_b):
+        pass
+
+
+class CyclicB(object):
+    def __init__(self, cyclic_a):
+        pass
+
+
+class Leaf(object):
+    pass
+
+
+class Fine(object):
+    def __init__(self, leaf, provide_fine):
+        pass
+
+
+class PrototypeBindingSpec(bindings.BindingSpec):
+
+    def configure(self, bind):
+        bind('leaf', to_class=Leaf, in_scope=scoping.PROTOTYPE)
+
+
+def _get_kinds(problems):
+    return sorted(problem.kind for problem in problems)
+
+
+class ValidateTest(unittest.TestCase):
+
+    def _new_obj_graph(self, classes, binding_specs=(), **kwargs):
+        return object_graph.new_object_graph(
+            modules=None, classes=classes, binding_specs=list(binding_specs),
+            **kwargs)
+
+    def test_finds_nothing_wrong_with_valid_graph(self):
+        self.assertEqual(
+            [], self._new_obj_graph([Leaf, Fine]).validate())
+
+    def test_finds_unbound_and_ambiguous_args(self):
+        problems = self._new_obj_graph(
+            [Foo, Outer.Foo, NeedsFoo, NeedsMissing]).validate()
+        self.assertEqual([validation.AMBIGUOUS_ARG, validation.UNBOUND_ARG],
+                         _get_kinds(problems))
+        self.assertTrue(any('"missing"' in problem.message
+                            for problem in problems))
+
+    def test_finds_cycles(self):
+        [problem] = self._new_obj_graph([CyclicA, CyclicB]).validate()
+        self.assertEqual(validation.CYCLE, problem.kind)
+        self.assertIn('CyclicA', problem.message)
+        self.assertIn('CyclicB', problem.message)
+
+    def test_finds_bad_scopes(self):
+        obj_graph = self._new_obj_graph(
+            [Fine], [PrototypeBindingSpec()],
+            is_scope_usable_from_scope=(
+                lambda to_scope_id, from_scope_id:
+                not (to_scope_id is scoping.PROTOTYPE and
+                     from_scope_id is scoping.SINGLETON)))
+        problems = obj_graph.validate()
+        self.assertEqual([validation.BAD_SCOPE], _get_kinds(problems))
+        self.assertEqual('bad_scope', problems[0].to_dict()['kind'])
+
+    def test_checks_only_what_roots_need(self):
+        obj_graph = self._new_obj_graph([Leaf, Fine, NeedsMissing])
+        self.assertEqual([], obj_graph.validate([Fine]))
+        self.assertEqual([validation.UNBOUND_ARG],
+                         _get_kinds(obj_graph.validate([NeedsMissing])))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from pinject import bindings
+from pinject import binding_keys
+from pinject import decorators
+from pinject import errors
+from pinject import object_graph
+from pinject import scoping
+
+
+_constructed = []
+
+
+class Foo(object):
+    def __init__(self):
+        _constructed.append('foo')
+
+
+class Bar(object):
+    def __init__(self, foo):
+        _constructed.append('bar')
+
+
+class SomeClass(object):
+    def __init__(self, foo, bar):
+        pass
+
+
+class WarmupProfileTest(unittest.TestCase):
+
+    def setUp(self):
+        del _constructed[:]
+        self.temp_dir = tempfile.mkdtemp()
+        self.profile_path = os.path.join(self.temp_dir, 'profile.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _new_obj_graph(self, classes=(Foo, Bar, SomeClass)):
+        return object_graph.new_object_graph(modules=None, classes=classes)
+
+    def _record_profile(self):
+        obj_graph = self._new_obj_graph()
+        with obj_graph.record_warmup_profile() as profile_recorder:
+            obj_graph.provide(SomeClass)
+        profile_recorder.write(self.profile_path)
+        del _constructed[:]
+        return profile_recorder
+
+    def test_records_singletons_in_construction_order(self):
+        profile_recorder = self._record_profile()
+        self.assertEqual(
+            [binding_keys.new('foo'), binding_keys.new('bar')],
+            profile_recorder.get_binding_keys())
+
+    def test_does_not_record_prototypes(self):
+        class SomeBindingSpec(bindings.BindingSpec):
+            def configure(self, bind):
+                bind('foo', to_class=Foo, in_scope=scoping.PROTOTYPE)
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[Bar, SomeClass],
+            binding_specs=[SomeBindingSpec()])
+        with obj_graph.record_warmup_profile() as profile_recorder:
+            obj_graph.provide(SomeClass)
+        self.assertEqual([binding_keys.new('bar')],
+                         profile_recorder.get_binding_keys())
+
+    def test_records_only_during_with_block(self):
+        obj_graph = self._new_obj_graph()
+        with obj_graph.record_warmup_profile() as profile_recorder:
+            pass
+        obj_graph.provide(SomeClass)
+        self.assertEqual([], profile_recorder.get_binding_keys())
+
+    def test_writes_json(self):
+        self._record_profile()
+        with open(self.profile_path) as profile_file:
+            profile = json.load(profile_file)
+        self.assertEqual(['foo', 'bar'], [entry['name']
+                                          for entry in profile['bindings']])
+
+    def test_warms_singletons_in_recorded_order(self):
+        self._record_profile()
+        obj_graph = self._new_obj_graph()
+        obj_graph.warm_from_profile(self.profile_path)
+        self.assertEqual(['foo', 'bar'], _constructed)
+        obj_graph.provide(SomeClass)
+        self.assertEqual(['foo', 'bar'], _constructed)
+
+    def test_warms_annotated_singletons(self):
+        class SomeBindingSpec(bindings.BindingSpec):
+            def configure(self, bind):
+                bind('foo', annotated_with='annot', to_class=Foo)
+        class NeedsAnnotatedFoo(object):
+            @decorators.annotate_arg('foo', 'annot')
+            def __init__(self, foo):
+                pass
+        def NewObjGraph():
+            return object_graph.new_object_graph(
+                modules=None, classes=[NeedsAnnotatedFoo],
+                binding_specs=[SomeBindingSpec()])
+        obj_graph = NewObjGraph()
+        with obj_graph.record_warmup_profile() as profile_recorder:
+            obj_graph.provide(NeedsAnnotatedFoo)
+        self.assertEqual([binding_keys.new('foo', 'annot')],
+                         profile_recorder.get_binding_keys())
+        profile_recorder.write(self.profile_path)
+        del _constructed[:]
+        NewObjGraph().warm_from_profile(self.profile_path)
+        self.assertEqual(['foo'], _constructed)
+
+    def test_skips_bindings_no_longer_bound(self):
+        self._record_profile()
+        obj_graph = self._new_obj_graph(classes=[Foo])
+        obj_graph.warm_from_profile(self.profile_path)
+        self.assertEqual(['foo'], _constructed)
+
+    def test_warms_in_background(self):
+        self._record_profile()
+        obj_graph = self._new_obj_graph()
+        thread = obj_graph.warm_from_profile(self.profile_path,
+                                             in_background=True)
+        thread.join()
+        self.assertTrue(thread.daemon)
+        self.assertEqual(['foo', 'bar'], _constructed)
+
+    def test_returns_none_when_warming_in_foreground(self):
+        self._record_profile()
+        self.assertIsNone(
+            self._new_obj_graph().warm_from_profile(self.profile_path))
+
+    def test_raises_error_for_non_profile(self):
+        with open(self.profile_path, 'w') as profile_file:
+            profile_file.write('not json')
+        self.assertRaises(errors.BadWarmupProfileError,
+                          self._new_obj_graph().warm_from_profile,
+                          self.profile_path)